@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+alias_ipd.py - keep the alias IP (INSTALL_IP_ADDR) on a CN with one long-lived, event-driven process.
+
+Replaces ip_alias_check.sh (an `ip monitor` subshell plus a loop forking ip/awk/cut/grep every WATCH
+seconds) and the per-stage ssh probes. `run` listens on an rtnetlink socket (stdlib only; no
+pyroute2, no subprocesses):
+  RTM_DELADDR of the alias      -> re-added at once through the same socket (ms, see restore_ms)
+  RTM_NEWLINK (iface back up)   -> re-added if missing
+  ENOBUFS (events dropped)      -> one address dump to resync
+Nothing runs periodically; only a failed restore is retried (1s, 2s, 4s ... 30s) until it sticks.
+Interfaces tried: --iface, then the default-route iface, then physical NICs (as alias_ip.sh).
+Log: --log (/var/log/alias_ipd.log), rotated at 1 MB x 3, and a repeating message is written at most
+5 times a minute (the rest counted). Status: a unix socket (--socket, /run/alias_ipd.sock) answering
+`status` / `stop` with one JSON line; `status` is the client.
+
+On the CN (root):
+  alias_ipd.py run 10.10.10.20/24 [--iface ens3]     # stays in the foreground
+  alias_ipd.py status [--wait 5]                     # exit 0 present, 1 absent, 3 no daemon
+  alias_ipd.py stop
+From Jenkins (ALIAS_ENGINE=daemon): installs/updates /usr/local/sbin/alias_ipd.py, (re)starts it when
+the CIDR or the script changed and prints each CN's status, one ssh per CN, CNs in parallel:
+  python3 scripts/alias_ipd.py ensure --cidr 10.10.10.20/24 --key ~/.ssh/jenkins_key \\
+      [--server-file server_pci_map.txt | --host 10.0.0.1 ...]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import errno
+import shlex
+import socket
+import struct
+import select
+import logging
+import argparse
+import ipaddress
+import subprocess
+import logging.handlers
+from concurrent.futures import ThreadPoolExecutor
+
+SOCKET = "/run/alias_ipd.sock"
+LOG = "/var/log/alias_ipd.log"
+DEST = "/usr/local/sbin/alias_ipd.py"
+SSH_OPTS = ["-o", "StrictHostKeyChecking=no"]
+
+# rtnetlink (linux/netlink.h, linux/rtnetlink.h, linux/if_addr.h)
+NETLINK_ROUTE = 0
+RTMGRP_LINK, RTMGRP_IPV4_IFADDR = 0x1, 0x10
+RTM_NEWLINK, RTM_DELLINK, RTM_NEWADDR, RTM_DELADDR, RTM_GETADDR = 16, 17, 20, 21, 22
+NLMSG_ERROR, NLMSG_DONE = 2, 3
+NLM_F_REQUEST, NLM_F_ACK, NLM_F_DUMP = 0x1, 0x4, 0x300
+NLM_F_REPLACE, NLM_F_CREATE = 0x100, 0x400
+IFA_ADDRESS, IFA_LOCAL = 1, 2
+IFF_UP = 0x1
+NLMSG = struct.Struct("=IHHII")
+IFADDR = struct.Struct("=BBBBI")
+IFINFO = struct.Struct("=BxHiII")
+RTA = struct.Struct("=HH")
+
+PHYS = re.compile(r"^(en|eth|ens|eno|em|bond|br)")
+VIRT = re.compile(r"(^lo$|docker|podman|cni|flannel|cilium|calico|weave|veth|tun|tap|virbr|wg)")
+
+
+def _align(n):
+    return (n + 3) & ~3
+
+
+def parse(buf):
+    """Yield (type, flags, seq, payload) for each netlink message in buf."""
+    off = 0
+    while off + NLMSG.size <= len(buf):
+        length, mtype, flags, seq, _ = NLMSG.unpack_from(buf, off)
+        if length < NLMSG.size:
+            break
+        yield mtype, flags, seq, buf[off + NLMSG.size:off + length]
+        off += _align(length)
+
+
+def attrs(payload, off):
+    out = {}
+    while off + RTA.size <= len(payload):
+        length, atype = RTA.unpack_from(payload, off)
+        if length < RTA.size:
+            break
+        out[atype] = payload[off + RTA.size:off + length]
+        off += _align(length)
+    return out
+
+
+class Netlink:
+    """Requests (dump / add / link up) on one socket; events on another, bound to the groups."""
+
+    def __init__(self):
+        self.req = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+        self.req.bind((0, 0))
+        self.events = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+        self.events.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.events.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR))
+        self.seq = int(time.time())
+
+    def _send(self, mtype, flags, body):
+        self.seq += 1
+        self.req.send(NLMSG.pack(NLMSG.size + len(body), mtype, flags, self.seq, 0) + body)
+        return self.seq
+
+    def _ack(self, seq):
+        """0 or the negative errno of the request's NLMSG_ERROR."""
+        while True:
+            for mtype, _, s, payload in parse(self.req.recv(65536)):
+                if s == seq and mtype == NLMSG_ERROR:
+                    return struct.unpack_from("=i", payload)[0]
+
+    def addresses(self):
+        """{ip: ifindex} of every IPv4 address."""
+        seq = self._send(RTM_GETADDR, NLM_F_REQUEST | NLM_F_DUMP, IFADDR.pack(socket.AF_INET, 0, 0, 0, 0))
+        out = {}
+        while True:
+            for mtype, _, s, payload in parse(self.req.recv(65536)):
+                if s != seq:
+                    continue
+                if mtype in (NLMSG_DONE, NLMSG_ERROR):
+                    return out
+                ip, index = addr_event(payload)
+                if ip:
+                    out[ip] = index
+
+    def link_up(self, index):
+        body = IFINFO.pack(socket.AF_UNSPEC, 0, index, IFF_UP, IFF_UP)
+        return self._ack(self._send(RTM_NEWLINK, NLM_F_REQUEST | NLM_F_ACK, body))
+
+    def add(self, iface_index, ip, prefixlen):
+        """`ip addr replace <ip>/<prefixlen> dev <iface>`; returns 0 or -errno."""
+        packed = socket.inet_aton(ip)
+        body = IFADDR.pack(socket.AF_INET, prefixlen, 0, 0, iface_index)
+        for atype in (IFA_LOCAL, IFA_ADDRESS):
+            body += RTA.pack(RTA.size + 4, atype) + packed
+        return self._ack(self._send(RTM_NEWADDR, NLM_F_REQUEST | NLM_F_ACK | NLM_F_CREATE | NLM_F_REPLACE, body))
+
+
+def addr_event(payload):
+    """(ip, ifindex) of an RTM_NEWADDR / RTM_DELADDR payload ('' if not IPv4)."""
+    family, _, _, _, index = IFADDR.unpack_from(payload)
+    if family != socket.AF_INET:
+        return "", index
+    a = attrs(payload, IFADDR.size)
+    raw = a.get(IFA_LOCAL) or a.get(IFA_ADDRESS)
+    return (socket.inet_ntoa(raw[:4]) if raw else ""), index
+
+
+def candidates(pinned):
+    """--iface, the default-route iface (/proc/net/route), then physical NICs; no subprocesses."""
+    out = [pinned] if pinned else []
+    try:
+        with open("/proc/net/route") as fh:
+            for line in fh.readlines()[1:]:
+                f = line.split()
+                if len(f) > 3 and f[1] == "00000000" and int(f[3], 16) & 1:
+                    out.append(f[0])
+                    break
+    except OSError:
+        pass
+    out += sorted(name for _, name in socket.if_nameindex() if PHYS.match(name) and not VIRT.search(name))
+    seen = []
+    for name in out:
+        if name not in seen:
+            seen.append(name)
+    return seen
+
+
+class RateLimit(logging.Filter):
+    """At most `burst` records per message template per `window` seconds; the rest are counted."""
+
+    def __init__(self, burst=5, window=60.0):
+        super().__init__()
+        self.burst, self.window, self.seen = burst, window, {}
+
+    def filter(self, record):
+        now, key = time.time(), record.msg
+        start, count, dropped = self.seen.get(key, (now, 0, 0))
+        if now - start >= self.window:
+            if dropped:
+                record.msg = f"{record.msg} ({dropped} similar suppressed)"
+            start, count, dropped = now, 0, 0
+        if count >= self.burst:
+            self.seen[key] = (start, count, dropped + 1)
+            return False
+        self.seen[key] = (start, count + 1, dropped)
+        return True
+
+
+def make_logger(path):
+    log = logging.getLogger("alias_ipd")
+    log.setLevel(logging.INFO)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    h = logging.handlers.RotatingFileHandler(path, maxBytes=1 << 20, backupCount=3)
+    h.setFormatter(logging.Formatter("[%(asctime)s] [alias_ipd] %(message)s", "%Y-%m-%d %H:%M:%S"))
+    h.addFilter(RateLimit())
+    log.addHandler(h)
+    return log
+
+
+class Daemon:
+    def __init__(self, cidr, iface, log, sock_path):
+        net = ipaddress.ip_interface(cidr)
+        self.cidr, self.ip, self.prefixlen = cidr, str(net.ip), net.network.prefixlen
+        self.pinned, self.log, self.sock_path = iface, log, sock_path
+        self.nl = Netlink()
+        self.present, self.iface = False, ""
+        self.removed_at = 0.0
+        self.retry_at, self.backoff = 0.0, 1.0
+        self.stats = {"started": time.time(), "events": 0, "restores": 0, "restore_ms": None,
+                      "errors": 0, "last_error": "", "resyncs": 0}
+
+    def status(self):
+        return {"cidr": self.cidr, "ip": self.ip, "present": self.present, "iface": self.iface, "pid": os.getpid(),
+                "uptime": round(time.time() - self.stats["started"], 1), **self.stats}
+
+    def resync(self):
+        found = self.nl.addresses()
+        self.present = self.ip in found
+        self.iface = socket.if_indextoname(found[self.ip]) if self.present else ""
+        if not self.present:
+            self.restore("missing at resync")
+
+    def restore(self, why):
+        t0 = time.time()
+        err = "no usable interface"
+        for name in candidates(self.pinned):
+            try:
+                index = socket.if_nametoindex(name)
+            except OSError:
+                continue
+            self.nl.link_up(index)
+            rc = self.nl.add(index, self.ip, self.prefixlen)
+            if rc == 0:
+                self.present, self.iface = True, name
+                ms = round((time.time() - (self.removed_at or t0)) * 1000, 1)
+                self.stats["restores"] += 1
+                self.stats["restore_ms"] = ms
+                self.retry_at, self.backoff = 0.0, 1.0
+                self.log.info(f"restored {self.cidr} on {name} ({why}; {ms} ms after removal)")
+                return True
+            err = f"{name}: {os.strerror(-rc)}"
+        self.stats["errors"] += 1
+        self.stats["last_error"] = err
+        self.retry_at = time.time() + self.backoff
+        self.backoff = min(self.backoff * 2, 30.0)
+        self.log.info(f"restore of {self.cidr} failed ({why}): {err}")
+        return False
+
+    def on_events(self):
+        try:
+            buf = self.nl.events.recv(65536)
+        except OSError as e:
+            if e.errno == errno.ENOBUFS:
+                self.stats["resyncs"] += 1
+                self.log.info("netlink overrun; resyncing")
+                self.resync()
+                return
+            raise
+        for mtype, _, _, payload in parse(buf):
+            self.stats["events"] += 1
+            if mtype in (RTM_NEWADDR, RTM_DELADDR):
+                ip, index = addr_event(payload)
+                if ip != self.ip:
+                    continue
+                if mtype == RTM_DELADDR:
+                    self.present, self.removed_at = False, time.time()
+                    self.log.info(f"{self.cidr} removed from index {index}")
+                    self.restore("removed")
+                    self.removed_at = 0.0
+                else:
+                    self.present = True
+                    try:
+                        self.iface = socket.if_indextoname(index)
+                    except OSError:
+                        self.iface = str(index)
+            elif mtype == RTM_NEWLINK and not self.present:
+                _, _, _, flags, _ = IFINFO.unpack_from(payload)
+                if flags & IFF_UP:
+                    self.restore("link up")
+
+    def on_client(self, conn):
+        conn.settimeout(2)
+        try:
+            cmd = conn.recv(64).decode(errors="replace").strip() or "status"
+            conn.sendall((json.dumps(self.status(), sort_keys=True) + "\n").encode())
+        except OSError:
+            return False
+        finally:
+            conn.close()
+        return cmd == "stop"
+
+    def serve(self):
+        if os.path.exists(self.sock_path):
+            os.unlink(self.sock_path)
+        srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        srv.bind(self.sock_path)
+        os.chmod(self.sock_path, 0o600)
+        srv.listen(8)
+        self.log.info(f"watching {self.cidr} (pid {os.getpid()}{', iface ' + self.pinned if self.pinned else ''})")
+        self.resync()
+        try:
+            while True:
+                timeout = max(0.0, self.retry_at - time.time()) if self.retry_at else None
+                ready, _, _ = select.select([self.nl.events, srv], [], [], timeout)
+                if self.nl.events in ready:
+                    self.on_events()
+                if srv in ready:
+                    conn, _ = srv.accept()
+                    if self.on_client(conn):
+                        self.log.info("stop requested")
+                        return 0
+                if self.retry_at and time.time() >= self.retry_at and not self.present:
+                    self.restore("retry")
+        finally:
+            srv.close()
+            if os.path.exists(self.sock_path):
+                os.unlink(self.sock_path)
+
+
+def ask(sock_path, cmd="status"):
+    """The daemon's status dict, or None when nothing is listening."""
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.settimeout(2)
+    try:
+        s.connect(sock_path)
+        s.sendall(cmd.encode() + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        return json.loads(data.decode())
+    except (OSError, ValueError):
+        return None
+    finally:
+        s.close()
+
+
+# ---------- Jenkins side ----------
+
+# Runs on the CN with this file on stdin: install/update it, (re)start the daemon if the CIDR or the
+# script changed, then print its status (waiting up to 5 s for the alias)
+ENSURE_SCRIPT = r'''
+set -euo pipefail
+CIDR="$1"; IFACE="$2"; DEST="$3"
+tmp="$(mktemp)"; cat > "$tmp"
+fresh=""
+cmp -s "$tmp" "$DEST" 2>/dev/null || { install -D -m 755 "$tmp" "$DEST"; fresh=1; }
+rm -f "$tmp"
+st="$(python3 "$DEST" status 2>/dev/null || true)"
+if [[ -n "$fresh" || "$st" != *"\"cidr\": \"$CIDR\""* ]]; then
+  python3 "$DEST" stop >/dev/null 2>&1 || true
+  setsid nohup python3 "$DEST" run "$CIDR" ${IFACE:+--iface "$IFACE"} </dev/null >/dev/null 2>&1 &
+fi
+python3 "$DEST" status --wait 5
+'''
+
+
+def ensure_host(ip, args):
+    import ssh_pool  # agent-side helpers are imported here: the copy on the CN runs standalone
+    remote = "bash -c " + " ".join(shlex.quote(a) for a in (ENSURE_SCRIPT, "_", args.cidr, args.iface, DEST))
+    ssh_pool.record("alias_ipd.py", ip, args.user)
+    with open(os.path.abspath(__file__), "rb") as fh:
+        r = subprocess.run(["ssh", *ssh_pool.ssh_opts(), *SSH_OPTS, "-i", args.key, f"{args.user}@{ip}", remote],
+                           stdin=fh, capture_output=True)
+    try:
+        st = json.loads(r.stdout.decode().strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        return 1, f"[alias-ipd][{ip}] ❌ no status (rc={r.returncode}) {r.stderr.decode(errors='replace').strip()[-200:]}"
+    if "running" in st:
+        return 1, f"[alias-ipd][{ip}] ❌ daemon not running (see /var/log/alias_ipd.log)"
+    if not st.get("present"):
+        return 1, f"[alias-ipd][{ip}] ❌ {st.get('cidr')} absent: {st.get('last_error') or 'unknown'} (pid {st.get('pid')})"
+    last = f", last restore {st['restore_ms']} ms" if st.get("restore_ms") is not None else ""
+    return 0, (f"[alias-ipd][{ip}] ✅ {st['cidr']} on {st['iface']} (pid {st['pid']}, up {st['uptime']}s, "
+               f"{st['restores']} restore(s){last})")
+
+
+def ensure(args):
+    import inventory
+    import perf_trace
+    hosts = list(args.host)
+    if not hosts:
+        try:
+            hosts = inventory.ips(args.server_file)
+        except (OSError, inventory.InventoryError) as e:
+            print(f"[alias-ipd] ❌ {args.server_file}: {e}", flush=True)
+            return 2
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, len(hosts))) as pool:
+        results = list(pool.map(lambda ip: ensure_host(ip, args), hosts))
+    for _, line in results:
+        print(line, flush=True)
+    perf_trace.record("alias ensure", t0, rc=max(rc for rc, _ in results))
+    return max(rc for rc, _ in results)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Event-driven alias IP keeper")
+    sub = ap.add_subparsers(dest="cmd")
+    sub.required = True
+    r = sub.add_parser("run")
+    r.add_argument("cidr", nargs="?", default=os.environ.get("INSTALL_IP_ADDR", ""))
+    r.add_argument("--iface", default=os.environ.get("IFACE", ""))
+    r.add_argument("--log", default=LOG)
+    r.add_argument("--socket", default=SOCKET)
+    s = sub.add_parser("status")
+    s.add_argument("--socket", default=SOCKET)
+    s.add_argument("--wait", type=float, default=0, help="seconds to wait for the alias to be present")
+    p = sub.add_parser("stop")
+    p.add_argument("--socket", default=SOCKET)
+    e = sub.add_parser("ensure")
+    e.add_argument("--cidr", default=os.environ.get("INSTALL_IP_ADDR", ""))
+    e.add_argument("--iface", default=os.environ.get("INSTALL_IP_IFACE", ""))
+    e.add_argument("--server-file", default=os.environ.get("SERVER_FILE", "server_pci_map.txt"))
+    e.add_argument("--host", action="append", default=[], help="CN ip (repeatable; default: every CN of --server-file)")
+    e.add_argument("--user", default="root")
+    e.add_argument("--key", default=os.environ.get("SSH_KEY", ""))
+    args = ap.parse_args()
+
+    if args.cmd == "run":
+        try:
+            ipaddress.ip_interface(args.cidr)
+        except ValueError:
+            print(f"[alias_ipd] ❌ invalid CIDR '{args.cidr}'", flush=True)
+            return 2
+        other = ask(args.socket)
+        if other:
+            print(f"[alias_ipd] already running (pid {other['pid']}, {other['cidr']})", flush=True)
+            return 0 if other["cidr"] == args.cidr else 1
+        return Daemon(args.cidr, args.iface, make_logger(args.log), args.socket).serve()
+    if args.cmd == "ensure":
+        if "/" not in args.cidr:
+            print(f"[alias-ipd] ❌ invalid CIDR '{args.cidr}'", flush=True)
+            return 2
+        return ensure(args)
+    if args.cmd == "stop":
+        st = ask(args.socket, "stop")
+        return 0 if st else 3
+    deadline = time.time() + args.wait
+    while True:
+        st = ask(args.socket)
+        if (st and st["present"]) or time.time() >= deadline:
+            break
+        time.sleep(0.1)
+    if st is None:
+        print(json.dumps({"running": False}), flush=True)
+        return 3
+    print(json.dumps(st, sort_keys=True), flush=True)
+    return 0 if st["present"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
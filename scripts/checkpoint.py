@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+checkpoint.py - per-host record of completed pipeline stages, so a failed run resumes where it stopped.
+
+A run is keyed by the parsed inventory (FIELDS of every server line), NEW_VERSION and an input hash
+(NEW_BUILD_PATH, K8S_VER, KSPRAY_DIR, DEPLOYMENT_TYPE; script defaults applied). Each key is one JSON
+file under CHECKPOINT_DIR (flock'd, atomically replaced): host -> stage -> when / which build.
+
+Stages, per host (ems is recorded on the EMS target only):
+  reset      cluster_reset.sh uninstall finished (a k8s record never skips a reset)
+  fetched    build tarballs staged on the CN (fetch_build.sh / fetch_engine.py)
+  extracted  TRILLIUM tree prepared for the installer (cluster_install.sh prep)
+  k8s        install_k8s.sh verified (cluster_install.sh)
+  nf         NF values patched (nf_config.sh)
+  ps, cs     platform / common services installed (ps_config.sh, cs_config.sh)
+  ems        EMS pods healthy (ems_install_and_check.sh)
+Recording a stage drops the stages built on that host (DOWNSTREAM): a re-installed k8s voids its
+nf/ps/cs/ems records.
+
+A record alone is not proof: before a stage is reported complete, one ssh per host checks that the
+work is still there (PROBES), so a re-imaged CN or a hand-run `kubeadm reset` is redone, not skipped.
+k8s (and ps/cs/ems, which need it) want every `kubectl get nodes` node Ready; fetched / extracted
+want the file recorded with `done --proof` (staged tarball or manifest, extraction stamp). A host
+whose probe fails has that stage and its downstream dropped. CHECKPOINT_VERIFY=0 trusts the records.
+
+Nothing is skipped or written unless CHECKPOINT_DIR is set (off by default in the Jenkinsfile). The
+records only resume a failed build: a successful one drops them (`forget` in the Jenkinsfile's post),
+so the next build with the same key runs every stage again. CHECKPOINT_FORCE=1 (or --force) makes
+every check report "not complete", so the whole pipeline runs again and re-records.
+
+pipeline_dag.py runs each task on a one-line server file; it exports CHECKPOINT_SERVER_FILE so every
+task still derives the key from the full inventory.
+
+Usage (bash scripts use scripts/checkpoint.sh):
+  python3 scripts/checkpoint.py check k8s --host 10.0.0.1      # exit 0 = complete, skip it
+  python3 scripts/checkpoint.py done k8s --host 10.0.0.1       # after the work succeeded
+  python3 scripts/checkpoint.py done fetched --host 10.0.0.1 --proof /home/labadmin/6.3.0/EA3/T.tar.gz
+  python3 scripts/checkpoint.py pending fetched                # hosts still to do, one per line
+  python3 scripts/checkpoint.py show                           # table for the current key
+  python3 scripts/checkpoint.py forget [--stage k8s] [--host IP]
+Python scripts: store = checkpoint.open_store(server_file); store.pending(...) / store.done(...).
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import shlex
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import inventory
+import ssh_pool
+
+STAGES = ("reset", "fetched", "extracted", "k8s", "nf", "ps", "cs", "ems")
+DOWNSTREAM = {
+    "reset": ("k8s", "nf", "ps", "cs", "ems"),
+    "fetched": ("extracted", "k8s", "nf", "ps", "cs", "ems"),
+    "extracted": ("k8s", "nf", "ps", "cs", "ems"),
+    "k8s": ("nf", "ps", "cs", "ems"),
+    "nf": ("ps", "cs", "ems"),
+    "ps": ("cs", "ems"),
+    "cs": ("ems",),
+    "ems": (),
+}
+# stage -> remote check that its work is still in place ({proof}: the path recorded with the stage)
+K8S_READY = ("export PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/bin; "
+             "kubectl get nodes --no-headers 2>/dev/null | "
+             "awk '{n++} $2 !~ /^Ready/ {bad=1} END {exit (n && !bad) ? 0 : 1}'")
+PROOF_EXISTS = 'for f in {proof}; do [ -e "$f" ] && exit 0; done; exit 1'
+PROBES = {"fetched": PROOF_EXISTS, "extracted": PROOF_EXISTS,
+          "k8s": K8S_READY, "ps": K8S_READY, "cs": K8S_READY, "ems": K8S_READY}
+
+# input -> (default, normaliser); defaults mirror the scripts so every stage derives the same key
+INPUTS = {
+    "NEW_BUILD_PATH": ("", lambda v: v.rstrip("/")),
+    "K8S_VER": ("1.31.4", str),
+    "KSPRAY_DIR": ("kubespray-2.27.0", str),
+    "DEPLOYMENT_TYPE": ("", str.lower),
+}
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def forced():
+    return os.environ.get("CHECKPOINT_FORCE", "").lower() in ("1", "true", "yes", "y")
+
+
+def glob_quote(path):
+    """Shell-quote a path but keep its glob characters live."""
+    return "".join(c if c in "*?[]" else shlex.quote(c) if not (c.isalnum() or c in "/._-") else c for c in path)
+
+
+def probe(stage, host, rec):
+    """True when the remote check of <stage> passes on <host> (stages without a check always pass)."""
+    template = PROBES.get(stage)
+    if template is None or os.environ.get("CHECKPOINT_VERIFY", "1") == "0":
+        return True
+    if "{proof}" in template:
+        if not rec.get("proof"):
+            return False
+        template = template.replace("{proof}", glob_quote(rec["proof"]))
+    key = os.environ.get("CN_SSH_KEY") or os.environ.get("SSH_KEY", "")
+    argv = ["ssh", *ssh_pool.ssh_opts(), "-o", "StrictHostKeyChecking=no", "-o", "BatchMode=yes",
+            "-o", "ConnectTimeout=10", *(["-i", key] if key else []),
+            f"{os.environ.get('HOST_USER', 'root')}@{host}", template]
+    try:
+        return subprocess.run(argv, stdin=subprocess.DEVNULL, capture_output=True, timeout=60).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def run_key(server_file, env=None):
+    """(key, description) of this inventory + NEW_VERSION + inputs."""
+    env = os.environ if env is None else env
+    servers = [{f: s[f] for f in inventory.FIELDS} for s in inventory.servers(server_file)]
+    inputs = {k: norm(env.get(k) or default) for k, (default, norm) in INPUTS.items()}
+    desc = {"version": env.get("NEW_VERSION", ""), "inputs": inputs,
+            "inventory": hashlib.sha256(json.dumps(servers, sort_keys=True).encode()).hexdigest()[:16],
+            "hosts": [s["ip"] for s in servers]}
+    key = hashlib.sha256(json.dumps({k: desc[k] for k in ("version", "inputs", "inventory")},
+                                    sort_keys=True).encode()).hexdigest()[:16]
+    return key, desc
+
+
+class Store:
+    def __init__(self, directory, server_file, env=None):
+        self.key, self.desc = run_key(server_file, env)
+        self.hosts = self.desc["hosts"]
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{self.key}.json")
+        self.lock_path = self.path + ".lock"
+
+    def _read(self):
+        try:
+            with open(self.path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {**self.desc, "key": self.key, "done": {}}
+
+    def _update(self, fn):
+        with open(self.lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            data = self._read()
+            fn(data["done"])
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as fh:
+                json.dump(data, fh, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+
+    def record(self, stage, host):
+        """The completion record of <stage> on <host>, or None."""
+        return self._read()["done"].get(host, {}).get(stage)
+
+    def pending(self, stage, hosts=None, verify=True):
+        """Hosts where <stage> is not proven complete: no record, or (verify) its probe fails there."""
+        hosts = hosts or self.hosts
+        if forced():
+            return list(hosts)
+        done = self._read()["done"]
+        recorded = [h for h in hosts if stage in done.get(h, {})]
+        stale = []
+        if verify and recorded:
+            with ThreadPoolExecutor(max_workers=min(16, len(recorded))) as pool:
+                ok = list(pool.map(lambda h: probe(stage, h, done[h][stage]), recorded))
+            stale = [h for h, good in zip(recorded, ok) if not good]
+            for h in stale:
+                log(f"[checkpoint] ⚠️  {stage} is recorded on {h} but its check failed there; redoing it")
+            if stale:
+                self.forget(stage, stale)
+        return [h for h in hosts if h not in recorded or h in stale]
+
+    def done(self, stage, hosts=None, proof=None):
+        hosts = hosts or self.hosts
+        rec = {"at": time.strftime("%Y-%m-%dT%H:%M:%S"), "build": os.environ.get("BUILD_NUMBER", ""),
+               "by": os.environ.get("TRACE_STAGE", "")}
+        if proof:
+            rec["proof"] = proof
+
+        def put(done):
+            for h in hosts:
+                for later in DOWNSTREAM[stage]:
+                    done.get(h, {}).pop(later, None)
+                done.setdefault(h, {})[stage] = rec
+        self._update(put)
+
+    def forget(self, stage=None, hosts=None):
+        hosts = hosts or self.hosts
+
+        def drop(done):
+            for h in hosts:
+                if stage is None:
+                    done.pop(h, None)
+                    continue
+                for s in (stage,) + DOWNSTREAM[stage]:
+                    done.get(h, {}).pop(s, None)
+        self._update(drop)
+
+    def show(self):
+        done = self._read()["done"]
+        d = self.desc
+        print(f"checkpoint {self.key}  version={d['version']}  build_path={d['inputs']['NEW_BUILD_PATH']}  "
+              f"k8s={d['inputs']['K8S_VER']}  type={d['inputs']['DEPLOYMENT_TYPE'] or '-'}")
+        print(f"{'HOST':<16}" + "".join(f"{s:>10}" for s in STAGES))
+        for h in self.hosts:
+            cells = []
+            for s in STAGES:
+                rec = done.get(h, {}).get(s)
+                cells.append(f"{('#' + rec['build']) if rec and rec['build'] else ('✓' if rec else '-'):>10}")
+            print(f"{h:<16}" + "".join(cells))
+
+
+def open_store(server_file):
+    """Store for this run, or None when checkpoints are off (CHECKPOINT_DIR unset)."""
+    directory = os.environ.get("CHECKPOINT_DIR", "")
+    return Store(directory, server_file) if directory else None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-host pipeline stage checkpoints")
+    ap.add_argument("cmd", choices=("check", "done", "pending", "show", "forget"))
+    ap.add_argument("stage", nargs="?", choices=STAGES)
+    ap.add_argument("--stage", dest="stage_opt", choices=STAGES, help="(forget) stage to drop with its downstream")
+    ap.add_argument("--host", action="append", default=[], help="host ip (repeatable; default: every host)")
+    ap.add_argument("--server-file", default=os.environ.get("CHECKPOINT_SERVER_FILE")
+                    or os.environ.get("SERVER_FILE", "server_pci_map.txt"))
+    ap.add_argument("--proof", default="", help="(done) remote path, glob allowed, that shows the work is still there")
+    ap.add_argument("--force", action="store_true", help="report every stage as not complete")
+    args = ap.parse_args()
+    if args.force:
+        os.environ["CHECKPOINT_FORCE"] = "1"
+    stage = args.stage or args.stage_opt
+    if args.cmd in ("check", "done", "pending") and not stage:
+        ap.error(f"{args.cmd} needs a stage")
+
+    try:
+        store = open_store(args.server_file)
+    except (OSError, inventory.InventoryError) as e:
+        log(f"[checkpoint] ⚠️  disabled: {args.server_file}: {e}")
+        store = None
+    if store is None:
+        # off: nothing is complete, recording is a no-op
+        if args.cmd == "pending":
+            try:
+                print("\n".join(args.host or inventory.ips(args.server_file)))
+            except (OSError, inventory.InventoryError):
+                pass
+        return 1 if args.cmd == "check" else 0
+
+    hosts = args.host or None
+    if args.cmd == "check":
+        missing = store.pending(stage, hosts)
+        if missing:
+            return 1
+        for h in hosts or store.hosts:
+            rec = store.record(stage, h)
+            build = f"build #{rec['build']}, " if rec["build"] else ""
+            log(f"[checkpoint] ⏭  {stage} already complete on {h} ({build}{rec['at']}); skipping "
+                f"(CHECKPOINT_FORCE=1 redoes it)")
+        return 0
+    if args.cmd == "pending":
+        print("\n".join(store.pending(stage, hosts)))
+    elif args.cmd == "done":
+        store.done(stage, hosts, args.proof or None)
+    elif args.cmd == "forget":
+        store.forget(stage, hosts)
+    else:
+        store.show()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+#!/usr/bin/env bash
+# scripts/checkpoint.sh
+# Source from pipeline scripts; every function is a no-op unless CHECKPOINT_DIR is set:
+#   ckpt_skip <stage> <host>...  -> 0 when <stage> is recorded complete on every <host> for this
+#                                   inventory + NEW_VERSION + inputs and its check still passes there
+#                                   (never with CHECKPOINT_FORCE=1)
+#   ckpt_done <stage> [--proof <remote path>] <host>...
+#                                -> record <stage> complete on each <host>; drops the stages built on it
+# Server file: CHECKPOINT_SERVER_FILE, else INSTALL_SERVER_FILE / SERVER_FILE. Store and stage list:
+# scripts/checkpoint.py (python3 scripts/checkpoint.py show).
+
+_ckpt(){
+  python3 "$(dirname "${BASH_SOURCE[0]}")/checkpoint.py" "$@" \
+    --server-file "${CHECKPOINT_SERVER_FILE:-${INSTALL_SERVER_FILE:-${SERVER_FILE:-server_pci_map.txt}}}"
+}
+
+_ckpt_hosts(){ local h; for h in "$@"; do printf -- '--host\n%s\n' "$h"; done; }
+
+ckpt_skip(){
+  [[ -n "${CHECKPOINT_DIR:-}" && $# -ge 2 ]] || return 1
+  local stage="$1" args=(); shift
+  mapfile -t args < <(_ckpt_hosts "$@")
+  _ckpt check "$stage" "${args[@]}"
+}
+
+ckpt_done(){
+  [[ -n "${CHECKPOINT_DIR:-}" && $# -ge 2 ]] || return 0
+  local stage="$1" proof=() args=(); shift
+  if [[ "$1" == --proof ]]; then proof=(--proof "$2"); shift 2; fi
+  (( $# )) || return 0
+  mapfile -t args < <(_ckpt_hosts "$@")
+  _ckpt done "$stage" ${proof[@]+"${proof[@]}"} "${args[@]}" || true
+}
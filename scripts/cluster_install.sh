@@ -1,10 +1,13 @@
 #!/usr/bin/env bash
 # scripts/cluster_install.sh
-# Sequential install per server
+# Per-host prep in parallel (INSTALL_CONCURRENCY), installer sequential per server
 # - Uses NEW_BUILD_PATH as root (normalized to /<BASE>[/<TAG>])
 # - Pre-check: create /mnt/data{0,1,2} and clear contents
-# - Only untars TRILLIUM_5GCN_CNF_REL_<BASE>*.tar.gz (no BINs)
+# - Only untars TRILLIUM_5GCN_CNF_REL_<BASE>*.tar.gz (no BINs), and only when its sha256 differs
+#   from the last extraction's stamp or the tree no longer matches it (extract_cached.sh; pigz if present)
 # - Streams install_k8s.sh output live to Jenkins
+# - INSTALL_PHASES=prep|install runs one phase (state in INSTALL_STATE_DIR), so a scheduler can
+#   overlap other per-host work with the serialized installer (pipeline_dag.py)
 # - SSH key auth to root@host
 # - If Ansible shows "Permission denied (publickey,password)" → print ANSIBLE_SSH_DENIED
 # - On DEPLOYMENT_TYPE=LOW, comment kubelet tuning in k8s-cluster.yml before install
@@ -33,6 +36,7 @@ require NEW_BUILD_PATH  "/home/labadmin"
 : "${INSTALL_SERVER_FILE:=server_pci_map.txt}"   # "name:ip" or just "ip"
 : "${INSTALL_IP_ADDR:=10.10.10.20/24}"           # optional; skip if empty
 : "${INSTALL_IP_IFACE:=}"
+: "${ALIAS_ENGINE:=}"                             # daemon = alias_ipd.py on each CN keeps INSTALL_IP_ADDR
 : "${INSTALL_MODE:=}"                             # Fresh_installation / Upgrade_*
 : "${DEPLOYMENT_TYPE:=}"                          # Low / Medium / High (case-insensitive)
 
@@ -40,6 +44,9 @@ require NEW_BUILD_PATH  "/home/labadmin"
 : "${INSTALL_RETRY_COUNT:=3}"
 : "${INSTALL_RETRY_DELAY_SECS:=20}"
 : "${BUILD_WAIT_SECS:=300}"
+: "${INSTALL_CONCURRENCY:=4}"                   # hosts prepared (mnt/extract/IP) in parallel
+: "${INSTALL_PHASES:=all}"                       # all | prep | install (pipeline_dag.py runs them as separate tasks)
+: "${INSTALL_STATE_DIR:=}"                       # prep -> install hand-off dir when the phases run separately
 
 [[ -f "$SSH_KEY" ]] || { echo "❌ SSH key not found: $SSH_KEY"; exit 1; }
 chmod 600 "$SSH_KEY" || true
@@ -47,6 +54,18 @@ chmod 600 "$SSH_KEY" || true
 
 SSH_OPTS='-o BatchMode=yes -o StrictHostKeyChecking=no -o ControlMaster=auto -o ControlPersist=5m -o ControlPath=/tmp/ssh_mux_%h_%p_%r'
 
+# Shared per-run ssh masters (scripts/ssh_pool.sh; no-op unless the pipeline started a pool)
+source "$(dirname "${BASH_SOURCE[0]}")/ssh_pool.sh" 2>/dev/null || true
+
+# Parsed + validated server inventory (scripts/inventory.sh -> INV_* arrays)
+source "$(dirname "${BASH_SOURCE[0]}")/inventory.sh"
+
+# Timing spans (scripts/perf_trace.sh; no-op unless TRACE_FILE is set)
+source "$(dirname "${BASH_SOURCE[0]}")/perf_trace.sh"
+
+# Resume checkpoints (scripts/checkpoint.sh; no-op unless CHECKPOINT_DIR is set)
+source "$(dirname "${BASH_SOURCE[0]}")/checkpoint.sh"
+
 BASE="$(base_ver "$NEW_VERSION")"
 TAG_IN="$(ver_tag "$NEW_VERSION")"
 
@@ -102,7 +121,7 @@ echo "[IP] ERROR: Could not plumb ${IP_CIDR} (tried: ${CAND[*]})"
 exit 2
 RS
 
-# 2) Always (re)extract TRILLIUM under <ROOT>/<BASE>/<TAG>; returns DIR path
+# 2) Ensure TRILLIUM is extracted under <ROOT>/<BASE>/<TAG> (cached by tarball digest); returns DIR path
 read -r -d '' ENSURE_TRILLIUM_EXTRACTED <<'RS' || true
 set -euo pipefail
 ROOT="$1"; BASE="$2"; TAG="$3"; WAIT="${4:-0}"
@@ -122,15 +141,16 @@ while :; do
 done
 [[ -n "$tarfile" ]] || { echo "[ERROR] No TRILLIUM tar found in $DEST_DIR after ${WAIT}s"; exit 2; }
 
-# Always untar, even if directory already exists
-echo "[TRIL] Extracting $(basename "$tarfile") into $DEST_DIR ..."
-tar -C "$DEST_DIR" -xzf "$tarfile"
+# Untar only if the tarball digest or the extracted tree changed (extract_cached.sh, prepended below)
+extract_cached "$tarfile" "$DEST_DIR" >&2
 
 dir_candidates=( "$DEST_DIR"/TRILLIUM_5GCN_CNF_REL_${BASE}*/ )
 [[ ${#dir_candidates[@]} -gt 0 ]] || { echo "[ERROR] Extraction completed but directory not found under $DEST_DIR"; exit 2; }
 echo "${dir_candidates[0]%/}"
 RS
 
+# extract_cached() travels with the snippet: the CN has no copy of this repo
+EXTRACT_CACHED_LIB="$(cat "$(dirname "$0")/extract_cached.sh")"
 
 # 3) LOW capacity tweak BEFORE install
 read -r -d '' LOW_CAPACITY_TWEAK <<'RS' || true
@@ -154,7 +174,8 @@ read -r -d '' RUN_INSTALL_STREAMING <<'RS' || true
 set -euo pipefail
 P="$1"
 cd "$P" || { echo "[ERROR] Path not found: $P"; exit 2; }
-sed -i 's/\r$//' install_k8s.sh 2>/dev/null || true
+# strip CRs only if present: a no-op sed -i would still bump mtime and invalidate the extract stamp
+! grep -q $'\r' install_k8s.sh 2>/dev/null || sed -i 's/\r$//' install_k8s.sh 2>/dev/null || true
 echo "[RUN] yes yes | ./install_k8s.sh (in $P)"
 
 # We want the exit of bash (right side of the pipe), not 'yes'
@@ -170,31 +191,30 @@ exit "$rc_bash"
 RS
 
 
-any_failed=0
-
-# ---- per-host loop ----
-while IFS= read -r raw || [[ -n "${raw:-}" ]]; do
-  line="$(echo -n "${raw:-}" | tr -d '\r')"
-  [[ -z "$line" || "${line:0:1}" == "#" ]] && continue
-
-  if [[ "$line" == *:* ]]; then
-    IFS=':' read -r _name ip _rest <<<"$line"; host="$(echo -n "${ip:-}" | xargs)"
-  else
-    host="$(echo -n "$line" | xargs)"
-  fi
-  [[ -z "$host" ]] && { echo "⚠️  Skipping malformed line: $line"; continue; }
-
-  # 0) Prepare /mnt on every host
-  ssh $SSH_OPTS -i "$SSH_KEY" "root@$host" bash -s <<<"$PREPARE_MNT_SNIPPET"
+# ---- orchestration helpers ----
+if [[ -n "$INSTALL_STATE_DIR" ]]; then
+  STATE_DIR="$INSTALL_STATE_DIR"; mkdir -p "$STATE_DIR"
+else
+  STATE_DIR="$(mktemp -d /tmp/cluster_install.XXXXXX)"
+  trap 'rm -rf "$STATE_DIR"' EXIT
+fi
 
-  # Normalize ROOT from NEW_BUILD_PATH
-  raw_base="$NEW_BUILD_PATH"
-  ROOT_BASE="$(normalize_root "$raw_base" "$BASE")"
+rsh(){ local h="$1"; shift; ssh $SSH_OPTS -i "$SSH_KEY" "root@$h" "$@"; }
+now(){ date +%s.%N; }
+prefix(){ sed -u "s/^/[$1] /"; }   # line-buffered host prefix for multiplexed output
+
+# timed <host> <phase> <cmd...> : run cmd, append "<phase> <secs>" to $STATE_DIR/<host>.times
+timed(){
+  local h="$1" ph="$2" t0 rc=0; shift 2
+  t0="$(now)"
+  "$@" || rc=$?
+  awk -v p="$ph" -v a="$t0" -v b="$(now)" 'BEGIN{printf "%s %.1f\n", p, b-a}' >> "$STATE_DIR/$h.times"
+  trace_span "$ph" "$h" "$t0" rc=$rc
+  return $rc
+}
 
-  # Determine TAG (if not provided)
-  TAG="$TAG_IN"
-  if [[ -z "$TAG" ]]; then
-    TAG="$(ssh $SSH_OPTS -i "$SSH_KEY" "root@$host" bash -s -- "$ROOT_BASE" "$BASE" <<'RS'
+detect_tag(){  # <host> <root>
+  rsh "$1" bash -s -- "$2" "$BASE" <<'RS'
 set -euo pipefail
 BDIR="$1"; BASE="$2"
 shopt -s nullglob
@@ -206,48 +226,74 @@ else
   echo "EA1"
 fi
 RS
-    )" || TAG="EA1"
+}
+
+# prep_host <host> : everything that is independent per host (/mnt prep, TAG, TRILLIUM extraction,
+# alias IP, LOW tweak). Writes the resolved paths to $STATE_DIR/<host>.env for the install phase.
+prep_host(){
+  local host="$1" raw_base ROOT_BASE TAG TRIL_DIR NEW_VER_PATH K8S_YAML
+
+  # 0) Prepare /mnt on every host
+  timed "$host" mnt rsh "$host" bash -s <<<"$PREPARE_MNT_SNIPPET" || return 1
+
+  # Normalize ROOT from NEW_BUILD_PATH
+  raw_base="$NEW_BUILD_PATH"
+  ROOT_BASE="$(normalize_root "$raw_base" "$BASE")"
+
+  # Determine TAG (if not provided)
+  TAG="$TAG_IN"
+  if [[ -z "$TAG" ]]; then
+    TAG="$(timed "$host" tag detect_tag "$host" "$ROOT_BASE")" || TAG="EA1"
   fi
 
   ROOT_BASE="$(normalize_root "$raw_base" "$BASE" "$TAG")"
-  echo ""; echo "🧩 Host:  $host"; echo "📁 Root:  $ROOT_BASE (from NEW_BUILD_PATH)"; echo "🏷️  Tag:   $TAG"
+  echo "🧩 Host:  $host"; echo "📁 Root:  $ROOT_BASE (from NEW_BUILD_PATH)"; echo "🏷️  Tag:   $TAG"
 
   # Ensure TRILLIUM present & extracted (returns directory)
-  TRIL_DIR="$(ssh $SSH_OPTS -i "$SSH_KEY" "root@$host" bash -s -- "$ROOT_BASE" "$BASE" "$TAG" "$BUILD_WAIT_SECS" <<<"$ENSURE_TRILLIUM_EXTRACTED" | tail -n1 || true)"
+  TRIL_DIR="$(timed "$host" extract rsh "$host" bash -s -- "$ROOT_BASE" "$BASE" "$TAG" "$BUILD_WAIT_SECS" <<<"$EXTRACT_CACHED_LIB"$'\n'"$ENSURE_TRILLIUM_EXTRACTED" | tail -n1 || true)"
   if [[ -z "$TRIL_DIR" ]]; then
-    echo "⚠️  TRILLIUM not ready on $host"; any_failed=1; continue
+    echo "⚠️  TRILLIUM not ready on $host"; return 1
   fi
 
   NEW_VER_PATH="${TRIL_DIR}/common/tools/install/k8s-v${K8S_VER}"
   K8S_YAML="${NEW_VER_PATH}/k8s-yamls/k8s-cluster.yml"
   echo "📁 Path:  $NEW_VER_PATH"
-  if [[ -z "$NEW_VER_PATH" ]]; then echo "[ERROR] NEW_VER_PATH empty"; any_failed=1; continue; fi
+  if [[ -z "$NEW_VER_PATH" ]]; then echo "[ERROR] NEW_VER_PATH empty"; return 1; fi
 
   # Ensure alias IP (only if configured) — IP-only presence check
-  if [[ -n "${INSTALL_IP_ADDR:-}" ]]; then
-    ssh $SSH_OPTS -i "$SSH_KEY" "root@$host" bash -s -- "$INSTALL_IP_ADDR" "$INSTALL_IP_IFACE" <<<"$ENSURE_IP_SNIPPET" || true
+  if [[ -n "${INSTALL_IP_ADDR:-}" && "$ALIAS_ENGINE" == daemon ]]; then
+    timed "$host" ip python3 "$(dirname "$0")/alias_ipd.py" ensure --cidr "$INSTALL_IP_ADDR" --iface "$INSTALL_IP_IFACE" \
+      --host "$host" --key "$SSH_KEY" || true
+  elif [[ -n "${INSTALL_IP_ADDR:-}" ]]; then
+    timed "$host" ip rsh "$host" bash -s -- "$INSTALL_IP_ADDR" "$INSTALL_IP_IFACE" <<<"$ENSURE_IP_SNIPPET" || true
   else
     echo "[IP] Skipping ensure; INSTALL_IP_ADDR is empty"
   fi
 
   # LOW footprint tweak BEFORE install
   if [[ "${DEPLOYMENT_TYPE,,}" == "low" ]]; then
-    ssh $SSH_OPTS -i "$SSH_KEY" "root@$host" bash -s -- "$K8S_YAML" <<<"$LOW_CAPACITY_TWEAK"
+    timed "$host" low rsh "$host" bash -s -- "$K8S_YAML" <<<"$LOW_CAPACITY_TWEAK" || return 1
   fi
 
-  # Run installer (live stream)
+  printf 'NEW_VER_PATH=%q\n' "$NEW_VER_PATH" > "$STATE_DIR/$host.env"
+  ckpt_done extracted --proof "$(dirname "$TRIL_DIR")/.TRILLIUM_5GCN_CNF_REL_${BASE}*.extracted" "$host"
+}
+
+# install_host <host> : the kubespray-driven installer; kept strictly one host at a time.
+install_host(){
+  local host="$1" NEW_VER_PATH tmp_log RUN_RC
+  source "$STATE_DIR/$host.env"
   echo "[RUN] Starting installer on $host ..."
   tmp_log="/tmp/install_k8s_${host}_$$.log"
   set +e
-  ssh $SSH_OPTS -i "$SSH_KEY" "root@$host" bash -s -- "$NEW_VER_PATH" <<<"$RUN_INSTALL_STREAMING" | tee "$tmp_log"
+  timed "$host" install rsh "$host" bash -s -- "$NEW_VER_PATH" <<<"$RUN_INSTALL_STREAMING" | tee "$tmp_log" | prefix "$host"
   RUN_RC=${PIPESTATUS[0]}
   set -e
 
   if grep -q 'Permission denied (publickey,password)' "$tmp_log"; then
     echo "ANSIBLE_SSH_DENIED"
     rm -f "$tmp_log" || true
-    any_failed=1
-    continue
+    return 1
   fi
   rm -f "$tmp_log" || true
 
@@ -255,14 +301,81 @@ RS
     echo "✅ Install verified healthy on $host"
   else
     echo "❌ Install failed on $host (rc=$RUN_RC)"
-    any_failed=1
+    return 1
   fi
+}
+
+timing_summary(){
+  echo ""
+  echo "──── per-phase timing (seconds) ────"
+  printf '%-16s %6s %6s %8s %6s %6s %8s %8s\n' host mnt tag extract ip low install total
+  for host in "${HOSTS[@]}"; do
+    awk -v h="$host" '
+      { t[$1]+=$2; tot+=$2 }
+      END {
+        printf "%-16s %6s %6s %8s %6s %6s %8s %8.1f\n", h,
+          ("mnt" in t ? sprintf("%.1f", t["mnt"]) : "-"), ("tag" in t ? sprintf("%.1f", t["tag"]) : "-"),
+          ("extract" in t ? sprintf("%.1f", t["extract"]) : "-"), ("ip" in t ? sprintf("%.1f", t["ip"]) : "-"),
+          ("low" in t ? sprintf("%.1f", t["low"]) : "-"), ("install" in t ? sprintf("%.1f", t["install"]) : "-"), tot
+      }' "$STATE_DIR/$host.times" 2>/dev/null || printf '%-16s (no timings)\n' "$host"
+  done
+  awk -v p="$PREP_WALL" -v i="$INSTALL_WALL" -v c="$INSTALL_CONCURRENCY" \
+    'BEGIN{printf "prep wall=%.1fs (concurrency %d)  install wall=%.1fs (serialized)  total=%.1fs\n", p, c, i, p+i}'
+}
+
+# ---- host list ----
+inventory_load "$INSTALL_SERVER_FILE" || { echo "❌ Invalid server inventory $INSTALL_SERVER_FILE"; exit 2; }
+HOSTS=("${INV_IP[@]}")
+
+any_failed=0
+(( INSTALL_CONCURRENCY >= 1 )) || INSTALL_CONCURRENCY=1
+PREP_WALL=0; INSTALL_WALL=0
+case "$INSTALL_PHASES" in all|prep|install) ;; *) echo "❌ INSTALL_PHASES must be all, prep or install"; exit 1;; esac
+
+# ---- phase 1: per-host prep, up to INSTALL_CONCURRENCY hosts at once ----
+if [[ "$INSTALL_PHASES" != "install" ]]; then
+  echo "[PREP] ${#HOSTS[@]} host(s), concurrency ${INSTALL_CONCURRENCY}"
+  t_prep="$(now)"
+  for host in "${HOSTS[@]}"; do
+    # Resume: k8s for this version is already verified on the host; neither prep nor installer runs
+    if ckpt_skip k8s "$host"; then
+      echo 0 > "$STATE_DIR/$host.rc"; : > "$STATE_DIR/$host.skip"; continue
+    fi
+    while (( $(jobs -rp | wc -l) >= INSTALL_CONCURRENCY )); do wait -n || true; done
+    ( rc=0; prep_host "$host" || rc=$?; echo "$rc" > "$STATE_DIR/$host.rc" ) > >(prefix "$host") 2>&1 &
+  done
+  wait || true
+  PREP_WALL="$(awk -v a="$t_prep" -v b="$(now)" 'BEGIN{printf "%.1f", b-a}')"
+  trace_span "prep (all hosts)" "" "$t_prep"
+  if [[ "$INSTALL_PHASES" == "prep" ]]; then
+    for host in "${HOSTS[@]}"; do
+      [[ "$(cat "$STATE_DIR/$host.rc" 2>/dev/null || echo 1)" == "0" ]] || { echo "❌ Prep failed on $host"; any_failed=1; }
+    done
+  fi
+fi
+
+# ---- phase 2: installer, serialized in host order ----
+if [[ "$INSTALL_PHASES" != "prep" ]]; then
+  t_install="$(now)"
+  for host in "${HOSTS[@]}"; do
+    echo ""
+    if [[ -f "$STATE_DIR/$host.skip" ]]; then
+      echo "⏭  $host: k8s already installed for this run (checkpoint)"; continue
+    fi
+    if [[ "$(cat "$STATE_DIR/$host.rc" 2>/dev/null || echo 1)" != "0" ]]; then
+      echo "❌ Prep failed on $host; skipping install"; any_failed=1; continue
+    fi
+    if install_host "$host"; then ckpt_done k8s "$host"; else any_failed=1; fi
+  done
+  INSTALL_WALL="$(awk -v a="$t_install" -v b="$(now)" 'BEGIN{printf "%.1f", b-a}')"
+  trace_span "install (serialized)" "" "$t_install"
+fi
 
-done < "$INSTALL_SERVER_FILE"
+timing_summary
 
 echo ""
 if [[ $any_failed -ne 0 ]]; then
   echo "❌ One or more installs failed."
   exit 1
 fi
-echo "🎉 Install step completed (installer invoked on all hosts)."
+echo "🎉 Install step completed (phases: ${INSTALL_PHASES}; installer invoked on all hosts unless prep-only)."
@@ -1,9 +1,26 @@
 #!/usr/bin/env bash
 # scripts/cluster_reset.sh
+# Per-host reset (uninstall_k8s.sh with swapped reset.yml/inventory), up to RESET_CONCURRENCY hosts at once.
+# RESET_STRATEGY=tuned runs reset.yml with the free strategy, RESET_FORKS, pipelining and a jsonfile fact cache
+# kept on the agent; RESET_CLUSTERS resets several independent clusters (one server file each) in one run.
+# Each host is probed once: a single ssh runs PROBE_BUNDLE, which returns k8s presence, the resolved old
+# install dir, kubespray/requirements state and alias IP state as one JSON line.
 if [ -z "${BASH_VERSION:-}" ]; then exec /usr/bin/env bash "$0" "$@"; fi
 
 set -euo pipefail
 
+# Shared per-run ssh masters (scripts/ssh_pool.sh; no-op unless the pipeline started a pool)
+source "$(dirname "${BASH_SOURCE[0]}")/ssh_pool.sh" 2>/dev/null || true
+
+# Parsed + validated server inventory (scripts/inventory.sh -> INV_* arrays)
+source "$(dirname "${BASH_SOURCE[0]}")/inventory.sh"
+
+# Timing spans (scripts/perf_trace.sh; no-op unless TRACE_FILE is set)
+source "$(dirname "${BASH_SOURCE[0]}")/perf_trace.sh"
+
+# Resume checkpoints (scripts/checkpoint.sh; no-op unless CHECKPOINT_DIR is set)
+source "$(dirname "${BASH_SOURCE[0]}")/checkpoint.sh"
+
 # ===== Inputs =====
 CR="${CLUSTER_RESET:-Yes}"                         # run gate (Yes/True/1)
 SSH_KEY="${SSH_KEY:-/var/lib/jenkins/.ssh/jenkins_key}"
@@ -18,11 +35,21 @@ RETRY_COUNT="${RETRY_COUNT:-3}"
 RETRY_DELAY_SECS="${RETRY_DELAY_SECS:-10}"
 INSTALL_NAME="${INSTALL_NAME:-install_k8s.sh}"
 UNINSTALL_NAME="${UNINSTALL_NAME:-uninstall_k8s.sh}"
+RESET_CONCURRENCY="${RESET_CONCURRENCY:-4}"        # hosts reset in parallel (1 = one at a time)
 
 # Alias IP watch parameters
 : "${INSTALL_IP_ADDR:=}"                           # e.g. 10.10.10.20/24
 CIDR="${CIDR:-${INSTALL_IP_ADDR:-}}"
 IP_MONITOR_INTERVAL="${IP_MONITOR_INTERVAL:-30}"
+: "${ALIAS_ENGINE:=}"                              # daemon = alias_ipd.py keeps the alias; no per-uninstall watcher
+
+# Ansible tuning / several clusters
+: "${RESET_STRATEGY:=}"                            # '' = ansible defaults | tuned
+: "${RESET_FORKS:=20}"
+: "${RESET_FACT_CACHE:=/var/tmp/k8s-installer-facts}"   # agent-side jsonfile fact cache, one dir per CN
+: "${RESET_FACT_MAX_AGE:=86400}"                   # cached facts younger than this (secs) skip facts.yml
+: "${RESET_CLUSTERS:=}"                            # "<name>=<server_file> ..." (empty = SERVER_FILE only)
+REMOTE_FACTS="/var/tmp/k8s-reset-facts"            # ansible fact cache dir on the CN
 
 # ===== Gate & validation =====
 shopt -s nocasematch
@@ -32,6 +59,39 @@ if [[ ! "$CR" =~ ^(yes|true|1)$ ]]; then
 fi
 shopt -u nocasematch
 
+# ===== Several independent clusters: one child run per server file, all at once =====
+if [[ -n "$RESET_CLUSTERS" ]]; then
+  CL_DIR="$(mktemp -d /tmp/cluster_reset_multi.XXXXXX)"
+  trap 'rm -rf "$CL_DIR"' EXIT
+  names=()
+  for spec in $RESET_CLUSTERS; do
+    name="${spec%%=*}"; file="${spec#*=}"
+    [[ "$spec" == *=* && -n "$name" && -f "$file" ]] || { echo "❌ RESET_CLUSTERS entry '$spec' (want <name>=<server_file>)"; exit 1; }
+    names+=("$name")
+  done
+  echo "[RESET] ${#names[@]} cluster(s): ${names[*]}"
+  for spec in $RESET_CLUSTERS; do
+    name="${spec%%=*}"; file="${spec#*=}"
+    ( t0=$SECONDS; ts="$(trace_now)"; rc=0
+      RESET_CLUSTERS="" SERVER_FILE="$file" bash "$0" || rc=$?
+      trace_span reset-cluster "$name" "$ts" rc=$rc
+      echo "$rc $((SECONDS - t0)) $file" > "$CL_DIR/$name.rc" ) > >(sed -u "s/^/[$name] /") 2>&1 &
+  done
+  wait || true
+
+  echo; echo "──── reset summary (per cluster) ────"
+  any_failed=0
+  for name in "${names[@]}"; do
+    read -r rc secs file < "$CL_DIR/$name.rc" 2>/dev/null || { rc=1; secs=0; file="?"; }
+    status=ok
+    [[ "$rc" == 0 ]] || { status="failed (rc=$rc)"; any_failed=1; }
+    printf '%-16s %-28s %-16s %5ss\n' "$name" "$file" "$status" "$secs"
+  done
+  [[ $any_failed -eq 0 ]] || { echo "❌ Cluster reset failed for one or more clusters."; exit 1; }
+  echo; echo "✅ Reset of ${#names[@]} cluster(s) finished."
+  exit 0
+fi
+
 [[ -f "$SSH_KEY" ]]     || { echo "❌ SSH key not found: $SSH_KEY"; exit 1; }
 chmod 600 "$SSH_KEY" || true
 [[ -f "$SERVER_FILE" ]] || { echo "❌ $SERVER_FILE not found"; exit 1; }
@@ -42,155 +102,219 @@ SSH_OPTS="-o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null -o BatchMo
 ts(){ date '+%Y-%m-%d %H:%M:%S'; }
 log(){ printf '[%s] %s\n' "$(ts)" "$*"; }
 rsh(){ ssh $SSH_OPTS -i "$SSH_KEY" "root@$1" "${@:2}"; }
-rscp(){ scp -q -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null -i "$SSH_KEY" "$2" "root@$1:$3"; }
-trim(){ awk '{$1=$1;print}' <<<"$*"; }
-
-# Parse server file into: name ip base mode n3 n6 n4 amf
-parse_line(){
-  local line="$1"
-  if [[ "$line" == \#* || -z "$line" ]]; then return 1; fi
-  IFS=':' read -r f1 f2 f3 f4 f5 f6 f7 f8 <<<"$line"
-  if [[ "$f1" =~ ^[0-9]+\.[0-9]+\.[0-9]+\.[0-9]+$ ]]; then
-    printf 'NA %s %s VM NA NA NA NA\n' "$f1" "$f2"
-  else
-    printf '%s %s %s %s %s %s %s %s\n' "$f1" "$f2" "$f3" "${f4:-VM}" "${f5:-NA}" "${f6:-NA}" "${f7:-NA}" "${f8:-NA}"
-  fi
-}
 
-remote_has_k8s(){
-  local ip="$1"
-  rsh "$ip" bash -lc '
-    set -e
-    command -v kubectl >/dev/null 2>&1 || command -v crictl >/dev/null 2>&1 || command -v kubeadm >/dev/null 2>&1
-  '
+# ===== Probe bundle =====
+# One round trip per host. Args: <base> <k8s_ver> <kspray_dir> <cidr|-> <uninstall_name>
+# (ssh joins the args with spaces, so an empty CIDR travels as "-").
+# Last line of output is JSON: has_k8s, tools, sp (resolved old install dir; same rules as the former
+# per-path `test -d` chain), probed, sp_exists, requirements, install/uninstall scripts, kubespray, hosts_yaml,
+# alias_cidr/alias_present/alias_iface.
+read -r -d '' PROBE_BUNDLE <<'RS' || true
+set -uo pipefail
+BASE="$1"; K8S_VER="$2"; KSPRAY_DIR="$3"; CIDR="${4:-}"; UNINSTALL_NAME="${5:-uninstall_k8s.sh}"
+[ "$CIDR" = "-" ] && CIDR=""
+js(){ local s="${1//\\/\\\\}"; s="${s//\"/\\\"}"; printf '"%s"' "$s"; }
+jb(){ "$@" >/dev/null 2>&1 && printf true || printf false; }
+jl(){ local out="" x; for x in "$@"; do out+="${out:+,}$(js "$x")"; done; printf '[%s]' "$out"; }
+
+tools=(); for t in kubectl crictl kubeadm; do command -v "$t" >/dev/null 2>&1 && tools+=("$t"); done
+
+sp=""; probed=()
+pick(){ local c; for c in "$@"; do probed+=("$c"); [[ -d "$c" ]] && { sp="$c"; return 0; }; done; return 1; }
+if [[ "$BASE" =~ /k8s-v[0-9]+\.[0-9]+\.[0-9]+$ ]]; then
+  sp="$BASE"
+elif [[ "$BASE" =~ /TRILLIUM_5GCN_CNF_REL_ ]]; then
+  pick "$BASE/common/tools/install/k8s-v${K8S_VER}" || sp="$BASE"
+elif [[ "$BASE" =~ /TRILLIUM_5GCN_CNF_REL_[0-9]+\.[0-9]+\.[0-9]+[^/]*/common/tools/install$ ]]; then
+  sp="$BASE/k8s-v${K8S_VER}"
+elif [[ "$BASE" =~ /([0-9]+\.[0-9]+\.[0-9]+)(/(EA[0-9]+))?$ ]]; then
+  num="${BASH_REMATCH[1]}"; tag="${BASH_REMATCH[3]}"
+  pick "$BASE/TRILLIUM_5GCN_CNF_REL_${num}${tag:+_${tag}}/common/tools/install/k8s-v${K8S_VER}" \
+       "$BASE/TRILLIUM_5GCN_CNF_REL_${num}/common/tools/install/k8s-v${K8S_VER}" || sp="$BASE"
+else
+  sp="$BASE"
+fi
+
+alias_iface=""
+if [[ -n "$CIDR" ]]; then
+  alias_iface="$(ip -4 -o addr show 2>/dev/null | awk -v ip="${CIDR%%/*}" '{split($4,a,"/"); if (a[1]==ip) {print $2; exit}}')"
+fi
+
+printf '{"has_k8s":%s,"tools":%s,"sp":%s,"probed":%s,"sp_exists":%s,"requirements":%s,' \
+  "$( (( ${#tools[@]} )) && echo true || echo false)" "$(jl ${tools[@]+"${tools[@]}"})" "$(js "$sp")" \
+  "$(jl ${probed[@]+"${probed[@]}"})" "$(jb test -d "$sp")" "$(jb test -f "$sp/requirements.txt")"
+printf '"uninstall_script":%s,"kubespray":%s,"kubespray_present":%s,"hosts_yaml":%s,' \
+  "$(jb test -f "$sp/$UNINSTALL_NAME")" "$(js "$sp/$KSPRAY_DIR")" "$(jb test -d "$sp/$KSPRAY_DIR")" \
+  "$(jb test -f "$sp/k8s-yamls/hosts.yaml")"
+printf '"alias_cidr":%s,"alias_present":%s,"alias_iface":%s}\n' \
+  "$(js "$CIDR")" "$([[ -n "$alias_iface" ]] && echo true || echo false)" "$(js "$alias_iface")"
+RS
+
+probe_host(){  # <ip> <base> -> JSON line
+  rsh "$1" bash -l -s -- "$2" "$K8S_VER" "$KSPRAY_DIR" "${INSTALL_IP_ADDR:--}" "$UNINSTALL_NAME" <<<"$PROBE_BUNDLE" | tail -n1
 }
 
-remote_find_old_sp(){
-  local ip="$1" base="$2"
-  if [[ "$base" =~ /k8s-v[0-9]+\.[0-9]+\.[0-9]+$ ]]; then
-    echo "$base"; return
-  fi
-  if [[ "$base" =~ /TRILLIUM_5GCN_CNF_REL_ ]]; then
-    if rsh "$ip" test -d "$base/common/tools/install/k8s-v${K8S_VER}"; then
-      echo "$base/common/tools/install/k8s-v${K8S_VER}"; return
-    fi
-    echo "$base"; return
-  fi
-  if [[ "$base" =~ /TRILLIUM_5GCN_CNF_REL_[0-9]+\.[0-9]+\.[0-9]+[^/]*/common/tools/install$ ]]; then
-    echo "$base/k8s-v${K8S_VER}"; return
-  fi
-  if [[ "$base" =~ /([0-9]+\.[0-9]+\.[0-9]+)(/(EA[0-9]+))?$ ]]; then
-    local num tag rel_with rel_without probe
-    num="$(printf '%s\n' "$base" | sed -n 's#.*/\([0-9]\+\.[0-9]\+\.[0-9]\+\)\(/\(EA[0-9]\+\)\)\?$#\1#p')"
-    tag="$(printf '%s\n' "$base" | sed -n 's#.*/[0-9]\+\.[0-9]\+\.[0-9]\+\(/\(EA[0-9]\+\)\)\?$#\2#p' | sed 's#^/##')"
-    rel_with="TRILLIUM_5GCN_CNF_REL_${num}${tag:+_${tag}}"
-    rel_without="TRILLIUM_5GCN_CNF_REL_${num}"
-    for rel in "$rel_with" "$rel_without"; do
-      probe="$base/$rel/common/tools/install/k8s-v${K8S_VER}"
-      if rsh "$ip" test -d "$probe"; then echo "$probe"; return; fi
-    done
-  fi
-  echo "$base"
+# JSON object on stdin -> P_<KEY>=<value> shell assignments (scalars; lists space-joined)
+probe_vars(){
+  python3 -c '
+import json, shlex, sys
+for k, v in json.load(sys.stdin).items():
+    if isinstance(v, bool):
+        v = "true" if v else "false"
+    elif isinstance(v, list):
+        v = " ".join(map(str, v))
+    print(f"P_{k.upper()}={shlex.quote(str(v))}")
+'
 }
 
-ensure_requirements_or_k8s(){
+ensure_requirements_or_k8s(){  # uses the P_* probe results
   local ip="$1" sp="$2"
-  if remote_has_k8s "$ip"; then
-    log "✅ Kubernetes detected on $ip — proceeding."
+  if [[ "$P_HAS_K8S" == true ]]; then
+    log "✅ Kubernetes detected on $ip ($P_TOOLS) — proceeding."
+    return 0
+  fi
+  if [[ "$P_REQUIREMENTS" == true ]]; then
+    log "✅ requirements.txt present"
     return 0
   fi
   log "ℹ️ Kubernetes not detected — ensuring $sp/requirements.txt via $INSTALL_NAME"
-  rsh "$ip" bash -lc '
-    set -euo pipefail
-    cd "'"$sp"'"
-    if [ -x "./'"$INSTALL_NAME"'" ]; then
-      sed -i "s/\r$//" "./'"$INSTALL_NAME"'" 2>/dev/null || true
-      chmod +x "./'"$INSTALL_NAME"'" || true
-      nohup bash -lc "./'"$INSTALL_NAME"'" >/tmp/_install.out 2>&1 &
-      echo $! >/tmp/_install.pid
-    fi
-  '
-  local waited=0
-  while (( waited < REQ_WAIT_SECS )); do
-    if rsh "$ip" test -f "$sp/requirements.txt"; then
-      log "✅ requirements.txt present"
-      break
-    fi
-    sleep 5; (( waited+=5 ))
-  done
-  rsh "$ip" bash -lc '
-    set -e
-    if [ -s /tmp/_install.pid ] && ps -p "$(cat /tmp/_install.pid 2>/dev/null)" >/dev/null 2>&1; then
-      kill "$(cat /tmp/_install.pid)" 2>/dev/null || true
-      sleep 2
-      ps -p "$(cat /tmp/_install.pid)" >/dev/null 2>&1 && kill -9 "$(cat /tmp/_install.pid)" 2>/dev/null || true
-    fi
-    rm -f /tmp/_install.pid /tmp/_install.out 2>/dev/null || true
-  '
+  # start the installer, wait on the node for requirements.txt, then stop it: one round trip
+  rsh "$ip" bash -l -s -- "$sp" "$INSTALL_NAME" "$REQ_WAIT_SECS" <<'RS'
+set -uo pipefail
+SP="$1"; NAME="$2"; WAIT="$3"
+cd "$SP" || exit 1
+if [ -x "./$NAME" ]; then
+  sed -i "s/\r$//" "./$NAME" 2>/dev/null || true
+  chmod +x "./$NAME" || true
+  nohup bash -lc "./$NAME" >/tmp/_install.out 2>&1 &
+  echo $! >/tmp/_install.pid
+fi
+waited=0
+while (( waited < WAIT )); do
+  if [ -f "$SP/requirements.txt" ]; then echo "✅ requirements.txt present"; break; fi
+  sleep 5; (( waited+=5 ))
+done
+if [ -s /tmp/_install.pid ] && ps -p "$(cat /tmp/_install.pid 2>/dev/null)" >/dev/null 2>&1; then
+  kill "$(cat /tmp/_install.pid)" 2>/dev/null || true
+  sleep 2
+  ps -p "$(cat /tmp/_install.pid)" >/dev/null 2>&1 && kill -9 "$(cat /tmp/_install.pid)" 2>/dev/null || true
+fi
+rm -f /tmp/_install.pid /tmp/_install.out 2>/dev/null || true
+RS
 }
 
+# Backup reset.yml/inventory, drop in the Jenkins reset.yml (shipped base64 in the args) and
+# <sp>/k8s-yamls/hosts.yaml: one round trip instead of three (rsh, scp, rsh).
+# With <skip_facts>=1 the facts.yml import is left out of the shipped reset.yml (cached facts are used).
 swap_reset_and_inventory(){
-  local ip="$1" sp="$2"
-  local kdir="$sp/$KSPRAY_DIR"
-  rsh "$ip" bash -lc '
-    set -euo pipefail
-    cd "'"$kdir"'" || exit 0
-    mkdir -p /tmp >/dev/null 2>&1 || true
-    if [ -f playbooks/reset.yml ]; then
-      cp -f playbooks/reset.yml "/tmp/reset_backup_$(date +%s)_$$.yml"
-      echo "[SWAP] reset.yml -> '"$kdir"'/playbooks/reset.yml (backup $(ls -1t /tmp/reset_backup_*_*.yml | head -n1))"
-    fi
-    if [ -f inventory/sample/hosts.yaml ]; then
-      cp -f inventory/sample/hosts.yaml "/tmp/inventory_backup_$(date +%s)_$$.yml"
-      echo "[SWAP] inventory: '"$kdir"'/inventory/sample/hosts.yaml ← '"$sp"'/k8s-yamls/hosts.yaml (backup $(ls -1t /tmp/inventory_backup_*_*.yml | head -n1))"
-    fi
-  '
-  [[ -f "$RESET_YML_WS" ]] && rscp "$ip" "$RESET_YML_WS" "$kdir/playbooks/reset.yml"
-  rsh "$ip" bash -lc '
-    set -e
-    if [ -f "'"$sp"'/k8s-yamls/hosts.yaml" ]; then
-      cp -f "'"$sp"'/k8s-yamls/hosts.yaml" "'"$kdir"'/inventory/sample/hosts.yaml"
-    fi
-  '
+  local ip="$1" sp="$2" skip_facts="${3:-0}"
+  local kdir="$sp/$KSPRAY_DIR" reset_b64=""
+  if [[ -f "$RESET_YML_WS" && "$skip_facts" == 1 ]]; then
+    reset_b64="$(without_facts < "$RESET_YML_WS" | base64 -w0)"
+  elif [[ -f "$RESET_YML_WS" ]]; then
+    reset_b64="$(base64 -w0 "$RESET_YML_WS")"
+  fi
+  rsh "$ip" bash -l -s -- "$kdir" "$sp" "$reset_b64" <<'RS'
+set -euo pipefail
+KDIR="$1"; SP="$2"; RESET_B64="${3:-}"
+cd "$KDIR" || exit 0
+if [ -f playbooks/reset.yml ]; then
+  cp -f playbooks/reset.yml "/tmp/reset_backup_$(date +%s)_$$.yml"
+  echo "[SWAP] reset.yml -> $KDIR/playbooks/reset.yml (backup $(ls -1t /tmp/reset_backup_*_*.yml | head -n1))"
+fi
+if [ -f inventory/sample/hosts.yaml ]; then
+  cp -f inventory/sample/hosts.yaml "/tmp/inventory_backup_$(date +%s)_$$.yml"
+  echo "[SWAP] inventory: $KDIR/inventory/sample/hosts.yaml ← $SP/k8s-yamls/hosts.yaml (backup $(ls -1t /tmp/inventory_backup_*_*.yml | head -n1))"
+fi
+if [ -n "$RESET_B64" ]; then
+  mkdir -p playbooks
+  printf '%s' "$RESET_B64" | base64 -d > playbooks/reset.yml
+fi
+if [ -f "$SP/k8s-yamls/hosts.yaml" ]; then
+  cp -f "$SP/k8s-yamls/hosts.yaml" "$KDIR/inventory/sample/hosts.yaml"
+fi
+RS
 }
 
-restore_reset_override(){
-  local ip="$1" sp="$2"
-  rsh "$ip" bash -lc '
-    set -e
-    last="$(ls -1t /tmp/reset_backup_*_*.yml 2>/dev/null | head -n1 || true)"
-    if [ -n "$last" ]; then
-      cp -f "$last" "'"$sp"'/'"$KSPRAY_DIR"'/playbooks/reset.yml"
-      echo "[RESTORE] reset: restored '"$sp"'/'"$KSPRAY_DIR"'/playbooks/reset.yml"
-    else
-      echo "[RESTORE] reset: no ctx"
-    fi
-  '
+# reset.yml on stdin minus the top-level play that imports facts.yml
+without_facts(){
+  awk '/^- /{ if (blk !~ /import_playbook: *facts\.yml/) printf "%s", blk; blk="" }
+       { blk = blk $0 "\n" }
+       END { if (blk !~ /import_playbook: *facts\.yml/) printf "%s", blk }'
+}
+
+# ===== Fact cache (RESET_STRATEGY=tuned) =====
+# The jsonfile cache lives on the agent ($RESET_FACT_CACHE/<ip>) so it survives the reset of the CN; it is
+# shipped before the uninstall when fresh and fetched back after a run that gathered facts.
+ANSIBLE_TUNE=""
+if [[ "$RESET_STRATEGY" == tuned ]]; then
+  ANSIBLE_TUNE="ANSIBLE_STRATEGY=free ANSIBLE_FORKS=$RESET_FORKS ANSIBLE_PIPELINING=True ANSIBLE_GATHERING=smart"
+  ANSIBLE_TUNE+=" ANSIBLE_CACHE_PLUGIN=jsonfile ANSIBLE_CACHE_PLUGIN_CONNECTION=$REMOTE_FACTS"
+  ANSIBLE_TUNE+=" ANSIBLE_CACHE_PLUGIN_TIMEOUT=$RESET_FACT_MAX_AGE"
+fi
+
+facts_fresh(){  # <ip>: cached facts exist and none is older than RESET_FACT_MAX_AGE
+  local d="$RESET_FACT_CACHE/$1" mins=$(( (RESET_FACT_MAX_AGE + 59) / 60 ))
+  [[ -n "$(find "$d" -type f 2>/dev/null | head -n1)" ]] || return 1
+  [[ -z "$(find "$d" -type f -mmin +"$mins" 2>/dev/null | head -n1)" ]]
+}
+
+facts_push(){  # <ip>: agent cache -> CN (replaces whatever the CN had)
+  tar -C "$RESET_FACT_CACHE/$1" -cz . | rsh "$1" "rm -rf $REMOTE_FACTS && mkdir -p $REMOTE_FACTS && tar -xz -C $REMOTE_FACTS"
 }
-restore_inventory_override(){
+
+facts_pull(){  # <ip>: CN -> agent cache (mtimes kept: freshness counts from the gathering)
+  local d="$RESET_FACT_CACHE/$1" tmp
+  tmp="$(mktemp -d)"
+  if rsh "$1" "tar -C $REMOTE_FACTS -cz ." | tar -xz -C "$tmp" && [[ -n "$(ls -A "$tmp")" ]]; then
+    rm -rf "$d"; mkdir -p "$RESET_FACT_CACHE"; mv "$tmp" "$d"
+    echo "[FACTS] cached $(ls -1 "$d" | wc -l) host(s) in $d"
+  else
+    rm -rf "$tmp"; echo "[FACTS] nothing to cache from $1"
+  fi
+}
+
+restore_overrides(){  # reset.yml + inventory from the newest backups, one round trip
   local ip="$1" sp="$2"
-  rsh "$ip" bash -lc '
-    set -e
-    last="$(ls -1t /tmp/inventory_backup_*_*.yml 2>/dev/null | head -n1 || true)"
-    if [ -n "$last" ]; then
-      cp -f "$last" "'"$sp"'/'"$KSPRAY_DIR"'/inventory/sample/hosts.yaml"
-      echo "[RESTORE] inventory: restored '"$sp"'/'"$KSPRAY_DIR"'/inventory/sample/hosts.yaml"
-    else
-      echo "[RESTORE] inventory: no ctx"
-    fi
-  '
+  rsh "$ip" bash -l -s -- "$sp/$KSPRAY_DIR" <<'RS'
+KDIR="$1"
+last="$(ls -1t /tmp/reset_backup_*_*.yml 2>/dev/null | head -n1 || true)"
+if [ -n "$last" ]; then
+  cp -f "$last" "$KDIR/playbooks/reset.yml"
+  echo "[RESTORE] reset: restored $KDIR/playbooks/reset.yml"
+else
+  echo "[RESTORE] reset: no ctx"
+fi
+last="$(ls -1t /tmp/inventory_backup_*_*.yml 2>/dev/null | head -n1 || true)"
+if [ -n "$last" ]; then
+  cp -f "$last" "$KDIR/inventory/sample/hosts.yaml"
+  echo "[RESTORE] inventory: restored $KDIR/inventory/sample/hosts.yaml"
+else
+  echo "[RESTORE] inventory: no ctx"
+fi
+RS
 }
 
 run_uninstall_with_retries(){
   local ip="$1" sp="$2"
-  local attempt=1
+  local attempt=1 t0 watch_cidr="${CIDR:-}"
+  [[ "$ALIAS_ENGINE" == daemon ]] && watch_cidr=""   # alias_ipd already restores it within ms
+  t0="$(trace_now)"
   while (( attempt <= RETRY_COUNT )); do
     echo "🧹 Running $UNINSTALL_NAME on $ip (attempt $attempt/$RETRY_COUNT)..."
-    if ssh $SSH_OPTS -i "$SSH_KEY" "root@$ip" bash -euo pipefail -s -- "$sp" "$UNINSTALL_NAME" "${CIDR:-}" "${IP_MONITOR_INTERVAL:-30}" <<'EOF'
+    if ssh $SSH_OPTS -i "$SSH_KEY" "root@$ip" bash -euo pipefail -s -- "$sp" "$UNINSTALL_NAME" "${watch_cidr:--}" "${IP_MONITOR_INTERVAL:-30}" "${ANSIBLE_TUNE// /,}" <<'EOF'
 set -euo pipefail
-SP="$1"; NAME="$2"; CIDR="${3:-}"; WATCH="${4:-30}"
+# ssh joins the args with spaces, so an empty CIDR travels as "-"
+SP="$1"; NAME="$2"; CIDR="${3:-}"; WATCH="${4:-30}"; TUNE="${5:-}"
+[ "$CIDR" = "-" ] && CIDR=""
 cd "$SP"
 
+# ANSIBLE_* overrides (RESET_STRATEGY=tuned; comma-joined to survive ssh) win over kubespray's ansible.cfg
+if [ -n "$TUNE" ]; then
+  export ${TUNE//,/ }
+  echo "[uninstall] ansible: ${TUNE//,/ }"
+fi
+
 # normalize uninstall script
 sed -i 's/\r$//' "$NAME" 2>/dev/null || true
 chmod +x "$NAME" || true
@@ -307,24 +431,49 @@ echo "[uninstall] starting"
 bash -xeuo pipefail "$NAME"
 EOF
     then
-      echo "✅ Uninstall succeeded on $ip"; return 0
+      echo "✅ Uninstall succeeded on $ip"
+      trace_span uninstall "$ip" "$t0" rc=0 retries=$((attempt - 1)) wait=$(( (attempt - 1) * RETRY_DELAY_SECS ))
+      return 0
     fi
     echo "⚠️ Uninstall attempt $attempt failed on $ip"
     ((attempt++))
     (( attempt <= RETRY_COUNT )) && { echo "🔁 Retrying in ${RETRY_DELAY_SECS}s..."; sleep "$RETRY_DELAY_SECS"; }
   done
-  echo "❌ Uninstall failed after $RETRY_COUNT attempts on $ip"; return 1
+  echo "❌ Uninstall failed after $RETRY_COUNT attempts on $ip"
+  trace_span uninstall "$ip" "$t0" rc=1 retries=$((RETRY_COUNT - 1)) wait=$(( (RETRY_COUNT - 1) * RETRY_DELAY_SECS ))
+  return 1
 }
 
-echo "Jenkins reset.yml: ${RESET_YML_WS:-<none>}"
-while IFS= read -r raw || [[ -n "$raw" ]]; do
-  line="$(trim "$raw")"; [[ -z "$line" || "$line" == \#* ]] && continue
-  read -r name ip base mode n3 n6 n4 amf <<<"$(parse_line "$line")"
-
-  echo; echo "🔧 Server: $ip"
-
-  # Ensure alias IP once (best-effort) before uninstall begins
-  if [[ -n "${INSTALL_IP_ADDR:-}" ]]; then
+# ===== Per-host reset =====
+STATE_DIR="$(mktemp -d /tmp/cluster_reset.XXXXXX)"
+trap 'rm -rf "$STATE_DIR"' EXIT
+prefix(){ sed -u "s/^/[$1] /"; }   # line-buffered host prefix for multiplexed output
+
+# reset_host <ip> <base> : probe once, then alias IP / requirements / swap / uninstall / restore.
+# Writes "ok" or "uninstall_failed" to $STATE_DIR/<ip>.status.
+reset_host(){
+  local ip="$1" base="$2" probe sp t skip_facts=0
+  echo "🔧 Server: $ip"
+  # Resume: the failed run being retried already reset this host (an installed k8s never skips it)
+  if ckpt_skip reset "$ip"; then
+    echo ok > "$STATE_DIR/$ip.status"
+    return 0
+  fi
+  t="$(trace_now)"
+  probe="$(probe_host "$ip" "$base" || true)"
+  trace_span probe "$ip" "$t"
+  [[ "$probe" == \{* ]] || { echo "❌ Probe failed on $ip"; return 1; }
+  printf '%s\n' "$probe" > "$STATE_DIR/$ip.probe.json"
+  eval "$(probe_vars <<<"$probe")" || { echo "❌ Unreadable probe result on $ip: $probe"; return 1; }
+  echo "🔎 Probe: k8s=$P_HAS_K8S${P_TOOLS:+ ($P_TOOLS)} kubespray=$P_KUBESPRAY_PRESENT requirements=$P_REQUIREMENTS alias=${P_ALIAS_PRESENT}${P_ALIAS_IFACE:+@$P_ALIAS_IFACE}"
+
+  # Ensure alias IP once (best-effort) before uninstall begins; skipped when the probe saw it
+  t="$(trace_now)"
+  if [[ -n "${INSTALL_IP_ADDR:-}" && "$ALIAS_ENGINE" == daemon ]]; then
+    python3 "$(dirname "${BASH_SOURCE[0]}")/alias_ipd.py" ensure --cidr "$INSTALL_IP_ADDR" --host "$ip" --key "$SSH_KEY" || return 1
+  elif [[ -n "${INSTALL_IP_ADDR:-}" && "$P_ALIAS_PRESENT" == true ]]; then
+    echo "[IP] Already present: ${INSTALL_IP_ADDR%%/*} ($P_ALIAS_IFACE)"
+  elif [[ -n "${INSTALL_IP_ADDR:-}" ]]; then
     echo "[IP] Ensuring ${INSTALL_IP_ADDR}"
     rsh "$ip" bash -lc '
       set -euo pipefail
@@ -338,27 +487,69 @@ while IFS= read -r raw || [[ -n "$raw" ]]; do
         ip addr replace "$CIDR" dev "$IF"
         echo "[IP] Added $CIDR on $IF"
       fi
-    '
+    ' || return 1
   fi
+  trace_span alias-ip "$ip" "$t"
 
-  # Locate old build path on remote
-  sp="$(remote_find_old_sp "$ip" "$base")"
+  # Old build path on remote (resolved by the probe)
+  sp="$P_SP"
   echo "📁 Using (normalized): $sp"
 
   # Ensure requirements/k8s presence (non-fatal if timeout)
-  ensure_requirements_or_k8s "$ip" "$sp" || true
+  trace_run requirements "$ip" ensure_requirements_or_k8s "$ip" "$sp" || true
+
+  # Tuned reset: ship this CN's cached facts (facts.yml then skipped) or clear stale ones on the CN
+  if [[ "$RESET_STRATEGY" == tuned ]]; then
+    if facts_fresh "$ip" && trace_run facts "$ip" facts_push "$ip"; then
+      skip_facts=1
+    else
+      rsh "$ip" "rm -rf $REMOTE_FACTS" || true
+    fi
+    echo "[RESET] ansible: strategy=free forks=$RESET_FORKS pipelining facts=$( ((skip_facts)) && echo cached || echo gather)"
+  fi
 
   # Swap reset.yml + inventory
-  swap_reset_and_inventory "$ip" "$sp"
+  trace_run swap "$ip" swap_reset_and_inventory "$ip" "$sp" "$skip_facts" || return 1
 
   # Uninstall with retries (with your ip_alias_check.sh watchdog running remotely)
-  if ! run_uninstall_with_retries "$ip" "$sp"; then
-    echo "❌ Uninstall failed after ${RETRY_COUNT} attempts on $ip"
+  if run_uninstall_with_retries "$ip" "$sp"; then
+    echo ok > "$STATE_DIR/$ip.status"
+    ckpt_done reset "$ip"
+    if [[ "$RESET_STRATEGY" == tuned && "$skip_facts" == 0 ]]; then
+      trace_run facts "$ip" facts_pull "$ip" || true
+    fi
+  else
+    echo uninstall_failed > "$STATE_DIR/$ip.status"
   fi
 
   # Restore backups
-  restore_reset_override "$ip" "$sp" || true
-  restore_inventory_override "$ip" "$sp" || true
-done < "$SERVER_FILE"
+  trace_run restore "$ip" restore_overrides "$ip" "$sp" || true
+}
+
+echo "Jenkins reset.yml: ${RESET_YML_WS:-<none>}"
+inventory_load "$SERVER_FILE" || { echo "❌ Invalid server inventory $SERVER_FILE"; exit 1; }
+HOSTS=("${INV_IP[@]}"); BASES=("${INV_BUILD[@]}")
+
+(( RESET_CONCURRENCY >= 1 )) || RESET_CONCURRENCY=1
+echo "[RESET] ${#HOSTS[@]} host(s), concurrency ${RESET_CONCURRENCY}"
+for i in "${!HOSTS[@]}"; do
+  ip="${HOSTS[$i]}"
+  while (( $(jobs -rp | wc -l) >= RESET_CONCURRENCY )); do wait -n || true; done
+  ( t0=$SECONDS; ts="$(trace_now)"; rc=0; reset_host "$ip" "${BASES[$i]}" || rc=$?
+    trace_span reset "$ip" "$ts" rc=$rc
+    echo "$rc $((SECONDS - t0))" > "$STATE_DIR/$ip.rc" ) > >(prefix "$ip") 2>&1 &
+done
+wait || true
+
+echo; echo "──── reset summary ────"
+any_failed=0
+for ip in "${HOSTS[@]}"; do
+  read -r rc secs < "$STATE_DIR/$ip.rc" 2>/dev/null || { rc=1; secs=0; }
+  status="$(cat "$STATE_DIR/$ip.status" 2>/dev/null || echo failed)"
+  [[ "$rc" == 0 ]] || { status="failed (rc=$rc)"; any_failed=1; }
+  printf '%-16s %-20s %5ss\n' "$ip" "$status" "$secs"
+done
 
+# uninstall failures are reported but not fatal (as before); a host whose reset could not run is
+[[ $any_failed -eq 0 ]] || { echo "❌ Cluster reset could not run on one or more hosts."; exit 1; }
 echo; echo "✅ Cluster reset step finished."
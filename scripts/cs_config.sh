@@ -1,10 +1,18 @@
 #!/usr/bin/env bash
-# Pick first host as kubectl runner
-RUNNER="$(awk 'NF && $1 !~ /^#/ { if (index($0,":")>0){ split($0,a,":"); print a[2]; exit } else { print $1; exit } }' "${SERVER_FILE}")"
-: "${RUNNER:?no host found in ${SERVER_FILE}}"
-
 set -euo pipefail
 
+# Shared per-run ssh masters (scripts/ssh_pool.sh; no-op unless the pipeline started a pool)
+source "$(dirname "${BASH_SOURCE[0]}")/ssh_pool.sh" 2>/dev/null || true
+
+# Parsed + validated server inventory (scripts/inventory.sh -> INV_* arrays)
+source "$(dirname "${BASH_SOURCE[0]}")/inventory.sh"
+
+# Timing spans (scripts/perf_trace.sh; no-op unless TRACE_FILE is set)
+source "$(dirname "${BASH_SOURCE[0]}")/perf_trace.sh"
+
+# Resume checkpoints (scripts/checkpoint.sh; no-op unless CHECKPOINT_DIR is set)
+source "$(dirname "${BASH_SOURCE[0]}")/checkpoint.sh"
+
 # --- required env (exported by Jenkins stage) ---
 : "${SERVER_FILE:?missing}"          # path to server list
 : "${SSH_KEY:?missing}"              # private key on Jenkins node
@@ -12,21 +20,20 @@ set -euo pipefail
 : "${NEW_BUILD_PATH:?missing}"       # e.g. /home/labadmin/6.3.0/EA3
 : "${DEPLOYMENT_TYPE:?missing}"      # Low|Medium|High
 HOST_USER="${HOST_USER:-root}"
+# VALUES_RENDER=1: the values files are rendered locally for all hosts in parallel from cached
+# pristine templates and only pushed where they changed (values_render.py); the per-host step
+# below then skips its in-place edits and only runs the installer.
 
 echo "[cs_config] NEW_BUILD_PATH=${NEW_BUILD_PATH}"
 echo "[cs_config] NEW_VERSION=${NEW_VERSION}"
 echo "[cs_config] DEPLOYMENT_TYPE=${DEPLOYMENT_TYPE}"
 
-# Parse hosts (supports "name:ip:..." or just "ip/name")
-mapfile -t HOSTS < <(awk '
-  NF && $1 !~ /^#/ {
-    if (index($0,":")>0) { n=split($0,a,":"); print a[2] } else { print $1 }
-  }' "${SERVER_FILE}")
+inventory_load "${SERVER_FILE}" || { echo "[cs_config] ERROR: invalid server inventory ${SERVER_FILE}" >&2; exit 1; }
+HOSTS=("${INV_IP[@]}")
+RUNNER="${INV_RUNNER}"    # first host is the kubectl runner
 
-if ((${#HOSTS[@]}==0)); then
-  echo "[cs_config] ERROR: no hosts parsed from ${SERVER_FILE}" >&2
-  exit 1
-fi
+# Resume: CS already installed on every host for this run
+ckpt_skip cs "${HOSTS[@]}" && exit 0
 
 cs_update_and_install_on_host() {
   local host="$1"
@@ -34,11 +41,12 @@ cs_update_and_install_on_host() {
 
   ssh -o StrictHostKeyChecking=no -o ConnectTimeout=15 -i "${SSH_KEY}" \
       "${HOST_USER}@${host}" bash -euo pipefail -s -- \
-      "${NEW_VERSION}" "${NEW_BUILD_PATH}" "${DEPLOYMENT_TYPE}" <<'EOSSH'
+      "${NEW_VERSION}" "${NEW_BUILD_PATH}" "${DEPLOYMENT_TYPE}" "${RENDERED}" <<'EOSSH'
 set -euo pipefail
 NEW_VERSION="$1"
 BASE="$2"
 DEPLOYMENT_TYPE="$3"
+RENDERED="${4:-0}"   # 1 = values already rendered + pushed by values_render.py
 
 # Build CS_ROOT from BASE + version-only (strip tag after '_')
 VER="${NEW_VERSION%%_*}"             # 6.3.0_EA3 -> 6.3.0 ; 6.3.0 -> 6.3.0
@@ -54,44 +62,48 @@ if [[ ! -d "${CS_ROOT}" ]]; then
   exit 2
 fi
 
-# Locate global-values.yaml
-YAML=""
-for f in "${CS_ROOT}/global-values.yaml" "${CS_ROOT}/global-value.yaml"; do
-  if [[ -f "$f" ]]; then YAML="$f"; break; fi
-done
-if [[ -z "$YAML" ]]; then
-  echo "[remote:cs] ERROR: global-values.yaml not found under ${CS_ROOT}" >&2
-  exit 2
-fi
-echo "[remote:cs] YAML=${YAML}"
-cp -a "${YAML}" "${YAML}.bak"
-
-# If DEPLOYMENT_TYPE is LOW, set capacitySetup: "LOW" (MEDIUM/other unchanged)
-case "${DEPLOYMENT_TYPE}" in
-  [Ll]ow)
-    sed -i -E 's|^(\s*capacitySetup:\s*).*$|\1"LOW"|' "${YAML}"
-    echo "[remote:cs] capacitySetup forced to LOW based on DEPLOYMENT_TYPE=LOW"
-    ;;
-  *)  echo "[remote:cs] capacitySetup left unchanged (DEPLOYMENT_TYPE=${DEPLOYMENT_TYPE})" ;;
-esac
-
-# Update cs-1-values.yaml: replace whole-word 'v1' with version-only (e.g., 6.3.0)
-CSV_FILE="$(find -L "${CS_ROOT}" -maxdepth 3 -type f -name 'cs-1-values.yaml' | head -n1 || true)"
-if [[ -z "${CSV_FILE}" ]]; then
-  echo "[remote:cs] ERROR: cs-1-values.yaml not found under ${CS_ROOT}" >&2
-  exit 2
-fi
-echo "[remote:cs] cs-1-values.yaml=${CSV_FILE}"
-cp -a "${CSV_FILE}" "${CSV_FILE}.bak"
+if [[ "${RENDERED}" == "1" ]]; then
+  echo "[remote:cs] values rendered by values_render.py; skipping in-place edits"
+else
+  # Locate global-values.yaml
+  YAML=""
+  for f in "${CS_ROOT}/global-values.yaml" "${CS_ROOT}/global-value.yaml"; do
+    if [[ -f "$f" ]]; then YAML="$f"; break; fi
+  done
+  if [[ -z "$YAML" ]]; then
+    echo "[remote:cs] ERROR: global-values.yaml not found under ${CS_ROOT}" >&2
+    exit 2
+  fi
+  echo "[remote:cs] YAML=${YAML}"
+  cp -a "${YAML}" "${YAML}.bak"
+
+  # If DEPLOYMENT_TYPE is LOW, set capacitySetup: "LOW" (MEDIUM/other unchanged)
+  case "${DEPLOYMENT_TYPE}" in
+    [Ll]ow)
+      sed -i -E 's|^(\s*capacitySetup:\s*).*$|\1"LOW"|' "${YAML}"
+      echo "[remote:cs] capacitySetup forced to LOW based on DEPLOYMENT_TYPE=LOW"
+      ;;
+    *)  echo "[remote:cs] capacitySetup left unchanged (DEPLOYMENT_TYPE=${DEPLOYMENT_TYPE})" ;;
+  esac
+
+  # Update cs-1-values.yaml: replace whole-word 'v1' with version-only (e.g., 6.3.0)
+  CSV_FILE="$(find -L "${CS_ROOT}" -maxdepth 3 -type f -name 'cs-1-values.yaml' | head -n1 || true)"
+  if [[ -z "${CSV_FILE}" ]]; then
+    echo "[remote:cs] ERROR: cs-1-values.yaml not found under ${CS_ROOT}" >&2
+    exit 2
+  fi
+  echo "[remote:cs] cs-1-values.yaml=${CSV_FILE}"
+  cp -a "${CSV_FILE}" "${CSV_FILE}.bak"
 
-# Use a word-boundary emulation in sed (portable to GNU sed) to replace only standalone 'v1'
-# Replaces (^|non-word) v1 (non-word|$) with \1<VER>\2
-sed -i -E "s/(^|[^[:alnum:]_])v1([^[:alnum:]_]|$)/\\1${VER}\\2/g" "${CSV_FILE}"
+  # Use a word-boundary emulation in sed (portable to GNU sed) to replace only standalone 'v1'
+  # Replaces (^|non-word) v1 (non-word|$) with \1<VER>\2
+  sed -i -E "s/(^|[^[:alnum:]_])v1([^[:alnum:]_]|$)/\\1${VER}\\2/g" "${CSV_FILE}"
 
-echo "[remote:cs] Diff (global-values.yaml):"
-diff -u "${YAML}.bak" "${YAML}" || true
-echo "[remote:cs] Diff (cs-1-values.yaml):"
-diff -u "${CSV_FILE}.bak" "${CSV_FILE}" || true
+  echo "[remote:cs] Diff (global-values.yaml):"
+  diff -u "${YAML}.bak" "${YAML}" || true
+  echo "[remote:cs] Diff (cs-1-values.yaml):"
+  diff -u "${CSV_FILE}.bak" "${CSV_FILE}" || true
+fi
 
 # Run the CS installer
 cd "${CS_ROOT}"
@@ -164,14 +176,25 @@ EOSSH
   echo "[cs_config][$host] done"
 }
 
+# Render + push all hosts' values up front (VALUES_RENDER=1)
+RENDERED=0
+if [[ "${VALUES_RENDER:-0}" == "1" ]]; then
+  python3 "$(dirname "$0")/values_render.py" --kind cs \
+    --server-file "$SERVER_FILE" --build-path "$NEW_BUILD_PATH" --version "$NEW_VERSION" \
+    --deployment-type "$DEPLOYMENT_TYPE" --user "$HOST_USER" --key "$SSH_KEY"
+  RENDERED=1
+fi
+
 # iterate hosts with simple retry
 for h in "${HOSTS[@]}"; do
   ok=0
+  t0="$(trace_now)"
   for attempt in 1 2 3; do
     if cs_update_and_install_on_host "$h"; then ok=1; break; fi
     echo "[cs_config][$h] attempt ${attempt} failed; retrying in 10s..."
     sleep 10
   done
+  trace_span config+install "$h" "$t0" rc=$((1 - ok)) retries=$((attempt - 1)) wait=$(( (attempt - ok) * 10 ))
   if ((ok==0)); then
     echo "[cs_config][$h] ERROR: failed after retries" >&2
     exit 1
@@ -179,3 +202,4 @@ for h in "${HOSTS[@]}"; do
 done
 
 echo "[cs_config] All hosts processed."
+ckpt_done cs "${HOSTS[@]}"
@@ -4,6 +4,18 @@
 # Avoids loading remote profiles to prevent PS1/XDG unbound errors.
 set -euo pipefail
 
+# Shared per-run ssh masters (scripts/ssh_pool.sh; no-op unless the pipeline started a pool)
+source "$(dirname "${BASH_SOURCE[0]}")/ssh_pool.sh" 2>/dev/null || true
+
+# Parsed + validated server inventory (scripts/inventory.sh -> INV_* arrays)
+source "$(dirname "${BASH_SOURCE[0]}")/inventory.sh"
+
+# Timing spans (scripts/perf_trace.sh; no-op unless TRACE_FILE is set)
+source "$(dirname "${BASH_SOURCE[0]}")/perf_trace.sh"
+
+# Resume checkpoints (scripts/checkpoint.sh; no-op unless CHECKPOINT_DIR is set)
+source "$(dirname "${BASH_SOURCE[0]}")/checkpoint.sh"
+
 # ----- Inputs -----
 : "${SERVER_FILE:?missing SERVER_FILE}"         # e.g., server_pci_map.txt
 : "${SSH_KEY:?missing SSH_KEY}"                 # e.g., /var/lib/jenkins/.ssh/jenkins_key
@@ -18,20 +30,18 @@ EMS_SELECTOR="${EMS_SELECTOR:-app=ems}"        # label selector; blank -> fallba
 EMS_NAME_PREFIX="${EMS_NAME_PREFIX:-ems}"      # used if selector yields nothing
 
 # ----- Resolve target from server file -----
-pick_line() {
-  if [[ -n "${HOST_NAME}" ]]; then
-    awk -F: -v n="${HOST_NAME}" '$0!~/^[[:space:]]*#/ && NF>=2 && $1==n {print; exit}' "${SERVER_FILE}"
-  else
-    awk -F: '$0!~/^[[:space:]]*#/ && NF>=2 {print; exit}' "${SERVER_FILE}"
-  fi
-}
-RAW="$(pick_line || true)"
-[[ -n "${RAW}" ]] || { echo "[ems] ERROR: no matching entry in ${SERVER_FILE}"; exit 2; }
-TARGET_NAME="$(printf '%s\n' "${RAW}" | awk -F: '{print $1}')"
-TARGET_IP="$(printf '%s\n'   "${RAW}" | awk -F: '{print $2}')"
-[[ "${TARGET_IP}" =~ ^[0-9]+\.[0-9]+\.[0-9]+\.[0-9]+$ ]] || { echo "[ems] ERROR: invalid IP in ${RAW}"; exit 2; }
+inventory_load "${SERVER_FILE}" || { echo "[ems] ERROR: invalid server inventory ${SERVER_FILE}"; exit 2; }
+idx=0
+if [[ -n "${HOST_NAME}" ]]; then
+  idx="$(inventory_index "${HOST_NAME}")" || { echo "[ems] ERROR: no matching entry in ${SERVER_FILE}"; exit 2; }
+fi
+TARGET_NAME="${INV_NAME[idx]}"
+TARGET_IP="${INV_IP[idx]}"
 echo "[ems] ▶ target: ${TARGET_NAME} ${TARGET_IP}"
 
+# Resume: EMS already installed and reachable for this run
+ckpt_skip ems "${TARGET_IP}" && exit 0
+
 VER="${NEW_VERSION%%_*}"
 EMS_DIR="${NEW_BUILD_PATH%/}/TRILLIUM_5GCN_CNF_REL_${VER}/nf-services/scripts"
 echo "[ems] EMS_DIR=${EMS_DIR}"
@@ -50,16 +60,25 @@ ssh_run() {
 }
 
 # ----- Install EMS remotely -----
+t0="$(trace_now)"
 ssh_run "
 ${REMOTE_ENV}
 [ -d '${EMS_DIR}' ] || { echo '[remote] EMS dir not found: ${EMS_DIR}' 1>&2; exit 3; }
 command -v kubectl >/dev/null 2>&1 || { echo '[remote] kubectl not found' 1>&2; exit 3; }
 cd '${EMS_DIR}'; chmod +x install_ems.sh; ./install_ems.sh
 "
+trace_span install "${TARGET_IP}" "$t0"
 
 # ----- EMS-only readiness -----
 echo "[ems] waiting up to 180s for EMS pods Ready (n/n) & Running…"
+t0="$(trace_now)"
 
+if [[ "${READY_ENGINE:-}" == "watch" ]]; then
+  # Watch EMS pods/deployments; returns as soon as they are Ready (k8s_ready_watch.py)
+  python3 "$(dirname "$0")/k8s_ready_watch.py" --host "${TARGET_IP}" --user "${HOST_USER}" --key "${SSH_KEY}" \
+    --namespace "${EMS_NAMESPACE}" --selector "${EMS_SELECTOR}" --name-prefix "${EMS_NAME_PREFIX}" \
+    --timeout 180 || { echo "[ems] ERROR: EMS not Ready in 180s" 1>&2; exit 4; }
+else
 K_NS_OPT="-A"; [ -n "${EMS_NAMESPACE}" ] && K_NS_OPT="-n ${EMS_NAMESPACE}"
 K_SEL_OPT="";  [ -n "${EMS_SELECTOR}"  ] && K_SEL_OPT="-l ${EMS_SELECTOR}"
 
@@ -113,13 +132,18 @@ else
   for i in 1 2 3; do kubectl get pods \$K_NS_OPT | grep -i '\"${EMS_NAME_PREFIX}\"' || true; sleep 3; done
 fi
 "
+fi
+trace_span ready "${TARGET_IP}" "$t0"
 
 # ----- GUI probe -----
 EMS_URL="https://${TARGET_IP}.nip.io/ems/register"
 echo "[ems] probing GUI: ${EMS_URL}"
+t0="$(trace_now)"
 code="$(curl -sk -o /dev/null -w '%{http_code}' "${EMS_URL}" || true)"
+trace_span gui-probe "${TARGET_IP}" "$t0" http="${code}"
 if [[ "${code}" == "200" || "${code}" == "302" ]]; then
   echo "[ems] ✅ GUI reachable (HTTP ${code}) at ${EMS_URL}"
+  ckpt_done ems "${TARGET_IP}"
 else
   echo "[ems] ERROR: GUI not reachable (HTTP ${code}) at ${EMS_URL}"
   exit 5
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+ems_stub_server.py - minimal local EMS stand-in for the EMS_BACKEND=http upload path.
+
+Implements the three endpoints ems_upload/rest.py calls (same default paths, EMS_API_* overrides honoured):
+  POST /ems/api/auth/login          {"username","password"} -> {"token": ...}
+  POST /ems/api/config/<nf>/import  multipart "file"        -> {"message": "Configuration imported"}
+  POST /ems/api/config/<nf>/apply                            -> {"message": "Configuration applied successfully"}
+plus GET /ems/api/config/<nf> returning the last applied document.
+
+Usage:
+  python3 scripts/ems_stub_server.py --port 8443 [--delay 0.2] [--fail-nf upf]
+  EMS_BACKEND=http EMS_URL=http://127.0.0.1:8443/ems/login python3 scripts/gui_upload.py
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from ems_upload.rest import API_LOGIN, API_IMPORT, API_APPLY  # noqa: E402
+
+
+def _route(template):
+    """'/ems/api/config/{nf}/import' -> regex with a named nf group."""
+    return re.compile("^" + re.escape(template).replace(re.escape("{nf}"), "(?P<nf>[a-z0-9_-]+)") + "$")
+
+
+class StubState:
+    def __init__(self, user, password, delay, fail_nfs):
+        self.user = user
+        self.password = password
+        self.delay = delay
+        self.fail_nfs = set(fail_nfs)
+        self.tokens = set()
+        self.staged = {}    # nf -> imported (not yet applied) document
+        self.applied = {}   # nf -> applied document
+        self.lock = threading.Lock()
+        self.calls = 0
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, so the client pool actually reuses connections
+    state = None
+    login_re = _route(API_LOGIN)
+    import_re = _route(API_IMPORT)
+    apply_re = _route(API_APPLY)
+    get_re = re.compile(r"^/ems/api/config/(?P<nf>[a-z0-9_-]+)$")
+
+    def log_message(self, fmt, *args):
+        sys.stderr.write("[STUB] " + (fmt % args) + "\n")
+
+    def _reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(n) if n else b""
+
+    def _authorized(self):
+        auth = self.headers.get("Authorization", "")
+        return auth.startswith("Bearer ") and auth[7:] in self.state.tokens
+
+    def _uploaded_file(self, raw):
+        ctype = self.headers.get("Content-Type", "")
+        if not ctype.startswith("multipart/"):
+            return raw
+        msg = BytesParser(policy=HTTP).parsebytes(b"Content-Type: " + ctype.encode() + b"\r\n\r\n" + raw)
+        for part in msg.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                return part.get_payload(decode=True)
+        return b""
+
+    def do_GET(self):
+        m = self.get_re.match(self.path)
+        if not m:
+            return self._reply(404, {"error": "not found"})
+        if not self._authorized():
+            return self._reply(401, {"error": "unauthorized"})
+        with self.state.lock:
+            doc = self.state.applied.get(m.group("nf"))
+        if doc is None:
+            return self._reply(404, {"error": "no config applied"})
+        return self._reply(200, doc)
+
+    def do_POST(self):
+        st = self.state
+        raw = self._body()
+        with st.lock:
+            st.calls += 1
+        if st.delay:
+            time.sleep(st.delay)
+
+        if self.login_re.match(self.path):
+            try:
+                creds = json.loads(raw or b"{}")
+            except ValueError:
+                creds = {}
+            if creds.get("username") != st.user or creds.get("password") != st.password:
+                return self._reply(401, {"error": "invalid credentials"})
+            token = uuid.uuid4().hex
+            with st.lock:
+                st.tokens.add(token)
+            return self._reply(200, {"token": token})
+
+        if not self._authorized():
+            return self._reply(401, {"error": "unauthorized"})
+
+        m = self.import_re.match(self.path)
+        if m:
+            nf = m.group("nf")
+            try:
+                doc = json.loads(self._uploaded_file(raw) or b"")
+            except ValueError as e:
+                return self._reply(400, {"error": f"invalid config file: {e}"})
+            with st.lock:
+                st.staged[nf] = doc
+            return self._reply(200, {"message": "Configuration imported"})
+
+        m = self.apply_re.match(self.path)
+        if m:
+            nf = m.group("nf")
+            if nf in st.fail_nfs:
+                return self._reply(500, {"error": f"Apply failed for {nf.upper()} (stub --fail-nf)"})
+            with st.lock:
+                if nf not in st.staged:
+                    return self._reply(409, {"error": "nothing imported"})
+                st.applied[nf] = st.staged.pop(nf)
+            return self._reply(200, {"message": "Configuration applied successfully"})
+
+        return self._reply(404, {"error": "not found"})
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local EMS stub for EMS_BACKEND=http")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8443)
+    ap.add_argument("--user", default=os.environ.get("EMS_USER", "root"))
+    ap.add_argument("--password", default=os.environ.get("EMS_PASS", "root123"))
+    ap.add_argument("--delay", type=float, default=0.0, help="seconds of latency added to each POST")
+    ap.add_argument("--fail-nf", action="append", default=[], help="NF whose apply returns an error")
+    args = ap.parse_args()
+
+    Handler.state = StubState(args.user, args.password, args.delay, [n.lower() for n in args.fail_nf])
+    srv = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"[STUB] EMS stub listening on http://{args.host}:{args.port} (login {API_LOGIN})")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
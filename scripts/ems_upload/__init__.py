@@ -0,0 +1,41 @@
+"""
+ems_upload - NF config uploader (AMF/SMF/UPF/...) with explicit Import click and import-effect verification.
+
+Flow (per EMS target + NF "lane"):
+  - Login (or restore the cached session, SESSION_CACHE=1)
+  - Configure -> <NF> -> <nf> (or the cached NF page URL)
+  - Choose File (absolute path) -> dispatch change event
+  - Click Import -> handle overwrite confirmation if appears
+  - Wait until imported config is visible in page (verify import effect)
+  - Click Apply -> click Ok -> capture final toast -> verify config in UI
+  - Save debug screenshots/html under debug_screenshots/ (one sub-dir per worker when pooled),
+    sampled per CAPTURE_MODE and written by a background thread
+
+Parallel mode:
+  - EMS_URLS (comma separated) lists the EMS instances to push to (default: EMS_URL)
+  - UPLOAD_NFS lists the NFs to pick up from CONFIG_DIR (files named *_<nf>.json; default amf)
+  - UPLOAD_WORKERS logged-in browser sessions work through the (EMS, NF) lanes concurrently
+    (default 1: one browser, as before).
+    Files inside one lane stay sequential (each Import/Apply overwrites the NF config).
+
+Backend:
+  - EMS_BACKEND=selenium (default) drives the GUI as above
+  - EMS_BACKEND=http replays the login/import/apply REST calls directly (ems_upload/rest.py),
+    no browser; same lanes/workers and the same success/fail classification
+
+Library use (nothing is started at import; the browser comes up on the first upload):
+    from ems_upload import Uploader
+    with Uploader(url, backend="selenium") as up:
+        up.upload("amf", ["config_files/site1_amf.json"])
+
+CLI: python -m ems_upload [--dry-run] [--nfs amf,smf] [--workers N] [--backend selenium|http]
+"""
+
+from .rest import EmsRestClient, classify_result
+from .gui import expected_fields
+from .uploader import Uploader, build_lanes, validate_lanes, run_pool
+
+__all__ = [
+    "Uploader", "build_lanes", "validate_lanes", "run_pool",
+    "EmsRestClient", "classify_result", "expected_fields",
+]
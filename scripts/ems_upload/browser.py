@@ -0,0 +1,475 @@
+"""
+WebDriver plumbing shared by the GUI flow: lazy Firefox start, per-thread driver/step binding,
+debug capture, the batched JS locator and the event-driven settle() waits.
+Selenium is imported only when a browser is actually needed.
+"""
+
+import os
+import re
+import gzip
+import time
+import json
+import queue
+import hashlib
+import threading
+import collections
+
+from .config import (
+    HEADLESS, SHORT_SLEEP, MED_SLEEP, WAIT_MODE, QUIET_MS, CAPTURE_MODE, CAPTURE_QUEUE, FIREFOX_PROFILE_DIR,
+)
+
+# ---------------- WebDriver Setup ----------------
+SESSION_STATS = []   # (phase, "cold" | "warm", secs)
+_session_lock = threading.Lock()
+
+def _session_stat(phase, kind, secs):
+    with _session_lock:
+        SESSION_STATS.append((phase, kind, secs))
+
+def _firefox_options(profile=None):
+    from selenium.webdriver.firefox.options import Options
+
+    opts = Options()
+    if HEADLESS:
+        opts.add_argument("--headless")
+    opts.accept_insecure_certs = True
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+    if profile:
+        opts.add_argument("-profile")
+        opts.add_argument(profile)
+    return opts
+
+def _build_driver(idx=0):
+    from selenium import webdriver
+
+    t0 = time.time()
+    kind = "cold"
+    profile = None
+    if FIREFOX_PROFILE_DIR:
+        profile = os.path.abspath(os.path.join(FIREFOX_PROFILE_DIR, f"w{idx:02d}"))
+        kind = "warm" if os.path.isdir(profile) and os.listdir(profile) else "cold"
+        os.makedirs(profile, exist_ok=True)
+    d = webdriver.Firefox(options=_firefox_options(profile))
+    _count_round_trips(d)
+    try:
+        d.set_window_size(1400, 1100)
+    except Exception:
+        pass
+    _session_stat("browser_start", kind, time.time() - t0)
+    return d
+
+def _count_round_trips(d):
+    """Every WebDriver command (driver and element alike) goes through d.execute; count them."""
+    d.round_trips = 0
+    orig = d.execute
+
+    def execute(driver_command, params=None):
+        d.round_trips += 1
+        return orig(driver_command, params)
+    d.execute = execute
+
+# An Uploader binds itself to the calling thread while it works; the helpers keep using the
+# module-level names `driver` and `step`, which resolve to that Uploader's (lazily started)
+# browser and its StepCapture.
+_tls = threading.local()
+
+def bound_uploader():
+    return getattr(_tls, "uploader", None)
+
+class _ThreadBound:
+    def __init__(self, attr):
+        self._attr = attr
+
+    def __getattr__(self, name):
+        up = bound_uploader()
+        if up is None:
+            raise RuntimeError(f"no Uploader bound to this thread (needed for '{self._attr}')")
+        return getattr(getattr(up, self._attr), name)
+
+driver = _ThreadBound("driver")
+
+# ---------------- Debug capture ----------------
+def _capture_policy(mode):
+    kind, _, n = mode.partition(":")
+    if kind == "every":
+        return kind, max(1, int(n or "5"))
+    if kind == "ring":
+        return kind, max(1, int(n or "10"))
+    if kind in ("all", "errors"):
+        return kind, 0
+    raise Exception(f"CAPTURE_MODE must be all, errors, every:N or ring:K, got '{mode}'")
+
+CAPTURE_POLICY = _capture_policy(CAPTURE_MODE)
+
+def _is_error_label(label):
+    return bool(re.search(r"err|fail", label, re.I))
+
+class _CaptureWriter:
+    """
+    One background thread that encodes and writes snapshots, so snap() only pays for the
+    WebDriver calls. The queue is bounded: if the disk falls behind, snap() blocks instead
+    of piling screenshots up in memory.
+    """
+    def __init__(self, maxsize):
+        self.q = queue.Queue(maxsize=max(1, maxsize))
+        self.thread = None
+        self.lock = threading.Lock()
+        self.seen = set()          # html files already on disk
+        self.stats = {"png": 0, "html": 0, "html_dedup": 0, "bytes": 0}
+
+    def put(self, item):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="capture-writer", daemon=True)
+                self.thread.start()
+        self.q.put(item)
+
+    def _loop(self):
+        while True:
+            item = self.q.get()
+            try:
+                self._write(*item)
+            except Exception as e:
+                print("capture write failed:", e)
+            finally:
+                self.q.task_done()
+
+    def _write(self, base_dir, name, label, png, html):
+        rec = {"step": name, "label": label}
+        if png:
+            with open(os.path.join(base_dir, name + ".png"), "wb") as fh:
+                fh.write(png)
+            rec["png"] = name + ".png"
+            self.stats["png"] += 1
+            self.stats["bytes"] += len(png)
+        if html is not None:
+            data = html.encode("utf-8")
+            rel = os.path.join("html", hashlib.sha256(data).hexdigest()[:20] + ".html.gz")
+            path = os.path.join(base_dir, rel)
+            if path in self.seen:
+                self.stats["html_dedup"] += 1
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with gzip.open(path, "wb", compresslevel=6) as fh:
+                    fh.write(data)
+                self.seen.add(path)
+                self.stats["html"] += 1
+                self.stats["bytes"] += os.path.getsize(path)
+            rec["html"] = rel
+        # captures.jsonl maps each step to its screenshot and (shared) page source
+        with open(os.path.join(base_dir, "captures.jsonl"), "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(rec) + "\n")
+
+    def flush(self):
+        if self.thread is not None:
+            self.q.join()
+
+_capture_writer = _CaptureWriter(CAPTURE_QUEUE)
+
+def capture_flush():
+    """Wait for queued snapshots to hit the disk and print what was written."""
+    _capture_writer.flush()
+    st = _capture_writer.stats
+    if st["png"] or st["html"]:
+        print(f"---- capture (CAPTURE_MODE={CAPTURE_MODE}): {st['png']} png, {st['html']} html "
+              f"(+{st['html_dedup']} deduped), {st['bytes'] / 1e6:.1f} MB ----")
+
+class StepCapture:
+    def __init__(self, base_dir):
+        self._base_dir = base_dir
+        self.counter = 0
+        self._rt_mark = None
+        self._ring = collections.deque(maxlen=CAPTURE_POLICY[1] or None)
+
+    @property
+    def base_dir(self):
+        os.makedirs(self._base_dir, exist_ok=True)
+        return self._base_dir
+
+    def _clean(self, s):
+        return re.sub(r"[^0-9A-Za-z._-]+", "_", str(s))[:80] or "step"
+
+    def _round_trips(self):
+        return getattr(driver, "round_trips", 0)
+
+    def snap(self, label, html=False):
+        # WebDriver round trips spent since the previous snap (the snap's own commands excluded)
+        rt = self._round_trips()
+        if self._rt_mark is not None:
+            with _rt_lock:
+                ROUNDTRIP_STATS.append((label, rt - self._rt_mark))
+            print(f"[RT] {label}: {rt - self._rt_mark} round trip(s)")
+        self.counter += 1
+        kind, n = CAPTURE_POLICY
+        err = _is_error_label(label)
+        if not err and (kind == "errors" or (kind == "every" and self.counter % n)):
+            self._rt_mark = self._round_trips()
+            return
+
+        ts = int(time.time())
+        name = f"{ts}_{self.counter:03d}_{self._clean(label)}"
+        png = src = None
+        try:
+            png = driver.get_screenshot_as_png()
+        except Exception as e:
+            print("screenshot failed:", e)
+        if html:
+            try:
+                src = driver.page_source
+            except Exception as e:
+                print("save page-source failed:", e)
+        item = (self.base_dir, name, label, png, src)
+        if kind == "ring" and not err:
+            self._ring.append(item)
+        else:
+            # an error step flushes the lead-up kept by ring mode
+            while self._ring:
+                _capture_writer.put(self._ring.popleft())
+            _capture_writer.put(item)
+            print(f"[CAPTURE] {os.path.join(self.base_dir, name)}")
+        self._rt_mark = self._round_trips()
+
+ROUNDTRIP_STATS = []   # (step label, webdriver round trips since the previous step)
+_rt_lock = threading.Lock()
+
+step = _ThreadBound("step")
+
+# ---------------- Utilities ----------------
+def wait_document_ready(timeout=20):
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            if driver.execute_script("return document.readyState") == "complete":
+                return True
+        except Exception:
+            pass
+        time.sleep(0.2)
+    return False
+
+# ---------------- Batch locator ----------------
+# One execute_script per poll: candidates are found by CSS (groups tried in order, first group with
+# hits wins), filtered by case-insensitive text (list = priority order) and by visibility in the
+# browser, and only the matching element handles come back. Replaces find_elements(<translate XPath>)
+# followed by one is_displayed() round trip per element.
+_LOCATE_JS = """
+return (function (spec) {
+  function txt(e) { return (e.textContent || '').replace(/\\s+/g, ' ').trim().toLowerCase(); }
+  function shown(e) {
+    var r = e.getBoundingClientRect();
+    if (r.width <= 0 || r.height <= 0) return false;
+    var cs = getComputedStyle(e);
+    return cs.visibility !== 'hidden' && cs.display !== 'none' && parseFloat(cs.opacity || '1') > 0;
+  }
+  function rank(t, texts, exact) {
+    for (var i = 0; i < texts.length; i++) {
+      if (exact ? t === texts[i] : t.indexOf(texts[i]) >= 0) return i;
+    }
+    return -1;
+  }
+  function find(roots, s) {
+    var groups = [].concat(s.css || '*');
+    var texts = s.text == null ? null : [].concat(s.text).map(function (x) { return String(x).toLowerCase(); });
+    for (var g = 0; g < groups.length; g++) {
+      var hits = [];
+      roots.forEach(function (root) {
+        var nodes = root.querySelectorAll(groups[g]);
+        for (var i = 0; i < nodes.length; i++) {
+          var e = nodes[i], r = 0;
+          if (texts) { r = rank(txt(e), texts, s.exact); if (r < 0) continue; }
+          if (s.visible !== false && !shown(e)) continue;
+          hits.push({e: e, r: r, i: hits.length});
+        }
+      });
+      if (texts && s.innermost !== false) {
+        hits = hits.filter(function (h) {
+          return !hits.some(function (o) { return o.e !== h.e && h.e.contains(o.e); });
+        });
+      }
+      if (s.anchor) {
+        var anchors = find([document], s.anchor);
+        if (anchors.length) {
+          var a = anchors[0].e;
+          var before = hits.filter(function (h) {
+            return a.compareDocumentPosition(h.e) & Node.DOCUMENT_POSITION_PRECEDING;
+          });
+          before.forEach(function (h) { h.i = -h.i; });   // closest to the anchor first
+          if (before.length || !s.anchor.optional) hits = before;
+        } else if (!s.anchor.optional) {
+          hits = [];
+        }
+      }
+      hits.sort(function (x, y) { return x.r - y.r || x.i - y.i; });
+      if (hits.length) return hits;
+    }
+    return [];
+  }
+  var roots = [document];
+  if (spec.within) roots = find([document], spec.within).map(function (h) { return h.e; });
+  var out = find(roots, spec);
+  if (spec.limit) out = out.slice(0, spec.limit);
+  return out.map(function (h) {
+    return spec.withText ? [h.e, (h.e.innerText || h.e.textContent || '').trim()] : h.e;
+  });
+})(arguments[0]);
+"""
+
+def locate(css="*", text=None, exact=False, within=None, anchor=None,
+           visible=True, innermost=True, with_text=False, limit=0):
+    """
+    css: selector or list of selectors tried in order; text: substring (or list, in priority order);
+    within/anchor: nested specs (dicts with the same keys) for the container / the element the
+    match must precede. Returns element handles ([element, text] pairs with with_text=True).
+    """
+    spec = {"css": css, "text": text, "exact": exact, "within": within, "anchor": anchor,
+            "visible": visible, "innermost": innermost, "withText": with_text, "limit": limit}
+    try:
+        return driver.execute_script(_LOCATE_JS, spec) or []
+    except Exception as e:
+        print("locate failed:", e)
+        return []
+
+def locate_first(**kw):
+    found = locate(limit=1, **kw)
+    return found[0] if found else None
+
+def _click(el):
+    try:
+        el.click()
+    except Exception:
+        try:
+            driver.execute_script("arguments[0].click();", el)
+        except Exception:
+            from selenium.webdriver.common.action_chains import ActionChains
+            ActionChains(driver).move_to_element(el).click(el).perform()
+
+def roundtrip_report():
+    with _rt_lock:
+        stats = list(ROUNDTRIP_STATS)
+    if not stats:
+        return
+    total = sum(n for _, n in stats)
+    print(f"---- webdriver round trips: {total} over {len(stats)} step(s) ----")
+    for label, n in sorted(stats, key=lambda x: -x[1])[:15]:
+        print(f"  {label:40s} {n}")
+
+def handle_native_alerts(timeout=6, accept=True):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        WebDriverWait(driver, timeout).until(EC.alert_is_present())
+        alert = driver.switch_to.alert
+        txt = alert.text or ""
+        print("Native alert:", txt)
+        if accept:
+            alert.accept()
+        else:
+            alert.dismiss()
+        time.sleep(SHORT_SLEEP)
+        return txt
+    except TimeoutException:
+        return ""
+    except Exception as e:
+        print("alert handling error:", e)
+        return ""
+
+OVERLAY_CSS = ("[class*='overlay']:not(.cdk-overlay-container):not(.cdk-global-overlay-wrapper):not(.cdk-overlay-pane), "
+               "[class*='backdrop'], [class*='spinning'], [class*='spinner'], [class*='loading'], [class*='progress']")
+
+def wait_for_no_overlay(wait=12):
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        if not locate(css=OVERLAY_CSS, limit=1):
+            return True
+        time.sleep(0.25)
+    return False
+
+# ---------------- Event-driven waits ----------------
+# Installed once per document: a MutationObserver stamping the last DOM change and a counter of
+# in-flight XHR/fetch requests. Each poll is one execute_script returning
+# [pending_requests, ms_since_last_mutation, visible_overlays, angular_stable].
+_QUIET_JS = """
+var q = window.__emsQuiet;
+if (!q) {
+  q = window.__emsQuiet = {pending: 0, last: Date.now()};
+  var touch = function () { q.last = Date.now(); };
+  new MutationObserver(touch).observe(document.documentElement,
+      {subtree: true, childList: true, attributes: true, characterData: true});
+  var send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    q.pending++; touch();
+    this.addEventListener('loadend', function () { q.pending = Math.max(0, q.pending - 1); touch(); });
+    return send.apply(this, arguments);
+  };
+  if (window.fetch) {
+    var f = window.fetch;
+    window.fetch = function () {
+      q.pending++; touch();
+      return f.apply(this, arguments).finally(function () { q.pending = Math.max(0, q.pending - 1); touch(); });
+    };
+  }
+}
+var overlays = 0;
+document.querySelectorAll('.cdk-overlay-backdrop-showing, .modal-backdrop, .spinner, .loading, ' +
+                          'mat-spinner, mat-progress-spinner, mat-progress-bar').forEach(function (e) {
+  var r = e.getBoundingClientRect(), cs = getComputedStyle(e);
+  if (r.width > 0 && r.height > 0 && cs.visibility !== 'hidden' && cs.display !== 'none') overlays++;
+});
+var ngStable = true;
+if (window.getAllAngularTestabilities) {
+  try { ngStable = window.getAllAngularTestabilities().every(function (t) { return t.isStable(); }); } catch (e) {}
+}
+return [q.pending, Date.now() - q.last, overlays, ngStable];
+"""
+
+WAIT_STATS = []   # (label, waited_secs, fixed_sleep_budget_secs)
+_wait_lock = threading.Lock()
+
+def settle(label, budget=MED_SLEEP, timeout=None):
+    """
+    Replacement for time.sleep(budget) after a UI action: return as soon as the page is quiet.
+    Gives up after `timeout` (default max(2*budget, 3s)) and falls back to the fixed sleep
+    when the probe script cannot run (e.g. a native alert is open).
+    """
+    t0 = time.time()
+    if WAIT_MODE != "event":
+        time.sleep(budget)
+    else:
+        deadline = t0 + (timeout if timeout is not None else max(2 * budget, 3.0))
+        while True:
+            try:
+                pending, idle_ms, overlays, ng_stable = driver.execute_script(_QUIET_JS)
+            except Exception:
+                time.sleep(max(0.0, budget - (time.time() - t0)))
+                break
+            if pending == 0 and idle_ms >= QUIET_MS and not overlays and ng_stable:
+                break
+            if time.time() >= deadline:
+                print(f"[WAIT] {label}: page not quiet after {time.time() - t0:.2f}s "
+                      f"(pending={pending} idle={idle_ms}ms overlays={overlays} ng_stable={ng_stable})")
+                break
+            time.sleep(0.05)
+    waited = time.time() - t0
+    with _wait_lock:
+        WAIT_STATS.append((label, waited, budget))
+    print(f"[WAIT] {label}: {waited:.2f}s (fixed sleep {budget:.2f}s)")
+    return waited
+
+def wait_report():
+    with _wait_lock:
+        stats = list(WAIT_STATS)
+    if not stats:
+        return
+    per = {}
+    for label, waited, budget in stats:
+        n, w, b = per.get(label, (0, 0.0, 0.0))
+        per[label] = (n + 1, w + waited, b + budget)
+    print(f"---- wait report (WAIT_MODE={WAIT_MODE}, QUIET_MS={QUIET_MS}) ----")
+    for label, (n, w, b) in sorted(per.items(), key=lambda kv: -kv[1][2]):
+        print(f"  {label:28s} x{n:<3d} waited={w:7.2f}s  fixed={b:7.2f}s  saved={b - w:7.2f}s")
+    total_w = sum(v[1] for v in per.values())
+    total_b = sum(v[2] for v in per.values())
+    print(f"  TOTAL waited={total_w:.2f}s fixed={total_b:.2f}s saved={total_b - total_w:.2f}s")
+
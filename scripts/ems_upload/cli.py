@@ -0,0 +1,61 @@
+"""
+Command line entry point: `python -m ems_upload` (or scripts/gui_upload.py).
+Everything defaults to the environment (EMS_URL(S), UPLOAD_NFS, UPLOAD_WORKERS, EMS_BACKEND, ...).
+"""
+
+import time
+import argparse
+import traceback
+
+from .config import CONFIG_DIR, DEBUG_DIR, EMS_BACKEND, EMS_URLS, UPLOAD_NFS, UPLOAD_WORKERS
+from .browser import capture_flush, wait_report, roundtrip_report
+from .gui import session_report
+from .uploader import BACKENDS, build_lanes, validate_lanes, run_pool
+
+
+def _csv(value):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(prog="ems_upload", description="Import + apply NF config files on EMS")
+    ap.add_argument("--config-dir", default=CONFIG_DIR, help="directory with *_<nf>.json files")
+    ap.add_argument("--nfs", type=lambda v: [n.lower() for n in _csv(v)], default=UPLOAD_NFS,
+                    help="comma separated NFs to upload")
+    ap.add_argument("--urls", type=_csv, default=EMS_URLS, help="comma separated EMS login URLs")
+    ap.add_argument("--workers", type=int, default=UPLOAD_WORKERS)
+    ap.add_argument("--backend", choices=BACKENDS, default=EMS_BACKEND if EMS_BACKEND in BACKENDS else None,
+                    required=EMS_BACKEND not in BACKENDS)
+    ap.add_argument("--debug-dir", default=DEBUG_DIR)
+    ap.add_argument("--dry-run", action="store_true", help="only validate the config files (no EMS, no browser)")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        lanes = build_lanes(args.config_dir, args.urls, args.nfs)
+        if not lanes:
+            print(f"No *_<nf>.json files for {args.nfs} in {args.config_dir}")
+            return
+        if args.dry_run:
+            if not validate_lanes(lanes):
+                raise SystemExit(1)
+            return
+        print(f"Starting {'GUI' if args.backend == 'selenium' else 'REST'} upload run")
+        results = run_pool(lanes, max(1, args.workers), args.backend, args.debug_dir)
+        failed = [r for r in results if r[4] != "ok"]
+        if failed:
+            raise Exception(f"{len(failed)} upload lane(s) failed: " + ", ".join(f"{r[2]}@{r[1]}" for r in failed))
+        print("All NF uploads processed.")
+    except Exception as e:
+        print("Main flow error:", e)
+        traceback.print_exc()
+        raise
+    finally:
+        if not args.dry_run:
+            capture_flush()
+            session_report()
+            wait_report()
+            roundtrip_report()
+            time.sleep(0.8)
@@ -0,0 +1,58 @@
+"""
+Environment configuration for ems_upload. Read once at import; nothing is created on disk here
+(DEBUG_DIR / SESSION_CACHE_DIR are made on first write).
+"""
+
+import os
+
+URL = os.environ.get("EMS_URL", "https://172.27.28.193.nip.io/ems/login")
+USERNAME = os.environ.get("EMS_USER", "root")
+PASSWORD = os.environ.get("EMS_PASS", "root123")
+EMS_BACKEND = os.environ.get("EMS_BACKEND", "selenium").lower()   # selenium | http
+CONFIG_DIR = os.environ.get("CONFIG_DIR", "config_files")
+DEBUG_DIR = os.environ.get("DEBUG_DIR", "debug_screenshots")
+
+HEADLESS = os.environ.get("HEADLESS", "1") != "0"
+FAST_MODE = os.environ.get("FAST_MODE", "0") == "1"
+
+SHORT_SLEEP = 0.2 if FAST_MODE else 0.6
+MED_SLEEP   = 0.6 if FAST_MODE else 1.2
+LONG_SLEEP  = 1.2 if FAST_MODE else 3.0
+
+# WAIT_MODE=event returns from settle() as soon as the SPA is quiet (no DOM mutations for QUIET_MS,
+# no XHR/fetch in flight, no cdk/modal backdrop or spinner, Angular stable); the fixed
+# SHORT/MED/LONG_SLEEP values are then only the report baseline. WAIT_MODE=sleep keeps the old delays.
+WAIT_MODE = os.environ.get("WAIT_MODE", "event").lower()
+QUIET_MS = int(os.environ.get("QUIET_MS", "300"))
+
+# Import/apply verification: fraction of the imported JSON's values that must be visible, counted
+# over the values the page did not already show before Import (0 = at least one), and the cap on
+# values sent to the browser per check.
+VERIFY_MIN_RATIO = float(os.environ.get("VERIFY_MIN_RATIO", "0.5"))
+VERIFY_MAX_FIELDS = int(os.environ.get("VERIFY_MAX_FIELDS", "400"))
+
+# Debug capture policy (StepCapture.snap): all | errors | every:N | ring:K
+#   all      every step (old behaviour, but written by a background thread)
+#   errors   only S_ERR_*/*fail* steps
+#   every:N  every Nth step plus all error steps
+#   ring:K   keep the last K steps in memory, write them only when an error step happens
+# HTML is stored once per content hash, gzipped, under <debug dir>/html/.
+CAPTURE_MODE = os.environ.get("CAPTURE_MODE", "all").lower()
+CAPTURE_QUEUE = int(os.environ.get("CAPTURE_QUEUE", "32"))
+# The apply result capture (capture_result_toast) saves the full page source only when the result
+# is not a success; RESULT_HTML=1 saves it for every result (debugging).
+RESULT_HTML = os.environ.get("RESULT_HTML", "0") == "1"
+
+EMS_URLS = [u.strip() for u in os.environ.get("EMS_URLS", URL).split(",") if u.strip()]
+UPLOAD_NFS = [n.strip().lower() for n in os.environ.get("UPLOAD_NFS", "amf").split(",") if n.strip()]
+UPLOAD_WORKERS = max(1, int(os.environ.get("UPLOAD_WORKERS", "1")))
+
+# Warm starts across runs: SESSION_CACHE=1 saves cookies + local/sessionStorage after login and the
+# URL of each NF page per (EMS, user) under SESSION_CACHE_DIR; the next run restores them instead of
+# logging in / walking the menus while younger than SESSION_TTL seconds (and not past cookie expiry).
+# FIREFOX_PROFILE_DIR keeps one persistent Firefox profile per worker (w00, w01, ...) there.
+SESSION_CACHE = os.environ.get("SESSION_CACHE", "0") == "1"
+SESSION_CACHE_DIR = os.environ.get("SESSION_CACHE_DIR", ".ems_session")
+SESSION_TTL = int(os.environ.get("SESSION_TTL", "1800"))
+FIREFOX_PROFILE_DIR = os.environ.get("FIREFOX_PROFILE_DIR", "")
+
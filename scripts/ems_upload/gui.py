@@ -0,0 +1,667 @@
+"""
+The EMS GUI flow: menu navigation, file import, apply/confirm, import/apply verification,
+session reuse and the per-file process. Every helper works on the calling thread's bound
+Uploader (see browser.driver / browser.step).
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+from .config import (
+    USERNAME, PASSWORD, SHORT_SLEEP, MED_SLEEP, VERIFY_MIN_RATIO, VERIFY_MAX_FIELDS,
+    SESSION_CACHE, SESSION_CACHE_DIR, SESSION_TTL, RESULT_HTML,
+)
+from .browser import (
+    driver, step, bound_uploader, locate, locate_first, _click, settle, wait_document_ready,
+    wait_for_no_overlay, handle_native_alerts, SESSION_STATS, _session_lock, _session_stat,
+)
+from .rest import classify_result, RESULT_OK_WORDS, RESULT_FAIL_WORDS
+
+# ---------------- Navigation helpers ----------------
+def open_configure_menu():
+    step.snap("S_BEFORE_click_configure", html=True)
+    wait_for_no_overlay(wait=8)
+    el = locate_first(css=["nav a *", "nav a", "a", "*"], text="configure")
+    if el:
+        _click(el)
+        settle("configure_menu", MED_SLEEP)
+        step.snap("S_CLICKED_configure", html=True)
+        return True
+    step.snap("S_ERR_click_configure", html=True)
+    raise Exception("open_configure_menu: Configure not found")
+
+def open_nf_menu(name):
+    step.snap(f"S_BEFORE_open_nf_{name}", html=True)
+    wait_for_no_overlay(wait=8)
+    el = locate_first(css=["nav a *", "nav a", "a"], text=name.lower())
+    if el:
+        _click(el)
+        settle(f"nf_menu_{name}", MED_SLEEP)
+        step.snap(f"S_CLICKED_nf_{name}", html=True)
+        return True
+    step.snap(f"S_ERR_click_nf_{name}", html=True)
+    raise Exception(f"open_nf_menu: {name} not found")
+
+def click_nf_subentry(nf):
+    t = nf.lower()
+    step.snap(f"S_BEFORE_click_{t}_subentry", html=True)
+    wait_for_no_overlay(wait=8)
+    # try exact normalized text first, then fuzzy
+    el = locate_first(text=t, exact=True) or locate_first(text=t)
+    if not el:
+        step.snap(f"S_ERR_click_{t}_subentry", html=True)
+        raise Exception(f"click_nf_subentry: '{t}' not found")
+    _click(el)
+    settle(f"{t}_subentry", MED_SLEEP)
+    step.snap(f"S_AFTER_click_{t}_subentry", html=True)
+    return True
+
+def click_amf_subentry():
+    return click_nf_subentry("amf")
+
+# ---------------- Upload helpers (original-style + fixes) ----------------
+def upload_config_file(file_path):
+    """
+    Use original logic: compute absolute path, ensure file exists, then send_keys(abs_path).
+    Dispatch a change event afterwards so SPA picks up the file.
+    """
+    step.snap("S_BEFORE_upload", html=True)
+    abs_path = os.path.abspath(file_path)
+    print("[DEBUG] Preparing to upload:", abs_path)
+    if not os.path.exists(abs_path):
+        step.snap("S_ERR_file_missing", html=True)
+        raise FileNotFoundError(f"Config file not found: {abs_path}")
+
+    # locate file input: visible one first, else any (file inputs are usually hidden behind a button)
+    inp = locate_first(css="input[type='file']") or locate_first(css="input[type='file']", visible=False)
+
+    if not inp:
+        # fallback to injecting input (rare)
+        try:
+            inp = driver.execute_script("var i=document.createElement('input'); i.type='file'; i.id='tmp_upload_input'; i.style.display='block'; document.body.appendChild(i); return i;")
+        except Exception:
+            inp = None
+        if not inp:
+            step.snap("S_ERR_no_file_input", html=True)
+            raise Exception("upload_config_file: no file input found and injection failed")
+
+    # ensure visible
+    try:
+        driver.execute_script("arguments[0].style.display='block'; arguments[0].style.visibility='visible';", inp)
+    except Exception:
+        pass
+
+    # now send the absolute path
+    try:
+        inp.send_keys(abs_path)
+    except Exception as e:
+        # sometimes Selenium needs the absolute path; already tried; rethrow with clearer message
+        raise Exception(f"upload_config_file: send_keys failed for {abs_path}: {e}")
+
+    # dispatch change event so SPA sees it
+    try:
+        driver.execute_script("arguments[0].dispatchEvent(new Event('change', {bubbles:true}));", inp)
+    except Exception:
+        pass
+
+    settle("upload_file", SHORT_SLEEP)
+    step.snap("S_AFTER_upload", html=True)
+    return True
+
+DIALOG_CSS = "[class*='modal'], [class*='dialog'], [role*='dialog'], [class*='popup']"
+BUTTON_CSS = ["button, [role='button'], a, input[type='button'], input[type='submit']", "*"]
+
+def handle_overwrite_confirmation(timeout=8):
+    """
+    After clicking Import, handle any overwrite/replace dialog automatically.
+    """
+    step.snap("S_WAIT_OVERWRITE_DIALOG", html=True)
+    end = time.time() + timeout
+    dialog_keywords = ["overwrite", "replace", "already exists", "are you sure", "confirm replace", "replace existing"]
+    button_texts = ["overwrite", "replace", "yes", "confirm", "proceed", "ok", "apply"]
+
+    while time.time() < end:
+        # visible dialog mentioning overwrite -> its best visible button, in one round trip
+        b = locate_first(css=BUTTON_CSS, text=button_texts,
+                         within={"css": DIALOG_CSS, "text": dialog_keywords, "innermost": False})
+        if b:
+            try:
+                _click(b)
+                step.snap("S_HANDLED_overwrite_button", html=True)
+                settle("overwrite_confirm", MED_SLEEP)
+                return True
+            except Exception:
+                pass
+        # native alert fallback
+        try:
+            a = handle_native_alerts(timeout=0.5, accept=False)
+            if a:
+                handle_native_alerts(timeout=1, accept=True)
+                step.snap("S_HANDLED_native_overwrite_alert", html=True)
+                return True
+        except Exception:
+            pass
+        time.sleep(0.4)
+    return False
+
+def click_import():
+    """
+    Click the Import button; first try to find it near Export (stable), otherwise generic import search.
+    Then handle overwrite confirmation if appears.
+    """
+    step.snap("S_BEFORE_import", html=True)
+    wait_for_no_overlay(wait=8)
+    settle("before_import", SHORT_SLEEP)
+
+    import_btn = locate_first(css="button, a, span, div", text="import",
+                              anchor={"text": "export", "optional": True})
+    if not import_btn:
+        step.snap("S_ERR_import_not_found", html=True)
+        raise Exception("click_import: Import button not found")
+
+    _click(import_btn)
+
+    step.snap("S_AFTER_click_import", html=True)
+    # handle potential overwrite confirmation
+    handled = handle_overwrite_confirmation(timeout=8)
+    if handled:
+        print("Overwrite confirmation handled.")
+    else:
+        settle("after_import", MED_SLEEP)
+    return True
+
+# ---------------- Import-effect verification ----------------
+# The imported document is walked once into (path, key, value) leaves; each poll sends the values to
+# the browser, which compares them against form-control values and the rendered text and returns
+# only index lists: [matched_in_a_field, matched_in_text, missing].
+_VERIFY_JS = """
+var exp = arguments[0], vals = {}, parts = [document.body ? document.body.innerText : ''];
+document.querySelectorAll('input, textarea, select').forEach(function (e) {
+  var v = String(e.value == null ? '' : e.value).trim().toLowerCase();
+  if (v) { vals[v] = 1; parts.push(v); }
+});
+var hay = parts.join('\\n').toLowerCase(), field = [], text = [], missing = [];
+for (var i = 0; i < exp.length; i++) {
+  if (vals[exp[i]]) field.push(i);
+  else if (hay.indexOf(exp[i]) >= 0) text.push(i);
+  else missing.push(i);
+}
+return [field, text, missing];
+"""
+
+_NUMBER = re.compile(r"[-+]?[0-9]+(\.[0-9]+)?([eE][-+]?[0-9]+)?")
+_TRIVIAL = {"true", "false", "null", "none", "enable", "disable", "enabled", "disabled"}
+
+def expected_fields(json_file, extra=None, limit=None):
+    """
+    Walk the whole JSON document and return [(path, key, value)] for scalar leaves worth looking
+    for in the GUI (one entry per distinct value). Values that would match almost any page are
+    skipped: booleans/null, numbers, anything of 3 characters or less, true/false/enabled-style words.
+    Non-JSON files fall back to alphanumeric tokens.
+    """
+    limit = limit or VERIFY_MAX_FIELDS
+    out, seen = [], set()
+
+    def add(path, key, value):
+        v = str(value).strip()
+        if len(v) <= 3 or v.lower() in seen or v.lower() in _TRIVIAL or _NUMBER.fullmatch(v):
+            return
+        seen.add(v.lower())
+        out.append((path, str(key), v))
+
+    def walk(obj, path):
+        if isinstance(obj, dict):
+            for k, v in obj.items():
+                walk(v, f"{path}.{k}" if path else str(k))
+        elif isinstance(obj, list):
+            for i, v in enumerate(obj):
+                walk(v, f"{path}[{i}]")
+        elif isinstance(obj, bool) or obj is None:
+            return
+        else:
+            add(path, path.rsplit(".", 1)[-1], obj)
+
+    try:
+        with open(json_file, "r", encoding="utf-8") as fh:
+            raw = fh.read()
+    except Exception:
+        raw = ""
+    try:
+        walk(json.loads(raw), "")
+    except Exception:
+        for tok in re.findall(r'[A-Za-z0-9_\-]{4,}', raw):
+            add("<raw>", "token", tok)
+    for k in extra or []:
+        if isinstance(k, str) and k:
+            add("<lookup>", "lookup", k)
+    if len(out) > limit:
+        print(f"[VERIFY] {json_file}: {len(out)} distinct values, checking the first {limit}")
+    return out[:limit]
+
+def check_fields(fields):
+    """One round trip: returns (in_field, in_text, missing) lists of fields."""
+    res = driver.execute_script(_VERIFY_JS, [v.lower() for _, _, v in fields])
+    in_field, in_text, missing = res or ([], [], list(range(len(fields))))
+    return ([fields[i] for i in in_field], [fields[i] for i in in_text], [fields[i] for i in missing])
+
+def visible_fields(fields):
+    """Lower-cased values of `fields` the page shows right now (the pre-import snapshot)."""
+    try:
+        in_field, in_text, _ = check_fields(fields)
+    except Exception as e:
+        print(f"[VERIFY] snapshot failed: {e}")
+        return set()
+    return {v.lower() for _, _, v in in_field + in_text}
+
+def wait_for_fields(label, fields, timeout, min_ratio=None, before=None):
+    """
+    Poll check_fields() until enough of the expected values are visible. Values in `before` (the
+    pre-import snapshot) were on the page already and prove nothing, so only the others are polled;
+    if the page already showed every value (same config uploaded again) all of them are.
+    Writes a field-level report (<label>_<ts>.json) next to the step captures and returns True/False.
+    """
+    min_ratio = VERIFY_MIN_RATIO if min_ratio is None else min_ratio
+    before = before or set()
+    all_fields, fields = fields, [f for f in fields if f[2].lower() not in before] or fields
+    if len(fields) == len(all_fields) and before:
+        print(f"[VERIFY] {label}: all {len(fields)} values were visible before the import; checking all of them")
+    need = max(1, int(len(fields) * min_ratio + 0.999))
+    end = time.time() + timeout
+    in_field, in_text, missing = [], [], list(fields)
+    while True:
+        try:
+            in_field, in_text, missing = check_fields(fields)
+        except Exception as e:
+            print(f"[VERIFY] {label}: check failed: {e}")
+        ok = len(in_field) + len(in_text) >= need
+        if ok or time.time() >= end:
+            break
+        time.sleep(0.5)
+
+    matched = len(in_field) + len(in_text)
+    print(f"[VERIFY] {label}: {matched}/{len(fields)} values visible "
+          f"(in fields={len(in_field)} in text={len(in_text)}, need {need}; "
+          f"{len(all_fields) - len(fields)} shown before import) -> {'OK' if ok else 'MISSING'}")
+    for path, _, value in missing[:10]:
+        print(f"[VERIFY]   missing {path} = {value}")
+    report = os.path.join(step.base_dir, f"{label}_{int(time.time())}.json")
+    try:
+        with open(report, "w", encoding="utf-8") as fh:
+            json.dump({"ok": ok, "need": need, "total": len(fields), "before": len(all_fields) - len(fields),
+                       "in_field": [{"path": p, "value": v} for p, _, v in in_field],
+                       "in_text": [{"path": p, "value": v} for p, _, v in in_text],
+                       "missing": [{"path": p, "value": v} for p, _, v in missing]}, fh, indent=1)
+    except Exception as e:
+        print("verify report write failed:", e)
+    return ok
+
+def wait_for_import_effect(json_file, timeout=12, before=None):
+    """
+    Check that values from the imported JSON show up in the GUI after Import.
+    This ensures the selected configuration is displayed in the GUI (overwrite effect).
+    `before` is the visible_fields() snapshot taken before Import.
+    """
+    step.snap("S_VERIFY_BEFORE_import_effect", html=True)
+    fields = expected_fields(json_file)
+    if not fields:
+        step.snap("S_ERR_no_candidates_for_import_verify", html=True)
+        raise Exception("No verification candidates found in JSON to verify import effect")
+
+    if wait_for_fields("import_effect", fields, timeout, before=before):
+        step.snap("S_IMPORT_effect_detected", html=True)
+        return True
+
+    step.snap("S_IMPORT_effect_missing", html=True)
+    raise Exception("Import did not update GUI (import-effect not detected)")
+
+# ---------------- Apply & confirmation ----------------
+def click_fetch():
+    step.snap("S_BEFORE_click_fetch", html=True)
+    cand = locate_first(text="fetch")
+    if cand:
+        try:
+            _click(cand)
+            settle("fetch", MED_SLEEP)
+            step.snap("S_AFTER_click_fetch", html=True)
+            return True
+        except Exception:
+            pass
+    step.snap("S_ERR_no_fetch", html=True)
+    return False
+
+def apply_and_confirm():
+    step.snap("S_BEFORE_apply", html=True)
+    wait_for_no_overlay(wait=8)
+    settle("before_apply", SHORT_SLEEP)
+
+    # find Apply (anchored near Fetch/Clear)
+    apply_btn = locate_first(css="button, a, span, div", text="apply",
+                             anchor={"text": "fetch", "optional": True})
+    if not apply_btn:
+        step.snap("S_ERR_apply_not_found", html=True)
+        raise Exception("apply_and_confirm: Apply button not found")
+
+    _click(apply_btn)
+
+    step.snap("S_AFTER_click_apply", html=True)
+
+    # Confirmation Ok handling
+    settle("apply_confirm_dialog", 1.2)
+    ok_btn = locate_first(css="button", text="ok")
+    if ok_btn:
+        _click(ok_btn)
+        step.snap("S_AFTER_click_ok", html=True)
+    else:
+        alt = handle_native_alerts(timeout=3, accept=True)
+        if alt:
+            step.snap("S_AFTER_native_alert_ok", html=True)
+
+    # Wait for final result popup (success/fail) for a short window
+    step.snap("S_WAITING_for_final_result", html=True)
+    end = time.time() + 12
+    final_text = ""
+    while time.time() < end:
+        hits = locate(css=TOAST_CSS + ", [class*='dialog']", with_text=True, innermost=False, limit=1,
+                      text=RESULT_OK_WORDS + RESULT_FAIL_WORDS)
+        if hits and hits[0][1]:
+            final_text = hits[0][1]
+            break
+        time.sleep(0.5)
+
+    if final_text:
+        step.snap("S_FINAL_result_popup", html=True)
+        outf = os.path.join(step.base_dir, f"apply_final_result_{int(time.time())}.txt")
+        try:
+            with open(outf, "w", encoding="utf-8") as fh:
+                fh.write(final_text)
+        except Exception:
+            pass
+        print("Final Apply result:", final_text)
+    else:
+        step.snap("S_ERR_no_final_popup", html=True)
+        print("No final popup detected after Apply (continuing)")
+
+    return True
+
+# ---------------- Verification helpers ----------------
+def verify_config_applied(json_file_path, lookup_keys=None, timeout=10, before=None):
+    step.snap("S_VERIFY_BEFORE_check_page", html=True)
+    fields = expected_fields(json_file_path, extra=lookup_keys)
+    if not fields:
+        return False
+
+    if wait_for_fields("verify_applied", fields, timeout, before=before):
+        step.snap("S_VERIFY_snippet_found", html=True)
+        return True
+
+    step.snap("S_VERIFY_failed_pagesrc", html=True)
+    return False
+
+TOAST_CSS = ("[class*='toast'], [class*='snack'], [class*='notification'], [role*='alert'], "
+             "[role*='status'], [class*='message']")
+
+def capture_result_toast(timeout=8, save_dir=None):
+    save_dir = save_dir or step.base_dir
+    step.snap("S_BEFORE_wait_toast", html=True)
+    end = time.time() + timeout
+    found_text = ""
+    while time.time() < end and not found_text:
+        for _, txt in locate(css=TOAST_CSS, with_text=True):
+            if txt:
+                found_text = txt
+                break
+        if found_text:
+            break
+        time.sleep(0.3)
+
+    ts = int(time.time())
+    status = classify_result(found_text)
+
+    png_name = os.path.join(save_dir, f"{ts}_RESULT_{status}.png")
+    txt_name = os.path.join(save_dir, f"{ts}_RESULT_{status}.txt")
+    # the full page source only matters when the result has to be debugged (RESULT_HTML=1: always)
+    html_name = os.path.join(save_dir, f"{ts}_RESULT_{status}.html") if status != "success" or RESULT_HTML else None
+
+    try:
+        driver.save_screenshot(png_name)
+    except Exception:
+        pass
+    if html_name:
+        try:
+            with open(html_name, "w", encoding="utf-8") as fh:
+                fh.write(driver.page_source)
+        except Exception:
+            pass
+    try:
+        with open(txt_name, "w", encoding="utf-8") as fh:
+            fh.write(found_text or "<no-text-detected>")
+    except Exception:
+        pass
+
+    print(f"[RESULT_CAPTURE] status={status} text='{found_text}' screenshot={png_name} page={html_name}")
+    return status, found_text, png_name, html_name
+
+# ---------------- Session cache ----------------
+_STORAGE_DUMP_JS = """
+const dump = s => { const o = {}; for (let i = 0; i < s.length; i++) { const k = s.key(i); o[k] = s.getItem(k); } return o; };
+return [dump(window.localStorage), dump(window.sessionStorage)];
+"""
+_STORAGE_LOAD_JS = """
+for (const [k, v] of Object.entries(arguments[0] || {})) window.localStorage.setItem(k, v);
+for (const [k, v] of Object.entries(arguments[1] || {})) window.sessionStorage.setItem(k, v);
+"""
+
+def _session_file(url):
+    key = hashlib.sha256(f"{url.split('#')[0]}|{_credentials()[0]}".encode()).hexdigest()[:16]
+    return os.path.join(SESSION_CACHE_DIR, f"session_{key}.json")
+
+def _load_session(url):
+    if not SESSION_CACHE or not url:
+        return {}
+    try:
+        with open(_session_file(url), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+def _store_session(url, nf_page=None, **fields):
+    """Merge fields (and one nf -> page url) into the cache file; atomic, readable by the owner only."""
+    if not SESSION_CACHE or not url:
+        return
+    with _session_lock:
+        data = _load_session(url)
+        data.update(fields)
+        if nf_page:
+            data.setdefault("nf_pages", {})[nf_page[0]] = nf_page[1]
+        os.makedirs(SESSION_CACHE_DIR, exist_ok=True)
+        path = _session_file(url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, path)
+
+def _session_fresh(data):
+    if not data.get("cookies") and not data.get("local_storage"):
+        return False
+    now = time.time()
+    if now - data.get("saved", 0) > SESSION_TTL:
+        return False
+    expiries = [c["expiry"] for c in data.get("cookies", []) if c.get("expiry")]
+    return not expiries or min(expiries) > now + 60
+
+def save_session(url):
+    try:
+        local, sess = driver.execute_script(_STORAGE_DUMP_JS)
+        _store_session(url, saved=time.time(), cookies=driver.get_cookies(),
+                       local_storage=local, session_storage=sess, landing=driver.current_url)
+        print(f"[SESSION] saved session for {url}")
+    except Exception as e:
+        print("[SESSION] could not save session:", e)
+
+def restore_session(url):
+    """Re-inject a cached login; True if the app no longer shows the login form."""
+    data = _load_session(url)
+    if not _session_fresh(data):
+        return False
+    try:
+        driver.get(url)
+        wait_document_ready(25)
+        for c in data.get("cookies", []):
+            try:
+                driver.add_cookie(c)
+            except Exception:
+                pass
+        driver.execute_script(_STORAGE_LOAD_JS, data.get("local_storage"), data.get("session_storage"))
+        driver.get(data.get("landing") or url)
+        wait_document_ready(25)
+        settle("session_restore", MED_SLEEP)
+    except Exception as e:
+        print("[SESSION] restore failed:", e)
+        return False
+    if locate_first(css="input[type='password']"):
+        print("[SESSION] cached session rejected by EMS; logging in")
+        _store_session(url, cookies=[], local_storage={}, session_storage={})
+        return False
+    step.snap("S_AFTER_session_restore", html=True)
+    print(f"[SESSION] reused session for {url} (age {time.time() - data['saved']:.0f}s)")
+    return True
+
+def _goto_cached_nf_page(nf, page_url):
+    try:
+        driver.get(page_url)
+        wait_document_ready(25)
+        settle(f"{nf}_page_cached", MED_SLEEP)
+    except Exception:
+        return False
+    return bool(locate_first(css="input[type='file']", visible=False) or
+                locate_first(css=BUTTON_CSS, text="import"))
+
+def session_report():
+    """Cold vs warm seconds per phase: this run, filling the other column from the last run that had it."""
+    with _session_lock:
+        stats = list(SESSION_STATS)
+    if not stats:
+        return
+    now = {}
+    for phase, kind, secs in stats:
+        n, total = now.get((phase, kind), (0, 0.0))
+        now[(phase, kind)] = (n + 1, total + secs)
+    current = {k: total / n for k, (n, total) in now.items()}
+
+    path = os.path.join(SESSION_CACHE_DIR, "timings.json")
+    try:
+        with open(path, encoding="utf-8") as fh:
+            history = {tuple(k.split("|")): v for k, v in json.load(fh).items()}
+    except (OSError, ValueError):
+        history = {}
+    if SESSION_CACHE:
+        merged = dict(history)
+        merged.update(current)
+        os.makedirs(SESSION_CACHE_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"|".join(k): v for k, v in merged.items()}, fh)
+
+    def cell(key):
+        if key in current:
+            return f"{current[key]:8.2f} "
+        if key in history:
+            return f"{history[key]:8.2f}*"
+        return f"{'-':>8s} "
+
+    print(f"---- session report (SESSION_CACHE={int(SESSION_CACHE)}, TTL={SESSION_TTL}s; * = previous run) ----")
+    print(f"  {'phase':20s} {'cold(s)':>9s} {'warm(s)':>9s}")
+    for phase in sorted({p for p, _ in now}, key=lambda p: (p != "browser_start", p != "login", p)):
+        print(f"  {phase:20s} {cell((phase, 'cold'))} {cell((phase, 'warm'))}")
+
+# ---------------- Per-file flow ----------------
+def _credentials():
+    up = bound_uploader()
+    return (up.username, up.password) if up else (USERNAME, PASSWORD)
+
+def login(url):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+
+    t0 = time.time()
+    if restore_session(url):
+        _session_stat("login", "warm", time.time() - t0)
+        return
+    driver.get(url)
+    step.snap("S_LOGIN_page_open", html=True)
+    wait_document_ready(25)
+    settle("login_page", MED_SLEEP)
+
+    u = driver.find_element(By.XPATH, "//input[@type='text' or @type='email' or contains(@name,'user')]")
+    p = driver.find_element(By.XPATH, "//input[@type='password' or contains(@name,'pass')]")
+    username, password = _credentials()
+    u.clear(); u.send_keys(username)
+    p.clear(); p.send_keys(password)
+    p.send_keys(Keys.RETURN)
+    settle("after_login", MED_SLEEP)
+    step.snap("S_AFTER_login", html=True)
+    if SESSION_CACHE:
+        save_session(url)
+    _session_stat("login", "cold", time.time() - t0)
+
+def open_nf_page(nf, url=None):
+    t0 = time.time()
+    cached = (_load_session(url).get("nf_pages") or {}).get(nf)
+    if cached and _goto_cached_nf_page(nf, cached):
+        step.snap(f"S_AFTER_{nf}_ready_cached", html=True)
+        _session_stat(f"{nf}_page", "warm", time.time() - t0)
+        return
+    open_configure_menu()
+    open_nf_menu(nf.upper())
+    click_nf_subentry(nf)
+    step.snap(f"S_AFTER_{nf}_ready", html=True)
+    page_url = driver.current_url
+    if page_url != _load_session(url).get("landing"):   # only worth caching if the SPA routes per page
+        _store_session(url, nf_page=(nf, page_url))
+    _session_stat(f"{nf}_page", "cold", time.time() - t0)
+
+def process_file(fpath):
+    fname = os.path.basename(fpath)
+    print("Processing:", fpath)
+    step.snap(f"S_START_upload_{fname}", html=True)
+
+    # Upload file (original safe logic)
+    upload_config_file(fpath)
+
+    # Pre-import snapshot: values the page already shows do not count as import/apply evidence
+    before = visible_fields(expected_fields(fpath))
+
+    # Click Import (explicit)
+    click_import()
+
+    # Wait for import effect (ensure GUI shows imported config before Apply)
+    wait_for_import_effect(fpath, timeout=12, before=before)
+
+    # Click Apply and confirm
+    apply_and_confirm()
+
+    # Capture final toast and verify presence in UI
+    status, msg, png, html = capture_result_toast(timeout=8)
+    if status == "success":
+        print("Apply reported success:", msg)
+        verified = verify_config_applied(fpath, timeout=8, before=before)
+        if verified:
+            print("Verified config snippet in UI.")
+        else:
+            print("Verification snippet not found, but toast said success.")
+    elif status == "fail":
+        raise Exception("Apply reported failure: " + (msg or "<no-text>"))
+    else:
+        print("No clear result toast; attempting Fetch + verify")
+        click_fetch()
+        settle("after_fetch", 1.0)
+        verified = verify_config_applied(fpath, timeout=8, before=before)
+        if not verified:
+            step.snap("S_VERIFY_final_failed", html=True)
+            raise Exception("Post-apply verification failed: config not visible in GUI. See debug artifacts.")
+    step.snap(f"S_DONE_upload_{fname}", html=True)
+
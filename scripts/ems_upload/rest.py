@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+ems_upload.rest - direct HTTP backend (EMS_BACKEND=http).
+
+Replays the calls the EMS SPA makes behind Configure -> <NF> -> Import -> Apply:
+  - POST login       (JSON user/password -> token and/or session cookie)
+  - POST import      (multipart upload of the NF config file)
+  - POST apply       (commit the imported config)
+with one pooled, keep-alive requests.Session per worker and EMS target. Results are classified
+with the same success/fail words the GUI flow uses on its result toast.
+
+Endpoints are relative to the origin of EMS_URL and can be overridden:
+  EMS_API_LOGIN   default /ems/api/auth/login
+  EMS_API_IMPORT  default /ems/api/config/{nf}/import
+  EMS_API_APPLY   default /ems/api/config/{nf}/apply
+  EMS_HTTP_TIMEOUT (seconds, default 30), EMS_HTTP_POOL (connections per host, default 4)
+
+For offline runs start the stub (scripts/ems_stub_server.py) and point EMS_URL at it.
+"""
+
+import os
+import json
+import time
+from urllib.parse import urlsplit
+
+API_LOGIN = os.environ.get("EMS_API_LOGIN", "/ems/api/auth/login")
+API_IMPORT = os.environ.get("EMS_API_IMPORT", "/ems/api/config/{nf}/import")
+API_APPLY = os.environ.get("EMS_API_APPLY", "/ems/api/config/{nf}/apply")
+HTTP_TIMEOUT = float(os.environ.get("EMS_HTTP_TIMEOUT", "30"))
+HTTP_POOL = int(os.environ.get("EMS_HTTP_POOL", "4"))
+
+RESULT_OK_WORDS = ["success", "applied", "saved", "completed", "persisted"]
+RESULT_FAIL_WORDS = ["error", "failed", "invalid", "rejected"]
+
+
+def classify_result(text):
+    """Map a result message to success/fail/unknown/none (same rules as the GUI result toast)."""
+    text_l = (text or "").lower()
+    if not text_l:
+        return "none"
+    if any(k in text_l for k in RESULT_OK_WORDS):
+        return "success"
+    if any(k in text_l for k in RESULT_FAIL_WORDS):
+        return "fail"
+    return "unknown"
+
+
+def origin_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _message(resp):
+    """Best-effort human message out of an EMS response (JSON message/status/error or raw text)."""
+    try:
+        body = resp.json()
+    except ValueError:
+        return (resp.text or "").strip()[:500]
+    if isinstance(body, dict):
+        for k in ("message", "msg", "status", "result", "error", "detail"):
+            if body.get(k):
+                return str(body[k])
+    return json.dumps(body)[:500]
+
+
+class EmsRestClient:
+    def __init__(self, url, user, password, verify=False):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base = origin_of(url)
+        self.user = user
+        self.password = password
+        self.session = requests.Session()
+        self.session.verify = verify
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL, pool_maxsize=HTTP_POOL, max_retries=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if not verify:
+            try:
+                import urllib3
+                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            except Exception:
+                pass
+        self.logged_in = False
+
+    def _url(self, path, nf=""):
+        return self.base + path.format(nf=nf.lower())
+
+    def login(self):
+        r = self.session.post(self._url(API_LOGIN),
+                              json={"username": self.user, "password": self.password},
+                              timeout=HTTP_TIMEOUT)
+        if r.status_code >= 400:
+            raise Exception(f"EMS login failed at {self.base}: HTTP {r.status_code} {_message(r)}")
+        try:
+            body = r.json()
+        except ValueError:
+            body = {}
+        token = (body.get("token") or body.get("access_token")) if isinstance(body, dict) else None
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self.logged_in = True
+        print(f"[HTTP] logged in to {self.base}")
+
+    def import_file(self, nf, fpath):
+        with open(fpath, "rb") as fh:
+            r = self.session.post(self._url(API_IMPORT, nf),
+                                  files={"file": (os.path.basename(fpath), fh, "application/json")},
+                                  timeout=HTTP_TIMEOUT)
+        msg = _message(r)
+        if r.status_code >= 400:
+            raise Exception(f"Import failed for {fpath}: HTTP {r.status_code} {msg}")
+        return msg
+
+    def apply(self, nf):
+        r = self.session.post(self._url(API_APPLY, nf), json={}, timeout=HTTP_TIMEOUT)
+        msg = _message(r)
+        status = classify_result(msg)
+        if r.status_code >= 400 and status != "fail":
+            status = "fail"
+        return status, msg
+
+    def upload(self, nf, fpath):
+        """Import + apply one file; returns (status, message) like capture_result_toast."""
+        if not self.logged_in:
+            self.login()
+        t0 = time.time()
+        imp = self.import_file(nf, fpath)
+        status, msg = self.apply(nf)
+        print(f"[HTTP] {nf} {os.path.basename(fpath)} -> {status} ({time.time() - t0:.2f}s) "
+              f"import='{imp}' apply='{msg}'")
+        return status, msg
+
+    def close(self):
+        try:
+            self.session.close()
+        except Exception:
+            pass
@@ -0,0 +1,227 @@
+"""
+Uploader: one EMS session (Firefox or REST) that imports + applies NF config files, and the
+lane pool that runs several of them side by side. Nothing is started until the first upload.
+"""
+
+import os
+import json
+import time
+import threading
+import traceback
+import contextlib
+from urllib.parse import urlparse
+
+import perf_trace   # scripts/ is on sys.path (gui_upload.py, python -m ems_upload from scripts/)
+
+from .config import (
+    URL, USERNAME, PASSWORD, EMS_BACKEND, CONFIG_DIR, DEBUG_DIR, EMS_URLS, UPLOAD_NFS, UPLOAD_WORKERS,
+)
+from .browser import _tls, _build_driver, StepCapture
+from .gui import login, open_nf_page, process_file, expected_fields
+from .rest import EmsRestClient
+
+BACKENDS = ("selenium", "http")
+
+
+class Uploader:
+    """
+    Import + apply NF config files on one EMS:
+
+        with Uploader("https://ems/ems/login") as up:
+            up.upload("amf", ["config_files/site1_amf.json"])
+
+    The browser (backend "selenium") or REST session (backend "http") is created by the first
+    upload() and reused by the following ones; retarget() moves it to another EMS.
+    """
+
+    def __init__(self, url=URL, username=USERNAME, password=PASSWORD, backend=EMS_BACKEND,
+                 debug_dir=DEBUG_DIR, idx=0):
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got '{backend}'")
+        self.url = url
+        self.username = username
+        self.password = password
+        self.backend = backend
+        self.idx = idx
+        self.step = StepCapture(debug_dir)
+        self._driver = None
+        self._rest = None
+        self._logged_in = False
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = _build_driver(self.idx)
+        return self._driver
+
+    @contextlib.contextmanager
+    def bound(self):
+        """Make the gui helpers (driver/step) resolve to this Uploader on the calling thread."""
+        prev = getattr(_tls, "uploader", None)
+        _tls.uploader = self
+        try:
+            yield self
+        finally:
+            _tls.uploader = prev
+
+    def retarget(self, url):
+        """Point at another EMS; the next upload logs in there, in the same browser."""
+        if url != self.url:
+            self.url = url
+            self._logged_in = False
+            if self._rest is not None:
+                self._rest.close()
+                self._rest = None
+
+    def upload(self, nf, files):
+        """Import + apply `files` in order on the `nf` page; raises on the first failure."""
+        nf = nf.lower()
+        if self.backend == "http":
+            if self._rest is None:
+                self._rest = EmsRestClient(self.url, self.username, self.password)
+            for fpath in files:
+                status, msg = self._rest.upload(nf, fpath)
+                if status == "fail":
+                    raise Exception("Apply reported failure: " + (msg or "<no-text>"))
+                if status != "success":
+                    print(f"[w{self.idx:02d}] {os.path.basename(fpath)}: no clear apply result ({msg!r})")
+            return
+        with self.bound():
+            if not self._logged_in:
+                login(self.url)
+                self._logged_in = True
+            open_nf_page(nf, self.url)
+            for fpath in files:
+                process_file(fpath)
+
+    def fail(self, label):
+        """Record an error step (and force a clean login next time)."""
+        self._logged_in = False
+        if self._rest is not None:
+            self._rest.logged_in = False
+        if self._driver is not None:
+            with self.bound():
+                self.step.snap(label, html=True)
+
+    def close(self):
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+        if self._rest is not None:
+            self._rest.close()
+            self._rest = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------------- Upload pool ----------------
+def build_lanes(config_dir=CONFIG_DIR, urls=EMS_URLS, nfs=UPLOAD_NFS):
+    """
+    One lane per (EMS url, nf): the sorted *_<nf>.json files of CONFIG_DIR.
+    Lanes are independent and run concurrently; files inside a lane run in order.
+    """
+    if not os.path.isdir(config_dir):
+        raise Exception(f"CONFIG_DIR '{config_dir}' not found")
+    files = sorted(os.listdir(config_dir))
+    if not files:
+        print("No files found in", config_dir)
+    lanes = []
+    for nf in nfs:
+        nf_files = [os.path.abspath(os.path.join(config_dir, f)) for f in files
+                    if f.lower().endswith(f"_{nf}.json")]
+        if not nf_files:
+            continue
+        for url in urls:
+            lanes.append((url, nf, nf_files))
+    # longest lanes first so the slowest one starts as early as possible
+    lanes.sort(key=lambda lane: -len(lane[2]))
+    return lanes
+
+def _take_lane(pending, lock, url):
+    with lock:
+        if not pending:
+            return None
+        for i, lane in enumerate(pending):
+            if lane[0] == url:
+                return pending.pop(i)
+        return pending.pop(0)
+
+def validate_lanes(lanes):
+    """Dry run: parse every lane file and count the values verification will look for; no browser."""
+    seen, bad = set(), 0
+    for _, nf, files in lanes:
+        for fpath in files:
+            if fpath in seen:
+                continue
+            seen.add(fpath)
+            try:
+                with open(fpath, encoding="utf-8") as fh:
+                    json.load(fh)
+                print(f"  ok   {nf:5s} {os.path.basename(fpath)}  fields={len(expected_fields(fpath))}")
+            except (OSError, ValueError) as e:
+                bad += 1
+                print(f"  FAIL {nf:5s} {os.path.basename(fpath)}  {e}")
+    print(f"Dry run: {len(lanes)} lane(s), {len(seen)} file(s), {bad} invalid")
+    return bad == 0
+
+def _run_worker(idx, pending, lock, results, backend=EMS_BACKEND, debug_dir=DEBUG_DIR):
+    up = Uploader(url=None, backend=backend, debug_dir=os.path.join(debug_dir, f"w{idx:02d}"), idx=idx)
+    try:
+        while True:
+            lane = _take_lane(pending, lock, up.url)
+            if lane is None:
+                return
+            url, nf, files = lane
+            t0 = time.time()
+            up.retarget(url)
+            rc = 1
+            try:
+                up.upload(nf, files)
+                rc = 0
+                results.append((idx, url, nf, len(files), "ok", time.time() - t0, ""))
+            except Exception as e:
+                print(f"[w{idx:02d}] lane {nf}@{url} failed:", e)
+                traceback.print_exc()
+                up.fail(f"S_ERR_lane_{nf}")   # also forces a clean login before the next lane
+                results.append((idx, url, nf, len(files), "fail", time.time() - t0, str(e)))
+            perf_trace.record(f"upload {nf}", t0, host=urlparse(url).hostname or url, files=len(files),
+                              rc=rc, worker=idx)
+    finally:
+        up.close()
+
+def run_pool(lanes, workers=UPLOAD_WORKERS, backend=EMS_BACKEND, debug_dir=DEBUG_DIR):
+    """
+    Work through the lanes with `workers` Uploaders (logged-in browsers, or REST sessions
+    with backend "http"). Worker 0 runs on the calling thread.
+    """
+    pending = list(lanes)
+    lock = threading.Lock()
+    results = []
+    n = max(1, min(workers, len(pending)))
+    targets = len({lane[0] for lane in pending})
+    print(f"Upload pool: {len(pending)} lane(s), {n} worker(s), targets={targets}, backend={backend}")
+    t0 = time.time()
+    threads = []
+    for idx in range(1, n):
+        t = threading.Thread(target=_run_worker, args=(idx, pending, lock, results, backend, debug_dir),
+                             name=f"upload-w{idx:02d}", daemon=True)
+        t.start()
+        threads.append(t)
+    _run_worker(0, pending, lock, results, backend, debug_dir)
+    for t in threads:
+        t.join()
+    wall = time.time() - t0
+
+    print("---- upload pool summary ----")
+    for idx, url, nf, count, status, secs, err in sorted(results, key=lambda r: -r[5]):
+        print(f"  w{idx:02d} {status:4s} {nf:5s} files={count:<3d} {secs:7.1f}s  {url}" + (f"  ({err})" if err else ""))
+    serial = sum(r[5] for r in results)
+    print(f"  wall={wall:.1f}s  sum-of-lanes={serial:.1f}s  slowest-lane={max([r[5] for r in results] or [0]):.1f}s")
+    return results
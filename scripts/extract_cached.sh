@@ -0,0 +1,99 @@
+#!/usr/bin/env bash
+# scripts/extract_cached.sh
+# Extract a tarball only when it changed since the last extraction.
+#   extract_cached <tarball> <dest_dir>
+# - Key: sha256 of the tarball; taken from <dir of tarball>/.staging_manifest.json (written by
+#   fetch_engine.py) when its size+mtime still match, otherwise computed with sha256sum.
+# - Stamp: <dest_dir>/.<tarball name>.extracted = digest + "size mtime path" of every archive member.
+#   A matching digest plus unchanged size/mtime of those members (stat only, no reads) skips the
+#   untar; files added to the tree later are ignored, other edited or missing members force a re-extract.
+# - Members the pipeline edits in place match EXTRACT_MUTABLE (default: *.yaml/*.yml/*.sh/*.csv):
+#   nf/ps/cs values patches, the reset.yml / hosts.yaml restore of cluster_reset.sh, the LOW sed on
+#   k8s-cluster.yml, CR stripping of the install scripts. A pristine copy of them is kept in
+#   <dest_dir>/.<tarball name>.pristine and stamped there; a hit copies it back over the tree, so
+#   every run starts from the tarball's values (a LOW run's edits never leak into a later MEDIUM one).
+# - Extraction uses pigz when available (parallel decompression), plain gzip otherwise.
+# - EXTRACT_FORCE=1 always re-extracts. Concurrent callers on one node are serialized (flock).
+# Used remotely by cluster_install.sh / fetch_build.sh / fetch_engine.py (piped to `bash -s`);
+# run directly it just calls extract_cached "$@".
+
+extract_cached(){
+  local fd rc=0
+  mkdir -p "$2"
+  if command -v flock >/dev/null 2>&1; then
+    exec {fd}>"$2/.$(basename "$1").lock"; flock "$fd"
+  fi
+  _extract_cached "$@" || rc=$?
+  [[ -n "${fd:-}" ]] && exec {fd}>&-
+  return "$rc"
+}
+
+_extract_cached(){
+  local tarball="$1" dest="$2"
+  local name stamp size mtime digest=""
+  name="$(basename "$tarball")"
+  stamp="$dest/.${name}.extracted"
+  size="$(stat -c %s "$tarball")"; mtime="$(stat -c %Y "$tarball")"
+
+  # digest: trust the staging manifest if it still describes this file
+  local manifest; manifest="$(dirname "$tarball")/.staging_manifest.json"
+  if [[ -f "$manifest" ]] && command -v python3 >/dev/null 2>&1; then
+    digest="$(python3 - "$manifest" "$name" "$size" "$mtime" <<'PY' 2>/dev/null || true
+import json, sys
+e = json.load(open(sys.argv[1])).get("artifacts", {}).get(sys.argv[2]) or {}
+if e.get("size") == int(sys.argv[3]) and e.get("mtime") == int(sys.argv[4]):
+    print(e.get("sha256", ""))
+PY
+)"
+  fi
+  [[ -n "$digest" ]] || digest="$(sha256sum "$tarball" | awk '{print $1}')"
+
+  local pristine="$dest/.${name}.pristine" mutable="${EXTRACT_MUTABLE:-\.(ya?ml|sh|csv)\$}"
+  tree_listing(){  # stdin: member paths -> "size mtime path"; mutable members as found in the pristine copy
+    local paths; paths="$(cat)"
+    { grep -Ev "$mutable" <<<"$paths" || true; } | (cd "$dest" && xargs -r -d '\n' stat -c '%s %Y %n' 2>/dev/null)
+    { grep -E "$mutable" <<<"$paths" || true; } | (cd "$pristine" 2>/dev/null && xargs -r -d '\n' stat -c '%s %Y %n' 2>/dev/null)
+  }
+
+  if [[ "${EXTRACT_FORCE:-0}" != "1" && -f "$stamp" ]] \
+     && [[ "$(sed -n 's/^# digest //p' "$stamp")" == "$digest" ]]; then
+    if cmp -s <(grep -v '^#' "$stamp") <(grep -v '^#' "$stamp" | cut -d' ' -f3- | tree_listing); then
+      # undo the previous run's in-place edits (cp -p keeps the stamped mtimes)
+      if grep -v '^#' "$stamp" | cut -d' ' -f3- | { grep -E "$mutable" || true; } |
+           (cd "$pristine" && xargs -r -d '\n' cp -p --parents -t ..); then
+        echo "[EXTRACT] $name unchanged (sha256 ${digest:0:12}); tree verified, edited files restored, skipping untar"
+        return 0
+      fi
+      echo "[EXTRACT] $name: restoring the edited files from $pristine failed; re-extracting"
+    else
+      echo "[EXTRACT] $name: extracted tree differs from stamp; re-extracting"
+    fi
+  fi
+
+  local t0=$SECONDS list
+  list="$(mktemp)"
+  if command -v pigz >/dev/null 2>&1; then
+    echo "[EXTRACT] Extracting $name into $dest (pigz) ..."
+    tar -C "$dest" -I pigz -xvf "$tarball" > "$list" || { rm -f "$list"; return 1; }
+  else
+    echo "[EXTRACT] Extracting $name into $dest ..."
+    tar -C "$dest" -xvzf "$tarball" > "$list" || { rm -f "$list"; return 1; }
+  fi
+
+  rm -rf "$pristine"; mkdir -p "$pristine"
+  { grep -v '/$' "$list" | grep -E "$mutable" || true; } |
+    (cd "$dest" && xargs -r -d '\n' cp -p --parents -t ".${name}.pristine") || { rm -f "$list"; return 1; }
+
+  {
+    echo "# digest $digest"
+    echo "# tarball $name $size"
+    grep -v '/$' "$list" | LC_ALL=C sort -u | tree_listing || true
+  } > "$stamp.tmp.$$" && mv -f "$stamp.tmp.$$" "$stamp"
+  rm -f "$list"
+  echo "[EXTRACT] $name extracted in $((SECONDS - t0))s ($(grep -vc '^#' "$stamp") files, stamp $stamp)"
+}
+
+if [[ "${BASH_SOURCE[0]:-}" == "$0" ]]; then
+  set -euo pipefail
+  extract_cached "$@"
+fi
@@ -3,7 +3,10 @@
 # - BUILD host: password-based auth via sshpass (BUILD_SRC_PASS)
 # - CN servers: key-based auth (CN_SSH_KEY), default user root
 # - Destination on CN: derived from NEW_BUILD_PATH + /<BASE>[/<TAG>]
-# - Extraction: controlled by EXTRACT_BUILD_TARBALLS (true/yes/y/1)
+# - Extraction: controlled by EXTRACT_BUILD_TARBALLS (true/yes/y/1); skipped when unchanged (extract_cached.sh)
+# - FETCH_ENGINE=python: one build-host read per tarball, concurrent CN uploads (fetch_engine.py)
+#   incremental via <dest>/.staging_manifest.json (sha256-verified; FETCH_FORCE=1 re-sends all,
+#   FETCH_VERIFY=size for a cheaper check, FETCH_SRC_HASH=1 to hash on the build host)
 
 set -euo pipefail
 
@@ -69,6 +72,18 @@ CN_USER="${CN_USER:-root}"
 SSH_CN=(ssh -o StrictHostKeyChecking=no -i "$CN_SSH_KEY")
 SCP_CN=(scp -o StrictHostKeyChecking=no -i "$CN_SSH_KEY")
 
+# Shared per-run ssh masters (scripts/ssh_pool.sh; no-op unless the pipeline started a pool)
+source "$(dirname "${BASH_SOURCE[0]}")/ssh_pool.sh" 2>/dev/null || true
+
+# Parsed + validated server inventory (scripts/inventory.sh -> INV_* arrays)
+source "$(dirname "${BASH_SOURCE[0]}")/inventory.sh"
+
+# Timing spans (scripts/perf_trace.sh; no-op unless TRACE_FILE is set)
+source "$(dirname "${BASH_SOURCE[0]}")/perf_trace.sh"
+
+# Resume checkpoints (scripts/checkpoint.sh; no-op unless CHECKPOINT_DIR is set)
+source "$(dirname "${BASH_SOURCE[0]}")/checkpoint.sh"
+
 # ---------- sanity/auth checks ----------
 echo "Targets from ${SERVER_FILE}:"
 awk 'NF && $1 !~ /^#/' "$SERVER_FILE" || true
@@ -109,33 +124,45 @@ readarray -t BIN_LIST < <(
 echo "ℹ️  BIN files found: ${#BIN_LIST[@]}"
 echo
 
+# ---------- python fan-out engine (optional) ----------
+# FETCH_ENGINE=python: read each tarball from the build host once into a local cache
+# (FETCH_CACHE_DIR) and push it to all CNs concurrently (FETCH_CONCURRENCY hosts at a time).
+if [[ "${FETCH_ENGINE:-bash}" == "python" ]]; then
+  engine_args=(
+    --src "${BUILD_SRC_USER}@${BUILD_SRC_HOST}" --src-dir "$FOUND_DIR"
+    --require "$TRIL_FILE"
+    --server-file "$SERVER_FILE"
+    --dest "$(normalize_dest "$NEW_BUILD_PATH" "$BASE" "$TAG")"
+    --cn-user "$CN_USER" --key "$CN_SSH_KEY"
+  )
+  for full in "${BIN_LIST[@]}"; do
+    [[ -n "$full" ]] && engine_args+=(--optional "$(basename "$full")")
+  done
+  if bool_yes "$EXTRACT_BUILD_TARBALLS"; then
+    engine_args+=(--extract "TRILLIUM_5GCN_CNF_REL_${BASE}")
+  fi
+  exec python3 "$(dirname "$0")/fetch_engine.py" "${engine_args[@]}"
+fi
+
 # ---------- per-CN host copy ----------
 any_failed=0
 
+inventory_load "$SERVER_FILE" || { echo "❌ Invalid server inventory $SERVER_FILE"; exit 2; }
+
 # We strictly ignore any per-line path and always derive from NEW_BUILD_PATH
-while IFS= read -r raw || [[ -n "${raw:-}" ]]; do
-  line="$(printf '%s' "${raw:-}" | tr -d '\r')"
-  [[ -z "$line" || "${line:0:1}" == "#" ]] && continue
-
-  host_ip=""
-  # Accept "name:ip[:whatever]" or bare IP
-  if [[ "$line" == *:* ]]; then
-    IFS=':' read -r _name ip _maybe <<<"$line"
-    host_ip="$(echo -n "${ip:-}" | xargs)"
-  else
-    host_ip="$(echo -n "$line" | xargs)"
-  fi
-  [[ -z "$host_ip" ]] && { echo "⚠️  Skipping malformed line: $line"; continue; }
+for host_ip in "${INV_IP[@]}"; do
+  t0="$(trace_now)"
 
   # Destination dir on CN derived from NEW_BUILD_PATH + BASE[/TAG]
   DEST_DIR="$(normalize_dest "$NEW_BUILD_PATH" "$BASE" "$TAG")"
+  if ckpt_skip fetched "$host_ip"; then echo; continue; fi
 
   echo "🧩 Target CN: $host_ip"
   echo "📁 Dest dir : $DEST_DIR"
 
   # Create destination dir on CN
   if ! "${SSH_CN[@]}" "${CN_USER}@${host_ip}" "mkdir -p '$DEST_DIR' && chmod 755 '$DEST_DIR'"; then
-    echo "❌ Failed to create $DEST_DIR on $host_ip"; any_failed=1; echo; continue
+    echo "❌ Failed to create $DEST_DIR on $host_ip"; any_failed=1; trace_span stage "$host_ip" "$t0" rc=1; echo; continue
   fi
 
   # Copy TRILLIUM (remote→remote) via scp -3; fall back to pipe if -3 fails
@@ -152,7 +179,7 @@ while IFS= read -r raw || [[ -n "${raw:-}" ]]; do
   fi
 
   if [[ $copy_ok -ne 1 ]]; then
-    echo "❌ Failed to copy $TRIL_FILE to $host_ip:$DEST_DIR"; any_failed=1; echo; continue
+    echo "❌ Failed to copy $TRIL_FILE to $host_ip:$DEST_DIR"; any_failed=1; trace_span stage "$host_ip" "$t0" rc=1; echo; continue
   fi
 
   # Copy BINs (if any) one by one (optional)
@@ -171,15 +198,16 @@ while IFS= read -r raw || [[ -n "${raw:-}" ]]; do
 
   # Verify TRILLIUM on CN
   if ! "${SSH_CN[@]}" "${CN_USER}@${host_ip}" "test -s '$DEST_DIR/$TRIL_FILE'"; then
-    echo "❌ Copy verification failed for $TRIL_FILE on $host_ip:$DEST_DIR"; any_failed=1; echo; continue
+    echo "❌ Copy verification failed for $TRIL_FILE on $host_ip:$DEST_DIR"; any_failed=1; trace_span stage "$host_ip" "$t0" rc=1; echo; continue
   fi
 
   # --------- NEW: Optional extraction on CN (controlled by EXTRACT_BUILD_TARBALLS) ---------
   if bool_yes "$EXTRACT_BUILD_TARBALLS"; then
     echo "🗜️  Extracting $TRIL_FILE on ${host_ip}:${DEST_DIR}"
-    # Extract into DEST_DIR; tolerate re-run if directory already exists
-    if ! "${SSH_CN[@]}" "${CN_USER}@${host_ip}" "cd '$DEST_DIR' && tar -xvzf '$TRIL_FILE'"; then
-      echo "❌ Failed to extract $TRIL_FILE on $host_ip"; any_failed=1; echo; continue
+    # Extract into DEST_DIR; skipped when the tarball digest and extracted tree match the last stamp
+    if ! "${SSH_CN[@]}" "${CN_USER}@${host_ip}" bash -s -- "$DEST_DIR/$TRIL_FILE" "$DEST_DIR" \
+         < <(cat "$(dirname "$0")/extract_cached.sh"; echo 'extract_cached "$1" "$2"'); then
+      echo "❌ Failed to extract $TRIL_FILE on $host_ip"; any_failed=1; trace_span stage "$host_ip" "$t0" rc=1; echo; continue
     fi
 
     # Quick post-check: directory should exist after untar
@@ -195,8 +223,10 @@ while IFS= read -r raw || [[ -n "${raw:-}" ]]; do
   # ----------------------------------------------------------------------
 
   echo "✅ Build files staged on ${host_ip}:${DEST_DIR}"
+  trace_span stage "$host_ip" "$t0" rc=0
+  ckpt_done fetched --proof "$DEST_DIR/$TRIL_FILE" "$host_ip"
   echo
-done < "$SERVER_FILE"
+done
 
 # ---------- result ----------
 if [[ $any_failed -ne 0 ]]; then
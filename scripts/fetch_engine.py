@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+fetch_engine.py - fan-out build staging for fetch_build.sh (FETCH_ENGINE=python).
+
+Each artifact is read from the BUILD host once into a local content-addressed cache
+(FETCH_CACHE_DIR/blobs/<sha256>, indexed by source path + size + mtime so an unchanged
+tarball is not read again on the next run), then pushed to all CN servers concurrently
+(--concurrency hosts at a time). Uploads of the TRILLIUM tarball start as soon as it is
+cached, while the BIN tarballs are still being read.
+
+Incremental staging: every CN keeps <dest>/.staging_manifest.json (name -> sha256, size, mtime,
+source). An artifact whose manifest entry matches the cached sha256 and whose on-disk size/mtime
+still match is not sent again; a same-size file without a manifest entry is adopted after a
+sha256sum on the CN; a leftover <name>.part whose prefix hashes the same is resumed instead of
+restarted. Every transferred file is verified on the CN (sha256sum, or size with --verify size)
+before the manifest is rewritten, so later stages can trust it. --force re-sends everything.
+--extract runs extract_cached.sh on the CN, which reuses that manifest's sha256 as the extraction
+key and skips the untar when the previously extracted tree is still intact.
+--src-hash runs sha256sum on the build host instead of trusting size+mtime for the cache.
+The cache is capped at FETCH_CACHE_MAX_GB (--cache-max-gb, 0 = no cap): after a new blob is stored,
+least-recently-used blobs are evicted, never one that a running fetch_engine has looked up or stored.
+
+Per-host and build-host throughput is printed at the end. Exit code 1 if any CN failed
+(TRILLIUM copy or extraction); a failed BIN copy only warns, as in the bash path.
+
+Build-host password comes from BUILD_SRC_PASS (passed to sshpass via the environment).
+CN connections reuse the per-run ssh masters of ssh_pool.py when SSH_POOL_DIR is set.
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import shlex
+import hashlib
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import inventory
+import ssh_pool
+import perf_trace
+import checkpoint
+
+CHUNK = 1 << 20
+MANIFEST = ".staging_manifest.json"
+EXTRACT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "extract_cached.sh")
+SSH_OPTS = ["-o", "StrictHostKeyChecking=no"]
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def human(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.1f} {unit}"
+        n /= 1024.0
+
+
+def rate(nbytes, secs):
+    return f"{nbytes / max(secs, 1e-6) / 1e6:.1f} MB/s"
+
+
+class BuildSource:
+    """ssh to the build host (sshpass -e, password from BUILD_SRC_PASS)."""
+
+    def __init__(self, target):
+        self.target = target
+        self.env = dict(os.environ, SSHPASS=os.environ.get("BUILD_SRC_PASS", ""))
+
+    def cmd(self, remote):
+        return ["sshpass", "-e", "ssh", *SSH_OPTS, "-o", "BatchMode=no", self.target, remote]
+
+    def run(self, remote):
+        return subprocess.run(self.cmd(remote), env=self.env, capture_output=True, text=True)
+
+    def stat(self, path):
+        r = self.run(f"stat -c '%s %Y' {shlex.quote(path)}")
+        if r.returncode != 0:
+            raise RuntimeError(f"stat {path} on {self.target} failed: {r.stderr.strip()}")
+        size, mtime = r.stdout.split()
+        return int(size), int(mtime)
+
+    def sha256(self, path):
+        r = self.run(f"sha256sum {shlex.quote(path)}")
+        if r.returncode != 0:
+            raise RuntimeError(f"sha256sum {path} on {self.target} failed: {r.stderr.strip()}")
+        return r.stdout.split()[0]
+
+    def open_stream(self, path):
+        return subprocess.Popen(self.cmd(f"cat {shlex.quote(path)}"), env=self.env, stdout=subprocess.PIPE)
+
+
+class Blob:
+    def __init__(self, name, path, sha256, size, cached, secs):
+        self.name = name
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.cached = cached
+        self.secs = secs
+
+
+class BuildCache:
+    """
+    Local content-addressed store: blobs/<sha256> plus index.json mapping
+    '<build host>:<path>' -> {size, mtime, sha256, used_at}. The index is guarded by flock so
+    two jobs on the same agent can share the cache.
+
+    Blobs this process hands out are pinned in tmp/live.<pid> until close(); eviction (under the
+    index lock) skips every blob pinned by a live process and removes the least recently used
+    others until the blobs fit in max_bytes.
+    """
+
+    def __init__(self, root, max_bytes=0):
+        self.root = root
+        self.blobs = os.path.join(root, "blobs")
+        self.tmp = os.path.join(root, "tmp")
+        os.makedirs(self.blobs, exist_ok=True)
+        os.makedirs(self.tmp, exist_ok=True)
+        self.index_path = os.path.join(root, "index.json")
+        self.lock = threading.Lock()
+        self.max_bytes = max_bytes
+        self.live_path = os.path.join(self.tmp, f"live.{os.getpid()}")
+        self.pinned = set()
+
+    def _pin(self, digest):
+        """Called under the index lock, so a concurrent eviction sees the pin."""
+        if digest not in self.pinned:
+            self.pinned.add(digest)
+            with open(self.live_path, "a", encoding="utf-8") as fh:
+                fh.write(digest + "\n")
+
+    def close(self):
+        try:
+            os.unlink(self.live_path)
+        except OSError:
+            pass
+
+    def _live_digests(self):
+        """Blobs pinned by any running process; pin files of dead ones are dropped."""
+        live = set()
+        for name in os.listdir(self.tmp):
+            if not name.startswith("live."):
+                continue
+            path = os.path.join(self.tmp, name)
+            try:
+                os.kill(int(name[5:]), 0)
+            except ProcessLookupError:
+                os.unlink(path)
+                continue
+            except (ValueError, PermissionError):
+                pass
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    live.update(fh.read().split())
+            except OSError:
+                pass
+        return live
+
+    def _evict(self, index):
+        if self.max_bytes <= 0:
+            return
+        sizes = {}
+        for name in os.listdir(self.blobs):
+            try:
+                st = os.stat(os.path.join(self.blobs, name))
+            except OSError:
+                continue
+            sizes[name] = (st.st_size, st.st_mtime)
+        total = sum(size for size, _ in sizes.values())
+        if total <= self.max_bytes:
+            return
+        last_used = {d: mtime for d, (_, mtime) in sizes.items()}
+        for e in index.values():
+            if e["sha256"] in last_used:
+                last_used[e["sha256"]] = max(last_used[e["sha256"]], e.get("used_at", e.get("cached_at", 0)))
+        live = self._live_digests() | self.pinned
+        for digest in sorted((d for d in sizes if d not in live), key=lambda d: last_used[d]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.blobs, digest))
+            except OSError:
+                continue
+            total -= sizes[digest][0]
+            for key in [k for k, e in index.items() if e["sha256"] == digest]:
+                del index[key]
+            log(f"🧹 cache: evicted {digest[:12]} ({human(sizes[digest][0])})")
+        if total > self.max_bytes:
+            log(f"⚠️  cache: {human(total)} still above the {human(self.max_bytes)} cap (rest in use)")
+
+    def _with_index(self, fn):
+        with self.lock, open(self.index_path + ".lock", "a") as lk:
+            fcntl.flock(lk, fcntl.LOCK_EX)
+            try:
+                with open(self.index_path, encoding="utf-8") as fh:
+                    index = json.load(fh)
+            except (OSError, ValueError):
+                index = {}
+            result = fn(index)
+            tmp = f"{self.index_path}.{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(index, fh, indent=1, sort_keys=True)
+            os.replace(tmp, self.index_path)
+            return result
+
+    def lookup(self, key, size, mtime):
+        def get(index):
+            e = index.get(key)
+            if e and e["size"] == size and e["mtime"] == mtime:
+                path = os.path.join(self.blobs, e["sha256"])
+                if os.path.isfile(path) and os.path.getsize(path) == size:
+                    e["used_at"] = int(time.time())
+                    self._pin(e["sha256"])
+                    return e["sha256"]
+            return None
+        return self._with_index(get)
+
+    def record(self, key, size, mtime, sha256):
+        def put(index):
+            now = int(time.time())
+            index[key] = {"size": size, "mtime": mtime, "sha256": sha256, "cached_at": now, "used_at": now}
+            self._pin(sha256)
+            self._evict(index)
+        self._with_index(put)
+
+    def fetch(self, src, remote_path, src_hash=False):
+        name = os.path.basename(remote_path)
+        key = f"{src.target}:{remote_path}"
+        t0 = time.time()
+        size, mtime = src.stat(remote_path)
+        digest = self.lookup(key, size, mtime)
+        if src_hash:
+            # content address straight from the build host: a renamed/touched tarball is still a hit
+            want = src.sha256(remote_path)
+            path = os.path.join(self.blobs, want)
+            digest = want if os.path.isfile(path) and os.path.getsize(path) == size else None
+            if digest:
+                self.record(key, size, mtime, digest)
+        if digest:
+            return Blob(name, os.path.join(self.blobs, digest), digest, size, True, time.time() - t0)
+
+        tmp = os.path.join(self.tmp, f"{name}.{os.getpid()}.{threading.get_ident()}")
+        h = hashlib.sha256()
+        got = 0
+        proc = src.open_stream(remote_path)
+        try:
+            with open(tmp, "wb") as out:
+                while True:
+                    chunk = proc.stdout.read(CHUNK)
+                    if not chunk:
+                        break
+                    h.update(chunk)
+                    out.write(chunk)
+                    got += len(chunk)
+        finally:
+            proc.stdout.close()
+            rc = proc.wait()
+        if rc != 0 or got != size:
+            os.unlink(tmp)
+            raise RuntimeError(f"read of {remote_path} from {src.target} failed (rc={rc}, {got}/{size} bytes)")
+        digest = h.hexdigest()
+        if src_hash and digest != want:
+            os.unlink(tmp)
+            raise RuntimeError(f"read of {remote_path} does not match the build host sha256")
+        os.replace(tmp, os.path.join(self.blobs, digest))
+        self.record(key, size, mtime, digest)
+        perf_trace.record(f"read {name}", t0, host=src.target.split("@")[-1], bytes=got)
+        return Blob(name, os.path.join(self.blobs, digest), digest, size, False, time.time() - t0)
+
+
+class CNHost:
+    """ssh to one CN (key auth); rides the pipeline's ssh_pool master when one is running."""
+
+    def __init__(self, ip, user, key):
+        self.ip = ip
+        self.user = user
+        self.target = f"{user}@{ip}"
+        self.key = key
+
+    def cmd(self, remote):
+        return ["ssh", *ssh_pool.ssh_opts(), *SSH_OPTS, "-i", self.key, self.target, remote]
+
+    def run(self, remote, **kw):
+        ssh_pool.record("fetch_engine.py", self.ip, self.user)
+        return subprocess.run(self.cmd(remote), **kw)
+
+    def probe(self, dest_dir, names):
+        """One round trip: the staging manifest plus size/mtime of each artifact and its .part."""
+        q = shlex.quote
+        script = (f"cd {q(dest_dir)} || exit 1; cat {MANIFEST} 2>/dev/null || echo '{{}}'; echo '@@'; "
+                  f"for f in {' '.join(q(n) for n in names)}; do "
+                  f"echo \"$f $(stat -c '%s %Y' \"$f\" 2>/dev/null || echo '-1 0') "
+                  f"$(stat -c %s \"$f.part\" 2>/dev/null || echo -1)\"; done")
+        r = self.run(script, capture_output=True, text=True)
+        if r.returncode != 0:
+            return {}, {}
+        head, _, tail = r.stdout.partition("@@")
+        try:
+            manifest = json.loads(head) or {}
+        except ValueError:
+            manifest = {}
+        files = {}
+        for line in tail.splitlines():
+            parts = line.split()
+            if len(parts) == 4:
+                files[parts[0]] = (int(parts[1]), int(parts[2]), int(parts[3]))
+        return manifest, files
+
+    def remote_sha256(self, path, length=None):
+        q = shlex.quote(path)
+        cmd = f"head -c {length} {q} | sha256sum" if length is not None else f"sha256sum {q}"
+        r = self.run(cmd, capture_output=True, text=True)
+        return r.stdout.split()[0] if r.returncode == 0 and r.stdout else ""
+
+    def mtime(self, path):
+        r = self.run(f"stat -c %Y {shlex.quote(path)}", capture_output=True, text=True)
+        return int(r.stdout.strip()) if r.returncode == 0 and r.stdout.strip() else 0
+
+    def push(self, blob, dest_dir, offset=0):
+        """
+        Stream a cached blob to dest_dir/<name> via <name>.part, renamed when complete.
+        offset > 0 appends the remainder to an existing .part (resume).
+        """
+        dest = f"{dest_dir}/{blob.name}"
+        part = shlex.quote(dest + ".part")
+        remote = f"cat {'>>' if offset else '>'} {part} && mv -f {part} {shlex.quote(dest)}"
+        with open(blob.path, "rb") as fh:
+            fh.seek(offset)
+            return self.run(remote, stdin=fh).returncode == 0
+
+    def write_manifest(self, dest_dir, manifest):
+        tmp = shlex.quote(f"{dest_dir}/{MANIFEST}.tmp")
+        remote = f"cat > {tmp} && mv -f {tmp} {shlex.quote(dest_dir + '/' + MANIFEST)}"
+        data = json.dumps(manifest, indent=1, sort_keys=True).encode()
+        return self.run(remote, input=data).returncode == 0
+
+
+def _prefix_sha256(path, length):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while length > 0:
+            chunk = fh.read(min(CHUNK, length))
+            if not chunk:
+                break
+            h.update(chunk)
+            length -= len(chunk)
+    return h.hexdigest()
+
+
+def sync_artifact(host, blob, dest_dir, entry, remote, opts):
+    """
+    Bring one artifact on one CN up to date. Returns (action, bytes_sent, manifest_entry) where
+    action is unchanged | adopted | resumed | sent, or raises RuntimeError.
+    """
+    path = f"{dest_dir}/{blob.name}"
+    size, mtime, part = remote
+    if not opts.force and size == blob.size:
+        if entry.get("sha256") == blob.sha256 and entry.get("size") == size and entry.get("mtime") == mtime:
+            return "unchanged", 0, entry
+        if opts.verify == "sha256" and host.remote_sha256(path) == blob.sha256:
+            return "adopted", 0, {"sha256": blob.sha256, "size": size, "mtime": mtime}
+
+    offset = 0
+    if not opts.force and 0 < part < blob.size and \
+            host.remote_sha256(path + ".part", part) == _prefix_sha256(blob.path, part):
+        offset = part
+    if not host.push(blob, dest_dir, offset):
+        raise RuntimeError(f"copy of {blob.name} failed")
+
+    if opts.verify == "sha256":
+        got = host.remote_sha256(path)
+        if got != blob.sha256:
+            raise RuntimeError(f"sha256 mismatch for {blob.name} on CN ({got[:12] or 'n/a'} != {blob.sha256[:12]})")
+    elif host.probe(dest_dir, [blob.name])[1].get(blob.name, (-1, 0, 0))[0] != blob.size:
+        raise RuntimeError(f"size mismatch for {blob.name} on CN")
+    entry = {"sha256": blob.sha256, "size": blob.size, "mtime": host.mtime(path)}
+    return ("resumed" if offset else "sent"), blob.size - offset, entry
+
+
+def stage_host(host, dest_dir, required, optional, extract_dir, stats, opts):
+    """Sync every artifact to one CN (in order, waiting on each cache future). True on success."""
+    with perf_trace.span("stage", host=host.ip) as sp:
+        ok = _stage_host(host, dest_dir, required, optional, extract_dir, stats, opts)
+        sp.update(rc=0 if ok else 1, bytes=stats.get(host.ip, (0, 0.0))[0])
+    return ok
+
+
+def _stage_host(host, dest_dir, required, optional, extract_dir, stats, opts):
+    t0 = time.time()
+    sent = 0
+    tag = f"[{host.ip}]"
+    if host.run(f"mkdir -p {shlex.quote(dest_dir)} && chmod 755 {shlex.quote(dest_dir)}").returncode != 0:
+        log(f"{tag} ❌ Failed to create {dest_dir}")
+        return False
+    manifest, remote = host.probe(dest_dir, opts.require + opts.optional)
+    artifacts = dict(manifest.get("artifacts") or {})
+    ok = True
+    for fut, must in [(f, True) for f in required] + [(f, False) for f in optional]:
+        try:
+            blob = fut.result()
+        except Exception as e:
+            log(f"{tag} {'❌' if must else '⚠️ '} source unavailable: {e}")
+            if must:
+                ok = False
+                break
+            continue
+        t1 = time.time()
+        try:
+            action, nbytes, entry = sync_artifact(host, blob, dest_dir, artifacts.get(blob.name) or {},
+                                                  remote.get(blob.name, (-1, 0, -1)), opts)
+        except RuntimeError as e:
+            artifacts.pop(blob.name, None)
+            if must:
+                log(f"{tag} ❌ Failed to copy {blob.name} to {host.ip}:{dest_dir}: {e}")
+                ok = False
+                break
+            log(f"{tag} ⚠️  Failed to copy BIN: {blob.name} to {host.ip} (continuing): {e}")
+            continue
+        secs = time.time() - t1
+        perf_trace.record(f"{action} {blob.name}", t1, host=host.ip, bytes=nbytes)
+        entry["source"] = f"{opts.src}:{opts.src_dir.rstrip('/')}/{blob.name}"
+        artifacts[blob.name] = entry
+        sent += nbytes
+        if nbytes:
+            log(f"{tag} 📥 {blob.name} {action} {human(nbytes)} in {secs:.1f}s ({rate(nbytes, secs)}), verified {opts.verify}")
+        else:
+            log(f"{tag} ✅ {blob.name} {action} (sha256 {blob.sha256[:12]})")
+        stats.setdefault(f"{host.ip}:actions", []).append(action)
+
+    if not host.write_manifest(dest_dir, {"version": 1, "staged_at": int(time.time()), "artifacts": artifacts}):
+        log(f"{tag} ⚠️  Could not write {dest_dir}/{MANIFEST}")
+    if not ok:
+        return False
+
+    if extract_dir:
+        tril = required[0].result().name
+        log(f"{tag} 🗜️  Extracting {tril} on {host.ip}:{dest_dir}")
+        with open(EXTRACT_SCRIPT, "rb") as fh:
+            script = fh.read() + b'\nextract_cached "$1" "$2"\n'
+        with perf_trace.span("extract", host=host.ip) as sp:
+            r = host.run(f"bash -s -- {shlex.quote(dest_dir + '/' + tril)} {shlex.quote(dest_dir)}", input=script)
+            sp["rc"] = r.returncode
+        if r.returncode != 0:
+            log(f"{tag} ❌ Failed to extract {tril} on {host.ip}")
+            return False
+        if host.run(f"test -d {shlex.quote(dest_dir + '/' + extract_dir)}").returncode != 0:
+            log(f"{tag} ⚠️  Extraction completed but '{extract_dir}' directory not found on {host.ip} (proceeding)")
+        else:
+            log(f"{tag} ✅ Extracted into {dest_dir}/{extract_dir}")
+
+    stats[host.ip] = (sent, time.time() - t0)
+    log(f"{tag} ✅ Build files staged on {host.ip}:{dest_dir}")
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Read build tarballs once, push them to all CNs concurrently")
+    ap.add_argument("--src", required=True, help="build host as user@host")
+    ap.add_argument("--src-dir", required=True)
+    ap.add_argument("--require", action="append", default=[], help="artifact that must reach every CN")
+    ap.add_argument("--optional", action="append", default=[], help="artifact whose failure only warns")
+    ap.add_argument("--server-file", required=True)
+    ap.add_argument("--dest", required=True, help="destination dir on the CNs")
+    ap.add_argument("--cn-user", default="root")
+    ap.add_argument("--key", required=True, help="CN ssh key")
+    ap.add_argument("--extract", default="", help="extract the first required artifact; expect this dir")
+    ap.add_argument("--concurrency", type=int, default=int(os.environ.get("FETCH_CONCURRENCY", "4")))
+    ap.add_argument("--src-concurrency", type=int, default=int(os.environ.get("FETCH_SRC_CONCURRENCY", "2")))
+    ap.add_argument("--cache-dir", default=os.environ.get("FETCH_CACHE_DIR", "/var/tmp/k8s-installer-build-cache"))
+    ap.add_argument("--cache-max-gb", type=float, default=float(os.environ.get("FETCH_CACHE_MAX_GB", "50")),
+                    help="evict least recently used blobs above this size (0 = no cap)")
+    ap.add_argument("--verify", choices=("sha256", "size"), default=os.environ.get("FETCH_VERIFY", "sha256"),
+                    help="end-to-end check of transferred files on the CN")
+    ap.add_argument("--src-hash", action="store_true", default=os.environ.get("FETCH_SRC_HASH", "0") == "1",
+                    help="sha256sum on the build host instead of trusting size+mtime")
+    ap.add_argument("--force", action="store_true", default=os.environ.get("FETCH_FORCE", "0") == "1",
+                    help="ignore CN manifests and re-send everything")
+    args = ap.parse_args()
+
+    try:
+        hosts = [CNHost(ip, args.cn_user, args.key) for ip in inventory.ips(args.server_file)]
+    except (OSError, inventory.InventoryError) as e:
+        log(f"❌ No CN targets in {args.server_file}: {e}")
+        return 2
+    store = checkpoint.open_store(args.server_file)
+    if store:
+        pending = set(store.pending("fetched", [h.ip for h in hosts]))
+        for h in hosts:
+            if h.ip not in pending:
+                log(f"⏭  {h.ip}: build already staged for this run (checkpoint)")
+        hosts = [h for h in hosts if h.ip in pending]
+        if not hosts:
+            log("🎉 Fetch stage already complete on all CN targets.")
+            return 0
+    src = BuildSource(args.src)
+    cache = BuildCache(args.cache_dir, int(args.cache_max_gb * (1 << 30)))
+    log(f"🚚 Fetch engine: {len(hosts)} CN(s), concurrency={args.concurrency}, cache={args.cache_dir}")
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, args.src_concurrency), thread_name_prefix="src") as src_pool, \
+         ThreadPoolExecutor(max_workers=max(1, args.concurrency), thread_name_prefix="cn") as cn_pool:
+        def cached(name):
+            return src_pool.submit(cache.fetch, src, f"{args.src_dir.rstrip('/')}/{name}", args.src_hash)
+        required = [cached(n) for n in args.require]
+        optional = [cached(n) for n in args.optional]
+        stats = {}
+        futs = {h.ip: cn_pool.submit(stage_host, h, args.dest, required, optional, args.extract, stats, args)
+                for h in hosts}
+        results = {ip: f.result() for ip, f in futs.items()}
+    wall = time.time() - t0
+    cache.close()
+    if store and any(results.values()):
+        store.done("fetched", [ip for ip, ok in results.items() if ok], proof=os.path.join(args.dest, MANIFEST))
+
+    log("---- fetch summary ----")
+    for fut in required + optional:
+        try:
+            b = fut.result()
+        except Exception as e:
+            log(f"  build  ❌ {e}")
+            continue
+        how = "cache hit" if b.cached else f"read {rate(b.size, b.secs)}"
+        log(f"  build  {b.name:50s} {human(b.size):>10s}  {how}  sha256={b.sha256[:12]}")
+    for ip, ok in results.items():
+        sent, secs = stats.get(ip, (0, 0.0))
+        actions = stats.get(f"{ip}:actions", [])
+        counts = ", ".join(f"{a}={actions.count(a)}" for a in ("sent", "resumed", "adopted", "unchanged") if a in actions)
+        log(f"  {ip:15s} {'ok  ' if ok else 'FAIL'} {human(sent):>10s} in {secs:6.1f}s  "
+            f"{rate(sent, secs) if ok else ''}  {counts}")
+    total = sum(stats[ip][0] for ip in results if ip in stats)
+    log(f"  wall={wall:.1f}s  pushed={human(total)}  aggregate={rate(total, wall)}")
+
+    if not all(results.values()):
+        log("❌ One or more CN targets failed during fetch.")
+        return 1
+    log("🎉 Fetch stage completed for all CN targets.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
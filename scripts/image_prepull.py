@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+image_prepull.py - put the PS / CS / NF / EMS container images on every CN before their installers
+run, from one Jenkins-side copy, instead of each CN pulling every image itself.
+
+  1. one ssh per CN reads the images containerd already has (ctr -n k8s.io images ls) and the
+     values files under <NEW_BUILD_PATH>/TRILLIUM_5GCN_CNF_REL_<VER>/{nf,platform,common}-services/scripts;
+     every `image: "<ref>"` line (the ones nf_config.sh rewrites) and every `image:` block
+     (registry / repository / tag, registry defaulting to global.registry) is collected. The
+     rewrites of the config scripts are applied (tag v1 -> <VER>, global.registry docker.io ->
+     the proxy), so pre- and post-render trees give the same list,
+  2. each image missing on some CN is fetched once on the agent, then loaded into every CN that
+     lacks it, hosts in parallel (IMAGE_PREPULL_CONCURRENCY) and IMAGE_PREPULL_PER_HOST images at a
+     time per CN,
+  3. a per-image table is printed (size, agent cache hit or fill time, CNs loaded / present /
+     failed, slowest load) and, with --report, written as JSON.
+
+Modes (--mode, IMAGE_PREPULL_MODE; auto picks the first that applies):
+  registry  IMAGE_MIRROR=<host:port> (a plain-http registry near the CNs): each image is copied there
+            once (skopeo); CNs pull from it over the LAN and tag it back to the original name
+  tar       skopeo or docker on the agent: each image is saved once to IMAGE_CACHE_DIR as a
+            docker-archive (keyed by reference, so builds sharing an image share the file; flock'ed
+            for parallel jobs) and streamed to `ctr -n k8s.io images import -` on each CN. After the
+            loads the cache is pruned from its index: images no longer used by the last
+            IMAGE_CACHE_KEEP_VERSIONS versions go, then the least recently used ones above
+            IMAGE_CACHE_MAX_GB (the current version's images are always kept)
+  pull      nothing on the agent: every CN runs `crictl pull` for its missing images, in parallel,
+            still ahead of the installers
+--from-backoff takes the images of the runner's pods in ImagePullBackOff / ErrImagePull instead of
+the values files (k8s_health_check.sh, IMAGE_PREPULL=1; exit 3 when no pod is in backoff). A failed image is a warning: the installers
+still pull what is missing (--strict makes it exit 1).
+
+Usage:
+  python3 scripts/image_prepull.py --server-file server_pci_map.txt --build-path /home/labadmin/6.3.0/EA3 \\
+      --version 6.3.0_EA3 --key ~/.ssh/jenkins_key [--mode auto] [--list] [--report images.json]
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import fcntl
+import shlex
+import shutil
+import tarfile
+import hashlib
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import inventory
+import perf_trace
+import ssh_pool
+from values_render import REGISTRY
+
+SSH_OPTS = ["-o", "StrictHostKeyChecking=no"]
+SUBDIRS = ("nf-services/scripts", "platform-services/scripts", "common-services/scripts")
+MARK = b"\n__VALUES_TAR__\n"
+BACKOFF = ("ImagePullBackOff", "ErrImagePull")
+
+# Runs on the CN: the image refs containerd has, the marker, then a tar of the values files
+READ_SCRIPT = r'''
+set -euo pipefail
+ROOT="$1"; shift
+ctr -n k8s.io images ls -q 2>/dev/null || true
+printf '\n__VALUES_TAR__\n'
+[[ -n "$ROOT" ]] || exit 0                    # --from-backoff: images only
+cd "$ROOT" 2>/dev/null || { echo "missing $ROOT" >&2; exit 3; }
+find "$@" -maxdepth 1 -name '*.yaml' -print0 2>/dev/null | tar --null -cf - -T -
+'''
+
+QUOTED = re.compile(r'\bimage:\s*["\']([^"\'\s{}]+)["\']')
+UNQUOTED = re.compile(r'^\s*(?:-\s+)?image:\s*([^\s"\'#{}\[]+)\s*(?:#.*)?$')
+BLOCK = re.compile(r'^(\s*)(?:-\s+)?image:\s*(?:#.*)?$')
+CHILD = re.compile(r'^\s*(registry|repository|name|tag):\s*["\']?([^\s"\'#{}]*)["\']?\s*(?:#.*)?$')
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def normalize(ref):
+    """containerd form: docker.io/library/redis:latest for 'redis'."""
+    name, _, digest = ref.partition("@")
+    first = name.split("/", 1)[0]
+    if "/" not in name or not ("." in first or ":" in first or first == "localhost"):
+        name = "docker.io/" + (name if "/" in name else "library/" + name)
+    if not digest and ":" not in name.rsplit("/", 1)[-1]:
+        name += ":latest"
+    return name + ("@" + digest if digest else "")
+
+
+def global_registry(text):
+    """global.registry of a values file ('' if none); docker.io is what ps_config.sh rewrites."""
+    in_global = False
+    for line in text.splitlines():
+        if re.match(r"^global:\s*(#.*)?$", line):
+            in_global = True
+        elif in_global and line.strip() and not line[0].isspace():
+            break
+        elif in_global:
+            m = re.match(r"^\s+registry:\s*[\"']?([^\s\"'#{}]+)", line)
+            if m:
+                return REGISTRY if m.group(1) == "docker.io" else m.group(1)
+    return ""
+
+
+def images_in(text, ver, default_registry=""):
+    """Image refs of one values file, with the config scripts' rewrites applied."""
+    refs = []
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        found = QUOTED.findall(line)
+        m = UNQUOTED.match(line)
+        if m:
+            found.append(m.group(1))
+        b = BLOCK.match(line)
+        if b:
+            indent, keys = len(b.group(1)), {}
+            for child in lines[i + 1:]:
+                if child.strip() and len(child) - len(child.lstrip()) <= indent:
+                    break
+                c = CHILD.match(child)
+                if c and c.group(2):
+                    keys.setdefault(c.group(1), c.group(2))
+            repo = keys.get("repository") or keys.get("name")
+            if repo:
+                reg = keys.get("registry") or default_registry
+                ref = f"{reg}/{repo}" if reg and not repo.startswith(reg + "/") else repo
+                found.append(ref + (f":{keys['tag']}" if keys.get("tag") and ":" not in repo.rsplit("/", 1)[-1] else ""))
+        for ref in found:
+            if ref.endswith(":v1"):
+                ref = ref[:-3] + ":" + ver
+            refs.append(normalize(ref))
+    return refs
+
+
+def short(ref):
+    return ref.rsplit("/", 1)[-1]
+
+
+class CNHost:
+    """ssh to one CN (key auth); rides the pipeline's ssh_pool master when one is running."""
+
+    def __init__(self, ip, user, key):
+        self.ip = ip
+        self.user = user
+        self.target = f"{user}@{ip}"
+        self.key = key
+
+    def run(self, remote, **kw):
+        ssh_pool.record("image_prepull.py", self.ip, self.user)
+        return subprocess.run(["ssh", *ssh_pool.ssh_opts(), *SSH_OPTS, "-i", self.key, self.target, remote],
+                              capture_output=True, **kw)
+
+    def read(self, root):
+        """(refs containerd has, {values file: text}) in one round trip."""
+        r = self.run("bash -s -- " + " ".join(shlex.quote(a) for a in (root, *SUBDIRS)), input=READ_SCRIPT.encode())
+        if r.returncode != 0:
+            raise RuntimeError(r.stderr.decode(errors="replace").strip()[-200:] or f"ssh rc={r.returncode}")
+        head, _, body = r.stdout.partition(MARK)
+        have = {normalize(x) for x in head.decode(errors="replace").split() if x and not x.startswith("sha256:")}
+        files = {}
+        if body:
+            with tarfile.open(fileobj=io.BytesIO(body), mode="r:") as tar:
+                for info in tar:
+                    if info.isfile():
+                        files[info.name] = tar.extractfile(info).read().decode("utf-8", "replace")
+        return have, files
+
+    def backoff_images(self):
+        """Images of pods currently in ImagePullBackOff / ErrImagePull."""
+        r = self.run("kubectl get pods -A -o json")
+        if r.returncode != 0:
+            raise RuntimeError(r.stderr.decode(errors="replace").strip()[-200:] or f"kubectl rc={r.returncode}")
+        refs = set()
+        for pod in json.loads(r.stdout or b"{}").get("items", []):
+            st = pod.get("status", {})
+            for cs in st.get("containerStatuses", []) + st.get("initContainerStatuses", []):
+                if (cs.get("state", {}).get("waiting") or {}).get("reason") in BACKOFF:
+                    refs.add(normalize(cs.get("image", "")))
+        return refs
+
+
+class TarCache:
+    """
+    IMAGE_CACHE_DIR/<sha256(ref)[:24]>.tar docker-archives plus index.json (ref -> file, size,
+    versions that used it, used_at). One flock per image, so parallel processes fill each image once.
+    """
+
+    def __init__(self, root, tool):
+        self.root, self.tool = root, tool
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, "index.json")
+
+    def _with_index(self, fn):
+        with open(self.index_path + ".lock", "a") as lk:
+            fcntl.flock(lk, fcntl.LOCK_EX)
+            try:
+                with open(self.index_path, encoding="utf-8") as fh:
+                    index = json.load(fh)
+            except (OSError, ValueError):
+                index = {}
+            result = fn(index)
+            tmp = f"{self.index_path}.{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(index, fh, indent=1, sort_keys=True)
+            os.replace(tmp, self.index_path)
+            return result
+
+    def _index(self, ref, entry):
+        def put(index):
+            old = index.get(ref, {})
+            entry["versions"] = sorted(set(old.get("versions", [])) | set(entry.pop("versions", [])))
+            index[ref] = {**old, **entry}
+        self._with_index(put)
+
+    def _drop(self, index, ref):
+        """Delete one image unless a fill holds its lock (then it stays for the next prune)."""
+        path = os.path.join(self.root, index[ref]["file"])
+        with open(path + ".lock", "a") as lk:
+            try:
+                fcntl.flock(lk, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return False
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        del index[ref]
+        return True
+
+    def prune(self, version, keep_versions, max_bytes):
+        """Drop images outside the last keep_versions versions, then LRU down to max_bytes (0 = no cap).
+        Images used by `version` (this run) are never dropped. Returns [(ref, size, why)]."""
+        def run(index):
+            dropped = []
+            last = {}                       # version -> latest used_at of any of its images
+            for e in index.values():
+                for v in e.get("versions", []):
+                    last[v] = max(last.get(v, 0), e.get("used_at", 0))
+            kept = set(sorted(last, key=last.get, reverse=True)[:max(1, keep_versions)]) | {version}
+            for ref in [r for r, e in index.items() if not kept & set(e.get("versions", []))]:
+                size = index[ref].get("size", 0)
+                if self._drop(index, ref):
+                    dropped.append((ref, size, "old version"))
+            total = sum(e.get("size", 0) for e in index.values())
+            if max_bytes > 0 and total > max_bytes:
+                for ref in sorted((r for r, e in index.items() if version not in e.get("versions", [])),
+                                  key=lambda r: index[r].get("used_at", 0)):
+                    if total <= max_bytes:
+                        break
+                    size = index[ref].get("size", 0)
+                    if self._drop(index, ref):
+                        total -= size
+                        dropped.append((ref, size, "size cap"))
+            return dropped
+        return self._with_index(run)
+
+    def get(self, ref, version):
+        """(path, size, hit). Fills the cache with skopeo or docker on a miss."""
+        path = os.path.join(self.root, hashlib.sha256(ref.encode()).hexdigest()[:24] + ".tar")
+        with open(path + ".lock", "a") as lk:
+            fcntl.flock(lk, fcntl.LOCK_EX)
+            hit = os.path.isfile(path)
+            if not hit:
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+                if self.tool == "skopeo":
+                    cmds = [["skopeo", "copy", "-q", f"docker://{ref}", f"docker-archive:{tmp}:{ref}"]]
+                else:
+                    cmds = [["docker", "pull", "-q", ref], ["docker", "save", "-o", tmp, ref]]
+                for cmd in cmds:
+                    r = subprocess.run(cmd, capture_output=True, text=True)
+                    if r.returncode != 0:
+                        if os.path.exists(tmp):
+                            os.unlink(tmp)
+                        raise RuntimeError(f"{cmd[0]} {cmd[1]}: {r.stderr.strip()[-200:]}")
+                os.replace(tmp, path)
+            size = os.path.getsize(path)
+        self._index(ref, {"file": os.path.basename(path), "size": size, "versions": [version],
+                          "used_at": int(time.time())})
+        return path, size, hit
+
+
+class Mirror:
+    """A plain-http registry (IMAGE_MIRROR) filled once per image with skopeo."""
+
+    def __init__(self, addr):
+        self.addr = addr
+
+    def path(self, ref):
+        return f"{self.addr}/{ref.split('/', 1)[1]}"
+
+    def get(self, ref, version):
+        dest = self.path(ref)
+        r = subprocess.run(["skopeo", "inspect", "--tls-verify=false", "--raw", f"docker://{dest}"], capture_output=True)
+        if r.returncode == 0:
+            return dest, 0, True
+        r = subprocess.run(["skopeo", "copy", "-q", "--dest-tls-verify=false", f"docker://{ref}", f"docker://{dest}"],
+                           capture_output=True, text=True)
+        if r.returncode != 0:
+            raise RuntimeError(f"skopeo copy: {r.stderr.strip()[-200:]}")
+        return dest, 0, False
+
+
+def pick_mode(mode, mirror):
+    tool = os.environ.get("IMAGE_PULL_TOOL") or ("skopeo" if shutil.which("skopeo") else
+                                                 "docker" if shutil.which("docker") else "")
+    if mode == "auto":
+        mode = "registry" if mirror and shutil.which("skopeo") else "tar" if tool else "pull"
+    return mode, tool
+
+
+def load(host, mode, ref, src):
+    """Put one image on one CN; returns bytes sent (tar mode)."""
+    if mode == "tar":
+        with open(src, "rb") as fh:
+            r = host.run("ctr -n k8s.io images import -", stdin=fh)
+        sent = os.path.getsize(src)
+    elif mode == "registry":
+        r = host.run(f"ctr -n k8s.io images pull --plain-http {shlex.quote(src)} >/dev/null && "
+                     f"ctr -n k8s.io images tag --force {shlex.quote(src)} {shlex.quote(ref)}")
+        sent = 0
+    else:
+        r = host.run(f"crictl pull {shlex.quote(ref)}")
+        sent = 0
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.decode(errors="replace").strip()[-200:] or f"rc={r.returncode}")
+    return sent
+
+
+def report(images, results, sources, path):
+    log(f"==== image pre-pull: {len(images)} image(s) ====")
+    log(f"{'image':<48} {'size':>9} {'agent':>10} {'loaded':>6} {'had':>4} {'fail':>4} {'max load':>9}")
+    out = []
+    for ref in sorted(images):
+        rows = [r for r in results if r["image"] == ref]
+        src = sources.get(ref, {})
+        loaded = [r for r in rows if r["status"] == "loaded"]
+        row = {"image": ref, "size": src.get("size", 0), "agent": src.get("agent", "-"),
+               "agent_secs": src.get("secs", 0.0), "loaded": len(loaded),
+               "present": sum(r["status"] == "present" for r in rows),
+               "failed": sum(r["status"] == "failed" for r in rows),
+               "max_load": max((r["secs"] for r in loaded), default=0.0), "hosts": rows}
+        out.append(row)
+        agent = f"fill {row['agent_secs']:.1f}s" if row["agent"] == "fill" else row["agent"]
+        log(f"{short(ref)[:48]:<48} {perf_trace.human(row['size']) if row['size'] else '-':>9} {agent:>10} "
+            f"{row['loaded']:>6} {row['present']:>4} {row['failed']:>4} {row['max_load']:>8.1f}s")
+    for r in results:
+        if r["status"] == "failed":
+            log(f"[images] ⚠️  {r['host']} {r['image']}: {r['error']}")
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(out, fh, indent=1)
+        log(f"[images] wrote {path}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pre-pull / side-load the CNF images onto every CN")
+    ap.add_argument("--server-file", default=os.environ.get("SERVER_FILE", "server_pci_map.txt"))
+    ap.add_argument("--build-path", default=os.environ.get("NEW_BUILD_PATH", ""), help="NEW_BUILD_PATH")
+    ap.add_argument("--version", default=os.environ.get("NEW_VERSION", ""), help="NEW_VERSION, e.g. 6.3.0_EA3")
+    ap.add_argument("--user", default=os.environ.get("HOST_USER", "root"))
+    ap.add_argument("--key", default=os.environ.get("SSH_KEY", ""), help="CN ssh key")
+    ap.add_argument("--mode", default=os.environ.get("IMAGE_PREPULL_MODE", "auto"), choices=("auto", "registry", "tar", "pull"))
+    ap.add_argument("--mirror", default=os.environ.get("IMAGE_MIRROR", ""), help="registry mode: <host:port>")
+    ap.add_argument("--cache-dir", default=os.environ.get("IMAGE_CACHE_DIR", "/var/tmp/k8s-installer-image-cache"))
+    ap.add_argument("--cache-keep-versions", type=int, default=int(os.environ.get("IMAGE_CACHE_KEEP_VERSIONS", "3")),
+                    help="tar mode: keep the images of the last N versions")
+    ap.add_argument("--cache-max-gb", type=float, default=float(os.environ.get("IMAGE_CACHE_MAX_GB", "100")),
+                    help="tar mode: LRU-prune the cache above this size (0 = no cap)")
+    ap.add_argument("--concurrency", type=int, default=int(os.environ.get("IMAGE_PREPULL_CONCURRENCY", "8")))
+    ap.add_argument("--per-host", type=int, default=int(os.environ.get("IMAGE_PREPULL_PER_HOST", "2")))
+    ap.add_argument("--from-backoff", action="store_true", help="images of the runner's pods in ImagePullBackOff")
+    ap.add_argument("--force", action="store_true", help="load even where containerd already has the image")
+    ap.add_argument("--list", action="store_true", help="print the images per CN and exit")
+    ap.add_argument("--strict", action="store_true", help="exit 1 when an image could not be loaded")
+    ap.add_argument("--report", default=os.environ.get("IMAGE_PREPULL_REPORT", ""), help="write the table as JSON")
+    args = ap.parse_args()
+
+    if not args.from_backoff and not (args.build_path and args.version):
+        log("[images] ❌ --build-path and --version are required")
+        return 2
+    try:
+        servers = inventory.servers(args.server_file)
+    except (OSError, inventory.InventoryError) as e:
+        log(f"[images] ❌ {args.server_file}: {e}")
+        return 2
+    ver = args.version.split("_", 1)[0]
+    root = "" if args.from_backoff else f"{args.build_path.rstrip('/')}/TRILLIUM_5GCN_CNF_REL_{ver}"
+    hosts = [CNHost(s["ip"], args.user, args.key) for s in servers]
+    mode, tool = pick_mode(args.mode, args.mirror)
+    if mode == "registry" and not args.mirror:
+        log("[images] ❌ registry mode needs --mirror / IMAGE_MIRROR")
+        return 2
+    if mode == "tar" and not tool:
+        log("[images] ❌ tar mode needs skopeo or docker on the agent")
+        return 2
+
+    # 1) what each CN has and needs
+    t0 = time.time()
+    backoff = set()
+    if args.from_backoff:
+        try:
+            backoff = hosts[0].backoff_images()
+        except (RuntimeError, ValueError) as e:
+            log(f"[images] ❌ {hosts[0].ip}: {e}")
+            return 1
+        if not backoff:
+            log("[images] no pods in ImagePullBackOff / ErrImagePull")
+            return 3
+
+    def scan(host):
+        with perf_trace.span("scan", host=host.ip) as sp:
+            have, files = host.read(root)
+            if args.from_backoff:
+                want = set(backoff)
+            else:
+                regs = {os.path.dirname(n): global_registry(t) for n, t in files.items() if "global-value" in n}
+                want = set()
+                for name, text in files.items():
+                    want.update(images_in(text, ver, regs.get(os.path.dirname(name), "")))
+            sp["images"] = len(want)
+        return have, want
+
+    need, images = {}, set()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        for host, fut in [(h, pool.submit(scan, h)) for h in hosts]:
+            try:
+                have, want = fut.result()
+            except RuntimeError as e:
+                log(f"[images] ❌ {host.ip}: {e}")
+                return 1
+            images |= want
+            need[host.ip] = sorted(want if args.force else want - have)
+            log(f"[images][{host.ip}] {len(want)} image(s), {len(need[host.ip])} to load")
+    log(f"[images] mode={mode}{' (' + tool + ')' if mode == 'tar' else ''}, {len(images)} distinct image(s), "
+        f"scan {time.time() - t0:.1f}s" + (" (from ImagePullBackOff)" if args.from_backoff else ""))
+    if args.list:
+        for host in hosts:
+            for ref in need[host.ip]:
+                log(f"{host.ip}\t{ref}")
+        return 0
+
+    # 2) one agent-side copy per image, loaded into every CN that lacks it
+    source = TarCache(args.cache_dir, tool) if mode == "tar" else Mirror(args.mirror) if mode == "registry" else None
+    sources, futures, lock = {}, {}, threading.Lock()
+    agent_pool = ThreadPoolExecutor(max_workers=max(1, args.per_host))
+
+    def fill(ref):
+        t = time.time()
+        src, size, hit = source.get(ref, args.version)
+        sources[ref] = {"size": size, "agent": "hit" if hit else "fill", "secs": time.time() - t}
+        if not hit:
+            perf_trace.record(f"cache {short(ref)}", t, bytes=size)
+        return src
+
+    def prepared(ref):
+        with lock:
+            if ref not in futures:
+                futures[ref] = agent_pool.submit(fill, ref) if source else None
+            return futures[ref]
+
+    results = []
+
+    def load_one(host, ref):
+        t = time.time()
+        row = {"host": host.ip, "image": ref, "status": "loaded", "secs": 0.0, "error": ""}
+        try:
+            fut = prepared(ref)
+            src = fut.result() if fut else ref
+            t = time.time()
+            sent = load(host, mode, ref, src)
+            perf_trace.record(f"load {short(ref)}", t, host=host.ip, bytes=sent or None, rc=0)
+        except (OSError, RuntimeError) as e:
+            row.update(status="failed", error=str(e))
+            perf_trace.record(f"load {short(ref)}", t, host=host.ip, rc=1)
+        row["secs"] = round(time.time() - t, 1)
+        return row
+
+    def host_worker(host):
+        with ThreadPoolExecutor(max_workers=max(1, args.per_host)) as hp:
+            rows = list(hp.map(lambda ref: load_one(host, ref), need[host.ip]))
+        rows += [{"host": host.ip, "image": ref, "status": "present", "secs": 0.0, "error": ""}
+                 for ref in sorted(images - set(need[host.ip]))]
+        return rows
+
+    t1 = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        for rows in pool.map(host_worker, hosts):
+            results.extend(rows)
+    agent_pool.shutdown()
+    report(images, results, sources, args.report)
+    if mode == "tar":
+        for ref, size, why in source.prune(args.version, args.cache_keep_versions, int(args.cache_max_gb * (1 << 30))):
+            log(f"[images] 🧹 cache: dropped {short(ref)} ({perf_trace.human(size)}, {why})")
+    failed = sum(r["status"] == "failed" for r in results)
+    log(f"[images] {'⚠️ ' if failed else '✅'} {sum(r['status'] == 'loaded' for r in results)} load(s), "
+        f"{failed} failed, {time.time() - t1:.1f}s")
+    return 1 if failed and args.strict else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+inventory.py - one parser for server_pci_map.txt, validated once, cached for every stage.
+
+Line format (the first one is the kubectl runner):
+  <name>:<ip>:<build_path>:<VM|SRIOV>:<N3>:<N6>:<N4_CIDR>:<AMF_N2_IP>
+N3/N6 are interface names or PCI addresses (0000:08:00.0 / 08:00.0) whose ':' are part of the
+value, so the tokens between the mode and N4 are split by PCI shape, not by position. Also accepted:
+'<name>:<ip>[:<build_path>...]' (IP-only stages), '<ip>:<build_path>' and a bare '<ip>'.
+'#' comments, blank lines and CRs are ignored.
+
+Validation (once, at `build`): errors - missing/invalid IP, duplicate IP or name; warnings -
+unknown mode, N3/N6 not separable, invalid N4_CIDR or AMF IP. Stages that need a field still check it.
+
+Cache: with INVENTORY_DIR set, `build` writes <dir>/<sha256[:16]>.json and .env for the server file's
+content; `env`/`json`/`load()` read those while the file is unchanged and parse only when it changed,
+so a pipeline parses the inventory once however many scripts and stages read it.
+
+Usage:
+  python3 scripts/inventory.py build --server-file server_pci_map.txt     # validate + cache (exit 2 on errors)
+  eval "$(python3 scripts/inventory.py env --server-file server_pci_map.txt)"   # INV_* bash arrays
+  python3 scripts/inventory.py get --server-file F [--name N | --ip IP | --role R] [--field ip]
+Bash scripts use scripts/inventory.sh (inventory_load); Python scripts import load().
+"""
+
+import os
+import re
+import sys
+import json
+import shlex
+import hashlib
+import argparse
+
+FIELDS = ("name", "ip", "build", "mode", "n3", "n6", "n4", "amf")
+IPV4 = re.compile(r"(25[0-5]|2[0-4][0-9]|1?[0-9]?[0-9])(\.(25[0-5]|2[0-4][0-9]|1?[0-9]?[0-9])){3}")
+PCI = {3: re.compile(r"[0-9A-Fa-f]{4}:[0-9A-Fa-f]{2}:[0-9A-Fa-f]{2}\.[0-7]"),
+       2: re.compile(r"[0-9A-Fa-f]{2}:[0-9A-Fa-f]{2}\.[0-7]")}
+MODES = ("VM", "SRIOV")
+
+
+class InventoryError(Exception):
+    pass
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def _split_ifaces(tokens):
+    """Regroup ':'-split tokens into interface values: PCI addresses take 3 (or 2) tokens."""
+    items, i = [], 0
+    while i < len(tokens):
+        for n in (3, 2):
+            if len(tokens) - i >= n and PCI[n].fullmatch(":".join(tokens[i:i + n])):
+                items.append(":".join(tokens[i:i + n]))
+                i += n
+                break
+        else:
+            items.append(tokens[i])
+            i += 1
+    return items
+
+
+def parse_line(line):
+    """One non-comment line -> record dict (FIELDS + 'line'); never raises, problems go to 'issues'."""
+    f = [t.strip() for t in line.split(":")]
+    rec = dict.fromkeys(FIELDS, "")
+    issues = []
+    if len(f) == 1:
+        rec["ip"] = f[0].split()[0]
+    elif IPV4.fullmatch(f[0]):                      # <ip>:<build_path>
+        rec["ip"], rec["build"] = f[0], ":".join(f[1:])
+    else:
+        rec["name"], rec["ip"] = f[0], f[1]
+        rec["build"] = f[2] if len(f) > 2 else ""
+        rec["mode"] = f[3].upper() if len(f) > 3 else ""
+        if len(f) >= 8:
+            rec["n4"], rec["amf"] = f[-2], f[-1]
+            mid = f[4:-2]
+            ifaces = _split_ifaces(mid)
+            if len(ifaces) != 2:
+                issues.append(f"cannot separate N3/N6 in '{':'.join(mid)}'")
+                half = max(len(mid) // 2, 1)
+                ifaces = [":".join(mid[:half]), ":".join(mid[half:])]
+            rec["n3"], rec["n6"] = ifaces
+        elif len(f) > 4:
+            issues.append(f"expected 8 fields for N3/N6/N4/AMF, got {len(f)}")
+    if rec["mode"] and rec["mode"] not in MODES:
+        issues.append(f"mode '{rec['mode']}' is not VM or SRIOV")
+    if rec["n4"] and not re.fullmatch(r"[0-9]+\.[0-9]+\.[0-9]+\.[0-9]+/[0-9]+", rec["n4"]):
+        issues.append(f"invalid N4_CIDR '{rec['n4']}'")
+    if rec["amf"] and not IPV4.fullmatch(rec["amf"]):
+        issues.append(f"invalid AMF_N2_IP '{rec['amf']}'")
+    rec["issues"] = issues
+    return rec
+
+
+def parse(server_file):
+    """Parse + validate + index. Returns the inventory dict (what the JSON cache holds)."""
+    with open(server_file, "rb") as fh:
+        raw = fh.read()
+    servers, errors, warnings = [], [], []
+    by_name, by_ip = {}, {}
+    for no, line in enumerate(raw.decode("utf-8", "replace").splitlines(), 1):
+        line = line.replace("\r", "").strip()
+        if not line or line.startswith("#"):
+            continue
+        rec = parse_line(line)
+        rec["line"] = no
+        where = f"{server_file}:{no}"
+        if not IPV4.fullmatch(rec["ip"]):
+            errors.append(f"{where}: invalid IP '{rec['ip']}'")
+            continue
+        if rec["ip"] in by_ip:
+            errors.append(f"{where}: duplicate IP {rec['ip']} (line {servers[by_ip[rec['ip']]]['line']})")
+            continue
+        if rec["name"] and rec["name"] in by_name:
+            errors.append(f"{where}: duplicate name {rec['name']} (line {servers[by_name[rec['name']]]['line']})")
+            continue
+        warnings += [f"{where}: {msg}" for msg in rec.pop("issues")]
+        by_ip[rec["ip"]] = len(servers)
+        if rec["name"]:
+            by_name[rec["name"]] = len(servers)
+        servers.append(rec)
+    by_role = {"runner": [0] if servers else []}
+    for mode in MODES:
+        by_role[mode.lower()] = [i for i, s in enumerate(servers) if s["mode"] == mode]
+    return {"version": 1, "source": os.path.abspath(server_file), "sha256": hashlib.sha256(raw).hexdigest(),
+            "servers": servers, "by_name": by_name, "by_ip": by_ip, "by_role": by_role,
+            "errors": errors, "warnings": warnings}
+
+
+def render_env(inv):
+    """Bash form: INV_COUNT, INV_RUNNER and one INV_<FIELD> array per field (index-aligned)."""
+    q = shlex.quote
+    out = [f"INV_SOURCE={q(inv['source'])}", f"INV_COUNT={len(inv['servers'])}",
+           f"INV_RUNNER={q(inv['servers'][0]['ip'] if inv['servers'] else '')}"]
+    for field in FIELDS:
+        out.append(f"INV_{field.upper()}=(" + " ".join(q(s[field]) for s in inv["servers"]) + ")")
+    return "\n".join(out) + "\n"
+
+
+def _cache_paths(server_file, cache_dir):
+    with open(server_file, "rb") as fh:
+        digest = hashlib.sha256(fh.read()).hexdigest()
+    base = os.path.join(cache_dir, digest[:16])
+    return digest, base + ".json", base + ".env"
+
+
+def load(server_file, cache_dir=None):
+    """Inventory dict for server_file: from INVENTORY_DIR when the cached copy matches, else parsed."""
+    cache_dir = os.environ.get("INVENTORY_DIR", "") if cache_dir is None else cache_dir
+    if cache_dir:
+        digest, jpath, _ = _cache_paths(server_file, cache_dir)
+        try:
+            with open(jpath, encoding="utf-8") as fh:
+                inv = json.load(fh)
+            if inv.get("sha256") == digest:
+                return inv
+        except (OSError, ValueError):
+            pass
+        return build(server_file, cache_dir)
+    return parse(server_file)
+
+
+def build(server_file, cache_dir):
+    """Parse and write the JSON + env cache (atomically); returns the inventory."""
+    inv = parse(server_file)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        _, jpath, epath = _cache_paths(server_file, cache_dir)
+        outputs = [(jpath, json.dumps(inv, indent=1, sort_keys=True))]
+        if inv["errors"]:
+            if os.path.exists(epath):       # inventory.sh sources .env unchecked: only for a valid file
+                os.unlink(epath)
+        else:
+            outputs.append((epath, render_env(inv)))
+        for path, text in outputs:
+            tmp = f"{path}.{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(text)
+            os.replace(tmp, path)
+    return inv
+
+
+def servers(server_file):
+    """Validated server records in file order; InventoryError if the file has errors or no servers."""
+    inv = load(server_file)
+    if inv["errors"]:
+        raise InventoryError("; ".join(inv["errors"]))
+    if not inv["servers"]:
+        raise InventoryError(f"no servers in {server_file}")
+    return inv["servers"]
+
+
+def ips(server_file):
+    """Validated host IPs in file order."""
+    return [s["ip"] for s in servers(server_file)]
+
+
+def select(inv, name="", ip="", role=""):
+    """Records matching name/ip/role (all when none given)."""
+    if name:
+        idx = [inv["by_name"][name]] if name in inv["by_name"] else []
+    elif ip:
+        idx = [inv["by_ip"][ip]] if ip in inv["by_ip"] else []
+    elif role:
+        idx = inv["by_role"].get(role, [])
+    else:
+        idx = range(len(inv["servers"]))
+    return [inv["servers"][i] for i in idx]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Parse, validate and cache the server inventory")
+    ap.add_argument("cmd", choices=("build", "env", "json", "get"))
+    ap.add_argument("--server-file", default=os.environ.get("SERVER_FILE", "server_pci_map.txt"))
+    ap.add_argument("--dir", default=os.environ.get("INVENTORY_DIR", ""), help="cache dir (INVENTORY_DIR)")
+    ap.add_argument("--name", default="")
+    ap.add_argument("--ip", default="")
+    ap.add_argument("--role", default="", help="runner | vm | sriov")
+    ap.add_argument("--field", default="", choices=("",) + FIELDS, help="get: print only this field")
+    args = ap.parse_args()
+
+    if not os.path.isfile(args.server_file):
+        log(f"[inventory] ❌ {args.server_file} not found")
+        return 2
+    inv = build(args.server_file, args.dir) if args.cmd == "build" else load(args.server_file, args.dir)
+    for e in inv["errors"]:
+        log(f"[inventory] ❌ {e}")
+    if args.cmd == "build":
+        for w in inv["warnings"]:
+            log(f"[inventory] ⚠️  {w}")
+        log(f"[inventory] {len(inv['servers'])} server(s) from {args.server_file} "
+            f"(runner {inv['servers'][0]['ip'] if inv['servers'] else '-'}, "
+            f"{len(inv['by_role']['vm'])} VM, {len(inv['by_role']['sriov'])} SRIOV)"
+            + (f", cached in {args.dir}" if args.dir else ""))
+    if inv["errors"]:
+        return 2
+    if not inv["servers"]:
+        log(f"[inventory] ❌ no servers in {args.server_file}")
+        return 2
+    if args.cmd == "env":
+        sys.stdout.write(render_env(inv))
+    elif args.cmd == "json":
+        print(json.dumps(inv, indent=1, sort_keys=True))
+    elif args.cmd == "get":
+        recs = select(inv, args.name, args.ip, args.role)
+        if not recs:
+            log(f"[inventory] ❌ no server matches {args.name or args.ip or args.role}")
+            return 1
+        for r in recs:
+            print(r[args.field] if args.field else ":".join(r[f] for f in FIELDS))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
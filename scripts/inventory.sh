@@ -0,0 +1,31 @@
+#!/usr/bin/env bash
+# scripts/inventory.sh
+# Source from pipeline scripts, then:
+#   inventory_load <server_file>  -> INV_COUNT, INV_RUNNER and index-aligned arrays
+#                                    INV_NAME INV_IP INV_BUILD INV_MODE INV_N3 INV_N6 INV_N4 INV_AMF
+#   inventory_index <name>        -> prints the index of that server name (non-zero if unknown)
+# Parsing/validation is scripts/inventory.py; with INVENTORY_DIR set (pipeline) the cached env of an
+# unchanged server file is sourced directly, so no stage re-parses it.
+
+inventory_load(){
+  local file="$1" env digest
+  [[ -f "$file" ]] || { echo "[inventory] ❌ $file not found" >&2; return 2; }
+  if [[ -n "${INVENTORY_DIR:-}" ]]; then
+    digest="$(sha256sum "$file" | awk '{print substr($1,1,16)}')"
+    if [[ -f "$INVENTORY_DIR/$digest.env" ]]; then
+      # shellcheck disable=SC1090
+      source "$INVENTORY_DIR/$digest.env"
+      (( INV_COUNT > 0 )) && return 0
+    fi
+  fi
+  env="$(python3 "$(dirname "${BASH_SOURCE[0]}")/inventory.py" env --server-file "$file")" || return 2
+  eval "$env"
+}
+
+inventory_index(){
+  local i
+  for i in "${!INV_NAME[@]}"; do
+    [[ "${INV_NAME[i]}" == "$1" ]] && { echo "$i"; return 0; }
+  done
+  return 1
+}
@@ -1,5 +1,6 @@
 #!/usr/bin/env sh
 # Keep <CIDR> present; auto-pick iface (default-route first, then physical NICs)
+# Polling fallback; with ALIAS_ENGINE=daemon the pipeline runs alias_ipd.py (netlink events, no polling) instead
 # Usage:
 #   sudo ./ip_alias_check.sh 10.10.10.20/24
 #   sudo ./ip_alias_check.sh -w 15 -l /var/log/alias_ipmon.log 10.10.10.20/24
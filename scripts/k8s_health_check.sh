@@ -1,28 +1,52 @@
 #!/usr/bin/env bash
 # k8s_health_check.sh
-# - Parses the first host from SERVER_FILE
+# - Uses the first host of SERVER_FILE (the inventory runner)
 # - Remotely checks that all pods are READY (m/n equal) with no bad STATUS
 # - If not healthy, waits 300s and retries once
+# - READY_ENGINE=watch: watches pods/deployments instead and returns as soon as all are Ready
+#   (k8s_ready_watch.py; HEALTH_TIMEOUT, default HEALTH_RETRY_WAIT_SECS x HEALTH_RETRIES = 300s;
+#   a pod stuck in CrashLoopBackOff / ImagePullBackOff ends the wait early)
+# - IMAGE_PREPULL=1: pods in ImagePullBackOff / ErrImagePull get their images side-loaded onto every
+#   CN right away (image_prepull.py --from-backoff), then the retry / watch runs once more
 # - Exit codes: 0 healthy, 1 unhealthy, 2 parse error, 3 kubectl missing
 
 set -euo pipefail
 
+# Shared per-run ssh masters (scripts/ssh_pool.sh; no-op unless the pipeline started a pool)
+source "$(dirname "${BASH_SOURCE[0]}")/ssh_pool.sh" 2>/dev/null || true
+
+# Parsed + validated server inventory (scripts/inventory.sh -> INV_* arrays)
+source "$(dirname "${BASH_SOURCE[0]}")/inventory.sh"
+
+# Timing spans (scripts/perf_trace.sh; no-op unless TRACE_FILE is set)
+source "$(dirname "${BASH_SOURCE[0]}")/perf_trace.sh"
+
 : "${SERVER_FILE:?missing}"
 : "${SSH_KEY:?missing}"
 
-HOST="$(
-  awk 'NF && $1 !~ /^#/ {
-         if (index($0,":")>0){ n=split($0,a,":"); print a[2]; exit }
-         else                { print $1;        exit }
-       }' "${SERVER_FILE}"
-)"
-
-[[ -n "${HOST}" ]] || { echo "[health-check] ERROR: could not parse host"; exit 2; }
+inventory_load "${SERVER_FILE}" || { echo "[health-check] ERROR: could not parse host"; exit 2; }
+HOST="${INV_RUNNER}"
 echo "[health-check] Using host ${HOST} for kubectl checks"
 
-# Run the remote health check via a single-quoted heredoc so $3/$4 are not expanded by the shell
-set +e
-ssh -o StrictHostKeyChecking=no -i "${SSH_KEY}" "root@${HOST}" bash -s <<'REMOTE'
+if [[ "${READY_ENGINE:-}" == "watch" ]]; then
+  : "${HEALTH_TIMEOUT:=$(( ${HEALTH_RETRY_WAIT_SECS:-300} * ${HEALTH_RETRIES:-1} ))}"
+  set +e
+  python3 "$(dirname "$0")/k8s_ready_watch.py" --host "${HOST}" --key "${SSH_KEY}" --timeout "${HEALTH_TIMEOUT}"
+  RC=$?
+  if (( RC == 2 )) && [[ "${IMAGE_PREPULL:-0}" == "1" ]] &&
+     python3 "$(dirname "$0")/image_prepull.py" --from-backoff --server-file "${SERVER_FILE}" --key "${SSH_KEY}"; then
+    python3 "$(dirname "$0")/k8s_ready_watch.py" --host "${HOST}" --key "${SSH_KEY}" --timeout "${HEALTH_TIMEOUT}"
+    RC=$?
+  fi
+  set -e
+  (( RC == 2 )) && RC=1    # terminal pod state -> unhealthy
+  exit $RC
+fi
+
+# Run the remote health check via a single-quoted heredoc so $3/$4 are not expanded by the shell.
+# $1=1: return 10 instead of waiting when pods are in ImagePullBackOff (side-load, then check again)
+remote_check(){
+ssh -o StrictHostKeyChecking=no -i "${SSH_KEY}" "root@${HOST}" bash -s -- "$1" <<'REMOTE'
 set -euo pipefail
 
 # Ensure kubectl is present
@@ -36,9 +60,9 @@ check() {
       split($3,a,"/");                 # READY m/n
       ready=(a[1]==a[2]);
       bad = ($4 ~ /(CrashLoopBackOff|ImagePullBackOff|BackOff|Error|Init:)/);
-      if (!ready || bad) exit 1
+      if (!ready || bad) { notok=1; exit }
     }
-    END { exit 0 }'
+    END { exit notok }'
 }
 
 if check; then
@@ -46,6 +70,11 @@ if check; then
   exit 0
 fi
 
+if [[ "${1:-0}" == "1" ]] && kubectl get pods -A --no-headers 2>/dev/null | grep -qE 'ImagePullBackOff|ErrImagePull'; then
+  echo "[health-check] Pods in ImagePullBackOff; side-loading their images first"
+  exit 10
+fi
+
 echo "[health-check] Pods not healthy, waiting 300s and retrying..."
 sleep 300
 
@@ -58,6 +87,17 @@ else
   exit 1
 fi
 REMOTE
+}
+
+t0="$(trace_now)"
+set +e
+remote_check "$([[ "${IMAGE_PREPULL:-0}" == "1" ]] && echo 1 || echo 0)"
 RC=$?
+if (( RC == 10 )); then
+  python3 "$(dirname "$0")/image_prepull.py" --from-backoff --server-file "${SERVER_FILE}" --key "${SSH_KEY}"
+  remote_check 0
+  RC=$?
+fi
 set -e
+trace_span health "${HOST}" "$t0" rc=$RC
 exit $RC
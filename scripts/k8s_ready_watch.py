@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+k8s_ready_watch.py - wait for pods and deployments to be Ready by watching them, not by sleeping.
+
+One ssh lists the pods and deployments on the kubectl host (the inventory runner, or the EMS host), then
+two `kubectl get -w --output-watch-events -o json` streams (pods, deployments) keep that state current.
+The watcher returns as soon as every pod is Ready (or Completed) and every deployment has all its
+replicas updated, ready and available, instead of check / sleep 300 / check. A pod stuck in a terminal
+state (CrashLoopBackOff, ImagePullBackOff, ErrImagePull, ... or phase Failed) or a deployment past its
+progress deadline ends the wait early once it has been in that state for --terminal-grace seconds.
+The state is re-listed every --resync seconds and a watch stream that drops is restarted, so a missed
+event or a restarted API server only delays the answer.
+
+At the end a per-namespace table shows pods, deployments and the time to ready (seconds from start
+until the namespace was last all-Ready); --metrics-json writes the same as JSON.
+
+Usage:
+  python3 scripts/k8s_ready_watch.py --host 10.0.0.1 --key ~/.ssh/jenkins_key [--timeout 300]
+  python3 scripts/k8s_ready_watch.py --host 10.0.0.1 --key K --namespace ems --selector app=ems --name-prefix ems
+Exit code: 0 ready, 1 not ready by --timeout, 2 terminal state, 3 kubectl missing on the host.
+CN connections reuse the ssh_pool.py masters when SSH_POOL_DIR is set.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import shlex
+import argparse
+import threading
+import subprocess
+
+import ssh_pool
+import perf_trace
+
+SSH_OPTS = ["-o", "StrictHostKeyChecking=no", "-o", "BatchMode=yes", "-o", "ConnectTimeout=15"]
+
+REMOTE_ENV = ('export PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/bin:"$PATH"; '
+              '[ -n "${KUBECONFIG:-}" ] || [ ! -f /root/.kube/config ] || export KUBECONFIG=/root/.kube/config; '
+              'command -v kubectl >/dev/null 2>&1 || { echo "kubectl not found" >&2; exit 3; }; ')
+
+TERMINAL = {"CrashLoopBackOff", "ImagePullBackOff", "ErrImagePull", "InvalidImageName",
+            "CreateContainerConfigError", "CreateContainerError", "RunContainerError"}
+KINDS = ("pods", "deployments")
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def pod_state(pod):
+    """(ready, reason, terminal) of one pod."""
+    st = pod.get("status") or {}
+    phase = st.get("phase", "")
+    if phase == "Succeeded":
+        return True, "Completed", False
+    for c in (st.get("initContainerStatuses") or []) + (st.get("containerStatuses") or []):
+        waiting = (c.get("state") or {}).get("waiting") or {}
+        if waiting.get("reason") in TERMINAL:
+            return False, waiting["reason"], True
+    if phase == "Failed":
+        return False, st.get("reason") or "Failed", True
+    if any(c.get("type") == "Ready" and c.get("status") == "True" for c in st.get("conditions") or []):
+        return True, "Ready", False
+    return False, phase or "Pending", False
+
+
+def deployment_state(dep):
+    """(ready, reason, terminal) of one deployment: rollout finished and every replica available."""
+    st = dep.get("status") or {}
+    want = (dep.get("spec") or {}).get("replicas", 1)
+    for c in st.get("conditions") or []:
+        if c.get("type") == "Progressing" and c.get("reason") == "ProgressDeadlineExceeded":
+            return False, "ProgressDeadlineExceeded", True
+    ready = (st.get("observedGeneration", 0) >= dep["metadata"].get("generation", 0)
+             and st.get("replicas", 0) == st.get("updatedReplicas", 0) == want
+             and st.get("readyReplicas", 0) == st.get("availableReplicas", 0) == want)
+    return ready, f"{st.get('readyReplicas', 0)}/{want} ready", False
+
+
+class ReadyWatch:
+    """Pod/deployment state of one cluster, kept current from a list + two watch streams."""
+
+    def __init__(self, args):
+        self.args = args
+        self.target = f"{args.user}@{args.host}"
+        self.selector = args.selector
+        self.prefix = "" if args.selector else args.name_prefix.lower()
+        self.state = {}               # (kind, ns, name) -> (ready, reason, terminal)
+        self.terminal_since = {}
+        self.ns_ready_at = {}         # ns -> seconds from start, while the namespace is all-Ready
+        self.events = queue.Queue()
+        self.streams = {}
+        self.resync_at = 0.0
+        self.t0 = time.monotonic()
+
+    def _ssh(self, remote):
+        ssh_pool.record("k8s_ready_watch.py", self.args.host, self.args.user)
+        return ["ssh", *ssh_pool.ssh_opts(), *SSH_OPTS, "-i", self.args.key, self.target, REMOTE_ENV + remote]
+
+    def _kubectl(self, kinds, watch=False):
+        cmd = ["kubectl", "get", kinds, "-o", "json"]
+        cmd += ["-n", self.args.namespace] if self.args.namespace else ["-A"]
+        if self.selector:
+            cmd += ["-l", self.selector]
+        if watch:
+            cmd += ["--watch-only", "--output-watch-events", f"--request-timeout={self.args.timeout + 60}s"]
+        return ("exec " if watch else "") + " ".join(shlex.quote(c) for c in cmd)
+
+    def _keep(self, obj):
+        return not self.prefix or self.prefix in obj["metadata"]["name"].lower()
+
+    def _apply(self, kind, obj, deleted=False):
+        if not self._keep(obj):
+            return
+        meta = obj["metadata"]
+        key = (kind, meta.get("namespace", ""), meta["name"])
+        if deleted or meta.get("deletionTimestamp"):
+            self.state.pop(key, None)
+            self.terminal_since.pop(key, None)
+            return
+        ready, reason, terminal = (pod_state if kind == "pods" else deployment_state)(obj)
+        if terminal and key not in self.terminal_since:
+            self.terminal_since[key] = time.monotonic()
+            log(f"[ready-watch] ⚠️  {key[1]}/{key[2]}: {reason}")
+        elif not terminal:
+            self.terminal_since.pop(key, None)
+        self.state[key] = (ready, reason, terminal)
+
+    def snapshot(self):
+        """Replace the state with a fresh list. Returns 0, 3 (no kubectl) or another rc (API not up yet)."""
+        r = subprocess.run(self._ssh(self._kubectl(",".join(KINDS))), stdin=subprocess.DEVNULL,
+                           capture_output=True, text=True)
+        if r.returncode != 0:
+            return r.returncode
+        items = json.loads(r.stdout).get("items", [])
+        if self.selector and self.args.name_prefix and not any(i.get("kind") == "Pod" for i in items):
+            log(f"[ready-watch] no pods match '{self.selector}'; falling back to names containing "
+                f"'{self.args.name_prefix}'")
+            self.selector, self.prefix = "", self.args.name_prefix.lower()
+            self.stop_streams()
+            return self.snapshot()
+        self.state.clear()
+        for item in items:
+            self._apply("pods" if item.get("kind") == "Pod" else "deployments", item)
+        self.terminal_since = {k: v for k, v in self.terminal_since.items() if k in self.state}
+        return 0
+
+    def _reader(self, kind, proc):
+        dec, buf = json.JSONDecoder(), ""
+        for chunk in iter(lambda: proc.stdout.read1(65536), b""):
+            buf += chunk.decode("utf-8", "replace")
+            while True:
+                buf = buf.lstrip()
+                try:
+                    ev, end = dec.raw_decode(buf)
+                except ValueError:
+                    break
+                buf = buf[end:]
+                self.events.put((kind, ev))
+        self.events.put((kind, None))
+
+    def start_streams(self):
+        for kind in KINDS:
+            proc = self.streams.get(kind)
+            if proc and proc.poll() is None:
+                continue
+            proc = subprocess.Popen(self._ssh(self._kubectl(kind, watch=True)), stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            self.streams[kind] = proc
+            threading.Thread(target=self._reader, args=(kind, proc), daemon=True).start()
+
+    def stop_streams(self):
+        for proc in self.streams.values():
+            if proc.poll() is None:
+                proc.terminate()
+        self.streams = {}
+
+    def namespaces(self):
+        out = {}
+        for (kind, ns, _), (ready, _, _) in self.state.items():
+            n = out.setdefault(ns, {"pods": 0, "deployments": 0, "not_ready": 0})
+            n[kind] += 1
+            n["not_ready"] += not ready
+        return out
+
+    def evaluate(self):
+        """Update per-namespace time to ready; True when everything watched is Ready."""
+        now = round(time.monotonic() - self.t0, 1)
+        nss = self.namespaces()
+        for ns, n in nss.items():
+            if n["not_ready"]:
+                self.ns_ready_at.pop(ns, None)
+            else:
+                self.ns_ready_at.setdefault(ns, now)
+        pods = sum(n["pods"] for n in nss.values())
+        return pods >= self.args.min_pods and not any(n["not_ready"] for n in nss.values())
+
+    def waiting(self, limit=5):
+        names = [f"{ns}/{name} ({reason})" for (_, ns, name), (ready, reason, _) in sorted(self.state.items())
+                 if not ready]
+        return ", ".join(names[:limit]) + (f" +{len(names) - limit} more" if len(names) > limit else "")
+
+    def report(self, result):
+        nss = self.namespaces()
+        log(f"[ready-watch] {'namespace':<28} {'pods':>5} {'deploys':>8} {'ready after':>12}")
+        for ns in sorted(nss):
+            at = self.ns_ready_at.get(ns)
+            log(f"[ready-watch] {ns:<28} {nss[ns]['pods']:>5} {nss[ns]['deployments']:>8} "
+                f"{(f'{at:.1f}s' if at is not None else 'not ready'):>12}")
+        if self.args.metrics_json:
+            with open(self.args.metrics_json, "w", encoding="utf-8") as fh:
+                json.dump({"host": self.args.host, "result": result,
+                           "elapsed_s": round(time.monotonic() - self.t0, 1),
+                           "namespaces": {ns: {"pods": n["pods"], "deployments": n["deployments"],
+                                               "ready_after_s": self.ns_ready_at.get(ns)}
+                                          for ns, n in nss.items()}}, fh, indent=1, sort_keys=True)
+
+    def run(self):
+        a = self.args
+        deadline = self.t0 + a.timeout
+        scope = f"-n {a.namespace}" if a.namespace else "all namespaces"
+        log(f"[ready-watch] {a.host}: watching pods/deployments in {scope}"
+            + (f" -l {self.selector}" if self.selector else "") + f", timeout {a.timeout}s")
+        rc, progress_at, ready_since = None, time.monotonic() + 15, None
+        try:
+            while rc is None:
+                now = time.monotonic()
+                if now >= self.resync_at:
+                    src = self.snapshot()
+                    if src == 3:
+                        log(f"[ready-watch] ❌ kubectl not found on {a.host}")
+                        return 3
+                    if src == 0:
+                        self.start_streams()
+                    elif self.resync_at == 0.0:
+                        log(f"[ready-watch] API not reachable yet on {a.host} (rc={src}); retrying")
+                    self.resync_at = now + a.resync
+                if not self.evaluate():
+                    ready_since = None
+                elif now - (ready_since := ready_since or now) >= a.settle:
+                    log(f"[ready-watch] ✅ all pods/deployments Ready after {now - self.t0:.1f}s")
+                    rc = 0
+                    break
+                stuck = [k for k, t in self.terminal_since.items() if now - t >= a.terminal_grace]
+                if stuck:
+                    for key in stuck:
+                        log(f"[ready-watch] ❌ {key[1]}/{key[2]}: {self.state[key][1]} for {a.terminal_grace}s+")
+                    rc = 2
+                    break
+                if now >= deadline:
+                    log(f"[ready-watch] ❌ not Ready after {a.timeout}s; waiting on: {self.waiting()}")
+                    rc = 1
+                    break
+                if now >= progress_at:
+                    ready = sum(1 for s in self.state.values() if s[0])
+                    log(f"[ready-watch] {ready}/{len(self.state)} Ready; waiting on: {self.waiting()}")
+                    progress_at = now + 15
+                self.drain()
+        finally:
+            self.stop_streams()
+        elapsed = time.monotonic() - self.t0
+        perf_trace.record("ready wait", time.time() - elapsed, host=a.host, rc=rc, wait=round(elapsed, 1))
+        self.report(("ready", "timeout", "terminal")[rc])
+        return rc
+
+    def drain(self, wait=1.0):
+        """Apply queued watch events (waiting up to `wait` s for the first); a dropped stream forces a re-list."""
+        try:
+            kind, ev = self.events.get(timeout=wait)
+        except queue.Empty:
+            return
+        while True:
+            if ev is None:
+                self.resync_at = min(self.resync_at, time.monotonic() + 5)
+            elif ev.get("type") in ("ADDED", "MODIFIED", "DELETED"):
+                self._apply(kind, ev["object"], deleted=ev["type"] == "DELETED")
+            try:
+                kind, ev = self.events.get_nowait()
+            except queue.Empty:
+                return
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Wait until pods and deployments are Ready (kubectl watch over ssh)")
+    ap.add_argument("--host", required=True, help="kubectl host")
+    ap.add_argument("--user", default=os.environ.get("HOST_USER", "root"))
+    ap.add_argument("--key", default=os.environ.get("SSH_KEY", ""))
+    ap.add_argument("--namespace", default="", help="only this namespace (default: all)")
+    ap.add_argument("--selector", default="", help="label selector for pods and deployments")
+    ap.add_argument("--name-prefix", default="", help="name filter (case-insensitive) when --selector matches no pod")
+    ap.add_argument("--timeout", type=int, default=int(os.environ.get("READY_WATCH_TIMEOUT", "300")))
+    ap.add_argument("--terminal-grace", type=int, default=int(os.environ.get("READY_WATCH_TERMINAL_GRACE", "60")),
+                    help="seconds a terminal pod state may last before giving up")
+    ap.add_argument("--settle", type=int, default=int(os.environ.get("READY_WATCH_SETTLE", "0")),
+                    help="seconds everything must stay Ready before returning")
+    ap.add_argument("--resync", type=int, default=30, help="re-list interval (seconds)")
+    ap.add_argument("--min-pods", type=int, default=1)
+    ap.add_argument("--metrics-json", default=os.environ.get("READY_WATCH_METRICS", ""))
+    args = ap.parse_args()
+    return ReadyWatch(args).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
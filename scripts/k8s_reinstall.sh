@@ -0,0 +1,93 @@
+#!/usr/bin/env bash
+# scripts/k8s_reinstall.sh
+# uninstall_k8s.sh -> install_k8s.sh on every host in SERVER_FILE: the recovery of pipeline_dag.py's
+# health[h] task for a host that stays unhealthy (the 'Cluster health check' stage's do_uninstall_install).
+# Each remote script runs in its own process group whose PGID is kept in /tmp/ci_<script>.pgid on
+# the CN, so an abort / timeout of this script also kills the remote installer.
+set -euo pipefail
+
+# Shared per-run ssh masters (scripts/ssh_pool.sh; no-op unless the pipeline started a pool)
+source "$(dirname "${BASH_SOURCE[0]}")/ssh_pool.sh" 2>/dev/null || true
+
+# Parsed + validated server inventory (scripts/inventory.sh -> INV_* arrays)
+source "$(dirname "${BASH_SOURCE[0]}")/inventory.sh"
+
+# Timing spans (scripts/perf_trace.sh; no-op unless TRACE_FILE is set)
+source "$(dirname "${BASH_SOURCE[0]}")/perf_trace.sh"
+
+: "${SERVER_FILE:?missing SERVER_FILE}"
+: "${SSH_KEY:?missing SSH_KEY}"
+: "${NEW_VERSION:?missing NEW_VERSION}"
+: "${NEW_BUILD_PATH:?missing NEW_BUILD_PATH}"
+K8S_VER="${K8S_VER:-1.31.4}"
+SSH_OPTS='-o BatchMode=yes -o StrictHostKeyChecking=no -o ControlMaster=auto -o ControlPersist=5m -o ControlPath=/tmp/ssh_mux_%h_%p_%r'
+
+inventory_load "${SERVER_FILE}" || { echo "[reinstall] ERROR: invalid server inventory ${SERVER_FILE}" >&2; exit 2; }
+
+# --- Track active remote pgid files for cleanup on abort ---
+declare -a REMOTE_PGID_PTRS=()   # entries: "ip:/tmp/ci_<op>.pgid"
+on_abort_cleanup() {
+  local ptr ip file pgid
+  for ptr in "${REMOTE_PGID_PTRS[@]}"; do
+    ip="${ptr%%:*}"; file="${ptr#*:}"
+    pgid="$(ssh $SSH_OPTS -i "$SSH_KEY" "root@$ip" "cat '$file' 2>/dev/null || true" | tr -d '[:space:]')" || true
+    if [[ -n "$pgid" ]]; then
+      echo "[reinstall][$ip] killing remote PGID $pgid"
+      ssh $SSH_OPTS -i "$SSH_KEY" "root@$ip" "kill -TERM -$pgid 2>/dev/null || true; sleep 2; kill -KILL -$pgid 2>/dev/null || true" || true
+    fi
+    ssh $SSH_OPTS -i "$SSH_KEY" "root@$ip" "rm -f '$file' 2>/dev/null || true" || true
+  done
+}
+trap on_abort_cleanup EXIT
+trap 'exit 143' HUP INT TERM
+
+normalize_install_path() {
+  local ip="$1" base="$2" ver="$3"
+  local num="${ver%%_*}"
+  local tag=""; [[ "$ver" == *_* ]] && tag="${ver##*_}"
+  for cand in \
+    "$base" \
+    "$base/TRILLIUM_5GCN_CNF_REL_${num}${tag:+_${tag}}/common/tools/install/k8s-v${K8S_VER}" \
+    "$base/TRILLIUM_5GCN_CNF_REL_${num}/common/tools/install/k8s-v${K8S_VER}" \
+    "$base/${num}${tag:+/${tag}}/TRILLIUM_5GCN_CNF_REL_${num}${tag:+_${tag}}/common/tools/install/k8s-v${K8S_VER}" \
+    "$base/${num}${tag:+/${tag}}/TRILLIUM_5GCN_CNF_REL_${num}/common/tools/install/k8s-v${K8S_VER}"
+  do
+    ssh $SSH_OPTS -i "$SSH_KEY" "root@$ip" test -d "$cand" && { echo "$cand"; return; }
+  done
+  echo "$base/${num}${tag:+/${tag}}/TRILLIUM_5GCN_CNF_REL_${num}/common/tools/install/k8s-v${K8S_VER}"
+}
+
+# --- Run a remote script in its own process group, record PGID, and wait ---
+# Usage: run_remote_killable <ip> <path> <script_name>
+run_remote_killable() {
+  local ip="$1" inst_path="$2" script="$3"
+  local tag="${script%%.sh}"
+  local pgid_file="/tmp/ci_${tag}.pgid"
+
+  REMOTE_PGID_PTRS+=("$ip:$pgid_file")
+
+  ssh $SSH_OPTS -i "$SSH_KEY" "root@$ip" bash -lc "
+    set -euo pipefail
+    cd '$inst_path'
+    sed -i 's/\\r\$//' '$script' 2>/dev/null || true
+    rm -f '$pgid_file' || true
+    (
+      setsid bash -lc \"yes yes | bash './$script'\" &
+      cpid=\$!
+      pgid=\$(ps -o pgid= -p \"\$cpid\" | tr -d ' ')
+      echo \"\$pgid\" > '$pgid_file'
+      wait \"\$cpid\"
+    )
+  "
+}
+
+for ip in "${INV_IP[@]}"; do
+  inst_path="$(normalize_install_path "$ip" "$NEW_BUILD_PATH" "$NEW_VERSION")"
+  echo "[reinstall][$ip] using path: $inst_path"
+
+  echo "[reinstall][$ip] ▶ uninstall_k8s.sh"
+  trace_run uninstall "$ip" run_remote_killable "$ip" "$inst_path" "uninstall_k8s.sh"
+
+  echo "[reinstall][$ip] ▶ install_k8s.sh"
+  trace_run install "$ip" run_remote_killable "$ip" "$inst_path" "install_k8s.sh"
+done
@@ -2,8 +2,24 @@
 # scripts/nf_config.sh — Configure NF YAMLs on CNs (robust exclude IP update)
 # Required env: SERVER_FILE, SSH_KEY, NEW_BUILD_PATH, NEW_VERSION, DEPLOYMENT_TYPE
 # Optional     : HOST_USER (default root), CN_DEPLOYMENT, N3_PCI, N6_PCI
+# NF_PATCH_ENGINE=python: all values files of a CN read in one ssh, patched in memory with comments
+#   kept, changed files written back once; hosts in parallel (nf_patch.py, NF_PATCH_CONCURRENCY,
+#   NF_PATCH_DRY_RUN=1 prints the diff only, NF_PATCH_DIFF=1 prints it on a real run too)
+# VALUES_RENDER=1: render from the cached pristine templates, push only changed files (values_render.py)
 set -euo pipefail
 
+# Shared per-run ssh masters (scripts/ssh_pool.sh; no-op unless the pipeline started a pool)
+source "$(dirname "${BASH_SOURCE[0]}")/ssh_pool.sh" 2>/dev/null || true
+
+# Parsed + validated server inventory (scripts/inventory.sh -> INV_* arrays)
+source "$(dirname "${BASH_SOURCE[0]}")/inventory.sh"
+
+# Timing spans (scripts/perf_trace.sh; no-op unless TRACE_FILE is set)
+source "$(dirname "${BASH_SOURCE[0]}")/perf_trace.sh"
+
+# Resume checkpoints (scripts/checkpoint.sh; no-op unless CHECKPOINT_DIR is set)
+source "$(dirname "${BASH_SOURCE[0]}")/checkpoint.sh"
+
 : "${SERVER_FILE:?missing SERVER_FILE}"
 : "${SSH_KEY:?missing SSH_KEY}"
 : "${NEW_BUILD_PATH:?missing NEW_BUILD_PATH}"
@@ -23,6 +39,25 @@ echo "[nf_config] NEW_VERSION=${NEW_VERSION} (VER=${VER})"
 echo "[nf_config] DEPLOYMENT_TYPE=${DEPLOYMENT_TYPE} (CAP=${CAP})"
 echo "[nf_config] SERVER_FILE=${SERVER_FILE}"
 
+inventory_load "${SERVER_FILE}" || { echo "[nf_config] ERROR: invalid server inventory ${SERVER_FILE}" >&2; exit 2; }
+
+# Resume: NF values already patched on every CN for this run
+ckpt_skip nf "${INV_IP[@]}" && exit 0
+
+# ---------- render-then-push / python patch engine (optional) ----------
+if [[ "${VALUES_RENDER:-0}" == "1" ]]; then
+  python3 "$(dirname "$0")/values_render.py" --kind nf \
+    --server-file "$SERVER_FILE" --build-path "$NEW_BUILD_PATH" --version "$NEW_VERSION" \
+    --deployment-type "$DEPLOYMENT_TYPE" --user "$HOST_USER" --key "$SSH_KEY" || exit $?
+  ckpt_done nf "${INV_IP[@]}"; exit 0
+fi
+if [[ "${NF_PATCH_ENGINE:-bash}" == "python" ]]; then
+  python3 "$(dirname "$0")/nf_patch.py" \
+    --server-file "$SERVER_FILE" --build-path "$NEW_BUILD_PATH" --version "$NEW_VERSION" \
+    --capacity "$CAP" --user "$HOST_USER" --key "$SSH_KEY" || exit $?
+  ckpt_done nf "${INV_IP[@]}"; exit 0
+fi
+
 # ----------------------------
 # Run a robust remote script
 # ----------------------------
@@ -286,52 +321,26 @@ EOSH
 }
 
 # ----------------------------
-# Iterate servers (robust parser for colon-filled PCI fields)
+# Iterate servers (inventory.py splits the colon-filled PCI fields)
 # ----------------------------
-while IFS= read -r RAW || [[ -n "${RAW:-}" ]]; do
-  [[ -z "$RAW" || "$RAW" =~ ^[[:space:]]*# ]] && continue
-
-  # Use awk to safely split even when N3/N6 contain colons
-  parsed_line="$(
-    awk -F: '
-      BEGIN{OFS="\t"}
-      {
-        name=$1; host=$2; build=$3; mode=$4
-        amf=$NF
-        n4=$(NF-1)
-        # tokens between mode and n4/amf:
-        mid_start=5; mid_end=NF-2; cnt=mid_end-mid_start+1
-        if (cnt<=0){ next }
-        if (mode ~ /VM|vm/ && cnt>=6){
-          n3=$5 ":" $6 ":" $7
-          n6=$8 ":" $9 ":" $10
-        } else if (cnt==2){
-          n3=$5; n6=$6
-        } else {
-          # fallback: split middle tokens in half
-          half=int(cnt/2)
-          n3=$5; for(i=6;i<5+half;i++){ n3=n3 ":" $i }
-          n6=$(5+half); for(i=6+half;i<=mid_end;i++){ n6=n6 ":" $i }
-        }
-        print name,host,build,mode,n3,n6,n4,amf
-      }' <<<"$RAW"
-  )" || true
-
-  if [[ -z "${parsed_line:-}" ]]; then
-    echo "[nf_config] skip malformed line: $RAW"
+for i in "${!INV_IP[@]}"; do
+  NAME="${INV_NAME[i]}"; HOST="${INV_IP[i]}"; REMOTE_BUILD="${INV_BUILD[i]}"; MODE="${INV_MODE[i]}"
+  N3_VAL="${INV_N3[i]}"; N6_VAL="${INV_N6[i]}"; N4_CIDR="${INV_N4[i]}"; AMF_IP="${INV_AMF[i]}"
+  if [[ -z "${N4_CIDR}" ]]; then
+    echo "[nf_config] skip malformed line: ${NAME}:${HOST}"
     continue
   fi
 
-  IFS=$'\t' read -r NAME HOST REMOTE_BUILD MODE N3_VAL N6_VAL N4_CIDR AMF_IP <<< "$parsed_line"
-
+  if ckpt_skip nf "${HOST}"; then continue; fi
   echo "[nf_config][${HOST}] ▶ start"
   echo "[nf_config][${HOST}] parsed: MODE='${MODE}' N3='${N3_VAL}' N6='${N6_VAL}' N4='${N4_CIDR}' AMF='${AMF_IP}'"
 
   NF_ROOT="${NEW_BUILD_PATH%/}/TRILLIUM_5GCN_CNF_REL_${VER}/nf-services/scripts"
 
-  run_remote "${HOST}" "${NF_ROOT}" "${MODE}" "${N3_VAL}" "${N6_VAL}" "${N4_CIDR}" "${AMF_IP}" "${CAP}" "${HOST}" "${VER}"
+  trace_run patch "${HOST}" run_remote "${HOST}" "${NF_ROOT}" "${MODE}" "${N3_VAL}" "${N6_VAL}" "${N4_CIDR}" "${AMF_IP}" "${CAP}" "${HOST}" "${VER}"
+  ckpt_done nf "${HOST}"
 
   echo "[nf_config][${HOST}] ◀ done"
-done < "${SERVER_FILE}"
+done
 
 echo "[nf_config] All hosts processed."
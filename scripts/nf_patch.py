@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+nf_patch.py - NF values patch engine for nf_config.sh (NF_PATCH_ENGINE=python).
+
+Per CN, one ssh reads every top-level *.yaml of
+  <NEW_BUILD_PATH>/TRILLIUM_5GCN_CNF_REL_<VER>/nf-services/scripts
+(as a tar stream) and resolves the N3/N6 interface names to PCI addresses on the CN. The patch
+set built from the server_pci_map.txt line is then applied in memory, line by line, so comments,
+key order and indentation are kept, and only the files that changed are written back, each once,
+in a second ssh. Hosts are patched concurrently (--concurrency). --dry-run prints the unified
+diff per file and writes nothing (--diff prints it on a real run too).
+
+The edits are those of the bash path in nf_config.sh:
+  global-values.yaml  capacitySetup "<CAP>", ingressExtFQDN <host>.nip.io,
+                      k8sCpuMgrStaticPolicyEnable false on LOW
+  *.yaml              image tag v1 -> <VER>
+  amf-1-values.yaml   NGC IP under '# NGC IP for external Communication', every externalIP
+  upf-1-values.yaml   intfConfig type (devPassthrough on VM, else sriov), N3/N6 pciAddress,
+                      upfsp.n4 ipam range <N4_CIDR> / first exclude <N4+1>/32
+  smf-1-values.yaml   smf-n4iwf.smf_n4iwf.n4 ipam range <N4_CIDR> / first exclude <N4+2>/32
+Exit code: 0, or that of the first failing host in file order (3 missing values file,
+4 invalid N4_CIDR, 1 ssh/other). CN connections reuse the ssh_pool.py masters when SSH_POOL_DIR is set.
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import shlex
+import tarfile
+import difflib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import inventory
+import ssh_pool
+import perf_trace
+
+UPF = "upf-1-values.yaml"
+SMF = "smf-1-values.yaml"
+AMF = "amf-1-values.yaml"
+GV = "global-values.yaml"
+VALUES = (UPF, SMF, AMF, GV)
+ALL = "*"   # patch applies to every top-level *.yaml
+SSH_OPTS = ["-o", "StrictHostKeyChecking=no"]
+
+IPV4 = r"[0-9]+\.[0-9]+\.[0-9]+\.[0-9]+"
+CIDR = IPV4 + r"/[0-9]+"
+
+# bash: resolve_pci <PCI|ifname> -> PCI address as seen on the CN ('' if unknown)
+RESOLVE_PCI = r'''
+is_pci() { [[ "$1" =~ ^[0-9A-Fa-f]{4}:[0-9A-Fa-f]{2}:[0-9A-Fa-f]{2}\.[0-9A-Fa-f]$ ]]; }
+resolve_pci() {
+  local t="$1" bus=""
+  if is_pci "$t"; then echo "$t"; return; fi
+  [[ -n "$t" && -d "/sys/class/net/$t" ]] || { echo ""; return; }
+  if command -v ethtool >/dev/null 2>&1; then
+    bus=$(ethtool -i "$t" 2>/dev/null | awk '/bus-info:/ {print $2}') || true
+    is_pci "$bus" && { echo "$bus"; return; }
+  fi
+  bus=$(basename "$(readlink -f "/sys/class/net/$t/device" 2>/dev/null)" 2>/dev/null) || true
+  is_pci "$bus" && echo "$bus" || echo ""
+}
+'''
+
+# Runs on the CN: check the values files, resolve N3/N6, then "PCI <n3|-> <n6|->" + tar of *.yaml
+FETCH_SCRIPT = r'''
+set -euo pipefail
+NF_ROOT="$1"; N3_IN="$2"; N6_IN="$3"
+for f in upf-1-values.yaml smf-1-values.yaml amf-1-values.yaml global-values.yaml; do
+  [[ -f "$NF_ROOT/$f" ]] || { echo "[remote] ERROR: missing $NF_ROOT/$f" >&2; exit 3; }
+done
+''' + RESOLVE_PCI + r'''
+n3="$(resolve_pci "$N3_IN")"; n6="$(resolve_pci "$N6_IN")"
+echo "PCI ${n3:--} ${n6:--}"
+cd "$NF_ROOT"
+find . -maxdepth 1 -type f -name '*.yaml' -printf '%P\0' | tar -cf - --null -T -
+'''
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def _indent(line):
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _comment(rest):
+    """Trailing ' # ...' of a scalar value (outside quotes), or ''."""
+    m = re.search(r"\s+#[^\"']*$", rest)
+    return m.group(0) if m else ""
+
+
+# ---------- patch operations: apply(lines) -> number of lines changed ----------
+
+class Scalar:
+    """`key: value` on the first matching line (all of them with every=True); trailing comment kept."""
+
+    def __init__(self, key, value, every=False):
+        self.key, self.value, self.every = key, value, every
+        self.rx = re.compile(r"^(\s*)(" + re.escape(key) + r")\s*:(.*)$")
+
+    def apply(self, lines):
+        n = 0
+        for i, line in enumerate(lines):
+            m = self.rx.match(line)
+            if not m:
+                continue
+            new = f"{m.group(1)}{self.key}: {self.value}{_comment(m.group(3))}"
+            n += new != line
+            lines[i] = new
+            if not self.every:
+                break
+        return n
+
+    def __str__(self):
+        return f"{self.key}={self.value}"
+
+
+class RangeScalar(Scalar):
+    """Scalar on every `key:` line of each sed-style /start/,/end/ range."""
+
+    def __init__(self, start, end, key, value):
+        super().__init__(key, value, every=True)
+        self.start, self.end = re.compile(r"^ *" + start + ":"), re.compile(r"^ *" + end + ":")
+        self.where = f"{start}..{end}"
+
+    def apply(self, lines):
+        n = 0
+        inside = False
+        for i, line in enumerate(lines):
+            if not inside:
+                if not self.start.match(line):
+                    continue
+                inside = True
+            elif self.end.match(line):
+                inside = False
+            m = self.rx.match(line)
+            if m:
+                new = f"{m.group(1)}{self.key}: {self.value}{_comment(m.group(3))}"
+                n += new != line
+                lines[i] = new
+        return n
+
+    def __str__(self):
+        return f"{self.where} {self.key}={self.value}"
+
+
+class Sub:
+    """Regex substitution on every line."""
+
+    def __init__(self, pattern, repl, label):
+        self.rx, self.repl, self.label = re.compile(pattern), repl, label
+
+    def apply(self, lines):
+        n = 0
+        for i, line in enumerate(lines):
+            new = self.rx.sub(self.repl, line)
+            if new != line:
+                lines[i] = new
+                n += 1
+        return n
+
+    def __str__(self):
+        return self.label
+
+
+class AfterComment:
+    """Replace the first bare IPv4 line after each `comment` line (keeps its indentation)."""
+
+    def __init__(self, comment, ip):
+        self.comment, self.ip = re.compile(comment), ip
+        self.value = re.compile(r"^\s*" + IPV4 + r"(\s*#.*)?$")
+
+    def apply(self, lines):
+        n = 0
+        mark = False
+        for i, line in enumerate(lines):
+            if mark and self.value.match(line):
+                new = _indent(line) + self.ip
+                n += new != line
+                lines[i] = new
+                mark = False
+                continue
+            if self.comment.search(line):
+                mark = True
+        return n
+
+    def __str__(self):
+        return f"NGC IP={self.ip}"
+
+
+class Ipam:
+    """
+    CNI ipam block under the YAML key path `path`: the first ipRanges "range" becomes `cidr`, the
+    first IPv4 of "exclude" becomes `exclude` (inserted if the list is empty). Line-based, same state
+    machine as the awk patchers of nf_config.sh; falls back to its regex patch when the result does
+    not read back as expected.
+    """
+
+    RX_KEY = re.compile(r"^(\s*)([A-Za-z0-9_-]+):\s*$")
+    RX_IPAM = re.compile(r'"ipam"\s*:\s*\{')
+    RX_RANGES = re.compile(r'"ipRanges"\s*:\s*\[')
+    RX_RANGE = re.compile(r'"range"\s*:\s*"' + CIDR + r'"\s*,?$')
+    RX_EXCL = re.compile(r'"exclude"\s*:\s*\[')
+    RX_EXCL_IP = re.compile(r'^\s*"' + CIDR + r'"\s*,?$')
+
+    def __init__(self, path, cidr, exclude):
+        self.path, self.cidr, self.exclude = path, cidr, exclude
+
+    def _patch_lines(self, lines):
+        out = []
+        depth = 0
+        inds = [0] * len(self.path)
+        in_ipam = in_ranges = in_ex = wrote_ex = False
+        exind = ""
+        for line in lines:
+            m = self.RX_KEY.match(line)
+            if m:
+                ind, key = len(m.group(1)), m.group(2)
+                for lvl, name in enumerate(self.path):
+                    if depth < lvl:
+                        break
+                    if depth == lvl:
+                        if key == name:
+                            depth, inds[lvl] = lvl + 1, ind
+                    elif ind <= inds[lvl] and key != name:
+                        depth = lvl
+                        in_ipam = in_ranges = in_ex = wrote_ex = False
+            if depth == len(self.path):
+                if not in_ipam and self.RX_IPAM.search(line):
+                    in_ipam = True
+                if in_ipam:
+                    if not in_ranges and self.RX_RANGES.search(line):
+                        in_ranges = True
+                    elif in_ranges and self.RX_RANGE.search(line):
+                        post = "," if re.search(r'",\s*$', line) else ""
+                        out.append(f'{_indent(line)}"range": "{self.cidr}"{post}')
+                        continue
+                    elif in_ranges and "]" in line:
+                        in_ranges = False
+                    if not in_ex and self.RX_EXCL.search(line):
+                        in_ex, exind = True, _indent(line) + "  "
+                        out.append(line)
+                        continue
+                    elif in_ex and not wrote_ex and self.RX_EXCL_IP.match(line):
+                        trail = "," if re.search(r",\s*$", line) else ""
+                        out.append(f'{exind}"{self.exclude}"{trail}')
+                        wrote_ex = True
+                        continue
+                    elif in_ex and not wrote_ex and re.match(r"^\s*\]", line):
+                        out += [f'{exind}"{self.exclude}"', line]
+                        in_ex, wrote_ex = False, True
+                        continue
+                    elif in_ex and "]" in line:
+                        in_ex = False
+                    if not in_ranges and not in_ex and re.match(r"^\s*\}", line):
+                        in_ipam = False
+            out.append(line)
+        return out
+
+    def _patch_regex(self, txt):
+        anchor = r"[\s\S]*?".join(re.escape(k) + ":" for k in self.path) + r'[\s\S]*?"ipam"[ \t]*:[ \t]*\{'
+        m = re.search(anchor, txt)
+        if not m:
+            return txt
+        start = m.end()
+        r1 = re.search(r'"ipRanges"[ \t]*:[ \t]*\[', txt[start:])
+        if r1:
+            pos = start + r1.end()
+            txt = txt[:pos] + re.sub(r'(?m)^([ \t]*"range":[ \t]*")[0-9]+(?:\.[0-9]+){3}/[0-9]+(".*$)',
+                                     lambda g: g.group(1) + self.cidr + g.group(2), txt[pos:], count=1)
+        r2 = re.search(r'"exclude"[ \t]*:[ \t]*\[\n', txt[start:])
+        if r2:
+            pos = start + r2.end()
+            r3 = re.search(r"\n[ \t]*\]", txt[pos:])
+            if r3:
+                body = txt[pos:pos + r3.start()]
+                body2, done = re.subn(r'(?m)^([ \t]*)"([0-9]+(?:\.[0-9]+){3}/[0-9]+)"([ \t]*,?)',
+                                      lambda g: g.group(1) + '"' + self.exclude + '"' + g.group(3), body, count=1)
+                if not done:
+                    body2 = re.match(r"[ \t]*", body).group(0) + '  "' + self.exclude + '"\n' + body
+                txt = txt[:pos] + body2 + txt[pos + r3.start():]
+        return txt
+
+    def apply(self, lines):
+        new = self._patch_lines(lines)
+        if [e.rstrip(", ") for e in first_excludes(new)] != [f'"{self.exclude}"']:
+            new = self._patch_regex("\n".join(new)).split("\n")
+        n = sum(max(i2 - i1, j2 - j1) for op, i1, i2, j1, j2 in
+                difflib.SequenceMatcher(None, lines, new, autojunk=False).get_opcodes() if op != "equal")
+        lines[:] = new
+        return n
+
+    def __str__(self):
+        return f"{'.'.join(self.path)} ipam range={self.cidr} exclude={self.exclude}"
+
+
+def first_excludes(lines):
+    """First IPv4/CIDR entry of every "exclude": [ list (as the bash verification reads it)."""
+    got, ex = [], False
+    for line in lines:
+        if Ipam.RX_EXCL.search(line):
+            ex = True
+            continue
+        if ex and re.search('"' + CIDR + '"', line):
+            got.append(line.lstrip(" "))
+            ex = False
+    return got
+
+
+def n4_values(n4):
+    """N4_CIDR a.b.c.d/m -> (range, UPF exclude d+1/32, SMF exclude d+2/32), or None if invalid."""
+    m = re.fullmatch(r"([0-9]+\.[0-9]+\.[0-9]+)\.([0-9]+)/([0-9]+)", n4 or "")
+    if not m:
+        return None
+    base3, last, mask = m.group(1), int(m.group(2)), m.group(3)
+    return f"{base3}.{last}/{mask}", f"{base3}.{last + 1}/32", f"{base3}.{last + 2}/32"
+
+
+def build_patch_set(server, capacity, ver, n3_pci, n6_pci):
+    """Declarative patch set for one server line: [(file or ALL, op), ...] applied in order."""
+    n4_range, excl_upf, excl_smf = n4_values(server["n4"])
+    patches = [
+        (GV, Scalar("capacitySetup", f'"{capacity}"')),
+        (GV, Scalar("ingressExtFQDN", f"{server['ip']}.nip.io")),
+    ]
+    if capacity == "LOW":
+        patches.append((GV, Scalar("k8sCpuMgrStaticPolicyEnable", "false")))
+    patches.append((ALL, Sub(r'(image:\s*"[^"]*:)v1(")', r"\g<1>" + ver + r"\g<2>", f"image tag v1->{ver}")))
+    if re.fullmatch(IPV4, server["amf"] or ""):
+        patches += [
+            (AMF, AfterComment(r"# *NGC IP for external Communication", server["amf"])),
+            (AMF, Scalar("externalIP", server["amf"], every=True)),
+        ]
+    intf_type = '"devPassthrough"' if server["mode"].upper() == "VM" else '"sriov"'
+    patches.append((UPF, RangeScalar("intfConfig", "upfsesscoresteps", "type", intf_type)))
+    if n3_pci:
+        patches.append((UPF, RangeScalar("nguInterface", "n6Interface_0", "pciAddress", n3_pci)))
+    if n6_pci:
+        for end in ("n6Interface_1", "n9Interface", "upfsesscoresteps"):
+            patches.append((UPF, RangeScalar("n6Interface_0", end, "pciAddress", n6_pci)))
+    patches += [
+        (UPF, Ipam(["upfsp", "n4"], n4_range, excl_upf)),
+        (SMF, Ipam(["smf-n4iwf", "smf_n4iwf", "n4"], n4_range, excl_smf)),
+    ]
+    return patches
+
+
+class ValuesFile:
+    """One values file: loaded once, patched in memory, serialized once."""
+
+    def __init__(self, info, data, normalize):
+        self.info = info
+        self.orig = data.decode("utf-8", "surrogateescape")
+        text = re.sub(r"\r$", "", self.orig, flags=re.M) if normalize else self.orig
+        self.lines = text.split("\n")
+
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+
+    @property
+    def changed(self):
+        return self.text != self.orig
+
+    def diff(self, host):
+        return difflib.unified_diff(self.orig.split("\n"), self.lines, f"{host}:{self.info.name}",
+                                    f"{host}:{self.info.name} (patched)", lineterm="")
+
+
+def apply_patches(files, patches):
+    """Apply each op to its file(s); returns [(file, op, lines changed)]."""
+    applied = []
+    for target, op in patches:
+        names = sorted(files) if target == ALL else [target]
+        for name in names:
+            applied.append((name, op, op.apply(files[name].lines)))
+    return applied
+
+
+class CNHost:
+    """ssh to one CN (key auth); rides the pipeline's ssh_pool master when one is running."""
+
+    def __init__(self, ip, user, key, caller="nf_patch.py"):
+        self.ip = ip
+        self.user = user
+        self.target = f"{user}@{ip}"
+        self.key = key
+        self.caller = caller
+
+    def run(self, remote, **kw):
+        ssh_pool.record(self.caller, self.ip, self.user)
+        return subprocess.run(["ssh", *ssh_pool.ssh_opts(), *SSH_OPTS, "-i", self.key, self.target, remote],
+                              capture_output=True, **kw)
+
+    def fetch(self, nf_root, n3, n6):
+        """One round trip: resolved (n3_pci, n6_pci) and {name: ValuesFile} of every top-level *.yaml."""
+        remote = "bash -s -- " + " ".join(shlex.quote(a) for a in (nf_root, n3, n6))
+        r = self.run(remote, input=FETCH_SCRIPT.encode())
+        if r.returncode != 0:
+            err = r.stderr.decode(errors="replace").strip()
+            raise HostError(r.returncode, err.splitlines()[-1] if err else f"ssh rc={r.returncode}")
+        head, _, body = r.stdout.partition(b"\n")
+        _, n3_pci, n6_pci = head.decode().split()
+        files = {}
+        with tarfile.open(fileobj=io.BytesIO(body), mode="r:") as tar:
+            for info in tar:
+                if info.isfile():
+                    files[info.name] = ValuesFile(info, tar.extractfile(info).read(), info.name in VALUES)
+        return ("" if n3_pci == "-" else n3_pci), ("" if n6_pci == "-" else n6_pci), files
+
+    def push(self, nf_root, files):
+        """One write: tar of the changed files (ValuesFile, named relative to nf_root) unpacked over it."""
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w:") as tar:
+            for f in files:
+                data = f.text.encode("utf-8", "surrogateescape")
+                f.info.size, f.info.mtime = len(data), int(time.time())
+                tar.addfile(f.info, io.BytesIO(data))
+        r = self.run(f"tar -C {shlex.quote(nf_root)} -xf -", input=buf.getvalue())
+        if r.returncode != 0:
+            raise HostError(1, f"write failed: {r.stderr.decode(errors='replace').strip()[-200:]}")
+
+
+class HostError(Exception):
+    def __init__(self, rc, msg):
+        super().__init__(msg)
+        self.rc = rc
+
+
+def summary(files):
+    """The sanity lines the bash path prints after patching."""
+    out = []
+
+    def after(name, start, pick):
+        lines = files[name].lines
+        for i, line in enumerate(lines):
+            if re.search(start, line):
+                return next((x for x in lines[i + 1:] if pick(x)), None)
+        return None
+
+    amf = files[AMF].lines
+    i = next((i for i, x in enumerate(amf) if re.search(r"# *NGC IP for external Communication", x)), None)
+    if i is not None and i + 1 < len(amf):
+        out.append(f"AMF NGC line: {amf[i + 1]}")
+    ext = next((x for x in amf if re.match(r"^\s*externalIP:", x)), None)
+    if ext is not None:
+        out.append(f"AMF {ext.strip()}")
+    for label, start, key in (("upf.type", "^ *intfConfig:", "^ *type:"),
+                              ("upf.ngu pci", "^ *nguInterface:", "^ *pciAddress:"),
+                              ("upf.n6  pci", "^ *n6Interface_0:", "^ *pciAddress:")):
+        got = after(UPF, start, lambda x, k=key: re.match(k, x))
+        if got is not None:
+            out.append(f"{label}: {got}")
+    out.append(f"upf.exclude(final): {' '.join(first_excludes(files[UPF].lines))}")
+    out.append(f"smf.exclude(final): {' '.join(first_excludes(files[SMF].lines))}")
+    return out
+
+
+def patch_host(server, args):
+    """Fetch, patch and write back one CN. Returns (rc, log lines)."""
+    out = []
+    tag = f"[nf_config][{server['ip']}]"
+    t0 = time.time()
+    out.append(f"{tag} ▶ start")
+    out.append(f"{tag} parsed: MODE='{server['mode']}' N3='{server['n3']}' N6='{server['n6']}' "
+               f"N4='{server['n4']}' AMF='{server['amf']}'")
+    if not n4_values(server["n4"]):
+        out.append(f"{tag} ❌ invalid N4_CIDR '{server['n4']}'")
+        return 4, out
+    host = CNHost(server["ip"], args.user, args.key)
+    try:
+        n3_pci, n6_pci, files = host.fetch(args.nf_root, server["n3"], server["n6"])
+        applied = apply_patches(files, build_patch_set(server, args.capacity, args.ver, n3_pci, n6_pci))
+        for name, op, n in applied:
+            if n or name in VALUES:
+                out.append(f"{tag} {name}: {op} ({n} line(s) changed)" if n else f"{tag} {name}: {op} (unchanged)")
+        changed = [f for f in files.values() if f.changed]
+        if args.diff or args.dry_run:
+            for f in changed:
+                out += list(f.diff(server["ip"]))
+        if args.dry_run:
+            out.append(f"{tag} dry run: {len(changed)} file(s) would change, nothing written")
+        elif changed:
+            host.push(args.nf_root, changed)
+            out.append(f"{tag} wrote {len(changed)} file(s): {', '.join(sorted(f.info.name for f in changed))}")
+        else:
+            out.append(f"{tag} all values files already up to date")
+    except HostError as e:
+        out.append(f"{tag} ❌ {e}")
+        return e.rc, out
+    except (OSError, ValueError, KeyError, tarfile.TarError) as e:
+        out.append(f"{tag} ❌ {e}")
+        return 1, out
+    n4_range, excl_upf, excl_smf = n4_values(server["n4"])
+    out.append(f"{tag} N4_RANGE={n4_range}  EXCL_UPF={excl_upf}  EXCL_SMF={excl_smf}")
+    out += [f"{tag} {line}" for line in summary(files)]
+    out.append(f"{tag} ◀ done in {time.time() - t0:.1f}s")
+    return 0, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Patch the NF values files of all CNs (comment-preserving)")
+    ap.add_argument("--server-file", required=True)
+    ap.add_argument("--build-path", required=True, help="NEW_BUILD_PATH")
+    ap.add_argument("--version", required=True, help="NEW_VERSION, e.g. 6.3.0_EA3")
+    ap.add_argument("--capacity", required=True, choices=("LOW", "MEDIUM", "HIGH"))
+    ap.add_argument("--user", default="root")
+    ap.add_argument("--key", required=True, help="CN ssh key")
+    ap.add_argument("--concurrency", type=int, default=int(os.environ.get("NF_PATCH_CONCURRENCY", "4")))
+    ap.add_argument("--dry-run", action="store_true", default=os.environ.get("NF_PATCH_DRY_RUN", "0") == "1",
+                    help="print the diff, write nothing")
+    ap.add_argument("--diff", action="store_true", default=os.environ.get("NF_PATCH_DIFF", "0") == "1",
+                    help="print the diff on a real run too")
+    args = ap.parse_args()
+
+    args.ver = args.version.split("_", 1)[0]
+    args.nf_root = f"{args.build_path.rstrip('/')}/TRILLIUM_5GCN_CNF_REL_{args.ver}/nf-services/scripts"
+
+    try:
+        servers = inventory.servers(args.server_file)
+    except (OSError, inventory.InventoryError) as e:
+        log(f"[nf_config] ❌ {args.server_file}: {e}")
+        return 2
+
+    log(f"[nf_config] patch engine: {len(servers)} host(s), {args.concurrency} at a time, NF_ROOT={args.nf_root}"
+        + (" (dry run)" if args.dry_run else ""))
+    def traced(server):
+        t0 = time.time()
+        rc, lines = patch_host(server, args)
+        perf_trace.record("patch", t0, host=server["ip"], rc=rc)
+        return rc, lines
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = [pool.submit(traced, s) for s in servers]
+        results = []
+        for fut in futures:
+            rc, lines = fut.result()
+            log("\n".join(lines))
+            results.append(rc)
+    failed = [rc for rc in results if rc]
+    if failed:
+        log(f"[nf_config] ❌ {len(failed)}/{len(results)} host(s) failed")
+        return failed[0]
+    log("[nf_config] All hosts processed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
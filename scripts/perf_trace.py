@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+perf_trace.py - pipeline-wide timing spans and the per-stage / per-host report built from them.
+
+Every script appends spans to TRACE_FILE (JSON lines; nothing is written when it is unset):
+  {"stage": "cluster_install", "host": "10.0.0.1", "phase": "extract", "start": <epoch>, "end": <epoch>,
+   "pid": 1234, "rc": 0, "bytes": ..., "retries": ..., "wait": ...}
+stage is TRACE_STAGE, else the script name. Python scripts use span()/record(); bash scripts source
+scripts/perf_trace.sh (trace_span / trace_run). Each span is one O_APPEND write, so parallel hosts and
+scripts can share the file.
+
+`report` prints the per-stage wall time (first start to last end), busy time (sum of spans), hosts,
+bytes, retries and waits, the per-host time of each stage and the slowest spans, and writes
+  --chrome   a Chrome trace (chrome://tracing, ui.perfetto.dev, speedscope): one process per
+             stage, one thread per host
+  --summary  the same tables as JSON
+
+Usage:
+  python3 scripts/perf_trace.py report --trace trace/spans.jsonl --chrome trace/chrome_trace.json \\
+      --summary trace/summary.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+
+FIELDS = ("bytes", "retries", "wait")
+
+
+def _stage():
+    return os.environ.get("TRACE_STAGE") or os.path.splitext(os.path.basename(sys.argv[0]))[0] or "python"
+
+
+def record(phase, start, end=None, host="", **fields):
+    """Append one span to TRACE_FILE (no-op when unset). Never raises: tracing must not fail a stage."""
+    path = os.environ.get("TRACE_FILE", "")
+    if not path:
+        return
+    span = {"stage": _stage(), "host": host, "phase": phase, "start": round(start, 6),
+            "end": round(time.time() if end is None else end, 6), "pid": os.getpid()}
+    span.update((k, v) for k, v in fields.items() if v is not None)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(span, sort_keys=True) + "\n").encode())
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+class span:
+    """
+    with perf_trace.span("upload", host=ip) as s:
+        ...
+        s["bytes"] += n
+    The dict's fields are recorded with the span; an exception adds rc=1 (unless rc was set).
+    """
+
+    def __init__(self, phase, host="", **fields):
+        self.phase, self.host, self.fields = phase, host, dict(fields)
+
+    def __enter__(self):
+        self.t0 = time.time()
+        return self.fields
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.fields.setdefault("rc", 1)
+        record(self.phase, self.t0, host=self.host, **self.fields)
+        return False
+
+
+# ---------- report ----------
+
+def load(path):
+    spans = []
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            try:
+                s = json.loads(line)
+                s["start"], s["end"] = float(s["start"]), float(s["end"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            spans.append(s)
+    return spans
+
+
+def summarize(spans):
+    t0 = min(s["start"] for s in spans)
+    t1 = max(s["end"] for s in spans)
+    stages = {}
+    for s in sorted(spans, key=lambda s: s["start"]):
+        st = stages.setdefault(s["stage"], {"first": s["start"], "last": s["end"], "spans": 0, "busy": 0.0,
+                                            "failed": 0, "hosts": defaultdict(float),
+                                            **{f: 0 for f in FIELDS}})
+        dur = s["end"] - s["start"]
+        st["last"] = max(st["last"], s["end"])
+        st["spans"] += 1
+        st["busy"] += dur
+        st["failed"] += bool(s.get("rc"))
+        if s.get("host"):
+            st["hosts"][s["host"]] += dur
+        for f in FIELDS:
+            st[f] += s.get(f) or 0
+    out = {"wall": round(t1 - t0, 1), "spans": len(spans), "stages": {}, "slowest": []}
+    for name, st in stages.items():
+        out["stages"][name] = {
+            "offset": round(st["first"] - t0, 1), "wall": round(st["last"] - st["first"], 1),
+            "busy": round(st["busy"], 1), "spans": st["spans"], "failed": st["failed"],
+            "hosts": {h: round(v, 1) for h, v in sorted(st["hosts"].items(), key=lambda kv: -kv[1])},
+            "bytes": st["bytes"], "retries": st["retries"], "wait": round(st["wait"], 1)}
+    for s in sorted(spans, key=lambda s: s["start"] - s["end"])[:15]:
+        out["slowest"].append({"stage": s["stage"], "host": s.get("host", ""), "phase": s["phase"],
+                               "secs": round(s["end"] - s["start"], 1), "offset": round(s["start"] - t0, 1)})
+    return out
+
+
+def human(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024.0
+
+
+def print_report(summary):
+    print(f"==== performance report: {summary['wall']}s wall, {summary['spans']} span(s) ====")
+    print(f"{'stage':<28} {'start':>7} {'wall':>8} {'busy':>8} {'hosts':>5} {'spans':>5} {'fail':>4} "
+          f"{'bytes':>10} {'retry':>5} {'wait':>7}")
+    for name, st in summary["stages"].items():
+        print(f"{name:<28} {st['offset']:>6.1f}s {st['wall']:>7.1f}s {st['busy']:>7.1f}s {len(st['hosts']):>5} "
+              f"{st['spans']:>5} {st['failed']:>4} {human(st['bytes']) if st['bytes'] else '-':>10} "
+              f"{st['retries']:>5} {st['wait']:>6.1f}s")
+    print("---- per host (sum of span time per stage) ----")
+    for name, st in summary["stages"].items():
+        if st["hosts"]:
+            print(f"{name:<28} " + "  ".join(f"{h}={v:.1f}s" for h, v in st["hosts"].items()))
+    print("---- slowest spans ----")
+    for s in summary["slowest"]:
+        print(f"{s['secs']:>8.1f}s  @{s['offset']:>7.1f}s  {s['stage']} / {s['phase']}" + (f" [{s['host']}]" if s["host"] else ""))
+
+
+def chrome_trace(spans):
+    """Trace Event Format: complete ('X') events, one pid per stage and one tid per host."""
+    t0 = min(s["start"] for s in spans)
+    pids, tids, events = {}, {}, []
+    for s in sorted(spans, key=lambda s: s["start"]):
+        pid = pids.setdefault(s["stage"], len(pids) + 1)
+        tid = tids.setdefault((pid, s.get("host") or "-"), len(tids) + 1)
+        args = {k: v for k, v in s.items() if k not in ("stage", "host", "phase", "start", "end")}
+        events.append({"name": s["phase"], "cat": s["stage"], "ph": "X", "pid": pid, "tid": tid,
+                       "ts": round((s["start"] - t0) * 1e6), "dur": max(1, round((s["end"] - s["start"]) * 1e6)),
+                       "args": args})
+    for stage, pid in pids.items():
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": stage}})
+        events.append({"name": "process_sort_index", "ph": "M", "pid": pid, "args": {"sort_index": pid}})
+    for (pid, host), tid in tids.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": host}})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pipeline timing spans: report")
+    ap.add_argument("cmd", choices=("report",))
+    ap.add_argument("--trace", default=os.environ.get("TRACE_FILE", "trace/spans.jsonl"))
+    ap.add_argument("--chrome", default="", help="write a Chrome trace JSON here")
+    ap.add_argument("--summary", default="", help="write the report as JSON here")
+    args = ap.parse_args()
+
+    if not os.path.isfile(args.trace):
+        print(f"[trace] no spans at {args.trace}")
+        return 0
+    spans = load(args.trace)
+    if not spans:
+        print(f"[trace] {args.trace} is empty")
+        return 0
+    summary = summarize(spans)
+    print_report(summary)
+    for path, data in ((args.chrome, lambda: chrome_trace(spans)), (args.summary, lambda: summary)):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(data(), fh, indent=None if path == args.chrome else 1)
+            print(f"[trace] wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
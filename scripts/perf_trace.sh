@@ -0,0 +1,33 @@
+#!/usr/bin/env bash
+# scripts/perf_trace.sh
+# Source from pipeline scripts; every function is a no-op unless TRACE_FILE is set:
+#   trace_now                                  -> epoch seconds (µs)
+#   trace_span <phase> <host> <start> [k=v...] -> append a span from <start> to now
+#   trace_run  <phase> <host> <cmd...>         -> run cmd, record it with rc=<its rc>, return that rc
+# Stage is TRACE_STAGE, else the script name; it is exported so the engines a script runs
+# (fetch_engine.py, nf_patch.py, ...) report under the same stage. Fields with numeric values
+# (rc, bytes, retries, wait) are written as numbers. Report: python3 scripts/perf_trace.py report.
+
+export TRACE_STAGE="${TRACE_STAGE:-$(basename "$0" .sh)}"
+
+trace_now(){ echo "${EPOCHREALTIME:-$(date +%s.%N)}"; }
+
+trace_span(){
+  [[ -n "${TRACE_FILE:-}" ]] || return 0
+  local phase="$1" host="$2" start="$3" kv k v extra=""; shift 3
+  for kv in "$@"; do
+    k="${kv%%=*}"; v="${kv#*=}"
+    if [[ "$v" =~ ^-?(0|[1-9][0-9]*)(\.[0-9]+)?$ ]]; then extra+=",\"$k\":$v"; else extra+=",\"$k\":\"${v//\"/\\\"}\""; fi
+  done
+  printf '{"stage":"%s","host":"%s","phase":"%s","start":%s,"end":%s,"pid":%d%s}\n' \
+    "$TRACE_STAGE" "$host" "$phase" "$start" "$(trace_now)" "$BASHPID" "$extra" \
+    >> "$TRACE_FILE" 2>/dev/null || true
+}
+
+trace_run(){
+  local phase="$1" host="$2" t0 rc=0; shift 2
+  t0="$(trace_now)"
+  "$@" || rc=$?
+  trace_span "$phase" "$host" "$t0" rc=$rc
+  return $rc
+}
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+pipeline_bench.py - reproducible end-to-end benchmark of the install pipeline against simulated CNs.
+
+Stand-ins started by `run` (removed at the end unless --keep):
+  CNs         N sshd containers (BENCH_RUNTIME=docker|podman) on a private bridge network. Stub kubectl /
+              crictl / ctr / helm report every node Ready and every pod Running.
+  build host  one more sshd container (password auth, as fetch_build.sh expects) holding a synthetic
+              TRILLIUM_5GCN_CNF_REL_<ver>.tar.gz (stub install/uninstall scripts sleeping --step-secs, the
+              values files the stages edit, --payload-mb of seeded random data) and <x>_BIN_REL_<ver>.tar.gz
+  EMS         scripts/ems_stub_server.py on the agent (gui_upload.py with EMS_BACKEND=http)
+For every host count (--hosts 1,4,16; fresh CNs each time) the real stage scripts run in order
+(fetch_build.sh, cluster_install.sh, nf_config.sh, ps_config.sh, cs_config.sh, ems_install_and_check.sh,
+gui_upload.py) and each stage records
+  wall    seconds
+  bytes   rx+tx on the stand-ins' interfaces (/sys/class/net/eth0/statistics, read with <runtime> exec)
+  ssh     connections accepted by the stand-ins' sshd (sessions multiplexed on a master count once)
+Results go to --out; stage logs and timing spans (TRACE_FILE) go under --work-dir. Against --baseline a
+stage is a regression when it failed, is more than --tolerance slower (and over 1 s), moves more than
+--tolerance more bytes or opens more ssh connections; any regression exits 1.
+
+Usage:
+  python3 scripts/pipeline_bench.py run [--hosts 1,4,16] [--stages fetch,install,nf,ps,cs,ems,upload]
+      [--payload-mb 64] [--step-secs 1] [--baseline scripts/bench_baseline.json] [--save-baseline] [--keep]
+  python3 scripts/pipeline_bench.py compare bench_results.json [--baseline scripts/bench_baseline.json]
+  python3 scripts/pipeline_bench.py clean
+"""
+
+import os
+import io
+import sys
+import gzip
+import json
+import time
+import random
+import shutil
+import socket
+import tarfile
+import argparse
+import platform
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import perf_trace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RUNTIME = os.environ.get("BENCH_RUNTIME", "docker")
+IMAGE = "k8s-installer-bench:latest"
+NETWORK = "k8s-bench"
+LABEL = "k8s-bench=1"
+VERSION = "6.3.0_EA3"
+K8S_VER = "1.31.4"
+KSPRAY_DIR = "kubespray-2.27.0"
+BUILD_USER, BUILD_PASS = "labadmin", "bench"
+STAGES = ("fetch", "install", "nf", "ps", "cs", "ems", "upload")
+NFS = ("amf", "smf", "upf")
+
+DOCKERFILE = """\
+FROM debian:bookworm-slim
+RUN apt-get update && apt-get install -y --no-install-recommends openssh-server python3 rsync tar gzip \\
+      coreutils procps iproute2 sudo && rm -rf /var/lib/apt/lists/* && mkdir -p /run/sshd \\
+ && sed -i 's/^#\\?PermitRootLogin.*/PermitRootLogin yes/; s/^#\\?PasswordAuthentication.*/PasswordAuthentication yes/' \\
+      /etc/ssh/sshd_config && ssh-keygen -A
+COPY stubs/ /usr/local/bin/
+RUN chmod 755 /usr/local/bin/*
+CMD ["/usr/sbin/sshd", "-D", "-e", "-o", "LogLevel=VERBOSE", "-o", "MaxStartups=200", "-o", "MaxSessions=100"]
+"""
+
+# Cluster CLI stand-ins baked into the image: everything is Ready / Running, nothing to pull
+STUBS = {
+    "kubectl": r'''#!/usr/bin/env bash
+# bench stub: one Ready node, every pod Running
+all=0; for a in "$@"; do [[ "$a" == -A || "$a" == --all-namespaces ]] && all=1; done
+case " $* " in
+  *" -o json"*|*" -ojson"*|*"--output=json"*) echo '{"items": []}' ;;
+  *" get nodes"*|*" get node "*|*" get no "*)
+    echo "NAME STATUS ROLES AGE VERSION"; echo "$(hostname) Ready control-plane 1d v1.31.4" ;;
+  *" get pods"*|*" get pod "*|*" get po "*)
+    if (( all )); then echo "NAMESPACE NAME READY STATUS RESTARTS AGE"; p="default "; else echo "NAME READY STATUS RESTARTS AGE"; p=""; fi
+    for n in ems-0 mongodb-0 amf-0 smf-0 upf-0 ps-0 cs-0; do echo "${p}${n} 1/1 Running 0 1m"; done ;;
+  *) echo "ok" ;;
+esac
+''',
+    "crictl": "#!/usr/bin/env bash\n# bench stub\nexit 0\n",
+    "ctr": "#!/usr/bin/env bash\n# bench stub: no images present, imports succeed\nexit 0\n",
+    "helm": "#!/usr/bin/env bash\n# bench stub\necho ok\n",
+}
+
+VALUES = """\
+global:
+  registry: docker.io
+  image:
+    tag: "v1"
+  capacity: Low
+n3Interface: eth1
+n6Interface: eth2
+n4Cidr: 140.116.10.0/30
+amfN2Ip: 11.6.2.100
+"""
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def sh(*argv, check=True, input=None):
+    r = subprocess.run(argv, capture_output=True, input=input)
+    if check and r.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv[:4])} ...: {r.stderr.decode(errors='replace').strip()[-300:]}")
+    return r.stdout.decode(errors="replace").strip()
+
+
+# ---------- synthetic build ----------
+
+def _stub_script(name, step_secs, extra=""):
+    return f"#!/usr/bin/env bash\n# bench stand-in for {name}\nsleep {step_secs}\n{extra}echo \"{name}: done\"\n"
+
+
+def build_tarballs(out_dir, payload_mb, step_secs, seed=1):
+    """TRILLIUM + BIN tarballs under out_dir; same bytes for the same (payload_mb, step_secs, seed)."""
+    base = VERSION.split("_")[0]
+    top = f"TRILLIUM_5GCN_CNF_REL_{base}"
+    k8s = f"{top}/common/tools/install/k8s-v{K8S_VER}"
+    files = {
+        f"{top}/common/tools/install/load.sh": _stub_script("load.sh", 0),
+        f"{k8s}/install_k8s.sh": _stub_script("install_k8s.sh", step_secs, "touch requirements.txt\n"),
+        f"{k8s}/uninstall_k8s.sh": _stub_script("uninstall_k8s.sh", step_secs),
+        f"{k8s}/requirements.txt": "ansible==9.13.0\n",
+        f"{k8s}/k8s-yamls/k8s-cluster.yml": "kube_version: v1.31.4\n",
+        f"{k8s}/k8s-yamls/hosts.yaml": "all:\n  hosts:\n    node1: {}\n",
+        f"{k8s}/{KSPRAY_DIR}/playbooks/reset.yml": "---\n",
+        f"{k8s}/{KSPRAY_DIR}/inventory/sample/hosts.yaml": "all:\n  hosts: {}\n",
+    }
+    for svc, scripts in (("platform-services", ("install_ps", "uninstall_ps", "install_mongodb", "uninstall_mongodb")),
+                         ("common-services", ("install_cs", "uninstall_cs")),
+                         ("nf-services", ("install_ems", "uninstall_ems", "install_nf", "uninstall_nf"))):
+        for s in scripts:
+            files[f"{top}/{svc}/scripts/{s}.sh"] = _stub_script(f"{s}.sh", step_secs)
+        files[f"{top}/{svc}/scripts/global-values.yaml"] = VALUES
+    for nf in NFS:
+        files[f"{top}/nf-services/scripts/{nf}-1-values.yaml"] = VALUES
+
+    rnd = random.Random(seed)
+    chunk = 1 << 20
+
+    def add_payload(tf, name, mb):
+        data = io.BytesIO(b"".join(rnd.randbytes(chunk) for _ in range(mb)))
+        info = tarfile.TarInfo(name)
+        info.size, info.mtime = len(data.getvalue()), 0
+        tf.addfile(info, data)
+
+    os.makedirs(out_dir, exist_ok=True)
+    tril = os.path.join(out_dir, f"{top}.tar.gz")
+    # gzip header mtime pinned too, so the tarball bytes repeat
+    with gzip.GzipFile(tril, "wb", compresslevel=1, mtime=0) as gz, tarfile.open(fileobj=gz, mode="w") as tf:
+        for name, text in sorted(files.items()):
+            raw = text.encode()
+            info = tarfile.TarInfo(name)
+            info.size, info.mtime = len(raw), 0
+            info.mode = 0o755 if name.endswith(".sh") else 0o644
+            tf.addfile(info, io.BytesIO(raw))
+        add_payload(tf, f"{top}/payload/images.bin", max(0, payload_mb - payload_mb // 4))
+    bin_tar = os.path.join(out_dir, f"BENCH_BIN_REL_{base}.tar.gz")
+    with gzip.GzipFile(bin_tar, "wb", compresslevel=1, mtime=0) as gz, tarfile.open(fileobj=gz, mode="w") as tf:
+        add_payload(tf, "bin/payload.bin", payload_mb // 4)
+    return [tril, bin_tar]
+
+
+# ---------- stand-ins ----------
+
+class Sim:
+    """The containers of one host count: build host + N CNs."""
+
+    def __init__(self, work, n, key):
+        self.work, self.n, self.key = work, n, key
+        self.cns = [f"k8s-bench-cn{i:02d}" for i in range(n)]
+        self.build = "k8s-bench-build"
+        self.ips = {}
+
+    @property
+    def names(self):
+        return [self.build] + self.cns
+
+    def start(self, tarballs):
+        clean(quiet=True)
+        sh(RUNTIME, "network", "create", "--label", LABEL, NETWORK, check=False)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(self._start_one, self.names))
+        sh(RUNTIME, "exec", self.build, "sh", "-c",
+           f"useradd -m {BUILD_USER} 2>/dev/null; echo '{BUILD_USER}:{BUILD_PASS}' | chpasswd; "
+           f"mkdir -p /CNBuild/{VERSION}")
+        for path in tarballs:
+            sh(RUNTIME, "cp", path, f"{self.build}:/CNBuild/{VERSION}/")
+        sh(RUNTIME, "exec", self.build, "chown", "-R", BUILD_USER, "/CNBuild")
+        self._wait_ssh()
+
+    def _start_one(self, name):
+        sh(RUNTIME, "run", "-d", "--name", name, "--hostname", name, "--label", LABEL, "--network", NETWORK, IMAGE)
+        with open(self.key + ".pub", "rb") as fh:
+            sh(RUNTIME, "exec", "-i", name, "sh", "-c",
+               "mkdir -p /root/.ssh && cat > /root/.ssh/authorized_keys && chmod 600 /root/.ssh/authorized_keys",
+               input=fh.read())
+        self.ips[name] = sh(RUNTIME, "inspect", "-f", "{{range .NetworkSettings.Networks}}{{.IPAddress}}{{end}}", name)
+
+    def _wait_ssh(self, timeout=60):
+        deadline = time.time() + timeout
+        for name in self.names:
+            while True:
+                try:
+                    with socket.create_connection((self.ips[name], 22), timeout=2) as s:
+                        if s.recv(4).startswith(b"SSH"):
+                            break
+                except OSError:
+                    pass
+                if time.time() > deadline:
+                    raise RuntimeError(f"sshd on {name} ({self.ips[name]}) not up after {timeout}s")
+                time.sleep(0.5)
+
+    def server_file(self, build_path):
+        path = os.path.join(self.work, f"servers_{self.n}.txt")
+        with open(path, "w") as fh:
+            fh.write("# <name>:<ip>:<build_path>:<VM|SRIOV>:<N3_PCI_OR_IF>:<N6_PCI_OR_IF>:<N4_CIDR>:<AMF_N2_IP>\n")
+            for name in self.cns:
+                fh.write(f"{name}:{self.ips[name]}:{build_path}:VM:eth1:eth2:140.116.10.0/30:11.6.2.100\n")
+        return path
+
+    def counters(self):
+        """(bytes rx+tx, ssh connections accepted) summed over the stand-ins."""
+        def one(name):
+            raw = sh(RUNTIME, "exec", name, "cat", "/sys/class/net/eth0/statistics/rx_bytes",
+                     "/sys/class/net/eth0/statistics/tx_bytes", check=False).split()
+            logs = subprocess.run([RUNTIME, "logs", name], capture_output=True)
+            text = (logs.stdout + logs.stderr).decode(errors="replace")
+            return sum(int(x) for x in raw if x.isdigit()), text.count("Accepted ")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            got = list(pool.map(one, self.names))
+        return sum(b for b, _ in got), sum(c for _, c in got)
+
+
+def build_image(work):
+    ctx = os.path.join(work, "image")
+    os.makedirs(os.path.join(ctx, "stubs"), exist_ok=True)
+    with open(os.path.join(ctx, "Dockerfile"), "w") as fh:
+        fh.write(DOCKERFILE)
+    for name, text in STUBS.items():
+        with open(os.path.join(ctx, "stubs", name), "w") as fh:
+            fh.write(text)
+    log(f"[bench] building {IMAGE} ({RUNTIME})")
+    sh(RUNTIME, "build", "-q", "-t", IMAGE, ctx)
+
+
+def clean(quiet=False):
+    ids = sh(RUNTIME, "ps", "-aq", "--filter", f"label={LABEL}", check=False).split()
+    if ids:
+        sh(RUNTIME, "rm", "-f", *ids, check=False)
+    sh(RUNTIME, "network", "rm", NETWORK, check=False)
+    if not quiet:
+        log(f"[bench] removed {len(ids)} container(s) and network {NETWORK}")
+
+
+class EmsStub:
+    def __init__(self, work):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.log = open(os.path.join(work, "ems_stub.log"), "w")
+        self.proc = subprocess.Popen([sys.executable, os.path.join(HERE, "ems_stub_server.py"), "--port", str(self.port)],
+                                     stdout=self.log, stderr=subprocess.STDOUT)
+        for _ in range(50):
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError("ems_stub_server.py did not start")
+
+    def stop(self):
+        self.proc.terminate()
+        self.proc.wait()
+        self.log.close()
+
+
+# ---------- stages ----------
+
+def stage_cmd(stage):
+    if stage == "upload":
+        return [sys.executable, os.path.join(HERE, "gui_upload.py")]
+    script = {"fetch": "fetch_build.sh", "install": "cluster_install.sh", "nf": "nf_config.sh",
+              "ps": "ps_config.sh", "cs": "cs_config.sh", "ems": "ems_install_and_check.sh"}[stage]
+    return ["bash", "-euo", "pipefail", os.path.join(HERE, script)]
+
+
+def stage_env(sim, server_file, key, build_path, ems_port, config_dir, trace_file):
+    """The Jenkinsfile's stage environment, pointed at the stand-ins."""
+    return {**os.environ,
+            "SERVER_FILE": server_file, "INSTALL_SERVER_FILE": server_file,
+            "SSH_KEY": key, "CN_SSH_KEY": key, "HOST_USER": "root",
+            "NEW_VERSION": VERSION, "NEW_BUILD_PATH": build_path, "K8S_VER": K8S_VER, "KSPRAY_DIR": KSPRAY_DIR,
+            "DEPLOYMENT_TYPE": "Low", "INSTALL_MODE": "Fresh_installation", "INSTALL_IP_ADDR": "",
+            "BUILD_SRC_HOST": sim.ips[sim.build], "BUILD_SRC_USER": BUILD_USER,
+            "BUILD_SRC_BASE": f"/CNBuild/{VERSION}", "BUILD_SRC_PASS": BUILD_PASS,
+            "EXTRACT_BUILD_TARBALLS": "true", "INSTALL_RETRY_COUNT": "1", "BUILD_WAIT_SECS": "60",
+            "EMS_BACKEND": "http", "EMS_URL": f"http://127.0.0.1:{ems_port}/ems/login",
+            "CONFIG_DIR": config_dir, "UPLOAD_NFS": ",".join(NFS), "DEBUG_DIR": os.path.join(sim.work, "debug"),
+            "TRACE_FILE": trace_file}
+
+
+def run_counts(args):
+    work = os.path.abspath(args.work_dir)
+    shutil.rmtree(work, ignore_errors=True)
+    for d in ("logs", "trace", "build", "config_files"):
+        os.makedirs(os.path.join(work, d))
+    key = os.path.join(work, "id_bench")
+    sh("ssh-keygen", "-q", "-t", "ed25519", "-N", "", "-f", key)
+    config_dir = os.path.join(work, "config_files")
+    for nf in NFS:
+        with open(os.path.join(config_dir, f"bench_{nf}.json"), "w") as fh:
+            json.dump({"nf": nf, "plmn": {"mcc": "001", "mnc": "01"}, "slices": [{"sst": 1, "sd": "000001"}]}, fh)
+
+    build_image(work)
+    t0 = time.time()
+    tarballs = build_tarballs(os.path.join(work, "build"), args.payload_mb, args.step_secs)
+    log(f"[bench] synthetic build: {', '.join(os.path.basename(t) for t in tarballs)} "
+        f"({perf_trace.human(sum(os.path.getsize(t) for t in tarballs))}, {time.time() - t0:.1f}s)")
+    build_path = "/home/labadmin/" + VERSION.replace("_", "/")
+    ems = EmsStub(work)
+    results = {}
+    try:
+        for n in args.hosts:
+            sim = Sim(work, n, key)
+            log(f"[bench] ── {n} host(s) ──")
+            sim.start(tarballs)
+            server_file = sim.server_file(build_path)
+            env = stage_env(sim, server_file, key, build_path, ems.port, config_dir,
+                            os.path.join(work, "trace", f"{n}.jsonl"))
+            for stage in args.stages:
+                bytes0, ssh0 = sim.counters()
+                logfile = os.path.join(work, "logs", f"{n}_{stage}.log")
+                t = time.time()
+                with open(logfile, "w") as fh:
+                    rc = subprocess.run(stage_cmd(stage), env=env, cwd=work, stdout=fh, stderr=subprocess.STDOUT).returncode
+                wall = round(time.time() - t, 2)
+                bytes1, ssh1 = sim.counters()
+                results[f"{stage}@{n}"] = {"stage": stage, "hosts": n, "wall": wall, "bytes": bytes1 - bytes0,
+                                           "ssh": ssh1 - ssh0, "rc": rc}
+                log(f"[bench] {stage:<8} {n:>3} host(s)  {wall:>8.2f}s  {perf_trace.human(bytes1 - bytes0):>9}  "
+                    f"{ssh1 - ssh0:>4} ssh  rc={rc}{'' if rc == 0 else '  (' + logfile + ')'}")
+            if not args.keep:
+                clean(quiet=True)
+    finally:
+        ems.stop()
+    return {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "host": platform.node(), "runtime": RUNTIME,
+                     "payload_mb": args.payload_mb, "step_secs": args.step_secs, "hosts": args.hosts,
+                     "stages": args.stages},
+            "results": results}
+
+
+# ---------- baseline ----------
+
+def compare(current, baseline, tolerance):
+    """Print current vs baseline per stage/host count; returns the number of regressions."""
+    base = baseline.get("results", {})
+    regressions = 0
+    log(f"{'STAGE':<9}{'HOSTS':>6}  {'WALL':>18}  {'BYTES':>21}  {'SSH':>10}  VERDICT")
+    for key, cur in sorted(current["results"].items(), key=lambda kv: (STAGES.index(kv[1]["stage"]), kv[1]["hosts"])):
+        old = base.get(key)
+        why = []
+        if cur["rc"] != 0:
+            why.append(f"rc={cur['rc']}")
+        if old:
+            if cur["wall"] > old["wall"] * (1 + tolerance) and cur["wall"] - old["wall"] > 1.0:
+                why.append("slower")
+            if cur["bytes"] > old["bytes"] * (1 + tolerance):
+                why.append("more bytes")
+            if cur["ssh"] > old["ssh"]:
+                why.append("more ssh")
+            wall = f"{old['wall']:.1f}->{cur['wall']:.1f}s"
+            moved = f"{perf_trace.human(old['bytes'])}->{perf_trace.human(cur['bytes'])}"
+            ssh = f"{old['ssh']}->{cur['ssh']}"
+        else:
+            wall, moved, ssh = f"{cur['wall']:.1f}s", perf_trace.human(cur["bytes"]), str(cur["ssh"])
+        verdict = "❌ " + ", ".join(why) if why else ("✅" if old else "new")
+        regressions += bool(why)
+        log(f"{cur['stage']:<9}{cur['hosts']:>6}  {wall:>18}  {moved:>21}  {ssh:>10}  {verdict}")
+    return regressions
+
+
+def load_json(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="End-to-end pipeline benchmark against simulated CNs")
+    sub = ap.add_subparsers(dest="cmd")
+    sub.required = True
+    r = sub.add_parser("run")
+    r.add_argument("--hosts", default=os.environ.get("BENCH_HOSTS", "1,4,16"))
+    r.add_argument("--stages", default=os.environ.get("BENCH_STAGES", ",".join(STAGES)))
+    r.add_argument("--payload-mb", type=int, default=int(os.environ.get("BENCH_PAYLOAD_MB", "64")))
+    r.add_argument("--step-secs", type=float, default=float(os.environ.get("BENCH_STEP_SECS", "1")),
+                   help="sleep in each stub install/uninstall script")
+    r.add_argument("--work-dir", default=os.environ.get("BENCH_DIR", ".bench"))
+    r.add_argument("--out", default="bench_results.json")
+    r.add_argument("--keep", action="store_true", help="leave the last host count's containers running")
+    c = sub.add_parser("compare")
+    c.add_argument("results")
+    for p in (r, c):
+        p.add_argument("--baseline", default=os.path.join(HERE, "bench_baseline.json"))
+        p.add_argument("--tolerance", type=float, default=float(os.environ.get("BENCH_TOLERANCE", "0.15")))
+    r.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    sub.add_parser("clean")
+    args = ap.parse_args()
+
+    if args.cmd == "clean":
+        clean()
+        return 0
+    if args.cmd == "compare":
+        current = load_json(args.results)
+        if current is None:
+            log(f"[bench] ❌ cannot read {args.results}")
+            return 2
+    else:
+        args.hosts = [int(x) for x in args.hosts.split(",") if x.strip()]
+        args.stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+        bad = [s for s in args.stages if s not in STAGES]
+        if bad or not args.hosts:
+            log(f"[bench] ❌ unknown stage(s) {bad} (choose from {','.join(STAGES)})" if bad else "[bench] ❌ no host counts")
+            return 2
+        if not shutil.which(RUNTIME):
+            log(f"[bench] ❌ {RUNTIME} not found (BENCH_RUNTIME=docker|podman)")
+            return 2
+        try:
+            current = run_counts(args)
+        except (RuntimeError, OSError) as e:
+            log(f"[bench] ❌ {e}")
+            clean(quiet=True)
+            return 2
+        with open(args.out, "w") as fh:
+            json.dump(current, fh, indent=2)
+        log(f"[bench] results -> {args.out}")
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        log(f"[bench] no baseline at {args.baseline}")
+        regressions = compare(current, {}, args.tolerance)
+    else:
+        log(f"[bench] baseline {args.baseline} ({baseline['meta'].get('time')}, {baseline['meta'].get('host')})")
+        regressions = compare(current, baseline, args.tolerance)
+    if getattr(args, "save_baseline", False):
+        with open(args.baseline, "w") as fh:
+            json.dump(current, fh, indent=2)
+        log(f"[bench] baseline saved -> {args.baseline}")
+        return 0
+    if regressions:
+        log(f"[bench] ❌ {regressions} regression(s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
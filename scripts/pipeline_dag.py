@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+pipeline_dag.py - run the install pipeline as a dependency graph of per-host tasks instead of
+fixed, all-hosts-at-once stages.
+
+Every step of the Jenkinsfile (and of the NF / CS / EMS pipelines) becomes one task per CN, running
+the same script against a one-line copy of that CN's SERVER_FILE entry:
+
+  reset[h]      cluster_reset.sh                   (INSTALL_MODE=Upgrade_with_cluster_reset)
+  fetch[h]      fetch_build.sh                     (FETCH_BUILD=true; one at a time: the first reads
+                                                    the build host, the rest hit fetch_engine's cache)
+  prep[h]       cluster_install.sh INSTALL_PHASES=prep     after reset[h], fetch[h]
+  install[h]    cluster_install.sh INSTALL_PHASES=install  after prep[h]; one installer at a time
+  health[h]     k8s_health_check.sh                after install[h]
+  images[h]     image_prepull.py                   after install[h]   (PS/CS/NF/EMS images side-loaded)
+  nf[h]         nf_config.sh                       after prep[h]      (values only: overlaps install)
+  ps-prep[h]    values_render.py --kind ps         after prep[h]      (VALUES_RENDER=1)
+  ps[h]         ps_config.sh                       after health[h], ps-prep[h], images[h]
+  ps-health[h]  k8s_health_check.sh                after ps[h]
+  cs-prep[h]    values_render.py --kind cs         after prep[h]      (VALUES_RENDER=1)
+  cs[h]         cs_config.sh                       after ps-health[h] (else health[h]), cs-prep[h], images[h]
+  ems[runner]   ems_install_and_check.sh           after health[h], nf[h], images[h]
+
+So host B fetches while host A installs, NF values are rendered while the installer runs and PS
+values are rendered while EMS pulls its images. Tasks that change a cluster (install, health, ps,
+cs, ems) hold that host's lock, the installer also holds a global one (as cluster_install.sh
+serializes it today). Ready tasks start longest-remaining-path first (static estimates).
+
+Two steps get one recovery attempt before they count as failed, as the Jenkinsfile stages do:
+install[h] re-runs the key bootstrap and the install when its output shows "Permission denied
+(publickey,password)" (rebootstrap_keys.sh); health[h] runs uninstall -> reinstall under the
+installer lock (k8s_reinstall.sh) and checks once more. A task past its timeout gets SIGTERM, then
+SIGKILL after KILL_GRACE seconds.
+
+A failed task skips everything that depends on it and no new task starts (--keep-going: tasks that
+do not depend on it still run). At the end the task table and the critical path are printed: the
+chain of tasks, each started by the end of the previous one (a dependency, or the lock / slot it
+waited for), that ends with the last task. Spans go to TRACE_FILE (perf_trace.py), task output to
+--log-dir/<task>.log, the table and critical path to --summary as JSON.
+
+Usage:
+  python3 scripts/pipeline_dag.py --server-file server_pci_map.txt --steps reset,fetch,install,health,ps \\
+      [--concurrency 8] [--keep-going] [--summary trace/dag_summary.json] [--dry-run]
+Inputs are the environment the stage scripts already read (NEW_VERSION, NEW_BUILD_PATH, SSH_KEY, ...).
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import queue
+import signal
+import shutil
+import argparse
+import threading
+import subprocess
+
+import inventory
+import perf_trace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STEPS = ("reset", "fetch", "install", "health", "images", "nf", "ps", "cs", "ems")
+REQUIRED_ENV = ("NEW_VERSION", "NEW_BUILD_PATH", "SSH_KEY")
+
+# step -> (timeout secs, estimate secs); timeouts are the Jenkinsfile stage timeouts
+LIMITS = {
+    "reset": (900, 600), "fetch": (1200, 300), "prep": (1200, 120), "install": (1200, 900),
+    "health": (2700, 300), "images": (1800, 300), "nf": (600, 30), "ps-prep": (600, 30), "ps": (1800, 900),
+    "ps-health": (600, 60), "cs-prep": (600, 30), "cs": (1800, 600), "ems": (1800, 600),
+}
+
+KILL_GRACE = 30       # SIGTERM -> SIGKILL for a task past its timeout (a hung ssh ignores the TERM)
+
+PENDING, RUNNING, OK, FAILED, SKIPPED = "pending", "running", "ok", "failed", "skipped"
+
+_print_lock = threading.Lock()
+
+
+def log(msg):
+    with _print_lock:
+        print(msg, flush=True)
+
+
+class Recovery:
+    """Run once after the task failed (only if its output matched `pattern`), then the task again."""
+    def __init__(self, why, argv, locks=(), pattern=None):
+        self.why, self.argv, self.locks, self.pattern = why, argv, tuple(locks), pattern
+
+
+class Task:
+    def __init__(self, step, host, label, argv, env=None, deps=(), locks=(), recovery=None):
+        self.step, self.host, self.label = step, host, label
+        self.name = f"{step}[{label}]"
+        self.argv, self.env = argv, dict(env or {})
+        self.deps, self.locks = [d for d in deps if d is not None], tuple(locks)
+        self.timeout, self.est = LIMITS[step]
+        self.status, self.rc = PENDING, None
+        self.start = self.end = self.ready = 0.0
+        self.blocked_by = None      # task whose end let this one start (critical path edge)
+        self.rank = 0.0             # est + longest est path of the tasks after it
+        self.proc = None
+        self.recovery = recovery
+        self.recovering = False     # set for the second run: recovery argv first, then argv again
+        self.matched = False        # the recovery pattern appeared in the output
+
+
+def script(name):
+    return ["bash", "-euo", "pipefail", os.path.join(HERE, name)]
+
+
+def render(kind, server_file):
+    e = os.environ.get
+    return [sys.executable, os.path.join(HERE, "values_render.py"), "--kind", kind, "--server-file", server_file,
+            "--build-path", e("NEW_BUILD_PATH", ""), "--version", e("NEW_VERSION", ""),
+            "--deployment-type", e("DEPLOYMENT_TYPE", ""), "--user", e("HOST_USER", "root"), "--key", e("SSH_KEY", "")]
+
+
+def host_files(server_file, servers, work_dir):
+    """One server file per CN holding just its line, so each task's script sees a single host."""
+    with open(server_file, encoding="utf-8", errors="replace") as fh:
+        lines = fh.read().splitlines()
+    os.makedirs(os.path.join(work_dir, "hosts"), exist_ok=True)
+    out = {}
+    for s in servers:
+        path = os.path.join(work_dir, "hosts", f"{s['name'] or s['ip']}.txt")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(lines[s["line"] - 1].replace("\r", "").strip() + "\n")
+        out[s["ip"]] = path
+    return out
+
+
+def build_graph(servers, files, steps, work_dir):
+    """The task list (dependency order) for the selected steps; steps gated off by env are left out."""
+    env = os.environ
+    if env.get("INSTALL_MODE", "").strip() != "Upgrade_with_cluster_reset":
+        steps = [s for s in steps if s != "reset"]
+    if env.get("FETCH_BUILD", "false").lower() != "true":
+        steps = [s for s in steps if s != "fetch"]
+    rendered = env.get("VALUES_RENDER", "0") == "1"
+    state_dir = os.path.join(work_dir, "install_state")
+    tasks = []
+
+    def add(step, s, argv, extra=None, deps=(), locks=(), recovery=None):
+        t = Task(step, s["ip"], s["name"] or s["ip"], argv, extra, deps, locks, recovery)
+        tasks.append(t)
+        return t
+
+    ems_host = servers[0]["ip"]
+    if env.get("HOST_NAME"):
+        ems_host = next((s["ip"] for s in servers if s["name"] == env["HOST_NAME"]), ems_host)
+
+    for s in servers:
+        f = files[s["ip"]]
+        cluster = f"cluster:{s['ip']}"
+        one = {"SERVER_FILE": f}
+        reset = fetch = prep = health = images = nf = ps_done = None
+        if "reset" in steps:
+            reset = add("reset", s, script("cluster_reset.sh"), {**one, "CLUSTER_RESET": "true"}, locks=(cluster,))
+        if "fetch" in steps:
+            fetch = add("fetch", s, script("fetch_build.sh"),
+                        {**one, "CN_SSH_KEY": env.get("CN_SSH_KEY") or env.get("SSH_KEY", "")}, locks=("build-src",))
+        if "install" in steps:
+            inst = {"INSTALL_SERVER_FILE": f, "INSTALL_STATE_DIR": state_dir}
+            prep = add("prep", s, script("cluster_install.sh"), {**inst, "INSTALL_PHASES": "prep"}, (reset, fetch))
+            install = add("install", s, script("cluster_install.sh"), {**inst, "INSTALL_PHASES": "install"},
+                          (prep,), ("installer", cluster),
+                          Recovery("ssh permission denied: re-running key bootstrap", script("rebootstrap_keys.sh"),
+                                   pattern="Permission denied (publickey,password)"))
+        else:
+            install = None
+        if "health" in steps:
+            health = add("health", s, script("k8s_health_check.sh"), one, (install,), (cluster,),
+                         Recovery("not healthy: uninstall -> reinstall", script("k8s_reinstall.sh"), ("installer",)))
+        if "images" in steps:
+            images = add("images", s, [sys.executable, os.path.join(HERE, "image_prepull.py"), "--server-file", f], one,
+                         (install,))
+        values_ready = prep or fetch or reset
+        if "nf" in steps:
+            nf = add("nf", s, script("nf_config.sh"), one, (values_ready,))
+        if "ps" in steps:
+            ps_prep = add("ps-prep", s, render("ps", f), deps=(values_ready,)) if rendered else None
+            ps = add("ps", s, script("ps_config.sh"), one, (health or install, ps_prep, images), (cluster,))
+            ps_done = add("ps-health", s, script("k8s_health_check.sh"), one, (ps,), (cluster,))
+        if "cs" in steps:
+            cs_prep = add("cs-prep", s, render("cs", f), deps=(values_ready,)) if rendered else None
+            add("cs", s, script("cs_config.sh"), one, (ps_done or health or install, cs_prep, images), (cluster,))
+        if "ems" in steps and s["ip"] == ems_host:
+            add("ems", s, script("ems_install_and_check.sh"), one, (health or install, nf, images), (cluster,))
+    return tasks
+
+
+def rank(tasks):
+    """rank = est + the longest est path of the tasks that depend on it (critical-path-first order)."""
+    after = {id(t): [] for t in tasks}
+    for t in tasks:
+        for d in t.deps:
+            after[id(d)].append(t)
+    for t in reversed(tasks):               # tasks are created in dependency order
+        t.rank = t.est + max((n.rank for n in after[id(t)]), default=0.0)
+
+
+class Runner:
+    def __init__(self, tasks, concurrency, keep_going, log_dir):
+        self.tasks, self.concurrency, self.keep_going, self.log_dir = tasks, max(1, concurrency), keep_going, log_dir
+        self.held = {}                      # lock -> task
+        self.done = queue.Queue()
+        self.stopping = False
+
+    @staticmethod
+    def _locks(t):
+        return t.locks + (t.recovery.locks if t.recovering else ())
+
+    def _launchable(self, t):
+        return all(d.status == OK for d in t.deps) and not any(lk in self.held for lk in self._locks(t))
+
+    def _exec(self, t, argv, env, lf):
+        """Run one command of the task (own session, streamed to its log), killed at the task timeout."""
+        pattern = t.recovery.pattern if t.recovery else None
+        t.proc = subprocess.Popen(argv, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT, start_new_session=True)
+        timer = threading.Timer(t.timeout, self._kill, (t, "timeout"))
+        timer.start()
+        try:
+            for raw in t.proc.stdout:
+                line = raw.decode("utf-8", "replace").rstrip("\n")
+                lf.write(line + "\n")
+                log(f"[{t.name}] {line}")
+                if pattern and pattern in line:
+                    t.matched = True
+            return t.proc.wait()
+        finally:
+            timer.cancel()
+
+    def _run(self, t):
+        path = os.path.join(self.log_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", t.name).strip("_") + ".log")
+        env = {**os.environ, **t.env}
+        env.pop("TRACE_STAGE", None)        # each script reports under its own name
+        start = time.time()
+        if not t.recovering:
+            t.start = start
+        try:
+            with open(path, "a" if t.recovering else "w", encoding="utf-8") as lf:
+                t.rc = 0
+                if t.recovering:
+                    lf.write(f"---- recovery: {t.recovery.why} ----\n")
+                    t.rc = self._exec(t, t.recovery.argv, env, lf)
+                    perf_trace.record(f"{t.step}-recovery", start, time.time(), host=t.host, rc=t.rc)
+                if t.rc == 0:
+                    t.rc = self._exec(t, t.argv, env, lf)
+        except OSError as e:
+            log(f"[{t.name}] ❌ {e}")
+            t.rc = 127
+        t.end = time.time()
+        perf_trace.record(t.step, start, t.end, host=t.host, rc=t.rc, wait=round(start - t.ready, 1),
+                          retry=int(t.recovering))
+        self.done.put(t)
+
+    def _kill(self, t, why):
+        proc = t.proc
+        if proc and proc.poll() is None:
+            log(f"[{t.name}] ⏱️  {why}: stopping")
+            try:
+                os.killpg(proc.pid, signal.SIGTERM)
+            except OSError:
+                return
+            threading.Timer(KILL_GRACE, self._force_kill, (t, proc)).start()
+
+    def _force_kill(self, t, proc):
+        if proc.poll() is None:
+            log(f"[{t.name}] ⏱️  still running {KILL_GRACE}s after SIGTERM: killing")
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def abort(self, *_):
+        self.stopping = True
+        for t in self.tasks:
+            if t.status == RUNNING:
+                self._kill(t, "pipeline aborted")
+
+    def run(self):
+        t0 = time.time()
+        last = None
+        failed = False
+        while True:
+            for t in self.tasks:
+                if t.status == PENDING and any(d.status in (FAILED, SKIPPED) for d in t.deps):
+                    t.status = SKIPPED
+                    log(f"[dag] ⏭️  {t.name} skipped (dependency failed)")
+            running = sum(t.status == RUNNING for t in self.tasks)
+            if not (self.stopping or (failed and not self.keep_going)):
+                for t in sorted((t for t in self.tasks if t.status == PENDING), key=lambda t: -t.rank):
+                    if running >= self.concurrency:
+                        break
+                    if not self._launchable(t):
+                        continue
+                    t.status, t.blocked_by = RUNNING, last
+                    if not t.recovering:
+                        t.ready = max([d.end for d in t.deps] + [t0])
+                    for lk in self._locks(t):
+                        self.held[lk] = t
+                    running += 1
+                    log(f"[dag] ▶ {t.name}")
+                    threading.Thread(target=self._run, args=(t,), daemon=True).start()
+            if running == 0:
+                break
+            last = self.done.get()
+            last.status = OK if last.rc == 0 else FAILED
+            for lk in self._locks(last):
+                self.held.pop(lk, None)
+            r = last.recovery
+            if (last.status == FAILED and r and not last.recovering and not self.stopping
+                    and (r.pattern is None or last.matched)):
+                log(f"[dag] 🔁 {last.name} rc={last.rc}: {r.why}, then once more")
+                last.status, last.recovering = PENDING, True
+                continue
+            log(f"[dag] {'✅' if last.status == OK else '❌'} {last.name} rc={last.rc} "
+                f"({last.end - last.start:.1f}s)")
+            failed = failed or last.status == FAILED
+        for t in self.tasks:
+            if t.status == PENDING:
+                t.status = SKIPPED
+        return t0
+
+
+def critical_path(tasks):
+    finished = [t for t in tasks if t.end]
+    if not finished:
+        return []
+    path = [max(finished, key=lambda t: t.end)]
+    while path[-1].blocked_by is not None:
+        path.append(path[-1].blocked_by)
+    return path[::-1]
+
+
+def report(tasks, t0, summary_path):
+    wall = max([t.end for t in tasks if t.end] + [t0]) - t0
+    log(f"==== pipeline DAG: {wall:.1f}s wall, {len(tasks)} task(s) ====")
+    log(f"{'task':<34} {'status':<8} {'start':>8} {'secs':>8} {'wait':>7}")
+    for t in sorted(tasks, key=lambda t: (t.start or float("inf"), t.name)):
+        if t.start:
+            log(f"{t.name:<34} {t.status:<8} {t.start - t0:>7.1f}s {t.end - t.start:>7.1f}s {t.start - t.ready:>6.1f}s")
+        else:
+            log(f"{t.name:<34} {t.status:<8} {'-':>8} {'-':>8} {'-':>7}")
+    path = critical_path(tasks)
+    busy = sum(t.end - t.start for t in path)
+    log(f"---- critical path: {busy:.1f}s of {wall:.1f}s in tasks ----")
+    for t in path:
+        log(f"  {t.name:<32} +{t.start - t0:>7.1f}s {t.end - t.start:>7.1f}s")
+    if summary_path:
+        os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+        with open(summary_path, "w", encoding="utf-8") as fh:
+            json.dump({"wall": round(wall, 1),
+                       "tasks": [{"task": t.name, "step": t.step, "host": t.host, "status": t.status, "rc": t.rc,
+                                  "deps": [d.name for d in t.deps], "locks": list(t.locks),
+                                  "start": round(t.start - t0, 1) if t.start else None,
+                                  "secs": round(t.end - t.start, 1) if t.end else None} for t in tasks],
+                       "critical_path": [t.name for t in path]}, fh, indent=1)
+        log(f"[dag] wrote {summary_path}")
+
+
+def print_plan(tasks):
+    log(f"{'task':<34} {'est':>6} {'rank':>6}  after / locks")
+    for t in tasks:
+        log(f"{t.name:<34} {t.est:>5}s {t.rank:>5.0f}s  {', '.join(d.name for d in t.deps) or '-'}"
+            + (f"  [{', '.join(t.locks)}]" if t.locks else ""))
+    chain, cur = [], max(tasks, key=lambda t: t.rank, default=None)
+    while cur is not None:
+        chain.append(cur.name)
+        nxt = [t for t in tasks if cur in t.deps]
+        cur = max(nxt, key=lambda t: t.rank) if nxt else None
+    log(f"estimated critical path ({max((t.rank for t in tasks), default=0):.0f}s): " + " → ".join(chain))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the install pipeline as a per-host dependency graph")
+    ap.add_argument("--server-file", default=os.environ.get("SERVER_FILE", "server_pci_map.txt"))
+    ap.add_argument("--steps", default=os.environ.get("PIPELINE_DAG_STEPS", "reset,fetch,install,health,ps"),
+                    help="comma list of " + ",".join(STEPS))
+    ap.add_argument("--concurrency", type=int, default=int(os.environ.get("PIPELINE_DAG_CONCURRENCY", "8")))
+    ap.add_argument("--keep-going", action="store_true", default=os.environ.get("PIPELINE_DAG_KEEP_GOING", "0") == "1",
+                    help="after a failure keep starting tasks that do not depend on it")
+    ap.add_argument("--work-dir", default=os.environ.get("PIPELINE_DAG_DIR", ".pipeline_dag"))
+    ap.add_argument("--log-dir", default="", help="per-task logs (default <work-dir>/logs)")
+    ap.add_argument("--summary", default=os.environ.get("PIPELINE_DAG_SUMMARY", ""), help="write tasks + critical path JSON")
+    ap.add_argument("--dry-run", action="store_true", help="print the graph and exit")
+    args = ap.parse_args()
+
+    steps = [s.strip() for s in args.steps.split(",") if s.strip()]
+    unknown = [s for s in steps if s not in STEPS]
+    if unknown:
+        log(f"[dag] ❌ unknown step(s): {', '.join(unknown)} (known: {', '.join(STEPS)})")
+        return 2
+    try:
+        servers = inventory.servers(args.server_file)
+    except (OSError, inventory.InventoryError) as e:
+        log(f"[dag] ❌ {e}")
+        return 2
+    missing = [v for v in REQUIRED_ENV if not os.environ.get(v)]
+    if missing and not args.dry_run:
+        log(f"[dag] ❌ missing {', '.join(missing)}")
+        return 2
+
+    if not args.dry_run:
+        shutil.rmtree(args.work_dir, ignore_errors=True)      # no prep state / logs from a previous run
+    files = host_files(args.server_file, servers, args.work_dir)
+    os.environ.setdefault("CHECKPOINT_SERVER_FILE", os.path.abspath(args.server_file))   # key on the full inventory
+    tasks = build_graph(servers, files, steps, args.work_dir)
+    rank(tasks)
+    log(f"[dag] {len(servers)} CN(s), {len(tasks)} task(s), steps={','.join(steps)}, concurrency={args.concurrency}")
+    if args.dry_run:
+        print_plan(tasks)
+        return 0
+
+    log_dir = args.log_dir or os.path.join(args.work_dir, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    runner = Runner(tasks, args.concurrency, args.keep_going, log_dir)
+    signal.signal(signal.SIGTERM, runner.abort)
+    signal.signal(signal.SIGINT, runner.abort)
+    t0 = runner.run()
+    report(tasks, t0, args.summary)
+    bad = [t.name for t in tasks if t.status != OK]
+    if bad:
+        log(f"[dag] ❌ not completed: {', '.join(bad)}")
+        return 1
+    log("[dag] 🎉 all tasks completed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
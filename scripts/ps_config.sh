@@ -1,6 +1,18 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
+# Shared per-run ssh masters (scripts/ssh_pool.sh; no-op unless the pipeline started a pool)
+source "$(dirname "${BASH_SOURCE[0]}")/ssh_pool.sh" 2>/dev/null || true
+
+# Parsed + validated server inventory (scripts/inventory.sh -> INV_* arrays)
+source "$(dirname "${BASH_SOURCE[0]}")/inventory.sh"
+
+# Timing spans (scripts/perf_trace.sh; no-op unless TRACE_FILE is set)
+source "$(dirname "${BASH_SOURCE[0]}")/perf_trace.sh"
+
+# Resume checkpoints (scripts/checkpoint.sh; no-op unless CHECKPOINT_DIR is set)
+source "$(dirname "${BASH_SOURCE[0]}")/checkpoint.sh"
+
 # --- required env (exported by Jenkins stage) ---
 : "${SERVER_FILE:?missing}"          # path to server list
 : "${SSH_KEY:?missing}"              # private key on Jenkins node
@@ -8,6 +20,9 @@ set -euo pipefail
 : "${NEW_BUILD_PATH:?missing}"       # e.g. /home/labadmin/6.3.0/EA3
 : "${DEPLOYMENT_TYPE:?missing}"      # Low|Medium|High
 HOST_USER="${HOST_USER:-root}"
+# VALUES_RENDER=1: global-values.yaml is rendered locally for all hosts in parallel from cached
+# pristine templates and only pushed where it changed (values_render.py); the per-host step
+# below then skips its in-place edits and only runs the installers.
 
 # Map DEPLOYMENT_TYPE → capacity
 case "${DEPLOYMENT_TYPE}" in
@@ -21,16 +36,12 @@ echo "[ps_config] NEW_BUILD_PATH=${NEW_BUILD_PATH}"
 echo "[ps_config] NEW_VERSION=${NEW_VERSION}"
 echo "[ps_config] DEPLOYMENT_TYPE=${DEPLOYMENT_TYPE} (${cap})"
 
-# Parse hosts from SERVER_FILE (supports "name:ip:..." or just "ip/name")
-mapfile -t HOSTS < <(awk '
-  NF && $1 !~ /^#/ {
-    if (index($0,":")>0) { n=split($0,a,":"); print a[2] } else { print $1 }
-  }' "${SERVER_FILE}")
+inventory_load "${SERVER_FILE}" || { echo "[ps_config] ERROR: invalid server inventory ${SERVER_FILE}" >&2; exit 1; }
+HOSTS=("${INV_IP[@]}")
+RUNNER="${INV_RUNNER}"    # first host is the kubectl runner
 
-if ((${#HOSTS[@]}==0)); then
-  echo "[ps_config] ERROR: no hosts parsed from ${SERVER_FILE}" >&2
-  exit 1
-fi
+# Resume: PS already installed and healthy on every host for this run
+ckpt_skip ps "${HOSTS[@]}" && exit 0
 
 ps_update_and_install_on_host() {
   local host="$1"
@@ -38,12 +49,13 @@ ps_update_and_install_on_host() {
 
   ssh -o StrictHostKeyChecking=no -o ConnectTimeout=15 -i "${SSH_KEY}" \
       "${HOST_USER}@${host}" bash -euo pipefail -s -- \
-      "${NEW_VERSION}" "${NEW_BUILD_PATH}" "${host}" "${cap}" <<'EOSSH'
+      "${NEW_VERSION}" "${NEW_BUILD_PATH}" "${host}" "${cap}" "${RENDERED}" <<'EOSSH'
 set -euo pipefail
 NEW_VERSION="$1"
 BASE="$2"
 TARGET_IP="$3"     # server IP from SERVER_FILE
 CAP="$4"
+RENDERED="${5:-0}" # 1 = values already rendered + pushed by values_render.py
 
 # Derive version-only and paths
 VER="${NEW_VERSION%%_*}"             # 6.3.0_EA3 -> 6.3.0 ; 6.3.0 -> 6.3.0
@@ -107,46 +119,50 @@ if [[ -z "$YAML" ]]; then
 fi
 echo "[remote] YAML=${YAML}"
 
-cp -a "${YAML}" "${YAML}.bak"
-
-# elasticHost: <server IP>
-sed -i -E "s|^(\s*elasticHost:\s*).*$|\1${TARGET_IP}|"            "${YAML}"
-# capacitySetup: "LOW|MEDIUM|HIGH"
-sed -i -E "s|^(\s*capacitySetup:\s*).*$|\1\"${CAP}\"|"           "${YAML}"
-# ingressExtFQDN: <server IP>.nip.io
-sed -i -E "s|^(\s*ingressExtFQDN:\s*).*$|\1${TARGET_IP}.nip.io|" "${YAML}"
-
-# global.registry: docker.io -> rsys-dockerproxy.radisys.com (inside `global:` block only)
-awk -v reg="rsys-dockerproxy.radisys.com" '
-  BEGIN{ in_g=0 }
-  {
-    if ($0 ~ /^[[:space:]]*global:[[:space:]]*$/) { in_g=1; print; next }
-    if (in_g && $0 ~ /^[^[:space:]]/) { in_g=0 }   # left the global block
-    if (in_g && $0 ~ /^[[:space:]]*registry:[[:space:]]*/) {
-      match($0, /^[[:space:]]*/); indent=substr($0,1,RLENGTH);
-      print indent "registry: " reg; next
+if [[ "${RENDERED}" == "1" ]]; then
+  echo "[remote] values rendered by values_render.py; skipping in-place edits"
+else
+  cp -a "${YAML}" "${YAML}.bak"
+
+  # elasticHost: <server IP>
+  sed -i -E "s|^(\s*elasticHost:\s*).*$|\1${TARGET_IP}|"            "${YAML}"
+  # capacitySetup: "LOW|MEDIUM|HIGH"
+  sed -i -E "s|^(\s*capacitySetup:\s*).*$|\1\"${CAP}\"|"           "${YAML}"
+  # ingressExtFQDN: <server IP>.nip.io
+  sed -i -E "s|^(\s*ingressExtFQDN:\s*).*$|\1${TARGET_IP}.nip.io|" "${YAML}"
+
+  # global.registry: docker.io -> rsys-dockerproxy.radisys.com (inside `global:` block only)
+  awk -v reg="rsys-dockerproxy.radisys.com" '
+    BEGIN{ in_g=0 }
+    {
+      if ($0 ~ /^[[:space:]]*global:[[:space:]]*$/) { in_g=1; print; next }
+      if (in_g && $0 ~ /^[^[:space:]]/) { in_g=0 }   # left the global block
+      if (in_g && $0 ~ /^[[:space:]]*registry:[[:space:]]*/) {
+        match($0, /^[[:space:]]*/); indent=substr($0,1,RLENGTH);
+        print indent "registry: " reg; next
+      }
+      print
     }
-    print
-  }
-' "${YAML}" > "${YAML}.tmp" && mv "${YAML}.tmp" "${YAML}"
-
-# metallb.L2Pool first entry -> "<IP>/32"
-awk -v ip="${TARGET_IP}" '
-  BEGIN{ in_m=0; in_l=0; replaced=0 }
-  {
-    if ($0 ~ /^[[:space:]]*metallb:[[:space:]]*$/) { in_m=1; in_l=0 }
-    else if (in_m && $0 ~ /^[[:space:]]*L2Pool:[[:space:]]*$/) { in_l=1 }
-    else if (in_m && in_l && $0 ~ /^[[:space:]]*-[[:space:]]*"/ && replaced==0) {
-      sub(/"[0-9.]+\/32"/, "\"" ip "/32\""); replaced=1
-    } else if (in_m && $0 ~ /^[[:space:]]*[A-Za-z0-9_]+:/ && $0 !~ /^[[:space:]]*L2Pool:/) {
-      in_m=0; in_l=0
+  ' "${YAML}" > "${YAML}.tmp" && mv "${YAML}.tmp" "${YAML}"
+
+  # metallb.L2Pool first entry -> "<IP>/32"
+  awk -v ip="${TARGET_IP}" '
+    BEGIN{ in_m=0; in_l=0; replaced=0 }
+    {
+      if ($0 ~ /^[[:space:]]*metallb:[[:space:]]*$/) { in_m=1; in_l=0 }
+      else if (in_m && $0 ~ /^[[:space:]]*L2Pool:[[:space:]]*$/) { in_l=1 }
+      else if (in_m && in_l && $0 ~ /^[[:space:]]*-[[:space:]]*"/ && replaced==0) {
+        sub(/"[0-9.]+\/32"/, "\"" ip "/32\""); replaced=1
+      } else if (in_m && $0 ~ /^[[:space:]]*[A-Za-z0-9_]+:/ && $0 !~ /^[[:space:]]*L2Pool:/) {
+        in_m=0; in_l=0
+      }
+      print
     }
-    print
-  }
-' "${YAML}" > "${YAML}.tmp" && mv "${YAML}.tmp" "${YAML}"
+  ' "${YAML}" > "${YAML}.tmp" && mv "${YAML}.tmp" "${YAML}"
 
-echo "[remote] Diff (PS global-values.yaml):"
-diff -u "${YAML}.bak" "${YAML}" || true
+  echo "[remote] Diff (PS global-values.yaml):"
+  diff -u "${YAML}.bak" "${YAML}" || true
+fi
 
 # ---- Run PS installer ----
 cd "${PS_ROOT}"
@@ -268,14 +284,25 @@ EOSSH
   echo "[ps_config][$host] done"
 }
 
+# Render + push all hosts' values up front (VALUES_RENDER=1)
+RENDERED=0
+if [[ "${VALUES_RENDER:-0}" == "1" ]]; then
+  python3 "$(dirname "$0")/values_render.py" --kind ps \
+    --server-file "$SERVER_FILE" --build-path "$NEW_BUILD_PATH" --version "$NEW_VERSION" \
+    --deployment-type "$DEPLOYMENT_TYPE" --user "$HOST_USER" --key "$SSH_KEY"
+  RENDERED=1
+fi
+
 # Iterate hosts with simple retry
 for h in "${HOSTS[@]}"; do
   ok=0
+  t0="$(trace_now)"
   for attempt in 1 2 3; do
     if ps_update_and_install_on_host "$h"; then ok=1; break; fi
     echo "[ps_config][$h] attempt ${attempt} failed; retrying in 10s..."
     sleep 10
   done
+  trace_span config+install "$h" "$t0" rc=$((1 - ok)) retries=$((attempt - 1)) wait=$(( (attempt - ok) * 10 ))
   if ((ok==0)); then
     echo "[ps_config][$h] ERROR: failed after retries" >&2
     exit 1
@@ -299,3 +326,4 @@ ssh -o StrictHostKeyChecking=no -i "${SSH_KEY}" "${HOST_USER}@${RUNNER}" bash -l
   fi
   echo "[ps_config] ✅ PS stage done"
 '
+ckpt_done ps "${HOSTS[@]}"
@@ -0,0 +1,40 @@
+#!/usr/bin/env bash
+# scripts/rebootstrap_keys.sh
+# Agent-side key re-bootstrap for every host in SERVER_FILE: writes /root/bootstrap_keys.sh on the CN
+# and runs it against the alias IP (root keypair, ssh-copy-id, known_hosts refresh, sshd restart).
+# The "Permission denied (publickey,password)" recovery of pipeline_dag.py's install[h] task; the
+# 'Cluster install' stage runs the same steps inline.
+set -euo pipefail
+
+# Shared per-run ssh masters (scripts/ssh_pool.sh; no-op unless the pipeline started a pool)
+source "$(dirname "${BASH_SOURCE[0]}")/ssh_pool.sh" 2>/dev/null || true
+
+# Parsed + validated server inventory (scripts/inventory.sh -> INV_* arrays)
+source "$(dirname "${BASH_SOURCE[0]}")/inventory.sh"
+
+: "${SERVER_FILE:?missing SERVER_FILE}"
+: "${SSH_KEY:?missing SSH_KEY}"
+: "${INSTALL_IP_ADDR:?missing INSTALL_IP_ADDR}"
+ALIAS_IP="${INSTALL_IP_ADDR%%/*}"
+
+inventory_load "${SERVER_FILE}" || { echo "[bootstrap] ERROR: invalid server inventory ${SERVER_FILE}" >&2; exit 2; }
+
+for h in "${INV_IP[@]}"; do
+  echo "[bootstrap][$h] re-running key bootstrap (alias ${ALIAS_IP})"
+  ssh -o StrictHostKeyChecking=no -i "${SSH_KEY}" "root@${h}" bash -lc '
+    set -euo pipefail
+    cat > /root/bootstrap_keys.sh <<'"'"'EOF'"'"'
+#!/usr/bin/env bash
+set -euo pipefail
+IP="$1"
+mkdir -p ~/.ssh && chmod 700 ~/.ssh
+ssh-keygen -q -t rsa -N "" -f ~/.ssh/id_rsa
+ssh-copy-id root@"${IP}"
+cat ~/.ssh/id_rsa.pub >> ~/.ssh/authorized_keys
+ssh-keygen -f "/root/.ssh/known_hosts" -R "${IP}"
+systemctl restart sshd
+EOF
+    chmod +x /root/bootstrap_keys.sh
+    /root/bootstrap_keys.sh "'"${ALIAS_IP}"'"
+  '
+done
@@ -3,10 +3,16 @@
 #   run cluster_reset.sh; on success -> cluster_install.sh
 # Else:
 #   run install only (handy for re-runs)
+# With CHECKPOINT_DIR set, hosts whose reset / k8s install is already recorded for this
+# inventory + version are skipped (scripts/checkpoint.py); --force redoes everything.
 
 set -euo pipefail
 DIR="$(cd "$(dirname "$0")" && pwd)"
 
+if [[ "${1:-}" == "--force" ]]; then
+  export CHECKPOINT_FORCE=1
+fi
+
 CL="${CLUSTER_RESET:-No}"
 shopt -s nocasematch
 if [[ "$CL" =~ ^(yes|true|1)$ ]]; then
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+ssh_pool.py - one set of multiplexed ssh masters per pipeline run, shared by every script.
+
+The Jenkinsfile runs `start` once after the SSH preflight: one ControlMaster per CN of SERVER_FILE
+is opened (in parallel) under SSH_POOL_DIR and kept alive with ControlPersist. Scripts that source
+scripts/ssh_pool.sh (bash) or call ssh_opts()/record() (Python, e.g. fetch_engine.py) then ride
+those masters, so each ssh/scp is a new channel on an existing connection instead of a new
+TCP + key exchange + auth. A call whose master is gone (not in SERVER_FILE, persist timeout) opens
+a fresh one through ControlMaster=auto and is counted as a new handshake.
+
+Every call is appended to SSH_POOL_DIR/calls.log; `stats` (and `stop`) print per-host handshake
+time, calls, reused/new counts and the time saved (reused calls x that host's handshake time).
+
+Usage:
+  python3 scripts/ssh_pool.py start --server-file server_pci_map.txt --key ~/.ssh/jenkins_key
+  python3 scripts/ssh_pool.py stats
+  python3 scripts/ssh_pool.py stop [--report ssh_pool_stats.json]
+Keep SSH_POOL_DIR short: unix socket paths are limited to ~100 characters.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import inventory
+import perf_trace
+
+OPTS_FILE = "ssh_opts"
+MASTERS_FILE = "masters.json"
+CALLS_FILE = "calls.log"
+CONTROL_PATH = "%r@%h:%p"
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def pool_dir():
+    """SSH_POOL_DIR if a pool has been started there, else ''."""
+    d = os.environ.get("SSH_POOL_DIR", "")
+    return d if d and os.path.isfile(os.path.join(d, OPTS_FILE)) else ""
+
+
+def ssh_opts():
+    """Options to put in front of any ssh/scp argv (first -o wins in ssh); [] without a pool."""
+    d = pool_dir()
+    if not d:
+        return []
+    with open(os.path.join(d, OPTS_FILE), encoding="utf-8") as fh:
+        return [line.rstrip("\n") for line in fh if line.strip()]
+
+
+def record(caller, host, user="root", port=22):
+    """Log one ssh/scp call: 'reused' if the host's master socket is up, else 'new'."""
+    d = pool_dir()
+    if not d:
+        return
+    mode = "reused" if os.path.exists(os.path.join(d, f"{user}@{host}:{port}")) else "new"
+    with open(os.path.join(d, CALLS_FILE), "a", encoding="utf-8") as fh:
+        fh.write(f"{caller}\t{host}\t{mode}\n")
+
+
+def _open_master(d, host, user, key, persist):
+    t0 = time.time()
+    r = subprocess.run(
+        ["ssh", "-o", "ControlMaster=yes", "-o", f"ControlPath={d}/{CONTROL_PATH}",
+         "-o", f"ControlPersist={persist}", "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=no",
+         "-o", "ConnectTimeout=15", "-i", key, "-fN", f"{user}@{host}"],
+        stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    perf_trace.record("ssh master", t0, host=host, rc=r.returncode)
+    return {"user": user, "ok": r.returncode == 0, "handshake_ms": int((time.time() - t0) * 1000),
+            "error": r.stderr.strip()[-200:] if r.returncode else ""}
+
+
+def start(args):
+    d = args.dir
+    os.makedirs(d, mode=0o700, exist_ok=True)
+    try:
+        hosts = inventory.ips(args.server_file)
+    except (OSError, inventory.InventoryError) as e:
+        log(f"❌ No hosts in {args.server_file}: {e}")
+        return 2
+    with ThreadPoolExecutor(max_workers=max(1, min(args.concurrency, len(hosts)))) as pool:
+        masters = dict(zip(hosts, pool.map(
+            lambda h: _open_master(d, h, args.user, args.key, args.persist), hosts)))
+    with open(os.path.join(d, MASTERS_FILE), "w", encoding="utf-8") as fh:
+        json.dump(masters, fh, indent=1, sort_keys=True)
+    with open(os.path.join(d, OPTS_FILE), "w", encoding="utf-8") as fh:
+        fh.write(f"-o\nControlMaster=auto\n-o\nControlPath={d}/{CONTROL_PATH}\n"
+                 f"-o\nControlPersist={args.persist}\n")
+    for host, m in masters.items():
+        if m["ok"]:
+            log(f"[ssh-pool] {host}: ✅ master up ({m['handshake_ms']} ms handshake)")
+        else:
+            log(f"[ssh-pool] {host}: ⚠️  no master ({m['error'] or 'ssh failed'}); calls will connect directly")
+    log(f"[ssh-pool] {sum(m['ok'] for m in masters.values())}/{len(masters)} master(s) under {d}")
+    return 0
+
+
+def report(d):
+    """Per-host/per-caller call counts and estimated time saved; also returned as a dict."""
+    try:
+        with open(os.path.join(d, MASTERS_FILE), encoding="utf-8") as fh:
+            masters = json.load(fh)
+    except (OSError, ValueError):
+        masters = {}
+    calls = []
+    try:
+        with open(os.path.join(d, CALLS_FILE), encoding="utf-8") as fh:
+            calls = [line.rstrip("\n").split("\t") for line in fh if line.count("\t") == 2]
+    except OSError:
+        pass
+    measured = [m["handshake_ms"] for m in masters.values() if m.get("ok")]
+    avg_ms = sum(measured) / len(measured) if measured else 0.0
+
+    hosts = {}
+    for caller, host, mode in calls:
+        h = hosts.setdefault(host, Counter())
+        h[mode] += 1
+    out = {"hosts": {}, "callers": dict(Counter(c[0] for c in calls))}
+    log("---- ssh pool ----")
+    for host in sorted(set(hosts) | set(masters)):
+        c = hosts.get(host, Counter())
+        m = masters.get(host, {})
+        hs = m.get("handshake_ms", avg_ms) if m.get("ok") else avg_ms
+        saved = c["reused"] * hs / 1000.0
+        out["hosts"][host] = {"handshake_ms": hs, "calls": c["reused"] + c["new"], "reused": c["reused"],
+                              "new": c["new"], "saved_s": round(saved, 1)}
+        log(f"  {host:15s} handshake {hs:6.0f} ms  calls={c['reused'] + c['new']:<4d} "
+            f"reused={c['reused']:<4d} new={c['new']:<3d} saved≈{saved:.1f}s")
+    total = sum(h["calls"] for h in out["hosts"].values())
+    handshakes = len(measured) + sum(h["new"] for h in out["hosts"].values())
+    saved = sum(h["saved_s"] for h in out["hosts"].values())
+    out.update(calls=total, handshakes=handshakes, saved_s=round(saved, 1))
+    log(f"  {total} ssh/scp call(s), {handshakes} handshake(s) ({len(measured)} master(s) + "
+        f"{handshakes - len(measured)} direct), ≈{saved:.1f}s saved")
+    if out["callers"]:
+        log("  by script: " + ", ".join(f"{k}={v}" for k, v in sorted(out["callers"].items())))
+    return out
+
+
+def stop(args):
+    d = args.dir
+    if not os.path.isdir(d):
+        log(f"[ssh-pool] nothing to stop ({d} missing)")
+        return 0
+    out = report(d)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            json.dump(out, fh, indent=1, sort_keys=True)
+    for name in os.listdir(d):
+        if "@" in name:
+            user, _, rest = name.partition("@")
+            host = rest.rsplit(":", 1)[0]
+            subprocess.run(["ssh", "-o", f"ControlPath={os.path.join(d, name)}", "-O", "exit", f"{user}@{host}"],
+                           capture_output=True)
+    shutil.rmtree(d, ignore_errors=True)
+    log(f"[ssh-pool] masters closed, {d} removed")
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-run pool of multiplexed ssh masters to the CNs")
+    ap.add_argument("--dir", default=os.environ.get("SSH_POOL_DIR", ""), help="pool dir (SSH_POOL_DIR)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("start", help="open one master per CN")
+    s.add_argument("--server-file", default=os.environ.get("SERVER_FILE", "server_pci_map.txt"))
+    s.add_argument("--user", default="root")
+    s.add_argument("--key", default=os.environ.get("SSH_KEY", "/var/lib/jenkins/.ssh/jenkins_key"))
+    s.add_argument("--persist", default=os.environ.get("SSH_POOL_PERSIST", "60m"),
+                   help="ControlPersist idle timeout of each master")
+    s.add_argument("--concurrency", type=int, default=8)
+    sub.add_parser("stats", help="print call counts and time saved")
+    p = sub.add_parser("stop", help="print stats, close the masters, remove the pool dir")
+    p.add_argument("--report", default="", help="also write the stats as JSON here")
+    args = ap.parse_args()
+
+    if not args.dir:
+        log("❌ SSH_POOL_DIR (or --dir) is required")
+        return 2
+    args.dir = os.path.abspath(args.dir)
+    if args.cmd == "start":
+        return start(args)
+    if args.cmd == "stats":
+        report(args.dir)
+        return 0
+    return stop(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env bash
+# scripts/ssh_pool.sh
+# Source from pipeline scripts: ssh/scp become functions that put the per-run pool options
+# (ControlMaster=auto + the shared ControlPath under SSH_POOL_DIR) in front of the caller's own
+# options, so every call rides the master started by `python3 scripts/ssh_pool.py start`.
+# Each call is logged to $SSH_POOL_DIR/calls.log as reused/new for `ssh_pool.py stats`.
+# No pool (SSH_POOL_DIR unset or not started) -> nothing is defined, ssh/scp behave as before.
+# sshpass-wrapped calls (build host, password bootstrap) exec the real binaries and are untouched.
+
+if [[ -n "${SSH_POOL_DIR:-}" && -f "$SSH_POOL_DIR/ssh_opts" ]] && ! declare -F _ssh_pool_call >/dev/null; then
+  mapfile -t SSH_POOL_OPTS < "$SSH_POOL_DIR/ssh_opts"
+
+  # _ssh_pool_call <ssh|scp> args... : log reused/new for the remote host, then run the real binary
+  _ssh_pool_call(){
+    local bin="$1"; shift
+    local vals user="" port=22 host="" mode a
+    [[ "$bin" == ssh ]] && vals="BbcDEeFIiJLlmOopQRSWw" || vals="cDFiJlOoPSX"
+    local -a args=("$@")
+    set -- "${args[@]}"
+    while (( $# )); do
+      a="$1"
+      case "$a" in
+        --) shift; [[ "$bin" == ssh ]] && host="${1:-}"; break;;
+        -O) host=""; break;;                                  # control command, not a session
+        -?) if [[ "$vals" == *"${a:1}"* ]]; then
+              [[ "$bin" == ssh && "$a" == -l ]] && user="${2:-}"
+              [[ ( "$bin" == ssh && "$a" == -p ) || ( "$bin" == scp && "$a" == -P ) ]] && port="${2:-22}"
+              shift; (( $# )) && shift; continue
+            fi
+            shift; continue;;
+        -*) shift; continue;;
+      esac
+      if [[ "$bin" == ssh ]]; then host="$a"; break; fi
+      [[ "$a" == *:* && "$a" != /* ]] && { host="${a%%:*}"; break; }
+      shift
+    done
+    if [[ -n "$host" ]]; then
+      [[ "$host" == *@* ]] && { user="${host%@*}"; host="${host##*@}"; }
+      [[ -n "$user" ]] || user="$(id -un)"
+      [[ -S "$SSH_POOL_DIR/$user@$host:$port" ]] && mode=reused || mode=new
+      printf '%s\t%s\t%s\n' "${0##*/}" "$host" "$mode" >> "$SSH_POOL_DIR/calls.log" 2>/dev/null || true
+    fi
+    command "$bin" "${SSH_POOL_OPTS[@]}" "${args[@]}"
+  }
+  ssh(){ _ssh_pool_call ssh "$@"; }
+  scp(){ _ssh_pool_call scp "$@"; }
+fi
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for nf_patch.py: the python engine must leave the NF values files exactly as the awk/sed path
+of nf_config.sh does, comments, anchors and aliases included.
+
+Both engines are run end to end through nf_config.sh on copies of fixtures/nf_values (the shapes of
+the nf-services/scripts values files), with an `ssh` on PATH that runs the remote command locally.
+
+Usage:
+  python3 -m pytest -q scripts/tests
+  python3 -m unittest discover -s scripts/tests
+"""
+
+import os
+import sys
+import shutil
+import filecmp
+import tempfile
+import unittest
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = os.path.dirname(HERE)
+FIXTURES = os.path.join(HERE, "fixtures", "nf_values")
+sys.path.insert(0, SCRIPTS)
+
+import nf_patch  # noqa: E402
+
+VERSION = "6.3.0_EA3"
+VER = "6.3.0"
+
+# ssh <opts> <target> <remote...>: run <remote...> through a local shell, as sshd would
+FAKE_SSH = r'''#!/usr/bin/env bash
+while [[ $# -gt 0 ]]; do
+  case "$1" in -o|-i|-p|-l) shift 2;; -*) shift;; *) break;; esac
+done
+shift
+exec bash -c "$*"
+'''
+
+
+class Tree:
+    """A build tree holding a copy of the fixtures, plus a server file and a PATH with the fake ssh."""
+
+    def __init__(self, root, server, crlf=False):
+        self.root = root
+        self.nf_root = os.path.join(root, "build", f"TRILLIUM_5GCN_CNF_REL_{VER}", "nf-services", "scripts")
+        shutil.copytree(FIXTURES, self.nf_root)
+        if crlf:
+            for name in os.listdir(self.nf_root):
+                path = os.path.join(self.nf_root, name)
+                with open(path, "rb") as fh:
+                    data = fh.read()
+                with open(path, "wb") as fh:
+                    fh.write(data.replace(b"\n", b"\r\n"))
+        self.server_file = os.path.join(root, "server_pci_map.txt")
+        with open(self.server_file, "w", encoding="utf-8") as fh:
+            fh.write(server + "\n")
+        bin_dir = os.path.join(root, "bin")
+        os.mkdir(bin_dir)
+        with open(os.path.join(bin_dir, "ssh"), "w", encoding="utf-8") as fh:
+            fh.write(FAKE_SSH)
+        os.chmod(os.path.join(bin_dir, "ssh"), 0o755)
+        self.path = bin_dir + os.pathsep + os.environ.get("PATH", "")
+
+    def nf_config(self, engine, deployment_type):
+        env = {k: v for k, v in os.environ.items()
+               if k not in ("CHECKPOINT_DIR", "SSH_POOL_DIR", "TRACE_FILE", "INVENTORY_DIR", "VALUES_RENDER")}
+        env.update(PATH=self.path, SERVER_FILE=self.server_file, SSH_KEY=os.path.join(self.root, "id_rsa"),
+                   NEW_BUILD_PATH=os.path.join(self.root, "build"), NEW_VERSION=VERSION,
+                   DEPLOYMENT_TYPE=deployment_type, NF_PATCH_ENGINE=engine)
+        return subprocess.run(["bash", os.path.join(SCRIPTS, "nf_config.sh")], env=env,
+                              capture_output=True, text=True)
+
+    def read(self, name):
+        with open(os.path.join(self.nf_root, name), encoding="utf-8", newline="") as fh:
+            return fh.read()
+
+
+class NfPatchMatchesBash(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="nf_patch_test.")
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def run_both(self, server, deployment_type, crlf=False):
+        trees = {}
+        for engine in ("bash", "python"):
+            root = os.path.join(self.tmp, engine)
+            os.mkdir(root)
+            tree = Tree(root, server, crlf)
+            r = tree.nf_config(engine, deployment_type)
+            self.assertEqual(r.returncode, 0, f"{engine} engine failed:\n{r.stdout}\n{r.stderr}")
+            trees[engine] = tree
+        return trees["bash"], trees["python"]
+
+    def assertSameTree(self, bash, python):
+        names = sorted(os.listdir(FIXTURES))
+        self.assertEqual(sorted(os.listdir(python.nf_root)), names, "python engine left extra files")
+        for name in names:
+            self.assertEqual(python.read(name), bash.read(name), name)
+        _, mismatch, errors = filecmp.cmpfiles(bash.nf_root, python.nf_root, names, shallow=False)
+        self.assertEqual((mismatch, errors), ([], []))
+
+    def test_sriov_medium_pci(self):
+        bash, python = self.run_both(
+            "server1:127.0.0.1:/unused:SRIOV:0000:08:00.0:0000:09:00.0:140.116.10.0/30:11.6.2.100", "medium")
+        self.assertSameTree(bash, python)
+
+        upf, smf, amf, gv = (python.read(n) for n in nf_patch.VALUES)
+        self.assertIn('  capacitySetup: "MEDIUM"\n', gv)
+        self.assertIn("  ingressExtFQDN: 127.0.0.1.nip.io\n", gv)
+        self.assertIn("  k8sCpuMgrStaticPolicyEnable: true\n", gv)
+        self.assertIn('  registry: &registry "localhost:5000"\n', gv)
+        self.assertIn("  <<: *commonImage\n", gv)
+        self.assertIn(f'image: "localhost:5000/5gcn/common-init:{VER}"', gv)
+        self.assertIn(f'image: "localhost:5000/5gcn/amf-sctp-lb:{VER}"   # SCTP load balancer\n', amf)
+        self.assertIn("      # NGC IP for external Communication\n      11.6.2.100\n", amf)
+        self.assertIn("    externalIP: 11.6.2.100\n", amf)
+        self.assertNotIn("10.0.0.11", amf)
+        self.assertIn('  imageTools: "localhost:5000/5gcn/upf-tools:v10"\n', upf)
+        self.assertIn('    type: "sriov"\n', upf)
+        self.assertIn('  upfsesscoresteps:\n    resources: *upfResources\n    type: "fixed"\n', upf)
+        self.assertIn("name: n3\n      pciAddress: 0000:08:00.0\n", upf)
+        self.assertIn("name: n6\n      pciAddress: 0000:09:00.0\n", upf)
+        self.assertIn("name: n6b\n      pciAddress: 0000:09:00.0\n", upf)
+        self.assertIn('"range": "192.168.50.0/30"', upf)
+        self.assertIn('"range": "140.116.10.0/30"', upf)
+        self.assertIn('"140.116.10.1/32",\n            "10.10.10.6/32"\n', upf)
+        self.assertIn('"range": "140.116.10.0/30",\n', smf)
+        self.assertIn('"exclude": [\n              "140.116.10.2/32"\n            ]\n', smf)
+        self.assertIn('image: "localhost:5000/5gcn/envoy:v1.28"', python.read("nrf-1-values.yaml"))
+
+    def test_vm_low_unresolved_ifnames_crlf(self):
+        bash, python = self.run_both(
+            "server1:127.0.0.1:/unused:VM:nf-test-n3:nf-test-n6:10.20.30.4/30:bad-ip", "low", crlf=True)
+        self.assertSameTree(bash, python)
+
+        gv, amf, upf = python.read(nf_patch.GV), python.read(nf_patch.AMF), python.read(nf_patch.UPF)
+        self.assertNotIn("\r", gv + amf + upf)
+        self.assertIn("  k8sCpuMgrStaticPolicyEnable: false\n", gv)
+        self.assertIn('    type: "devPassthrough"\n', upf)
+        self.assertIn("pciAddress: 0000:00:00.0\n", upf)
+        self.assertIn("    externalIP: 10.0.0.10\n", amf)
+        # not one of the four values files: only the image tag changes, CRLF kept as the sed path does
+        self.assertIn(f'image: "localhost:5000/5gcn/nrf:{VER}"\r\n', python.read("nrf-1-values.yaml"))
+
+    def test_invalid_n4_cidr(self):
+        for engine in ("bash", "python"):
+            root = os.path.join(self.tmp, engine)
+            os.mkdir(root)
+            tree = Tree(root, "server1:127.0.0.1:/unused:SRIOV:0000:08:00.0:0000:09:00.0:140.116.10.0:11.6.2.100")
+            r = tree.nf_config(engine, "medium")
+            self.assertEqual(r.returncode, 4, f"{engine}:\n{r.stdout}\n{r.stderr}")
+
+    def test_second_run_writes_nothing(self):
+        root = os.path.join(self.tmp, "python")
+        os.mkdir(root)
+        tree = Tree(root, "server1:127.0.0.1:/unused:SRIOV:0000:08:00.0:0000:09:00.0:140.116.10.0/30:11.6.2.100")
+        self.assertEqual(tree.nf_config("python", "high").returncode, 0)
+        before = {n: tree.read(n) for n in os.listdir(tree.nf_root)}
+        r = tree.nf_config("python", "high")
+        self.assertEqual(r.returncode, 0, r.stdout + r.stderr)
+        self.assertIn("all values files already up to date", r.stdout)
+        self.assertEqual({n: tree.read(n) for n in os.listdir(tree.nf_root)}, before)
+
+
+class ScalarComments(unittest.TestCase):
+    """The one intended difference: a trailing comment on a patched scalar is kept (awk drops it)."""
+
+    def test_trailing_comment_kept(self):
+        lines = ['global:', '  capacitySetup: "MEDIUM"   # LOW | MEDIUM | HIGH', '  externalIP: 1.2.3.4 # n2']
+        self.assertEqual(nf_patch.Scalar("capacitySetup", '"LOW"').apply(lines), 1)
+        self.assertEqual(nf_patch.Scalar("externalIP", "5.6.7.8", every=True).apply(lines), 1)
+        self.assertEqual(lines, ['global:', '  capacitySetup: "LOW"   # LOW | MEDIUM | HIGH',
+                                 '  externalIP: 5.6.7.8 # n2'])
+
+    def test_quoted_hash_is_not_a_comment(self):
+        lines = ['  ingressExtFQDN: "a#b"']
+        nf_patch.Scalar("ingressExtFQDN", "1.2.3.4.nip.io").apply(lines)
+        self.assertEqual(lines, ["  ingressExtFQDN: 1.2.3.4.nip.io"])
+
+
+if __name__ == "__main__":
+    unittest.main()
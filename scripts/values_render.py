@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+values_render.py - render-then-push mode for nf_config.sh / ps_config.sh / cs_config.sh (VALUES_RENDER=1).
+
+Instead of editing the values files in place on each CN, one host after another:
+  1. the pristine templates (every *-services/scripts/*.yaml of TRILLIUM_5GCN_CNF_REL_<VER>.tar.gz)
+     are pulled once per build version into a local cache
+     (VALUES_CACHE_DIR/<VER>/<key>, key = tarball sha256 from the CN's .staging_manifest.json,
+     else NEW_VERSION + tarball size); later runs and other hosts reuse it,
+  2. one ssh per CN reads the sha256 of its current values files (and resolves N3/N6 to PCI),
+  3. the per-host variants are rendered locally, all hosts in parallel, from SERVER_FILE,
+  4. only the files whose sha256 differs are pushed, as one tar per host.
+A re-run with unchanged inputs is one cached lookup plus one ssh per host and pushes nothing.
+
+Kinds (the edits of the corresponding script):
+  nf  nf-services/scripts/*.yaml: the nf_patch.py patch set (N3/N6 PCI, N4, AMF, capacity, FQDN, tags)
+  ps  platform-services/scripts/global-values.yaml: elasticHost, capacitySetup, ingressExtFQDN,
+      global.registry, first metallb.L2Pool entry
+  cs  common-services/scripts/global-values.yaml capacitySetup (LOW only), cs-1-values.yaml v1 -> <VER>
+Without the tarball on the CN (deleted after extraction) the CN's extracted tree is used as the
+template for that run; every edit is idempotent, so rendering over an already patched tree is safe.
+--dry-run prints the diff against the template and pushes nothing.
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import fcntl
+import shlex
+import shutil
+import hashlib
+import tarfile
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import inventory
+import nf_patch
+import perf_trace
+from nf_patch import Scalar, Sub, ValuesFile, CNHost, HostError
+
+REGISTRY = "rsys-dockerproxy.radisys.com"
+
+# Runs on the CN: "TAR <size|-> <sha256|->", "PCI <n3|-> <n6|->", then sha256sum of the values files
+PROBE_SCRIPT = r'''
+set -euo pipefail
+BASE="${1%/}"; VER="$2"; NEW_VERSION="$3"; N3_IN="$4"; N6_IN="$5"
+TOP="TRILLIUM_5GCN_CNF_REL_${VER}"
+T="$BASE/$TOP.tar.gz"
+if [[ -f "$T" ]]; then
+  size="$(stat -c %s "$T")"; mtime="$(stat -c %Y "$T")"; sha=""
+  if [[ -f "$BASE/.staging_manifest.json" ]] && command -v python3 >/dev/null 2>&1; then
+    sha="$(python3 - "$BASE/.staging_manifest.json" "$TOP.tar.gz" "$size" "$mtime" <<'PY' 2>/dev/null || true
+import json, sys
+e = json.load(open(sys.argv[1])).get("artifacts", {}).get(sys.argv[2]) or {}
+if e.get("size") == int(sys.argv[3]) and e.get("mtime") == int(sys.argv[4]):
+    print(e.get("sha256", ""))
+PY
+)"
+  fi
+  echo "TAR $size ${sha:--}"
+else
+  echo "TAR - -"
+fi
+''' + nf_patch.RESOLVE_PCI + r'''
+n3="$(resolve_pci "$N3_IN")"; n6="$(resolve_pci "$N6_IN")"
+echo "PCI ${n3:--} ${n6:--}"
+cd "$BASE/$TOP" 2>/dev/null || exit 0
+find -L nf-services/scripts platform-services/scripts common-services/scripts -maxdepth 3 -type f \
+  -name '*.yaml' -print0 2>/dev/null | xargs -0 -r sha256sum || true
+'''
+
+# Runs on one CN: tar of every *-services/scripts/*.yaml, from the tarball or else the extracted tree
+PULL_SCRIPT = r'''
+set -euo pipefail
+BASE="${1%/}"; VER="$2"; TOP="TRILLIUM_5GCN_CNF_REL_${VER}"
+tmp="$(mktemp -d)"; trap 'rm -rf "$tmp"' EXIT
+if [[ -f "$BASE/$TOP.tar.gz" ]]; then
+  if command -v pigz >/dev/null 2>&1; then z=(-I pigz); else z=(-z); fi
+  tar -C "$tmp" "${z[@]}" -xf "$BASE/$TOP.tar.gz" --wildcards '*-services/scripts/*.yaml'
+  tar -C "$tmp" -cf - "$TOP"
+else
+  cd "$BASE"
+  find -L "$TOP"/nf-services/scripts "$TOP"/platform-services/scripts "$TOP"/common-services/scripts \
+    -maxdepth 3 -type f -name '*.yaml' -print0 | tar -chf - --null -T -
+fi
+'''
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def capacity(deployment_type):
+    """DEPLOYMENT_TYPE -> LOW | MEDIUM | HIGH, as the config scripts map it."""
+    d = deployment_type.lower()
+    return "LOW" if d == "low" else "HIGH" if d == "high" else "MEDIUM"
+
+
+# ---------- extra patch operations for the PS values ----------
+
+class BlockScalar(Scalar):
+    """Scalar on every `key:` line inside a `block:` mapping (left at the next unindented line)."""
+
+    def __init__(self, block, key, value):
+        super().__init__(key, value, every=True)
+        self.block = re.compile(r"^\s*" + re.escape(block) + r":\s*$")
+        self.name = block
+
+    def apply(self, lines):
+        n = 0
+        inside = False
+        for i, line in enumerate(lines):
+            if self.block.match(line):
+                inside = True
+                continue
+            if inside and re.match(r"^\S", line):
+                inside = False
+            m = self.rx.match(line) if inside else None
+            if m:
+                new = f"{m.group(1)}{self.key}: {self.value}{nf_patch._comment(m.group(3))}"
+                n += new != line
+                lines[i] = new
+        return n
+
+    def __str__(self):
+        return f"{self.name}.{self.key}={self.value}"
+
+
+class L2PoolEntry:
+    """First `- "<ip>/32"` entry of metallb.L2Pool -> `- "<ip>/32"` of this server."""
+
+    def __init__(self, ip):
+        self.ip = ip
+
+    def apply(self, lines):
+        in_m = in_l = False
+        for i, line in enumerate(lines):
+            if re.match(r"^\s*metallb:\s*$", line):
+                in_m, in_l = True, False
+            elif in_m and re.match(r"^\s*L2Pool:\s*$", line):
+                in_l = True
+            elif in_m and in_l and re.match(r'^\s*-\s*"', line):
+                new = re.sub(r'"[0-9.]+/32"', f'"{self.ip}/32"', line, count=1)
+                lines[i] = new
+                return int(new != line)
+            elif in_m and re.match(r"^\s*[A-Za-z0-9_]+:", line):
+                in_m = in_l = False
+        return 0
+
+    def __str__(self):
+        return f"metallb.L2Pool[0]={self.ip}/32"
+
+
+# ---------- kinds: template files + per-host patch set ----------
+
+def _first(tree, *rels):
+    return next((r for r in rels if os.path.isfile(os.path.join(tree, r))), None)
+
+
+def kind_files(kind, tree):
+    """Template files (paths relative to TRILLIUM_5GCN_CNF_REL_<VER>) a kind renders."""
+    if kind == "nf":
+        d = "nf-services/scripts"
+        names = sorted(n for n in os.listdir(os.path.join(tree, d)) if n.endswith(".yaml")) \
+            if os.path.isdir(os.path.join(tree, d)) else []
+        missing = [n for n in nf_patch.VALUES if n not in names]
+        if missing:
+            raise HostError(3, f"template missing {d}/{missing[0]}")
+        return [f"{d}/{n}" for n in names]
+    root = "platform-services/scripts" if kind == "ps" else "common-services/scripts"
+    gv = _first(tree, f"{root}/global-values.yaml", f"{root}/global-value.yaml")
+    if not gv:
+        raise HostError(2, f"global-values.yaml not found under {root}")
+    if kind == "ps":
+        return [gv]
+    for dirpath, dirnames, filenames in os.walk(os.path.join(tree, root), followlinks=True):
+        dirnames.sort()
+        rel = os.path.relpath(dirpath, os.path.join(tree, root))
+        if rel != "." and rel.count(os.sep) >= 1:    # find -maxdepth 3
+            dirnames[:] = []
+        if "cs-1-values.yaml" in filenames:
+            return [gv, os.path.relpath(os.path.join(dirpath, "cs-1-values.yaml"), tree)]
+    raise HostError(2, f"cs-1-values.yaml not found under {root}")
+
+
+def patch_set(kind, server, files, args, n3_pci, n6_pci):
+    """[(relpath, op), ...] for one host."""
+    ip = server["ip"]
+    if kind == "nf":
+        if not nf_patch.n4_values(server["n4"]):
+            raise HostError(4, f"invalid N4_CIDR '{server['n4']}'")
+        d = "nf-services/scripts"
+        return [(f"{d}/{name}" if name != nf_patch.ALL else name, op)
+                for name, op in nf_patch.build_patch_set(server, args.capacity, args.ver, n3_pci, n6_pci)]
+    gv = files[0]
+    if kind == "ps":
+        return [
+            (gv, Scalar("elasticHost", ip, every=True)),
+            (gv, Scalar("capacitySetup", f'"{args.capacity}"', every=True)),
+            (gv, Scalar("ingressExtFQDN", f"{ip}.nip.io", every=True)),
+            (gv, BlockScalar("global", "registry", REGISTRY)),
+            (gv, L2PoolEntry(ip)),
+        ]
+    ops = [(files[1], Sub(r"(^|[^A-Za-z0-9_])v1([^A-Za-z0-9_]|$)", r"\g<1>" + args.ver + r"\g<2>",
+                                f"v1->{args.ver}"))]
+    if args.capacity == "LOW":
+        ops.insert(0, (gv, Scalar("capacitySetup", '"LOW"', every=True)))
+    return ops
+
+
+class TemplateCache:
+    """
+    Local store of pristine template trees: <root>/<VER>/<key>/TRILLIUM_5GCN_CNF_REL_<VER>/...
+    Pulled once per key (flock-guarded, so parallel hosts and jobs on the agent share one pull).
+    """
+
+    def __init__(self, root, ver):
+        self.dir = os.path.join(root, ver)
+        self.top = f"TRILLIUM_5GCN_CNF_REL_{ver}"
+        self.lock = threading.Lock()
+        os.makedirs(self.dir, exist_ok=True)
+
+    def get(self, key, host, args):
+        """Template tree for key (pulled from host when missing); key None = no tarball, uncached."""
+        if key is None:
+            tmp = tempfile.mkdtemp(prefix="values-tree-")
+            self._pull(host, args, tmp)
+            return os.path.join(tmp, self.top), False
+        dest = os.path.join(self.dir, key)
+        with self.lock, open(dest + ".lock", "a") as lk:
+            fcntl.flock(lk, fcntl.LOCK_EX)
+            if os.path.isdir(dest):
+                return os.path.join(dest, self.top), True
+            tmp = tempfile.mkdtemp(prefix=f"{key}.", dir=self.dir)
+            try:
+                self._pull(host, args, tmp)
+                os.replace(tmp, dest)
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+            return os.path.join(dest, self.top), False
+
+    def _pull(self, host, args, dest):
+        t0 = time.time()
+        r = host.run(f"bash -s -- {shlex.quote(args.build_path)} {shlex.quote(args.ver)}", input=PULL_SCRIPT.encode())
+        if r.returncode != 0:
+            raise HostError(1, f"template pull failed: {r.stderr.decode(errors='replace').strip()[-200:]}")
+        count = 0
+        with tarfile.open(fileobj=io.BytesIO(r.stdout), mode="r:") as tar:
+            for info in tar:
+                name = os.path.normpath(info.name)
+                if not info.isfile() or name.startswith(("..", "/")) or not name.startswith(self.top + os.sep):
+                    continue
+                path = os.path.join(dest, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as fh:
+                    fh.write(tar.extractfile(info).read())
+                os.chmod(path, info.mode & 0o777)
+                count += 1
+        log(f"[values_render] templates pulled from {host.ip}: {count} file(s) in {time.time() - t0:.1f}s")
+        perf_trace.record("template pull", t0, host=host.ip, bytes=len(r.stdout))
+
+
+def probe(host, server, args):
+    """One round trip: (template key or None, n3_pci, n6_pci, {relpath: sha256} on the CN)."""
+    q = shlex.quote
+    remote = "bash -s -- " + " ".join(q(a) for a in (args.build_path, args.ver, args.version,
+                                                       server.get("n3", ""), server.get("n6", "")))
+    r = host.run(remote, input=PROBE_SCRIPT.encode())
+    if r.returncode != 0:
+        err = r.stderr.decode(errors="replace").strip()
+        raise HostError(1, err.splitlines()[-1] if err else f"ssh rc={r.returncode}")
+    lines = r.stdout.decode(errors="replace").splitlines()
+    _, size, sha = lines[0].split()
+    _, n3, n6 = lines[1].split()
+    key = sha if sha != "-" else (f"{args.version}-{size}" if size != "-" else None)
+    hashes = {}
+    for line in lines[2:]:
+        digest, _, path = line.partition("  ")
+        if path:
+            hashes[path] = digest
+    return key, ("" if n3 == "-" else n3), ("" if n6 == "-" else n6), hashes
+
+
+def render_host(server, args, cache):
+    """Probe, render and push one CN. Returns (rc, log lines)."""
+    tag = f"[{args.kind}_config][{server['ip']}]"
+    out = [f"{tag} ▶ render"]
+    t0 = time.time()
+    host = CNHost(server["ip"], args.user, args.key, caller="values_render.py")
+    tree = None
+    try:
+        key, n3_pci, n6_pci, remote = probe(host, server, args)
+        tree, cached = cache.get(key, host, args)
+        if key is None:
+            out.append(f"{tag} ⚠️  no TRILLIUM tarball on the CN; rendering from its extracted tree")
+        files = kind_files(args.kind, tree)
+        values = {}
+        for rel in files:
+            with open(os.path.join(tree, rel), "rb") as fh:
+                data = fh.read()
+            info = tarfile.TarInfo(rel)
+            info.mode = os.stat(os.path.join(tree, rel)).st_mode & 0o777
+            values[rel] = ValuesFile(info, data, os.path.basename(rel) in nf_patch.VALUES and args.kind == "nf")
+        for name, op, n in nf_patch.apply_patches(values, patch_set(args.kind, server, files, args, n3_pci, n6_pci)):
+            if n:
+                out.append(f"{tag} {name}: {op} ({n} line(s) changed)")
+        stale = [f for rel, f in values.items()
+                 if remote.get(rel) != hashlib.sha256(f.text.encode("utf-8", "surrogateescape")).hexdigest()]
+        if args.dry_run:
+            for f in stale:
+                out += list(f.diff(server["ip"]))
+            out.append(f"{tag} dry run: {len(stale)}/{len(values)} file(s) would be pushed")
+        elif stale:
+            host.push(f"{args.build_path.rstrip('/')}/TRILLIUM_5GCN_CNF_REL_{args.ver}", stale)
+            out.append(f"{tag} pushed {len(stale)}/{len(values)} file(s): {', '.join(f.info.name for f in stale)}")
+        else:
+            out.append(f"{tag} {len(values)} file(s) already up to date, nothing pushed")
+        out.append(f"{tag} ◀ done in {time.time() - t0:.1f}s (templates {'cached' if cached else 'pulled'})")
+        return 0, out
+    except HostError as e:
+        out.append(f"{tag} ❌ {e}")
+        return e.rc, out
+    except (OSError, ValueError, IndexError, tarfile.TarError) as e:
+        out.append(f"{tag} ❌ {e}")
+        return 1, out
+    finally:
+        if tree and not tree.startswith(cache.dir):
+            shutil.rmtree(os.path.dirname(tree), ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Render NF/PS/CS values files locally, push only changed files")
+    ap.add_argument("--kind", required=True, choices=("nf", "ps", "cs"))
+    ap.add_argument("--server-file", required=True)
+    ap.add_argument("--build-path", required=True, help="NEW_BUILD_PATH")
+    ap.add_argument("--version", required=True, help="NEW_VERSION, e.g. 6.3.0_EA3")
+    ap.add_argument("--deployment-type", required=True, help="Low | Medium | High")
+    ap.add_argument("--user", default="root")
+    ap.add_argument("--key", required=True, help="CN ssh key")
+    ap.add_argument("--cache-dir", default=os.environ.get("VALUES_CACHE_DIR", "/var/tmp/k8s-installer-values-cache"))
+    ap.add_argument("--concurrency", type=int, default=int(os.environ.get("VALUES_RENDER_CONCURRENCY", "8")))
+    ap.add_argument("--dry-run", action="store_true", default=os.environ.get("VALUES_RENDER_DRY_RUN", "0") == "1",
+                    help="print the diff against the template, push nothing")
+    args = ap.parse_args()
+
+    args.ver = args.version.split("_", 1)[0]
+    args.capacity = capacity(args.deployment_type)
+    try:
+        servers = inventory.servers(args.server_file)
+    except (OSError, inventory.InventoryError) as e:
+        log(f"[values_render] ERROR: {args.server_file}: {e}")
+        return 2
+
+    t0 = time.time()
+    cache = TemplateCache(args.cache_dir, args.ver)
+    log(f"[values_render] {args.kind}: {len(servers)} host(s), {args.concurrency} at a time, "
+        f"VER={args.ver} CAP={args.capacity}" + (" (dry run)" if args.dry_run else ""))
+    def traced(server):
+        t1 = time.time()
+        rc, lines = render_host(server, args, cache)
+        perf_trace.record(f"render {args.kind}", t1, host=server["ip"], rc=rc)
+        return rc, lines
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = [pool.submit(traced, s) for s in servers]
+        results = []
+        for fut in futures:
+            rc, lines = fut.result()
+            log("\n".join(lines))
+            results.append(rc)
+    failed = [rc for rc in results if rc]
+    if failed:
+        log(f"[values_render] ❌ {len(failed)}/{len(results)} host(s) failed")
+        return failed[0]
+    log(f"[values_render] {args.kind}: all hosts rendered in {time.time() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())